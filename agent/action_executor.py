@@ -0,0 +1,304 @@
+"""
+Concurrent execution of containment actions across EDR and SOAR platforms.
+
+An action (isolate_host, block_ip, disable_user, ...) against many targets is
+split into platform-sized batches that run with bounded parallelism. Every
+target carries an idempotency key, so retried or double-clicked actions never
+re-run targets that already succeeded or are still in flight, and progress is
+reported after each batch. A success is reused only until the opposite action
+(release after isolate, ...) succeeds on the target, or ``completed_ttl`` passes.
+"""
+import asyncio
+import hashlib
+import json
+import logging
+import time
+import uuid
+from typing import Awaitable, Callable, Dict, Iterable, List, Optional
+
+from caching import LRUCache
+from handlers.api import chunked
+
+# action kind -> (platform type, how the handler performs it)
+ACTION_ROUTES = {
+    "isolate_host": ("edr", "isolate"),
+    "release_host": ("edr", "release"),
+    "block_ip": ("soar", "execute"),
+    "unblock_ip": ("soar", "execute"),
+    "block_domain": ("soar", "execute"),
+    "disable_user": ("soar", "execute"),
+    "enable_user": ("soar", "execute"),
+    "quarantine_file": ("soar", "execute"),
+    "run_playbook": ("soar", "playbook")
+}
+
+# Actions that undo containment don't count as mitigations
+REVERSALS = {"release_host", "unblock_ip", "enable_user"}
+
+# A success of one of these makes an earlier success of the other stale
+OPPOSITES = {"isolate_host": "release_host", "block_ip": "unblock_ip", "disable_user": "enable_user"}
+OPPOSITES.update({undo: do for do, undo in list(OPPOSITES.items())})
+
+PENDING = "pending"
+RUNNING = "running"
+SUCCEEDED = "succeeded"
+FAILED = "failed"
+
+
+def idempotency_key(kind: str, target: str, parameters: Optional[Dict] = None) -> str:
+    payload = json.dumps([kind, target, parameters or {}], sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()[:24]
+
+
+class ActionPlan:
+    """A containment step proposed by Gaius or submitted by an operator"""
+    def __init__(self, action_id: str, kind: str, targets: Iterable[str], description: str = "",
+                 parameters: Optional[Dict] = None, platform: Optional[str] = None):
+        if kind not in ACTION_ROUTES:
+            raise ValueError(f"Unknown action: {kind}")
+        if isinstance(targets, (str, bytes, dict)) or not all(isinstance(target, str) for target in targets):
+            raise ValueError("targets must be a list of strings")
+        if parameters is not None and not isinstance(parameters, dict):
+            raise ValueError("parameters must be an object")
+        self.action_id = action_id
+        self.kind = kind
+        self.targets = list(dict.fromkeys(targets))
+        self.description = description or f"{kind.replace('_', ' ')} on {len(self.targets)} target(s)"
+        self.parameters = parameters or {}
+        self.platform = platform
+
+    def to_dict(self) -> Dict:
+        return {
+            "id": self.action_id,
+            "action": self.kind,
+            "description": self.description,
+            "targets": len(self.targets),
+            "platform": self.platform
+        }
+
+
+class ActionRun:
+    """Per-target state of one execution of a plan"""
+    def __init__(self, plan: ActionPlan):
+        self.plan = plan
+        self.status = PENDING
+        self.targets: Dict[str, str] = dict.fromkeys(plan.targets, PENDING)
+        self.errors: Dict[str, str] = {}
+        self.reused = 0
+        self.started = time.time()
+        self.finished: Optional[float] = None
+        self.reported = 0.0
+        self.task: Optional[asyncio.Task] = None
+
+    def counts(self) -> Dict[str, int]:
+        counts = {PENDING: 0, RUNNING: 0, SUCCEEDED: 0, FAILED: 0}
+        for state in self.targets.values():
+            counts[state] += 1
+        return counts
+
+    def to_dict(self, detail: bool = False) -> Dict:
+        counts = self.counts()
+        summary = {
+            **self.plan.to_dict(),
+            "status": self.status,
+            "progress": round((counts[SUCCEEDED] + counts[FAILED]) / max(1, len(self.targets)), 3),
+            **counts,
+            "reused": self.reused,
+            "elapsed": round((self.finished or time.time()) - self.started, 3),
+            "failures": dict(list(self.errors.items())[:20])
+        }
+        if detail:
+            summary["target_status"] = dict(self.targets)
+            summary["idempotency_keys"] = {
+                target: idempotency_key(self.plan.kind, target, self.plan.parameters) for target in self.targets
+            }
+        return summary
+
+
+class ActionExecutor:
+    """
+    Runs action plans against the handlers registered in
+    ``gaius.security_integrations``. Batches from all running plans share one
+    concurrency limit so a large isolation can't starve the platforms.
+    """
+    def __init__(self, gaius, on_progress: Optional[Callable[[Dict], Awaitable]] = None,
+                 max_concurrency: int = 16, progress_interval: float = 0.25,
+                 on_mitigated: Optional[Callable[[int, List[str]], None]] = None, completed_ttl: float = 900.0):
+        self.gaius = gaius
+        self.on_progress = on_progress
+        self.on_mitigated = on_mitigated
+        self.progress_interval = progress_interval
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self.plans: Dict[str, ActionPlan] = {}
+        self.runs: Dict[str, ActionRun] = {}
+        self._request_runs = LRUCache(maxsize=1024)   # Idempotency-Key header -> action id
+        # (kind, target) -> (idempotency key, platform, monotonic time) of the last success
+        self._completed = LRUCache(maxsize=100000)
+        self.completed_ttl = completed_ttl
+        self._inflight: Dict[str, asyncio.Future] = {}
+
+    def propose(self, kind: str, targets: Iterable[str], description: str = "",
+                parameters: Optional[Dict] = None, platform: Optional[str] = None,
+                action_id: Optional[str] = None) -> ActionPlan:
+        plan = ActionPlan(action_id or uuid.uuid4().hex[:12], kind, targets, description, parameters, platform)
+        self.plans[plan.action_id] = plan
+        return plan
+
+    def proposals(self) -> List[Dict]:
+        """Plans that have not been executed yet"""
+        return [plan.to_dict() for action_id, plan in self.plans.items() if action_id not in self.runs]
+
+    def start(self, action_id: str, request_key: Optional[str] = None) -> ActionRun:
+        """Begin executing a plan in the background and return its run immediately"""
+        if request_key is not None:
+            previous = self._request_runs.get(request_key)
+            if previous in self.runs:
+                return self.runs[previous]
+        plan = self.plans.get(action_id)
+        if plan is None:
+            raise KeyError(action_id)
+        run = self.runs.get(action_id)
+        if run is None or (run.status != RUNNING and (run.plan is not plan or run.counts()[FAILED])):
+            # A finished run is re-executed for a revised plan or to retry failed targets
+            run = self.runs[action_id] = ActionRun(plan)
+            run.task = asyncio.create_task(self._execute(run))
+        if request_key is not None:
+            self._request_runs.put(request_key, action_id)
+        return run
+
+    async def execute(self, action_id: str) -> ActionRun:
+        run = self.start(action_id)
+        if run.task is not None:
+            await asyncio.shield(run.task)
+        return run
+
+    async def _execute(self, run: ActionRun):
+        plan = run.plan
+        run.status = RUNNING
+        try:
+            handlers = self._handlers_for(plan)
+            if not handlers:
+                platform = plan.platform or f"{ACTION_ROUTES[plan.kind][0]} platform"
+                self._fail(run, plan.targets, f"no connected {platform}")
+                return
+
+            pending, waits = [], []
+            for target in plan.targets:
+                key = idempotency_key(plan.kind, target, plan.parameters)
+                if self._already_done(plan.kind, target, key):
+                    run.targets[target] = SUCCEEDED
+                    run.reused += 1
+                elif key in self._inflight:
+                    waits.append(self._await_other_run(run, target, self._inflight[key]))
+                else:
+                    self._inflight[key] = asyncio.get_running_loop().create_future()
+                    pending.append(target)
+
+            name, handler = handlers[0]
+            batch_size = getattr(handler, "batch_size", 50)
+            await asyncio.gather(
+                *(self._run_batch(run, name, handler, batch) for batch in chunked(pending, batch_size)),
+                *waits
+            )
+        except Exception as e:
+            logging.error(f"Action {plan.action_id} failed: {e}")
+            self._fail(run, [t for t, state in run.targets.items() if state in (PENDING, RUNNING)], str(e))
+        finally:
+            counts = run.counts()
+            run.status = FAILED if counts[FAILED] and not counts[SUCCEEDED] else SUCCEEDED
+            run.finished = time.time()
+            await self._report(run, force=True)
+
+    def _handlers_for(self, plan: ActionPlan) -> List:
+        platform_type = ACTION_ROUTES[plan.kind][0]
+        integration = self.gaius.security_integrations[platform_type]
+        return [
+            (name, handler) for name, handler in integration["data_handlers"].items()
+            if integration["connection_status"].get(name) == "connected"
+            and (plan.platform is None or plan.platform == name)
+        ]
+
+    async def _run_batch(self, run: ActionRun, platform: str, handler, batch: List[str]):
+        plan = run.plan
+        mode = ACTION_ROUTES[plan.kind][1]
+        async with self._semaphore:
+            for target in batch:
+                run.targets[target] = RUNNING
+            try:
+                if mode in ("isolate", "release"):
+                    accepted = await handler.isolate_hosts(batch, release=mode == "release")
+                elif mode == "playbook":
+                    results = await asyncio.gather(*(
+                        handler.run_playbook(plan.parameters.get("playbook"), target, plan.parameters.get("inputs"))
+                        for target in batch
+                    ), return_exceptions=True)
+                    accepted = {target: not isinstance(result, Exception) for target, result in zip(batch, results)}
+                else:
+                    accepted = await handler.execute_action(plan.kind, batch, plan.parameters)
+            except Exception as e:
+                logging.error(f"{platform} {plan.kind} batch failed: {e}")
+                accepted, error = {}, str(e)
+            else:
+                error = f"rejected by {platform}"
+
+        succeeded = []
+        for target in batch:
+            key = idempotency_key(plan.kind, target, plan.parameters)
+            ok = bool(accepted.get(target))
+            if ok:
+                succeeded.append(target)
+            run.targets[target] = SUCCEEDED if ok else FAILED
+            if ok:
+                self._completed.put((plan.kind, target), (key, platform, time.monotonic()))
+                self._completed.invalidate((OPPOSITES.get(plan.kind), target))
+            else:
+                run.errors[target] = error
+            future = self._inflight.pop(key, None)
+            if future is not None and not future.done():
+                future.set_result(ok)
+        if succeeded and self.on_mitigated is not None and plan.kind not in REVERSALS:
+            self.on_mitigated(len(succeeded), succeeded)
+        await self._report(run)
+
+    def _already_done(self, kind: str, target: str, key: str) -> bool:
+        """Whether this exact action last succeeded on the target recently and was not undone since"""
+        done = self._completed.get((kind, target))
+        return done is not None and done[0] == key and time.monotonic() - done[2] < self.completed_ttl
+
+    async def _await_other_run(self, run: ActionRun, target: str, future: asyncio.Future):
+        run.targets[target] = RUNNING
+        ok = await asyncio.shield(future)
+        run.targets[target] = SUCCEEDED if ok else FAILED
+        if ok:
+            run.reused += 1
+        else:
+            run.errors[target] = "failed in concurrent run"
+
+    def _fail(self, run: ActionRun, targets: List[str], error: str):
+        for target in targets:
+            run.targets[target] = FAILED
+            run.errors[target] = error
+            future = self._inflight.pop(idempotency_key(run.plan.kind, target, run.plan.parameters), None)
+            if future is not None and not future.done():
+                future.set_result(False)
+
+    async def _report(self, run: ActionRun, force: bool = False):
+        if self.on_progress is None:
+            return
+        now = time.monotonic()
+        if not force and now - run.reported < self.progress_interval:
+            return
+        run.reported = now
+        try:
+            await self.on_progress(run.to_dict())
+        except Exception as e:
+            logging.error(f"Error reporting action progress: {e}")
+
+    def snapshot(self) -> Dict:
+        statuses = [run.status for run in self.runs.values()]
+        return {
+            "proposed": len(self.plans),
+            "running": statuses.count(RUNNING),
+            "completed_targets": len(self._completed),
+            "inflight_targets": len(self._inflight)
+        }
@@ -0,0 +1,350 @@
+"""
+Compact struct-of-arrays representation for IDS alerts.
+
+Each column is a typed ``array`` exposed through a ``memoryview`` so slices share
+the underlying buffers. Alerts only become dictionaries at the API edge via
+``AlertBatch.to_dicts``.
+"""
+import ipaddress
+import operator
+import sys
+import threading
+from array import array
+from datetime import datetime, timezone
+from functools import lru_cache
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+SEVERITY_LEVELS = ("info", "low", "medium", "high", "critical")
+SEVERITY_CODES = {name: code for code, name in enumerate(SEVERITY_LEVELS)}
+
+# Suricata/Snort priorities run from 1 (most severe) downwards
+IDS_PRIORITY_SEVERITY = {1: SEVERITY_CODES["high"], 2: SEVERITY_CODES["medium"], 3: SEVERITY_CODES["low"]}
+
+PROTOCOL_NUMBERS = {"icmp": 1, "tcp": 6, "udp": 17, "ipv6-icmp": 58, "sctp": 132}
+PROTOCOL_NAMES = {number: name for name, number in PROTOCOL_NUMBERS.items()}
+
+_IPV4_MAPPED_PREFIX = 0xFFFF00000000
+_LOW_64 = (1 << 64) - 1
+
+# Column name -> array typecode
+COLUMNS = {
+    "timestamp": "d",
+    "src_hi": "Q",
+    "src_lo": "Q",
+    "dst_hi": "Q",
+    "dst_lo": "Q",
+    "src_port": "H",
+    "dst_port": "H",
+    "proto": "B",
+    "severity": "B",
+    "signature": "I",
+    "sid": "I",
+    "sensor": "I"
+}
+
+
+@lru_cache(maxsize=65536)
+def pack_ip(address: str) -> Tuple[int, int]:
+    """Pack an IPv4/IPv6 address into two 64-bit halves; IPv4 is stored IPv4-mapped"""
+    if not address:
+        return 0, 0
+    ip = ipaddress.ip_address(address)
+    value = int(ip)
+    if ip.version == 4:
+        value |= _IPV4_MAPPED_PREFIX
+    return value >> 64, value & _LOW_64
+
+
+def parse_timestamp(value) -> float:
+    """
+    Epoch seconds from an epoch number (or its string form, as Zeek writes it)
+    or an ISO-8601 timestamp, as EVE writes it; ISO without an offset is taken as UTC
+    """
+    if not value:
+        return 0.0
+    if not isinstance(value, str):
+        return float(value)
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    parsed = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed.timestamp()
+
+
+def _unsigned(value, limit: int, what: str) -> int:
+    """An integer field as stored in its column; TypeError/OverflowError like array.append would raise"""
+    value = operator.index(value or 0)
+    if not 0 <= value <= limit:
+        raise OverflowError(f"{what} {value} out of range")
+    return value
+
+
+def unpack_ip(hi: int, lo: int) -> Optional[str]:
+    if hi == 0 and lo == 0:
+        return None
+    if hi == 0 and (lo >> 32) == 0xFFFF:
+        return str(ipaddress.IPv4Address(lo & 0xFFFFFFFF))
+    return str(ipaddress.IPv6Address((hi << 64) | lo))
+
+
+class StringTable:
+    """Interns repeated strings (signatures, sensor names) to small integer ids"""
+    def __init__(self):
+        self._ids: Dict[str, int] = {"": 0}
+        self._values: List[str] = [""]
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._values)
+
+    def intern(self, value: Optional[str]) -> int:
+        if not value:
+            return 0
+        try:
+            return self._ids[value]
+        except KeyError:
+            # Sensor parsers intern from worker threads; only a miss takes the lock
+            with self._lock:
+                ident = self._ids.get(value)
+                if ident is None:
+                    ident = len(self._values)
+                    # Published only once lookup(ident) works
+                    self._values.append(value)
+                    self._ids[value] = ident
+                return ident
+
+    def lookup(self, ident: int) -> str:
+        return self._values[ident]
+
+    def find(self, value: str) -> Optional[int]:
+        return self._ids.get(value)
+
+
+class AlertBatch:
+    """Immutable batch of alerts stored column-wise"""
+    def __init__(self, columns: Dict[str, memoryview], signatures: StringTable, sensors: StringTable):
+        self.columns = columns
+        self.signatures = signatures
+        self.sensors = sensors
+        self._length = len(columns["timestamp"])
+
+    @classmethod
+    def empty(cls, signatures: Optional[StringTable] = None,
+              sensors: Optional[StringTable] = None) -> "AlertBatch":
+        return AlertBatchBuilder(signatures, sensors).build()
+
+    @classmethod
+    def from_arrays(cls, arrays: Dict[str, array], signatures: StringTable,
+                    sensors: StringTable) -> "AlertBatch":
+        return cls({name: memoryview(arrays[name]) for name in COLUMNS}, signatures, sensors)
+
+    def __len__(self) -> int:
+        return self._length
+
+    def __iter__(self) -> Iterator[Dict]:
+        for index in range(self._length):
+            yield self._row(index)
+
+    def __getitem__(self, key):
+        if isinstance(key, slice):
+            if key.step not in (None, 1):
+                return self.take(range(*key.indices(self._length)))
+            # memoryview slicing shares the underlying buffers
+            return AlertBatch(
+                {name: view[key] for name, view in self.columns.items()},
+                self.signatures,
+                self.sensors
+            )
+        if key < 0:
+            key += self._length
+        if not 0 <= key < self._length:
+            raise IndexError("alert index out of range")
+        return self._row(key)
+
+    def column(self, name: str) -> memoryview:
+        return self.columns[name]
+
+    def take(self, indices: Iterable[int]) -> "AlertBatch":
+        """Gather the given rows into a new batch"""
+        indices = indices if isinstance(indices, (array, range, list)) else list(indices)
+        arrays = {}
+        for name, typecode in COLUMNS.items():
+            view = self.columns[name]
+            arrays[name] = array(typecode, [view[i] for i in indices])
+        return AlertBatch.from_arrays(arrays, self.signatures, self.sensors)
+
+    def select(self, column: str, predicate: Callable[[int], bool]) -> array:
+        """Indices of rows whose column value satisfies predicate"""
+        return array("I", [i for i, value in enumerate(self.columns[column]) if predicate(value)])
+
+    def filter(self, column: str, predicate: Callable[[int], bool]) -> "AlertBatch":
+        return self.take(self.select(column, predicate))
+
+    def with_min_severity(self, level: str) -> "AlertBatch":
+        threshold = SEVERITY_CODES[level]
+        return self.filter("severity", lambda value: value >= threshold)
+
+    def with_signature(self, signature: str) -> "AlertBatch":
+        ident = self.signatures.find(signature)
+        if ident is None:
+            return self[0:0]
+        return self.filter("signature", lambda value: value == ident)
+
+    def with_sids(self, sids) -> "AlertBatch":
+        sids = set(sids)
+        return self.filter("sid", lambda value: value in sids)
+
+    def severity_counts(self) -> Dict[str, int]:
+        counts = [0] * len(SEVERITY_LEVELS)
+        for value in self.columns["severity"]:
+            counts[value] += 1
+        return dict(zip(SEVERITY_LEVELS, counts))
+
+    def nbytes(self) -> int:
+        return sum(view.nbytes for view in self.columns.values())
+
+    def to_dicts(self) -> List[Dict]:
+        """Materialize JSON-ready rows; intended for the API edge only"""
+        return [self._row(index) for index in range(self._length)]
+
+    def _row(self, index: int) -> Dict:
+        c = self.columns
+        return {
+            "timestamp": datetime.fromtimestamp(c["timestamp"][index], timezone.utc).isoformat(),
+            "src_ip": unpack_ip(c["src_hi"][index], c["src_lo"][index]),
+            "dst_ip": unpack_ip(c["dst_hi"][index], c["dst_lo"][index]),
+            "src_port": c["src_port"][index],
+            "dst_port": c["dst_port"][index],
+            "proto": PROTOCOL_NAMES.get(c["proto"][index], str(c["proto"][index])),
+            "severity": SEVERITY_LEVELS[c["severity"][index]],
+            "signature": self.signatures.lookup(c["signature"][index]),
+            "sid": c["sid"][index],
+            "sensor": self.sensors.lookup(c["sensor"][index])
+        }
+
+    @staticmethod
+    def concat(batches: Sequence["AlertBatch"]) -> "AlertBatch":
+        if not batches:
+            return AlertBatch.empty()
+        first = batches[0]
+        arrays = {name: array(typecode) for name, typecode in COLUMNS.items()}
+        for batch in batches:
+            if batch.signatures is not first.signatures or batch.sensors is not first.sensors:
+                raise ValueError("Cannot concatenate batches with different intern tables")
+            for name, column in arrays.items():
+                column.frombytes(batch.columns[name].tobytes())
+        return AlertBatch.from_arrays(arrays, first.signatures, first.sensors)
+
+
+class AlertBatchBuilder:
+    """Accumulates alerts column-wise and freezes them into an AlertBatch"""
+    def __init__(self, signatures: Optional[StringTable] = None, sensors: Optional[StringTable] = None):
+        self.signatures = signatures if signatures is not None else StringTable()
+        self.sensors = sensors if sensors is not None else StringTable()
+        self._arrays = {name: array(typecode) for name, typecode in COLUMNS.items()}
+        # EVE events skipped for an unparseable address, timestamp or out-of-range field
+        self.rejected = 0
+
+    def __len__(self) -> int:
+        return len(self._arrays["timestamp"])
+
+    def append(self, timestamp: float, src_ip: str, dst_ip: str, src_port: int = 0,
+               dst_port: int = 0, proto: str = "", severity: str = "info",
+               signature: str = "", sensor: str = "", sid: int = 0):
+        # Every field is converted before any column grows, so a bad row leaves them all aligned
+        row = (float(timestamp), *pack_ip(src_ip), *pack_ip(dst_ip),
+               _unsigned(src_port, 0xFFFF, "port"), _unsigned(dst_port, 0xFFFF, "port"),
+               PROTOCOL_NUMBERS.get((proto or "").lower(), 0), SEVERITY_CODES.get(severity, 0),
+               self.signatures.intern(signature), _unsigned(sid, 0xFFFFFFFF, "sid"), self.sensors.intern(sensor))
+        for column, value in zip(self._arrays.values(), row):
+            column.append(value)
+
+    def append_eve(self, event: Dict, sensor: str = "") -> bool:
+        """
+        Append a Suricata EVE ``alert`` event. Events with an invalid address,
+        timestamp, port or sid are skipped and counted in ``rejected``; returns whether it was kept
+        """
+        alert = event.get("alert", {})
+        try:
+            timestamp = parse_timestamp(event.get("timestamp"))
+            self.append(
+                timestamp,
+                event.get("src_ip", ""),
+                event.get("dest_ip", ""),
+                event.get("src_port", 0),
+                event.get("dest_port", 0),
+                event.get("proto", ""),
+                SEVERITY_LEVELS[IDS_PRIORITY_SEVERITY.get(alert.get("severity"), 0)],
+                alert.get("signature", ""),
+                sensor or event.get("host", ""),
+                alert.get("signature_id", 0)
+            )
+        except (TypeError, ValueError, OverflowError):
+            self.rejected += 1
+            return False
+        return True
+
+    def build(self) -> AlertBatch:
+        arrays = self._arrays
+        self._arrays = {name: array(typecode) for name, typecode in COLUMNS.items()}
+        return AlertBatch.from_arrays(arrays, self.signatures, self.sensors)
+
+
+def benchmark_memory(count: int = 1_000_000) -> Dict[str, float]:
+    """Compare resident size of ``count`` alerts as dicts versus an AlertBatch"""
+    import gc
+    import tracemalloc
+
+    def synthetic() -> Iterator[Tuple]:
+        base = datetime.now().timestamp()
+        for i in range(count):
+            yield (
+                base + i * 0.001,
+                f"10.{(i >> 16) & 255}.{(i >> 8) & 255}.{i & 255}",
+                f"192.168.{(i >> 8) & 15}.{i & 255}",
+                1024 + i % 60000,
+                (80, 443, 22, 53)[i % 4],
+                ("tcp", "udp")[i % 2],
+                SEVERITY_LEVELS[i % 4],
+                f"ET POLICY signature {i % 500}",
+                f"sensor-{i % 12}"
+            )
+
+    fields = ("timestamp", "src_ip", "dst_ip", "src_port", "dst_port",
+              "proto", "severity", "signature", "sensor")
+
+    gc.collect()
+    tracemalloc.start()
+    as_dicts = [dict(zip(fields, row)) for row in synthetic()]
+    dict_bytes = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del as_dicts
+    pack_ip.cache_clear()
+
+    gc.collect()
+    tracemalloc.start()
+    builder = AlertBatchBuilder()
+    for row in synthetic():
+        builder.append(*row)
+    pack_ip.cache_clear()
+    batch = builder.build()
+    gc.collect()
+    batch_bytes = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+
+    return {
+        "alerts": count,
+        "dict_bytes_per_alert": dict_bytes / count,
+        "batch_bytes_per_alert": batch_bytes / count,
+        "column_bytes_per_alert": batch.nbytes() / count,
+        "ratio": dict_bytes / max(batch_bytes, 1)
+    }
+
+
+if __name__ == "__main__":
+    results = benchmark_memory(int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000)
+    for key, value in results.items():
+        print(f"{key}: {value:,.1f}" if isinstance(value, float) else f"{key}: {value:,}")
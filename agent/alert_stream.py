@@ -0,0 +1,210 @@
+"""
+Live alert fan-out for /ws/alerts subscribers.
+
+Publishing never blocks ingestion: each subscriber gets the rows matching its
+precompiled filter appended to a bounded buffer, and overload is absorbed by
+the subscriber's drop/sample policy. Rows become dicts only when a
+subscriber's sender task drains its buffer.
+"""
+import asyncio
+import math
+from array import array
+from collections import deque
+from typing import Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+from alert_batch import AlertBatch, SEVERITY_CODES
+from zone_index import NO_ZONE, ZoneIndex
+
+POLICIES = ("drop_oldest", "drop_newest", "sample")
+
+
+class AlertFilter:
+    """
+    Server-side filter over severity, sector, sensor and signature.
+    Names are resolved to interned/zone ids once and re-resolved only when the
+    intern tables or zone index change.
+    """
+    def __init__(self, min_severity: Optional[str] = None, sectors: Iterable[str] = (),
+                 sensors: Iterable[str] = (), signatures: Iterable[str] = ()):
+        if min_severity is not None and min_severity not in SEVERITY_CODES:
+            raise ValueError(f"Unknown severity: {min_severity}")
+        self.min_severity = SEVERITY_CODES[min_severity] if min_severity else 0
+        self.sectors = {sector.lower() for sector in sectors}
+        self.sensors = set(sensors)
+        self.signatures = set(signatures)
+        self._resolved_for: Optional[Tuple] = None
+        self._tests: List[Tuple[str, Callable[[int], bool]]] = []
+
+    @classmethod
+    def from_query(cls, params) -> "AlertFilter":
+        def split(name: str) -> List[str]:
+            return [value.strip() for value in (params.get(name) or "").split(",") if value.strip()]
+        return cls(
+            min_severity=params.get("severity") or None,
+            sectors=split("sector"),
+            sensors=split("sensor"),
+            signatures=split("signature")
+        )
+
+    def _compile(self, batch: AlertBatch, zone_index: Optional[ZoneIndex]):
+        key = (id(batch.signatures), len(batch.signatures), id(batch.sensors),
+               len(batch.sensors), id(zone_index))
+        if key == self._resolved_for:
+            return
+        tests: List[Tuple[str, Callable[[int], bool]]] = []
+        if self.min_severity:
+            threshold = self.min_severity
+            tests.append(("severity", lambda value: value >= threshold))
+        if self.signatures:
+            ids = _resolve(batch.signatures.find, self.signatures)
+            tests.append(("signature", ids.__contains__))
+        if self.sensors:
+            ids = _resolve(batch.sensors.find, self.sensors)
+            tests.append(("sensor", ids.__contains__))
+        if self.sectors:
+            zones = zone_index.zones if zone_index is not None else []
+            ids = frozenset(zone_id for zone_id, zone in enumerate(zones) if zone.sector.lower() in self.sectors)
+            if "general defense" in self.sectors:
+                ids = ids | {NO_ZONE}
+            tests.append(("zone", ids.__contains__))
+        self._tests = tests
+        self._resolved_for = key
+
+    def select(self, batch: AlertBatch, zone_ids: Optional[array] = None,
+               zone_index: Optional[ZoneIndex] = None) -> Iterable[int]:
+        """Indices of matching rows, narrowing column by column"""
+        self._compile(batch, zone_index)
+        indices: Iterable[int] = range(len(batch))
+        for column_name, test in self._tests:
+            if column_name == "zone":
+                column = zone_ids if zone_ids is not None else array("i", [NO_ZONE]) * len(batch)
+            else:
+                column = batch.columns[column_name]
+            if isinstance(indices, range):
+                indices = [i for i, value in enumerate(column) if test(value)]
+            else:
+                indices = [i for i in indices if test(column[i])]
+        return indices
+
+
+def _resolve(find: Callable[[str], Optional[int]], names: Set[str]) -> frozenset:
+    return frozenset(ident for ident in (find(name) for name in names) if ident is not None)
+
+
+class AlertSubscription:
+    """
+    Bounded per-client buffer of (batch, row indices) chunks. Kept rows are
+    copied out so a slow client never pins whole published batches
+    """
+    def __init__(self, alert_filter: AlertFilter, capacity: int = 5000, policy: str = "drop_oldest"):
+        if policy not in POLICIES:
+            raise ValueError(f"Unknown overload policy: {policy}")
+        self.filter = alert_filter
+        self.capacity = max(1, capacity)
+        self.policy = policy
+        self.ready = asyncio.Event()
+        self._chunks = deque()
+        self.size = 0
+        self.counters = {"matched": 0, "delivered": 0, "dropped": 0, "sampled_out": 0}
+        self._unreported_loss = 0
+
+    def offer(self, batch: AlertBatch, indices):
+        count = len(indices)
+        if not count:
+            return
+        self.counters["matched"] += count
+        free = self.capacity - self.size
+        if count > free:
+            indices = self._shed(indices, free)
+        if len(indices):
+            kept = AlertBatch.concat([batch]) if len(indices) == len(batch) else batch.take(indices)
+            self._chunks.append((kept, range(len(kept))))
+            self.size += len(indices)
+        self.ready.set()
+
+    def _shed(self, indices, free: int):
+        count = len(indices)
+        if self.policy == "drop_newest":
+            kept = indices[:max(free, 0)]
+            self._lose("dropped", count - len(kept))
+            return kept
+        if self.policy == "sample":
+            if free <= 0:
+                self._lose("sampled_out", count)
+                return []
+            kept = indices[::math.ceil(count / free)]
+            self._lose("sampled_out", count - len(kept))
+            return kept
+        # drop_oldest: evict buffered rows to make room for the newest
+        if count >= self.capacity:
+            self._lose("dropped", self.size + count - self.capacity)
+            self._chunks.clear()
+            self.size = 0
+            return indices[count - self.capacity:]
+        needed = count - free
+        while needed > 0 and self._chunks:
+            batch, buffered = self._chunks[0]
+            if len(buffered) <= needed:
+                self._chunks.popleft()
+                needed -= len(buffered)
+                self.size -= len(buffered)
+                self._lose("dropped", len(buffered))
+            else:
+                self._chunks[0] = (batch, buffered[needed:])
+                self.size -= needed
+                self._lose("dropped", needed)
+                needed = 0
+        return indices
+
+    def _lose(self, counter: str, count: int):
+        self.counters[counter] += count
+        self._unreported_loss += count
+
+    def drain(self, limit: int = 500) -> Tuple[List[Dict], int]:
+        """Up to ``limit`` buffered rows as dicts, plus alerts lost since the last drain"""
+        rows: List[Dict] = []
+        while self._chunks and len(rows) < limit:
+            batch, indices = self._chunks.popleft()
+            room = limit - len(rows)
+            if len(indices) > room:
+                self._chunks.appendleft((batch, indices[room:]))
+                indices = indices[:room]
+            rows.extend(batch[i] for i in indices)
+            self.size -= len(indices)
+        if not self._chunks:
+            self.ready.clear()
+        lost, self._unreported_loss = self._unreported_loss, 0
+        self.counters["delivered"] += len(rows)
+        return rows, lost
+
+
+class AlertBroadcaster:
+    """Matches each ingested batch against every subscription without awaiting"""
+    def __init__(self):
+        self.subscriptions: Set[AlertSubscription] = set()
+        self.published = 0
+
+    def subscribe(self, alert_filter: AlertFilter, capacity: int = 5000,
+                  policy: str = "drop_oldest") -> AlertSubscription:
+        subscription = AlertSubscription(alert_filter, capacity, policy)
+        self.subscriptions.add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: AlertSubscription):
+        self.subscriptions.discard(subscription)
+
+    def publish(self, batch: AlertBatch, zone_ids: Optional[array] = None,
+                zone_index: Optional[ZoneIndex] = None):
+        self.published += len(batch)
+        if not len(batch):
+            return
+        for subscription in list(self.subscriptions):
+            subscription.offer(batch, subscription.filter.select(batch, zone_ids, zone_index))
+
+    def stats(self) -> Dict:
+        return {
+            "published": self.published,
+            "subscribers": len(self.subscriptions),
+            "buffered": sum(subscription.size for subscription in self.subscriptions),
+            "dropped": sum(s.counters["dropped"] + s.counters["sampled_out"] for s in self.subscriptions)
+        }
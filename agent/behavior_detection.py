@@ -0,0 +1,366 @@
+"""
+Behavioral detection over connection records: beaconing and lateral movement.
+
+BehaviorDetector consumes FlowBatches (Zeek conn logs, NetFlow/IPFIX, PCAP
+flows). Its state stays bounded however many connection pairs go past:
+
+- Every (src, dst, dst_port) pair is counted in a Count-Min sketch. A pair
+  only gets per-pair state once the sketch has seen it ``admit_after``
+  times, so the long tail of one-off connections allocates nothing.
+- Tracked pairs keep an exact count and their last ``max_samples`` start
+  times, in an LRU table of at most ``max_pairs`` entries. Periodicity is
+  scored from those samples using the gap and spectral statistics in
+  flow_analytics.
+- Internal sources that reach internal hosts on administration ports (SMB,
+  RPC, RDP, SSH, WinRM) get a HyperLogLog of distinct destinations per
+  ``window``. A source whose fan-out reaches ``fanout_threshold`` is a
+  lateral-movement candidate, and a small sample of its edges forms the
+  fan-out graph.
+
+Time comes from the connection records themselves, so a replayed log and a
+live feed give the same findings. Batches are folded in with C-level
+Counter passes; Python-level work is per distinct pair, not per row.
+"""
+import ipaddress
+import math
+import threading
+import time
+from array import array
+from collections import Counter, OrderedDict, deque
+from functools import lru_cache
+from itertools import compress, repeat
+from operator import itemgetter
+from typing import Dict, List, Optional, Tuple
+
+from alert_batch import unpack_ip
+from flow_analytics import FlowAnalytics, FlowBatch
+
+_LOW_64 = (1 << 64) - 1
+
+# SSH, MS-RPC, NetBIOS session, SMB, RDP, WinRM
+LATERAL_PORTS = frozenset({22, 135, 139, 445, 3389, 5985, 5986})
+
+
+def _mix(value: int) -> int:
+    """SplitMix64 finalizer: spreads Python's hash of small ints across all 64 bits"""
+    value = ((value ^ (value >> 30)) * 0xBF58476D1CE4E5B9) & _LOW_64
+    value = ((value ^ (value >> 27)) * 0x94D049BB133111EB) & _LOW_64
+    return value ^ (value >> 31)
+
+
+@lru_cache(maxsize=65536)
+def _is_internal(hi: int, lo: int) -> bool:
+    if hi == 0 and (lo >> 32) == 0xFFFF:
+        return ipaddress.IPv4Address(lo & 0xFFFFFFFF).is_private
+    return ipaddress.IPv6Address((hi << 64) | lo).is_private
+
+
+class CountMinSketch:
+    """
+    Approximate counts in depth x width saturating counters. Estimates never
+    fall below the true count. Conservative update (raise only the counters
+    below the new minimum) keeps collisions from inflating them much.
+    """
+    def __init__(self, width: int = 1 << 20, depth: int = 4):
+        self.width = width
+        self.rows = [array("H", bytes(2 * width)) for _ in range(depth)]
+
+    def _indexes(self, key) -> List[int]:
+        value = _mix(hash(key) & _LOW_64)
+        # Double hashing: row i probes h1 + i * h2
+        first, step = value & 0xFFFFFFFF, (value >> 32) | 1
+        return [(first + row * step) % self.width for row in range(len(self.rows))]
+
+    def add(self, key, count: int = 1) -> int:
+        """Count ``key`` and return its new estimate"""
+        indexes = self._indexes(key)
+        estimate = min(min(row[index] for row, index in zip(self.rows, indexes)) + count, 0xFFFF)
+        for row, index in zip(self.rows, indexes):
+            if row[index] < estimate:
+                row[index] = estimate
+        return estimate
+
+    def decay(self):
+        """Halve every counter so that old traffic fades out"""
+        self.rows = [array("H", map(int.__rshift__, row, repeat(1))) for row in self.rows]
+
+
+class HyperLogLog:
+    """Distinct-count estimate in 2**precision one-byte registers"""
+    def __init__(self, precision: int = 7):
+        self.precision = precision
+        self.registers = bytearray(1 << precision)
+
+    def add(self, item):
+        value = _mix(hash(item) & _LOW_64)
+        index = value & (len(self.registers) - 1)
+        rank = 64 - self.precision - (value >> self.precision).bit_length() + 1
+        if rank > self.registers[index]:
+            self.registers[index] = rank
+
+    def merge(self, other: "HyperLogLog") -> "HyperLogLog":
+        merged = HyperLogLog(self.precision)
+        merged.registers = bytearray(map(max, self.registers, other.registers))
+        return merged
+
+    def count(self) -> int:
+        size = len(self.registers)
+        estimate = 0.7213 / (1 + 1.079 / size) * size * size / sum(2.0 ** -rank for rank in self.registers)
+        zeros = self.registers.count(0)
+        if estimate <= 2.5 * size and zeros:
+            # Small-range correction (linear counting)
+            estimate = size * math.log(size / zeros)
+        return round(estimate)
+
+
+class PairState:
+    __slots__ = ("count", "times")
+
+    def __init__(self, max_samples: int):
+        self.count = 0
+        self.times = deque(maxlen=max_samples)
+
+
+class SourceFanout:
+    """Distinct lateral destinations of one source in the current and previous window"""
+    __slots__ = ("epoch", "current", "previous", "ports", "edges")
+
+    def __init__(self, epoch: int):
+        self.epoch = epoch
+        self.current = HyperLogLog()
+        self.previous: Optional[HyperLogLog] = None
+        self.ports: Counter = Counter()
+        self.edges: set = set()
+
+    def roll(self, epoch: int):
+        if epoch == self.epoch:
+            return
+        self.previous = self.current if epoch == self.epoch + 1 else None
+        self.current = HyperLogLog()
+        self.epoch = epoch
+        self.ports.clear()
+        self.edges.clear()
+
+    def distinct(self) -> int:
+        sketch = self.current if self.previous is None else self.current.merge(self.previous)
+        return sketch.count()
+
+
+class BehaviorDetector:
+    def __init__(self, max_pairs: int = 100_000, max_samples: int = 128, admit_after: int = 4,
+                 max_sources: int = 10_000, window: float = 3600.0, fanout_threshold: int = 20,
+                 max_edges: int = 32, lateral_ports=LATERAL_PORTS, rescore_interval: float = 30.0,
+                 analyzer: Optional[FlowAnalytics] = None):
+        self.max_pairs = max_pairs
+        self.max_samples = max_samples
+        self.admit_after = admit_after
+        self.max_sources = max_sources
+        self.window = window
+        self.fanout_threshold = fanout_threshold
+        self.max_edges = max_edges
+        self.lateral_ports = frozenset(lateral_ports)
+        self.rescore_interval = rescore_interval
+        self.analyzer = analyzer or FlowAnalytics(min_beacon_events=8)
+        self.sketch = CountMinSketch()
+        self._pairs: "OrderedDict[tuple, PairState]" = OrderedDict()
+        self._sources: "OrderedDict[Tuple[int, int], SourceFanout]" = OrderedDict()
+        self._epoch: Optional[int] = None
+        self._scored_at: Optional[float] = None  # monotonic
+        # Batches arrive from worker threads while the loop reads findings
+        self._lock = threading.Lock()
+        self.findings: Dict = {"beaconing": [], "lateral_movement": [], "graph": {"nodes": [], "edges": []}}
+        self.counters = {"connections": 0, "batches": 0, "pairs_admitted": 0, "pairs_evicted": 0,
+                         "sources_evicted": 0, "scores": 0}
+
+    def observe(self, flows: FlowBatch):
+        """Fold a batch of connection records into the sketches and pair state"""
+        if not len(flows):
+            return
+        columns = flows.columns
+        keys = list(zip(columns["src_hi"], columns["src_lo"], columns["dst_hi"], columns["dst_lo"],
+                        columns["dst_port"]))
+        counts = Counter(keys)
+        latest = max(columns["start"])
+        with self._lock:
+            self.counters["connections"] += len(keys)
+            self.counters["batches"] += 1
+            epoch = int(latest // self.window)
+            if self._epoch is not None and epoch > self._epoch:
+                self.sketch.decay()
+            self._epoch = epoch if self._epoch is None else max(self._epoch, epoch)
+            tracked = self._admit(counts)
+            if tracked:
+                for key, start in compress(zip(keys, columns["start"]), map(tracked.__contains__, keys)):
+                    tracked[key].append(start)
+            self._observe_fanout(counts, self._epoch)
+
+    def _admit(self, counts: Counter) -> Dict[tuple, deque]:
+        """Pairs of this batch that have per-pair state, mapped to their time samples"""
+        pairs, tracked = self._pairs, {}
+        for key, count in counts.items():
+            state = pairs.get(key)
+            if state is None:
+                if self.sketch.add(key, count) < self.admit_after:
+                    continue
+                state = pairs[key] = PairState(self.max_samples)
+                self.counters["pairs_admitted"] += 1
+                if len(pairs) > self.max_pairs:
+                    pairs.popitem(last=False)
+                    self.counters["pairs_evicted"] += 1
+            else:
+                pairs.move_to_end(key)
+            state.count += count
+            tracked[key] = state.times
+        return tracked
+
+    def _observe_fanout(self, counts: Counter, epoch: int):
+        sources, ports = self._sources, self.lateral_ports
+        for (src_hi, src_lo, dst_hi, dst_lo, port), count in counts.items():
+            if port not in ports or not (_is_internal(src_hi, src_lo) and _is_internal(dst_hi, dst_lo)):
+                continue
+            source = (src_hi, src_lo)
+            fanout = sources.get(source)
+            if fanout is None:
+                fanout = sources[source] = SourceFanout(epoch)
+                if len(sources) > self.max_sources:
+                    sources.popitem(last=False)
+                    self.counters["sources_evicted"] += 1
+            else:
+                sources.move_to_end(source)
+                fanout.roll(epoch)
+            fanout.current.add((dst_hi, dst_lo))
+            fanout.ports[port] += count
+            if len(fanout.edges) < self.max_edges:
+                fanout.edges.add((dst_hi, dst_lo))
+
+    def score(self, force: bool = False, limit: int = 20) -> Dict:
+        """
+        Recompute findings from the tracked state; rate-limited to one scoring
+        per ``rescore_interval`` unless forced, since spectra are not free
+        """
+        now = time.monotonic()
+        if not force and self._scored_at is not None and now - self._scored_at < self.rescore_interval:
+            return self.findings
+        with self._lock:
+            series = [(key, list(state.times), state.count) for key, state in self._pairs.items()
+                      if len(state.times) >= self.analyzer.min_beacon_events]
+            fanouts = [(source, fanout.distinct(), dict(fanout.ports), list(fanout.edges))
+                       for source, fanout in self._sources.items()
+                       if fanout.epoch >= (self._epoch or 0) - 1]
+        beacons = self.analyzer.rank_beacons(((key, times) for key, times, _ in series), limit,
+                                             totals={key: count for key, _, count in series})
+        self.findings = {
+            "beaconing": beacons,
+            **self._lateral_findings(fanouts, limit),
+            "scored_at": time.time()
+        }
+        self._scored_at = now
+        self.counters["scores"] += 1
+        return self.findings
+
+    def _lateral_findings(self, fanouts: List[tuple], limit: int) -> Dict:
+        flagged = [entry for entry in fanouts if entry[1] >= self.fanout_threshold]
+        flagged.sort(key=lambda entry: entry[1], reverse=True)
+        flagged = flagged[:limit]
+        sources = {source for source, _, _, _ in flagged}
+        findings, nodes, edges = [], set(), []
+        for source, distinct, ports, destinations in flagged:
+            host = unpack_ip(*source)
+            targets = sorted(unpack_ip(*destination) for destination in destinations)
+            # A destination that fans out itself is where the intruder moved next
+            pivots = sorted(unpack_ip(*destination) for destination in destinations if destination in sources)
+            findings.append({
+                "src": host, "distinct_destinations": distinct, "ports": ports,
+                "sample_destinations": targets, "pivots": pivots
+            })
+            nodes.add(host)
+            nodes.update(targets)
+            edges.extend([host, target] for target in targets)
+        return {"lateral_movement": findings, "graph": {"nodes": sorted(nodes), "edges": edges}}
+
+    def export_state(self) -> Dict:
+        """
+        Sketch, pair and fan-out state as flat typed arrays plus a small JSON part.
+        Safe to call from a worker thread: observation is held off while copying.
+        """
+        with self._lock:
+            pairs, sources = list(self._pairs.items()), list(self._sources.items())
+            sketch = array("H")
+            for row in self.sketch.rows:
+                sketch.extend(row)
+            times = array("d")
+            for _, state in pairs:
+                times.extend(state.times)
+            registers, previous = bytearray(), bytearray()
+            for _, fanout in sources:
+                registers += fanout.current.registers
+                previous += fanout.previous.registers if fanout.previous is not None else bytes(
+                    len(fanout.current.registers))
+            keys = [key for key, _ in pairs]
+            return {
+                "epoch": self._epoch,
+                "counters": dict(self.counters),
+                "findings": self.findings,
+                "sketch": {"width": self.sketch.width, "counters": sketch},
+                "pairs": {
+                    **{name: array("Q", map(itemgetter(field), keys))
+                       for field, name in enumerate(("src_hi", "src_lo", "dst_hi", "dst_lo"))},
+                    "dst_port": array("H", map(itemgetter(4), keys)),
+                    "count": array("Q", [state.count for _, state in pairs]),
+                    "samples": array("I", [len(state.times) for _, state in pairs]),
+                    "times": times
+                },
+                "sources": {
+                    "hi": array("Q", [source[0] for source, _ in sources]),
+                    "lo": array("Q", [source[1] for source, _ in sources]),
+                    "epoch": array("q", [fanout.epoch for _, fanout in sources]),
+                    "has_previous": bytes(fanout.previous is not None for _, fanout in sources),
+                    "registers": bytes(registers),
+                    "previous": bytes(previous),
+                    "ports": [list(fanout.ports.items()) for _, fanout in sources],
+                    "edges": [list(fanout.edges) for _, fanout in sources]
+                }
+            }
+
+    def restore_state(self, state: Dict):
+        """Reload state from ``export_state``; findings come back as they were last scored"""
+        pairs, sources = state["pairs"], state["sources"]
+        rows = state["sketch"]["counters"]
+        width = state["sketch"]["width"]
+        with self._lock:
+            self._epoch = state["epoch"]
+            self.counters.update(state["counters"])
+            self.findings = state["findings"]
+            if width == self.sketch.width and len(rows) == width * len(self.sketch.rows):
+                self.sketch.rows = [rows[offset:offset + width] for offset in range(0, len(rows), width)]
+            restored: "OrderedDict[tuple, PairState]" = OrderedDict()
+            times, offset = pairs["times"], 0
+            for key, count, samples in zip(zip(pairs["src_hi"], pairs["src_lo"], pairs["dst_hi"], pairs["dst_lo"],
+                                               pairs["dst_port"]), pairs["count"], pairs["samples"]):
+                entry = restored[key] = PairState(self.max_samples)
+                entry.count = count
+                entry.times.extend(times[offset:offset + samples])
+                offset += samples
+            self._pairs = restored
+            fanouts: "OrderedDict[Tuple[int, int], SourceFanout]" = OrderedDict()
+            size = len(HyperLogLog().registers)
+            for position, (source, epoch, has_previous, ports, edges) in enumerate(zip(
+                    zip(sources["hi"], sources["lo"]), sources["epoch"], sources["has_previous"],
+                    sources["ports"], sources["edges"])):
+                fanout = fanouts[source] = SourceFanout(epoch)
+                fanout.current.registers[:] = sources["registers"][position * size:(position + 1) * size]
+                if has_previous:
+                    fanout.previous = HyperLogLog()
+                    fanout.previous.registers[:] = sources["previous"][position * size:(position + 1) * size]
+                fanout.ports.update(dict(ports))
+                fanout.edges.update(map(tuple, edges))
+            self._sources = fanouts
+
+    def snapshot(self) -> Dict:
+        return {
+            **self.counters,
+            "tracked_pairs": len(self._pairs),
+            "tracked_sources": len(self._sources),
+            "beaconing": len(self.findings["beaconing"]),
+            "lateral_movement": len(self.findings["lateral_movement"])
+        }
@@ -0,0 +1,243 @@
+import hashlib
+import json
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional
+
+
+class LRUCache:
+    """Bounded least-recently-used cache with hit/miss accounting"""
+    def __init__(self, maxsize: int = 128):
+        if maxsize <= 0:
+            raise ValueError("maxsize must be positive")
+        self.maxsize = maxsize
+        self._entries: "OrderedDict[Hashable, Any]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._entries
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        try:
+            value = self._entries[key]
+        except KeyError:
+            self.misses += 1
+            return default
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def put(self, key: Hashable, value: Any):
+        self._entries[key] = value
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    def get_or_compute(self, key: Hashable, compute: Callable[[], Any]) -> Any:
+        """Return the cached value for key, computing and storing it on a miss"""
+        sentinel = _MISSING
+        value = self.get(key, sentinel)
+        if value is sentinel:
+            value = compute()
+            self.put(key, value)
+        return value
+
+    def invalidate(self, key: Hashable) -> bool:
+        return self._entries.pop(key, _MISSING) is not _MISSING
+
+    def invalidate_where(self, predicate: Callable[[Hashable], bool]) -> int:
+        """Drop every entry whose key matches predicate, returning the count"""
+        stale = [key for key in self._entries if predicate(key)]
+        for key in stale:
+            del self._entries[key]
+        return len(stale)
+
+    def clear(self):
+        self._entries.clear()
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "size": len(self._entries),
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "misses": self.misses
+        }
+
+
+_MISSING = object()
+
+
+def fingerprint_topology(topology: Dict) -> str:
+    """Stable content hash of a topology dictionary"""
+    payload = json.dumps(topology, sort_keys=True, default=str, separators=(",", ":"))
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class FrozenDict(dict):
+    """Dict that refuses mutation; nested dicts and lists are frozen too"""
+    def __init__(self, data: Optional[Dict] = None):
+        super().__init__((key, _freeze(value)) for key, value in (data or {}).items())
+
+    def _read_only(self, *args, **kwargs):
+        raise TypeError(f"{type(self).__name__} is read-only")
+
+    __setitem__ = __delitem__ = __ior__ = _read_only
+    update = setdefault = pop = popitem = clear = _read_only
+
+    def __reduce__(self):
+        return type(self), (dict(self),)
+
+
+class TopologySnapshot(FrozenDict):
+    """
+    Read-only view of a topology build, tagged with its content hash and version.
+    Behaves as a plain dict so terrain analysis needs no changes.
+    """
+    def __init__(self, topology: Dict, version: int, fingerprint: Optional[str] = None):
+        super().__init__(topology)
+        self.fingerprint = fingerprint or fingerprint_topology(topology)
+        self.version = version
+
+    def __reduce__(self):
+        return type(self), (dict(self), self.version, self.fingerprint)
+
+
+def _freeze(value: Any) -> Any:
+    if isinstance(value, dict) and not isinstance(value, FrozenDict):
+        return FrozenDict(value)
+    if isinstance(value, list):
+        return tuple(_freeze(item) for item in value)
+    return value
+
+
+class TrackedList(list):
+    """List that reports in-place mutations to an owner callback"""
+    def __init__(self, items=(), on_change: Optional[Callable[[], None]] = None):
+        self._on_change = on_change
+        super().__init__(_track(item, on_change) for item in items)
+
+    def _changed(self):
+        if self._on_change is not None:
+            self._on_change()
+
+    def append(self, item):
+        super().append(_track(item, self._on_change))
+        self._changed()
+
+    def extend(self, items):
+        super().extend(_track(item, self._on_change) for item in items)
+        self._changed()
+
+    def insert(self, index, item):
+        super().insert(index, _track(item, self._on_change))
+        self._changed()
+
+    def remove(self, item):
+        super().remove(item)
+        self._changed()
+
+    def pop(self, *args):
+        item = super().pop(*args)
+        self._changed()
+        return item
+
+    def clear(self):
+        super().clear()
+        self._changed()
+
+    def sort(self, *args, **kwargs):
+        super().sort(*args, **kwargs)
+        self._changed()
+
+    def reverse(self):
+        super().reverse()
+        self._changed()
+
+    def __setitem__(self, index, value):
+        if isinstance(index, slice):
+            value = [_track(item, self._on_change) for item in value]
+        else:
+            value = _track(value, self._on_change)
+        super().__setitem__(index, value)
+        self._changed()
+
+    def __delitem__(self, index):
+        super().__delitem__(index)
+        self._changed()
+
+    def __iadd__(self, items):
+        self.extend(items)
+        return self
+
+    def __imul__(self, count):
+        super().__imul__(count)
+        self._changed()
+        return self
+
+
+class TrackedDict(dict):
+    """
+    Dict that reports mutations, including those made to nested dicts and lists,
+    to an owner callback. Used for configuration that derived caches depend on.
+    """
+    def __init__(self, data: Optional[Dict] = None, on_change: Optional[Callable[[], None]] = None):
+        self._on_change = on_change
+        super().__init__()
+        for key, value in (data or {}).items():
+            super().__setitem__(key, _track(value, on_change))
+
+    def _changed(self):
+        if self._on_change is not None:
+            self._on_change()
+
+    def __setitem__(self, key, value):
+        super().__setitem__(key, _track(value, self._on_change))
+        self._changed()
+
+    def __delitem__(self, key):
+        super().__delitem__(key)
+        self._changed()
+
+    def update(self, *args, **kwargs):
+        for key, value in dict(*args, **kwargs).items():
+            super().__setitem__(key, _track(value, self._on_change))
+        self._changed()
+
+    def setdefault(self, key, default=None):
+        if key not in self:
+            self[key] = default
+        return self[key]
+
+    def pop(self, key, *args):
+        had_key = key in self
+        value = super().pop(key, *args)
+        if had_key:
+            self._changed()
+        return value
+
+    def popitem(self):
+        item = super().popitem()
+        self._changed()
+        return item
+
+    def clear(self):
+        super().clear()
+        self._changed()
+
+    def __ior__(self, other):
+        self.update(other)
+        return self
+
+
+def _track(value: Any, on_change: Optional[Callable[[], None]]) -> Any:
+    if isinstance(value, (TrackedDict, TrackedList)):
+        value._on_change = on_change
+        return value
+    if isinstance(value, dict):
+        return TrackedDict(value, on_change)
+    if isinstance(value, list):
+        return TrackedList(value, on_change)
+    return value
@@ -0,0 +1,238 @@
+"""
+Defense capability scores computed from live tool telemetry.
+
+Scores use the same 0-100 scale as Gaius's force comparison. There is one
+score per radar control, and three aggregates feed ``friendly_forces``:
+
+- strength: the mean of the controls we have evidence for. A control's
+  evidence is its sensors' health and drop rate, or failing that the
+  topology configuration.
+- mobility: how quickly detections are mitigated. It combines the ratio of
+  mitigated to detected threats with the MTTR: the mean delay between an
+  indicator's first high-severity detection and a containment action that
+  succeeded on that same indicator (address, host or user).
+- supplies: headroom left in the pipeline after sensor drops and alert
+  backlog.
+
+Every input is a RollingWindow, so reads on each /status are O(sensors).
+Open detections awaiting mitigation are bounded by ``max_open``.
+Until any telemetry arrives, the aggregates keep the previous fixed
+estimates.
+"""
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, Iterable, Optional
+
+from telemetry import RollingStats, RollingWindow
+
+RADAR_CONTROLS = ("firewall", "ids", "encryption", "authentication", "monitoring", "backup")
+
+# Sensor kinds reported by tools -> the radar control they provide evidence for
+SENSOR_CONTROLS = {
+    "firewall": "firewall", "waf": "firewall",
+    "ids": "ids", "ips": "ids", "snort": "ids", "suricata": "ids", "zeek": "ids",
+    "vpn": "encryption", "tls": "encryption",
+    "auth": "authentication", "idp": "authentication", "mfa": "authentication",
+    "siem": "monitoring", "netflow": "monitoring", "edr": "monitoring",
+    "backup": "backup"
+}
+
+DEFAULT_STRENGTH = 75
+DEFAULT_RESPONSE = 80
+DEFAULT_RESOURCES = 90
+
+
+class SensorHealth:
+    """Rolling received/dropped counters and last heartbeat for one sensor"""
+    def __init__(self, kind: str, control: str, window: float, bucket: float, clock: Callable[[], float]):
+        self.kind = kind
+        self.control = control
+        self.healthy = True
+        self.last_seen = clock()
+        self.received = RollingWindow(window, bucket, clock)
+        self.dropped = RollingWindow(window, bucket, clock)
+
+    def drop_rate(self) -> float:
+        dropped = self.dropped.total()
+        seen = self.received.total() + dropped
+        return dropped / seen if seen else 0.0
+
+
+class CapabilityScorer:
+    def __init__(self, window: float = 300.0, bucket: float = 10.0, stale_after: float = 120.0,
+                 mttr_target: float = 300.0, max_open: int = 10000, clock: Callable[[], float] = time.monotonic):
+        self.window = window
+        self.bucket = bucket
+        self.stale_after = stale_after
+        self.mttr_target = mttr_target
+        self.clock = clock
+        self.sensors: Dict[str, SensorHealth] = {}
+        self.detected = RollingWindow(window, bucket, clock)
+        self.mitigated = RollingWindow(window, bucket, clock)
+        # Hour-wide buckets for the dashboard timeline
+        self.detected_hourly = RollingWindow(7 * 3600, 3600, clock)
+        self.mitigated_hourly = RollingWindow(7 * 3600, 3600, clock)
+        # Indicator -> when it was first detected, until a mitigation on it is recorded
+        self._open: "OrderedDict[str, float]" = OrderedDict()
+        self.max_open = max_open
+        # Detection-to-mitigation delays of matched indicators
+        self.response_times = RollingStats(window, bucket, clock)
+        self.backlog = 0
+        self.backlog_capacity = 0
+
+    # Telemetry
+
+    def report_sensor(self, name: str, kind: str, healthy: bool = True, received: int = 0, dropped: int = 0):
+        """Heartbeat from a sensor, with events received/dropped since its last report"""
+        sensor = self.sensors.get(name)
+        if sensor is None:
+            control = SENSOR_CONTROLS.get(kind.lower())
+            if control is None:
+                raise ValueError(f"Unknown sensor kind: {kind}")
+            sensor = self.sensors[name] = SensorHealth(kind.lower(), control, self.window, self.bucket, self.clock)
+        sensor.healthy = healthy
+        sensor.last_seen = self.clock()
+        if received:
+            sensor.received.add(received)
+        if dropped:
+            sensor.dropped.add(dropped)
+
+    def record_detected(self, count: int, indicators: Iterable[str] = ()):
+        """``count`` detected threats; ``indicators`` are the addresses etc. a mitigation may later target"""
+        if count:
+            self.detected.add(count)
+            self.detected_hourly.add(count)
+        now = self.clock()
+        for indicator in indicators:
+            if indicator not in self._open:
+                self._open[indicator] = now
+                if len(self._open) > self.max_open:
+                    self._open.popitem(last=False)
+
+    def record_mitigated(self, count: int, targets: Iterable[str] = ()):
+        """``count`` mitigations; targets that match an open detection yield a response time"""
+        if count:
+            self.mitigated.add(count)
+            self.mitigated_hourly.add(count)
+        now = self.clock()
+        for target in targets:
+            detected_at = self._open.pop(target, None)
+            if detected_at is not None:
+                self.response_times.observe(now - detected_at)
+
+    def record_backlog(self, depth: int, capacity: int):
+        self.backlog = depth
+        self.backlog_capacity = capacity
+
+    # Scores
+
+    def _sensor_score(self, sensor: SensorHealth, now: float) -> float:
+        if not sensor.healthy or now - sensor.last_seen > self.stale_after:
+            return 0.0
+        return 100.0 * (1.0 - sensor.drop_rate())
+
+    def control_scores(self, configured: Optional[Dict[str, float]] = None) -> Dict[str, Optional[int]]:
+        """Per-control score from sensor telemetry, else from configuration, else None"""
+        now = self.clock()
+        evidence: Dict[str, list] = {}
+        for sensor in self.sensors.values():
+            evidence.setdefault(sensor.control, []).append(self._sensor_score(sensor, now))
+        configured = configured or {}
+        scores = {}
+        for control in RADAR_CONTROLS:
+            values = evidence.get(control)
+            if values:
+                scores[control] = round(sum(values) / len(values))
+            elif configured.get(control) is not None:
+                scores[control] = round(configured[control])
+            else:
+                scores[control] = None
+        return scores
+
+    def sensor_status(self, kinds: Iterable[str]) -> Optional[str]:
+        """"active", "degraded" or "offline" across sensors of these kinds; None if none report"""
+        kinds = set(kinds)
+        now = self.clock()
+        up = [self._sensor_score(sensor, now) > 0 for sensor in self.sensors.values() if sensor.kind in kinds]
+        if not up:
+            return None
+        return "active" if all(up) else "degraded" if any(up) else "offline"
+
+    def defense_strength(self, controls: Dict[str, Optional[int]]) -> int:
+        known = [score for score in controls.values() if score is not None]
+        return round(sum(known) / len(known)) if known else DEFAULT_STRENGTH
+
+    def mttr(self) -> Optional[float]:
+        """Mean seconds from detection to mitigation over matched indicators; None without any pair"""
+        if not self.response_times.count.total():
+            return None
+        return self.response_times.mean()
+
+    def response_capability(self) -> int:
+        detected, mitigated = self.detected.total(), self.mitigated.total()
+        if not detected and not mitigated:
+            return DEFAULT_RESPONSE
+        coverage = min(1.0, mitigated / detected) if detected else 1.0
+        mttr = self.mttr()
+        if mttr is None:
+            # No mitigation has been matched to its detection yet; judge on coverage alone
+            return round(100 * coverage)
+        speed = min(1.0, self.mttr_target / mttr) if mttr else 1.0
+        return round(100 * (coverage + speed) / 2)
+
+    def resource_availability(self) -> int:
+        sensors = list(self.sensors.values())
+        if not sensors and not self.backlog_capacity:
+            return DEFAULT_RESOURCES
+        dropped = sum(sensor.dropped.total() for sensor in sensors)
+        seen = sum(sensor.received.total() for sensor in sensors) + dropped
+        headroom = 1.0 - (dropped / seen if seen else 0.0)
+        if self.backlog_capacity:
+            headroom *= 1.0 - min(1.0, self.backlog / self.backlog_capacity)
+        return round(100 * headroom)
+
+    def snapshot(self) -> Dict:
+        mttr = self.mttr()
+        return {
+            "sensors": len(self.sensors),
+            "detected": self.detected.total(),
+            "mitigated": self.mitigated.total(),
+            "mttr_seconds": round(mttr, 1) if mttr is not None else None,
+            "backlog": self.backlog,
+            "backlog_capacity": self.backlog_capacity
+        }
+
+    # Snapshots
+
+    def export_state(self) -> Dict:
+        now = self.clock()
+        return {
+            "detected": self.detected.export_state(now),
+            "mitigated": self.mitigated.export_state(now),
+            "detected_hourly": self.detected_hourly.export_state(now),
+            "mitigated_hourly": self.mitigated_hourly.export_state(now),
+            "response_times": self.response_times.export_state(now),
+            "open": [[indicator, now - detected_at] for indicator, detected_at in self._open.items()],
+            "sensors": {
+                name: {"kind": sensor.kind, "healthy": sensor.healthy, "age": now - sensor.last_seen,
+                       "received": sensor.received.export_state(now), "dropped": sensor.dropped.export_state(now)}
+                for name, sensor in self.sensors.items()
+            }
+        }
+
+    def restore_state(self, state: Dict, elapsed: float = 0.0):
+        """Reload counters exported ``elapsed`` seconds ago; sensors silent since then go stale as usual"""
+        now = self.clock()
+        for name in ("detected", "mitigated", "detected_hourly", "mitigated_hourly"):
+            getattr(self, name).restore_state(state[name], elapsed, now)
+        self.response_times.restore_state(state["response_times"], elapsed, now)
+        self._open = OrderedDict((indicator, now - age - elapsed) for indicator, age in state["open"])
+        for name, saved in state["sensors"].items():
+            control = SENSOR_CONTROLS.get(saved["kind"])
+            if control is None:
+                continue
+            sensor = self.sensors[name] = SensorHealth(saved["kind"], control, self.window, self.bucket, self.clock)
+            sensor.healthy = saved["healthy"]
+            sensor.last_seen = now - saved["age"] - elapsed
+            sensor.received.restore_state(saved["received"], elapsed, now)
+            sensor.dropped.restore_state(saved["dropped"], elapsed, now)
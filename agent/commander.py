@@ -1,7 +1,10 @@
 import asyncio
-from typing import Dict, List
+import logging
+import time
+from typing import Dict, List, Optional
 from security_tools import SecurityToolsInterface
 from gaius_core import GaiusGeneral
+from scenario_simulator import SIMULATION_OPTIONS
 
 class CommandInterface:
     def __init__(self, gaius: GaiusGeneral, security_tools: SecurityToolsInterface):
@@ -11,8 +14,14 @@ class CommandInterface:
             "analyze_threats": self.analyze_current_threats,
             "get_defense_status": self.get_defense_status,
             "configure_ids": self.configure_ids_settings,
-            "tactical_advice": self.get_tactical_advice
+            "tactical_advice": self.get_tactical_advice,
+            "analyze_flows": self.analyze_flows,
+            "formulate_strategy": self.formulate_strategy
         }
+        # Polled views (/status, the dashboard feed) reuse recent advice instead of an LLM call per request
+        self._advice: Optional[Dict] = None
+        self._advice_at = 0.0
+        self._advice_refresh: Optional[asyncio.Task] = None
 
     async def process_command(self, command: str, params: Dict) -> Dict:
         """Process incoming commands from security teams"""
@@ -28,7 +37,7 @@ class CommandInterface:
 
     async def analyze_current_threats(self, params: Dict) -> Dict:
         """Get Gaius's analysis of current threat landscape"""
-        ids_alerts = self.security_tools.analyze_ids_alerts()
+        ids_alerts = await self.security_tools.analyze_ids_alerts()
         # await here since evaluate_situation is async
         assessment = await self.gaius.evaluate_situation({
             "threat_data": ids_alerts,
@@ -48,9 +57,9 @@ class CommandInterface:
             "active_defenses": self._get_active_defenses()
         }
 
-    def configure_ids_settings(self, params: Dict) -> Dict:
+    async def configure_ids_settings(self, params: Dict) -> Dict:
         """Configure IDS settings based on Gaius's recommendations"""
-        success = self.security_tools.connect_ids(
+        success = await self.security_tools.connect_ids(
             params.get("ids_type"),
             params.get("config", {})
         )
@@ -59,22 +68,75 @@ class CommandInterface:
             "message": "IDS configuration updated" if success else "Configuration failed"
         }
 
+    async def analyze_flows(self, params: Dict) -> Dict:
+        """Analyze a flow export or capture file and update the network terrain"""
+        path = params.get("path")
+        if not path:
+            return {"status": "error", "message": "path is required"}
+        try:
+            report = await self.security_tools.analyze_flows(path)
+        except (OSError, ValueError) as e:
+            return {"status": "error", "message": f"Flow analysis failed: {e}"}
+        return {"status": "success", "flow_analysis": report}
+
+    async def formulate_strategy(self, params: Dict) -> Dict:
+        """Strategy for the live situation, or for params["context"], quantified by what-if simulation"""
+        options = {option: params[option] for option in SIMULATION_OPTIONS if option in params}
+        try:
+            strategy = await self.gaius.formulate_strategy(params.get("context"), **options)
+        except (TypeError, ValueError) as e:
+            return {"status": "error", "message": f"Simulation failed: {e}"}
+        return {"status": "success", "strategy": strategy}
+
     async def get_tactical_advice(self, params: Dict) -> Dict:
         """Get specific tactical recommendations from Gaius"""
         try:
             situation = {
-                "terrain": self.security_tools.get_network_topology(),
                 "current_threats": params.get("threats", []),
                 "defense_posture": self.security_tools.get_defense_capabilities()
             }
+            # No situation inputs here: the live assessment is reused, not recomputed from
+            # partial inputs and recorded as if the threat level had changed
             assessment = await self.gaius.evaluate_situation(situation)
+            advice = await self._format_tactical_advice(assessment)
+            # Concurrent identical situations are coalesced into one LLM call
+            advice["strategic_insight"] = await self.gaius.generate_strategic_advice(
+                assessment, {**situation, "terrain": self.security_tools.get_network_topology()})
             return {
                 "status": "success",
-                "tactical_advice": self._format_tactical_advice(assessment)
+                "tactical_advice": advice
             }
         except Exception as e:
             return {"status": "error", "message": str(e)}
 
+    async def cached_tactical_advice(self, max_age: float = 30.0) -> Dict:
+        """
+        Tactical advice at most ``max_age`` seconds old. Stale advice is served while
+        one background refresh runs; only the very first call waits for the LLM.
+        """
+        if self._advice is None:
+            if self._advice_refresh is None:
+                self._advice_refresh = asyncio.ensure_future(self._refresh_advice())
+            await asyncio.shield(self._advice_refresh)
+        elif time.monotonic() - self._advice_at > max_age and self._advice_refresh is None:
+            self._advice_refresh = asyncio.ensure_future(self._refresh_advice())
+        return self._advice
+
+    async def _refresh_advice(self):
+        try:
+            advice = await self.get_tactical_advice({})
+        except Exception as e:
+            logging.error(f"Tactical advice refresh failed: {e}")
+            advice = {"status": "error", "message": str(e)}
+        try:
+            # Keep serving the last good advice after a failed refresh, and retry on the next poll
+            if advice.get("status") == "success":
+                self._advice, self._advice_at = advice, time.monotonic()
+            elif self._advice is None:
+                self._advice = advice
+        finally:
+            self._advice_refresh = None
+
     def _get_active_defenses(self) -> List[str]:
         """Get list of currently active defense mechanisms"""
         return ["ids_monitoring", "firewall_rules", "endpoint_protection"]
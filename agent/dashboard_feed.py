@@ -0,0 +1,62 @@
+"""
+Sequenced dashboard update feed shared by every /ws/dashboard connection.
+
+Each update is serialized once per encoding and fanned out to all clients.
+Clients reconnect with the last sequence number and feed epoch they saw and
+receive only the updates they missed, or a full snapshot if those have aged
+out of the buffer. Sequence numbers restart with the process, so a client
+whose epoch does not match this feed's always gets a snapshot.
+"""
+import asyncio
+import uuid
+from collections import deque
+from typing import Dict, List, Optional
+
+from serialization import EncodedMessage
+
+
+class DashboardFeed:
+    def __init__(self, history: int = 256):
+        self.seq = 0
+        self.epoch = uuid.uuid4().hex
+        self.state: Dict = {}
+        self._history = deque(maxlen=history)  # (seq, EncodedMessage)
+        self._changed = asyncio.Condition()
+
+    async def publish(self, update: Dict) -> int:
+        """Merge a partial update into the dashboard state and notify subscribers"""
+        self.seq += 1
+        self.state.update(update)
+        message = EncodedMessage({"type": "update", "epoch": self.epoch, "seq": self.seq, "data": update})
+        self._history.append((self.seq, message))
+        async with self._changed:
+            self._changed.notify_all()
+        return self.seq
+
+    def snapshot(self) -> EncodedMessage:
+        return EncodedMessage({"type": "snapshot", "epoch": self.epoch, "seq": self.seq, "data": dict(self.state)})
+
+    def since(self, seq: Optional[int], epoch: Optional[str] = None) -> List[EncodedMessage]:
+        """
+        Messages a client that last saw ``seq`` of feed ``epoch`` needs to catch
+        up: the missed updates when still buffered, otherwise a single full snapshot.
+        """
+        if seq is None or epoch != self.epoch or seq > self.seq:
+            return [self.snapshot()]
+        if seq == self.seq:
+            return []
+        oldest = self._history[0][0] if self._history else self.seq + 1
+        if seq + 1 < oldest:
+            return [self.snapshot()]
+        return [message for message_seq, message in self._history if message_seq > seq]
+
+    async def wait_for_update(self, seq: int, timeout: float) -> bool:
+        """Wait until the feed moves past ``seq``; False on timeout"""
+        if self.seq > seq:
+            return True
+        try:
+            async with self._changed:
+                await asyncio.wait_for(self._changed.wait_for(lambda: self.seq > seq), timeout)
+            return True
+        except asyncio.TimeoutError:
+            return False
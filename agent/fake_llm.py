@@ -0,0 +1,127 @@
+"""
+Minimal OpenAI-compatible chat completions server for exercising failure modes.
+
+Run ``python fake_llm.py --port 8090 --error-rate 0.3 --latency 0.2 --slow-rate 0.1``
+and point Gaius at it with ``DEEPSEEK_BASE_URL=http://127.0.0.1:8090/v1``.
+Only the standard library is used so it can run wherever the agent runs.
+"""
+import argparse
+import asyncio
+import json
+import logging
+import random
+import time
+from typing import Dict, Optional
+
+
+class FakeLLMServer:
+    """Serves ``POST /v1/chat/completions`` with configurable latency and errors"""
+    def __init__(self, host: str = "127.0.0.1", port: int = 8090, latency: float = 0.1,
+                 error_rate: float = 0.0, slow_rate: float = 0.0, slow_latency: float = 12.0,
+                 seed: Optional[int] = None):
+        self.host = host
+        self.port = port
+        self.latency = latency
+        self.error_rate = error_rate
+        self.slow_rate = slow_rate
+        self.slow_latency = slow_latency
+        self.requests = 0
+        self._random = random.Random(seed)
+        self._server: Optional[asyncio.AbstractServer] = None
+
+    def configure(self, **settings):
+        """Change failure behaviour at runtime, e.g. to simulate a brownout"""
+        for key, value in settings.items():
+            if not hasattr(self, key):
+                raise AttributeError(f"Unknown setting: {key}")
+            setattr(self, key, value)
+
+    async def start(self):
+        self._server = await asyncio.start_server(self._handle, self.host, self.port)
+        if self.port == 0:
+            self.port = self._server.sockets[0].getsockname()[1]
+        logging.info(f"Fake LLM listening on http://{self.host}:{self.port}/v1")
+
+    async def stop(self):
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+
+    @property
+    def base_url(self) -> str:
+        return f"http://{self.host}:{self.port}/v1"
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            request_line = await reader.readline()
+            headers = {}
+            while True:
+                line = await reader.readline()
+                if line in (b"\r\n", b"\n", b""):
+                    break
+                name, _, value = line.decode("latin-1").partition(":")
+                headers[name.strip().lower()] = value.strip()
+            body = await reader.readexactly(int(headers.get("content-length", 0)))
+            status, payload = await self._respond(request_line.decode("latin-1"), body)
+            data = json.dumps(payload).encode("utf-8")
+            writer.write(
+                f"HTTP/1.1 {status}\r\nContent-Type: application/json\r\n"
+                f"Content-Length: {len(data)}\r\nConnection: close\r\n\r\n".encode("latin-1") + data
+            )
+            await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def _respond(self, request_line: str, body: bytes):
+        if "/chat/completions" not in request_line:
+            return "404 Not Found", {"error": {"message": "not found"}}
+
+        self.requests += 1
+        roll = self._random.random()
+        if roll < self.error_rate:
+            await asyncio.sleep(self.latency)
+            return "503 Service Unavailable", {"error": {"message": "simulated outage", "type": "server_error"}}
+        delay = self.slow_latency if roll < self.error_rate + self.slow_rate else self.latency
+        await asyncio.sleep(delay)
+
+        request = json.loads(body or b"{}")
+        messages = request.get("messages", [])
+        question = messages[-1]["content"].splitlines()[-1] if messages else ""
+        return "200 OK", self._completion(request.get("model", "fake"), f"Ave! [fake] {question[:200]}")
+
+    @staticmethod
+    def _completion(model: str, content: str) -> Dict:
+        return {
+            "id": f"chatcmpl-fake-{time.time_ns()}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": model,
+            "choices": [{
+                "index": 0,
+                "message": {"role": "assistant", "content": content},
+                "finish_reason": "stop"
+            }],
+            "usage": {"prompt_tokens": 0, "completion_tokens": 0, "total_tokens": 0}
+        }
+
+
+async def _serve(args):
+    server = FakeLLMServer(args.host, args.port, args.latency, args.error_rate,
+                           args.slow_rate, args.slow_latency, args.seed)
+    await server.start()
+    await asyncio.Event().wait()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Fake OpenAI-compatible LLM server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8090)
+    parser.add_argument("--latency", type=float, default=0.1)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--slow-rate", type=float, default=0.0)
+    parser.add_argument("--slow-latency", type=float, default=12.0)
+    parser.add_argument("--seed", type=int)
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(_serve(parser.parse_args()))
@@ -0,0 +1,697 @@
+"""
+Local flow analytics over NetFlow v5, IPFIX, PCAP and Zeek conn.log files.
+
+Files are memory-mapped and decoded straight from the mapping, without a
+per-record Python loop for flow exports:
+- NetFlow v5 records are fixed-width, so each field is a strided memoryview
+  slice copied into a typed ``array`` column.
+- IPFIX data sets are unpacked with ``struct.iter_unpack`` using a format
+  built from their template.
+PCAP packets go through a flow table keyed by 5-tuple. Zeek conn logs are
+already one row per connection. Every reader returns a FlowBatch: a
+struct-of-arrays like AlertBatch, using the same packed 128-bit addresses.
+
+FlowAnalytics aggregates a FlowBatch into three results:
+- top talkers
+- bottlenecks, meaning destinations that concentrate traffic or approach
+  link capacity; these feed ``data_routes.bottlenecks``
+- beaconing candidates, meaning host pairs whose connections recur at
+  near-constant intervals (see gap_statistics and spectral_periodicity)
+"""
+import cmath
+import math
+import mmap
+import os
+import struct
+import sys
+import time
+from array import array
+from collections import Counter
+from functools import lru_cache
+from itertools import chain, compress, repeat
+from operator import add, itemgetter, mul, sub
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+from alert_batch import PROTOCOL_NAMES, PROTOCOL_NUMBERS, pack_ip, unpack_ip
+from serialization import loads_json
+
+_IPV4_MAPPED_PREFIX = 0xFFFF00000000
+_LOW_64 = (1 << 64) - 1
+
+FLOW_COLUMNS = {
+    "start": "d",
+    "end": "d",
+    "src_hi": "Q",
+    "src_lo": "Q",
+    "dst_hi": "Q",
+    "dst_lo": "Q",
+    "src_port": "H",
+    "dst_port": "H",
+    "proto": "B",
+    "packets": "Q",
+    "bytes": "Q"
+}
+
+
+class FlowBatch:
+    """Flow records stored column-wise"""
+    def __init__(self, columns: Dict[str, array]):
+        self.columns = columns
+        self._length = len(columns["start"])
+
+    @classmethod
+    def empty(cls) -> "FlowBatch":
+        return cls({name: array(typecode) for name, typecode in FLOW_COLUMNS.items()})
+
+    @staticmethod
+    def concat(batches: List["FlowBatch"]) -> "FlowBatch":
+        merged = FlowBatch.empty()
+        for batch in batches:
+            for name, column in merged.columns.items():
+                column.extend(batch.columns[name])
+        merged._length = len(merged.columns["start"])
+        return merged
+
+    def __len__(self) -> int:
+        return self._length
+
+    def column(self, name: str) -> array:
+        return self.columns[name]
+
+    def nbytes(self) -> int:
+        return sum(len(column) * column.itemsize for column in self.columns.values())
+
+
+def _ipv4_columns(addresses) -> Tuple[array, array]:
+    """IPv4 integers as IPv4-mapped (hi, lo) columns"""
+    lo = array("Q", map(_IPV4_MAPPED_PREFIX.__or__, addresses))
+    return array("Q", bytes(8 * len(lo))), lo
+
+
+def _append_columns(columns: Dict[str, array], values: Dict[str, object]):
+    for name, column in columns.items():
+        value = values[name]
+        # array.extend only takes arrays of the same typecode; anything else is iterated
+        column.extend(value if getattr(value, "typecode", None) == column.typecode else iter(value))
+
+
+# NetFlow v5
+
+_V5_HEADER = struct.Struct("!HHIIIIBBH")
+_V5_RECORD = struct.Struct("!IIIHHIIIIHHBBBBHHBBH")
+
+
+def read_netflow_v5(path: str) -> FlowBatch:
+    """
+    A file of concatenated NetFlow v5 export datagrams, as written by a raw
+    collector. Datagram headers are walked first; the record bodies are then
+    joined and unpacked in one pass.
+    """
+    bodies, boots, counts = [], [], []
+    with open(path, "rb") as handle, mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ) as data:
+        view = memoryview(data)
+        offset, size = 0, len(data)
+        try:
+            while offset + _V5_HEADER.size <= size:
+                version, count, uptime, secs, nsecs, _, _, _, _ = _V5_HEADER.unpack_from(data, offset)
+                if version != 5:
+                    raise ValueError(f"Not a NetFlow v5 datagram at offset {offset}")
+                offset += _V5_HEADER.size
+                count = min(count, (size - offset) // _V5_RECORD.size)
+                bodies.append(view[offset:offset + count * _V5_RECORD.size])
+                # First/Last are router uptime in ms; this converts them to epoch seconds
+                boots.append(secs + nsecs / 1e9 - uptime / 1000)
+                counts.append(count)
+                offset += count * _V5_RECORD.size
+            body = b"".join(bodies)
+        finally:
+            bodies.clear()
+            view.release()
+    batch = FlowBatch.empty()
+    if not body:
+        return batch
+    # Records are fixed-width, so each field is a strided slice of the body
+    count = len(body) // _V5_RECORD.size
+    words, halves = memoryview(body).cast("I"), memoryview(body).cast("H")
+
+    def field(view: memoryview, typecode: str, index: int) -> array:
+        column = array(typecode, view[index::len(view) // count])
+        if sys.byteorder == "little":
+            column.byteswap()
+        return column
+
+    boot = array("d", chain.from_iterable(map(repeat, boots, counts)))
+    src_hi, src_lo = _ipv4_columns(field(words, "I", 0))
+    dst_hi, dst_lo = _ipv4_columns(field(words, "I", 1))
+    _append_columns(batch.columns, {
+        "start": map(add, boot, map((0.001).__mul__, field(words, "I", 6))),
+        "end": map(add, boot, map((0.001).__mul__, field(words, "I", 7))),
+        "src_hi": src_hi, "src_lo": src_lo, "dst_hi": dst_hi, "dst_lo": dst_lo,
+        "src_port": field(halves, "H", 16), "dst_port": field(halves, "H", 17),
+        "proto": memoryview(body)[38::_V5_RECORD.size],
+        "packets": field(words, "I", 4), "bytes": field(words, "I", 5)
+    })
+    batch._length = count
+    return batch
+
+
+# IPFIX (RFC 7011)
+
+# Information element id -> flow column
+_IPFIX_FIELDS = {
+    1: "bytes", 2: "packets", 4: "proto", 7: "src_port", 11: "dst_port",
+    8: "src_v4", 12: "dst_v4", 27: "src_v6", 28: "dst_v6",
+    150: "start_s", 151: "end_s", 152: "start_ms", 153: "end_ms"
+}
+_UNSIGNED = {1: "B", 2: "H", 4: "I", 8: "Q"}
+
+
+class _IPFIXTemplate:
+    def __init__(self, fields: List[Tuple[int, int]]):
+        codes, self.names = ["!"], []
+        for element, length in fields:
+            name = _IPFIX_FIELDS.get(element)
+            if name in ("src_v4", "dst_v4") and length == 4:
+                codes.append("I")
+            elif name in ("src_v6", "dst_v6") and length == 16:
+                codes.append("16s")
+            elif name is not None and length in _UNSIGNED and not name.endswith("v4") and not name.endswith("v6"):
+                codes.append(_UNSIGNED[length])
+            else:
+                codes.append(f"{length}x")
+                continue
+            self.names.append(name)
+        self.record = struct.Struct("".join(codes))
+
+
+def read_ipfix(path: str) -> FlowBatch:
+    """A file of concatenated IPFIX messages; sets with variable-length fields are skipped"""
+    batch = FlowBatch.empty()
+    templates: Dict[Tuple[int, int], _IPFIXTemplate] = {}
+    with open(path, "rb") as handle, mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ) as data:
+        view = memoryview(data)
+        offset, size = 0, len(data)
+        try:
+            while offset + 16 <= size:
+                version, length, export_time, _, domain = struct.unpack_from("!HHIII", data, offset)
+                if version != 10 or length < 16:
+                    raise ValueError(f"Not an IPFIX message at offset {offset}")
+                position, message_end = offset + 16, min(size, offset + length)
+                offset = message_end
+                while position + 4 <= message_end:
+                    set_id, set_length = struct.unpack_from("!HH", data, position)
+                    if set_length < 4:
+                        break
+                    body_start, set_end = position + 4, min(message_end, position + set_length)
+                    position = set_end
+                    if set_id == 2:
+                        _read_templates(data, body_start, set_end, domain, templates)
+                    elif set_id >= 256 and (domain, set_id) in templates:
+                        template = templates[(domain, set_id)]
+                        record_size = template.record.size
+                        body = view[body_start:set_end - (set_end - body_start) % record_size]
+                        if body:
+                            _append_ipfix(batch, template, list(template.record.iter_unpack(body)), export_time)
+                        del body
+        finally:
+            view.release()
+    batch._length = len(batch.columns["start"])
+    return batch
+
+
+def _read_templates(data, position: int, end: int, domain: int, templates: Dict):
+    while position + 4 <= end:
+        template_id, field_count = struct.unpack_from("!HH", data, position)
+        position += 4
+        fields, variable = [], False
+        for _ in range(field_count):
+            element, length = struct.unpack_from("!HH", data, position)
+            position += 4
+            if element & 0x8000:  # enterprise-specific: skip the enterprise number
+                position += 4
+                element = -1
+            variable = variable or length == 0xFFFF
+            fields.append((element, length))
+        if not variable and fields:
+            templates[(domain, template_id)] = _IPFIXTemplate(fields)
+
+
+def _append_ipfix(batch: FlowBatch, template: _IPFIXTemplate, records: List[tuple], export_time: int):
+    count = len(records)
+    values = dict(zip(template.names, zip(*records)))
+    zeros = bytes(count)
+
+    def addresses(v4: str, v6: str) -> Tuple[array, array]:
+        if v4 in values:
+            return _ipv4_columns(values[v4])
+        if v6 in values:
+            packed = [int.from_bytes(address, "big") for address in values[v6]]
+            return array("Q", [value >> 64 for value in packed]), array("Q", [value & _LOW_64 for value in packed])
+        return array("Q", bytes(8 * count)), array("Q", bytes(8 * count))
+
+    def times(seconds: str, millis: str):
+        if millis in values:
+            return map((0.001).__mul__, values[millis])
+        if seconds in values:
+            return map(float, values[seconds])
+        return array("d", [float(export_time)]) * count
+
+    src_hi, src_lo = addresses("src_v4", "src_v6")
+    dst_hi, dst_lo = addresses("dst_v4", "dst_v6")
+    _append_columns(batch.columns, {
+        "start": times("start_s", "start_ms"), "end": times("end_s", "end_ms"),
+        "src_hi": src_hi, "src_lo": src_lo, "dst_hi": dst_hi, "dst_lo": dst_lo,
+        "src_port": values.get("src_port", array("H", zeros * 2)),
+        "dst_port": values.get("dst_port", array("H", zeros * 2)),
+        "proto": values.get("proto", zeros),
+        "packets": values.get("packets", array("Q", zeros * 8)),
+        "bytes": values.get("bytes", array("Q", zeros * 8))
+    })
+
+
+# PCAP (libpcap format; pcapng is not supported)
+
+_PCAP_MAGIC = {
+    b"\xd4\xc3\xb2\xa1": ("<", 1e-6), b"\xa1\xb2\xc3\xd4": (">", 1e-6),
+    b"\x4d\x3c\xb2\xa1": ("<", 1e-9), b"\xa1\xb2\x3c\x4d": (">", 1e-9)
+}
+LINKTYPE_ETHERNET, LINKTYPE_RAW, LINKTYPE_LINUX_SLL = 1, 101, 113
+
+
+def read_pcap(path: str, idle_timeout: float = 60.0) -> FlowBatch:
+    """
+    Aggregate packets into flows by 5-tuple. A flow ends when its 5-tuple is
+    idle for ``idle_timeout`` seconds or a new TCP SYN arrives; the next packet
+    then starts a new flow.
+    """
+    flows: Dict[tuple, list] = {}  # 5-tuple -> [start, end, packets, bytes]
+    finished: List[tuple] = []
+    with open(path, "rb") as handle, mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ) as data:
+        if data[:4] not in _PCAP_MAGIC:
+            raise ValueError(f"{path} is not a libpcap file")
+        order, resolution = _PCAP_MAGIC[data[:4]]
+        linktype = struct.unpack_from(order + "I", data, 20)[0] & 0x0FFFFFFF
+        record = struct.Struct(order + "IIII")
+        unpack_record, unpack_short = record.unpack_from, struct.Struct("!H").unpack_from
+        unpack_ports = struct.Struct("!HH").unpack_from
+        offset, size = 24, len(data)
+        while offset + 16 <= size:
+            seconds, fraction, captured, length = unpack_record(data, offset)
+            packet = offset + 16
+            offset = packet + captured
+            if offset > size:
+                break
+            if linktype == LINKTYPE_ETHERNET:
+                ethertype, ip = unpack_short(data, packet + 12)[0], packet + 14
+                while ethertype in (0x8100, 0x88A8) and ip + 4 <= offset:  # VLAN tags
+                    ethertype, ip = unpack_short(data, ip + 2)[0], ip + 4
+            elif linktype == LINKTYPE_LINUX_SLL:
+                ethertype, ip = unpack_short(data, packet + 14)[0], packet + 16
+            elif linktype == LINKTYPE_RAW:
+                ip = packet
+                ethertype = 0x0800 if data[ip] >> 4 == 4 else 0x86DD
+            else:
+                raise ValueError(f"Unsupported PCAP link type {linktype}")
+
+            if ethertype == 0x0800 and ip + 20 <= offset:
+                header = (data[ip] & 0x0F) * 4
+                proto = data[ip + 9]
+                src, dst = data[ip + 12:ip + 16], data[ip + 16:ip + 20]
+                fragment = unpack_short(data, ip + 6)[0] & 0x1FFF
+                transport = ip + header if not fragment else offset
+            elif ethertype == 0x86DD and ip + 40 <= offset:
+                proto = data[ip + 6]
+                src, dst = data[ip + 8:ip + 24], data[ip + 24:ip + 40]
+                transport = ip + 40
+            else:
+                continue
+            ports = unpack_ports(data, transport) if proto in (6, 17) and transport + 4 <= offset else (0, 0)
+            # A bare SYN opens a new connection even if the 5-tuple was reused
+            syn = proto == 6 and transport + 14 <= offset and data[transport + 13] & 0x12 == 0x02
+
+            timestamp = seconds + fraction * resolution
+            key = (src, dst, ports[0], ports[1], proto)
+            flow = flows.get(key)
+            if flow is None or syn or timestamp - flow[1] > idle_timeout:
+                if flow is not None:
+                    finished.append(key + tuple(flow))
+                flows[key] = [timestamp, timestamp, 1, length]
+            else:
+                flow[1] = timestamp
+                flow[2] += 1
+                flow[3] += length
+    finished.extend(key + tuple(flow) for key, flow in flows.items())
+    return _flows_to_batch(finished)
+
+
+def _pack_address(raw: bytes) -> Tuple[int, int]:
+    value = int.from_bytes(raw, "big")
+    if len(raw) == 4:
+        return 0, value | _IPV4_MAPPED_PREFIX
+    return value >> 64, value & _LOW_64
+
+
+def _flows_to_batch(flows: List[tuple]) -> FlowBatch:
+    batch = FlowBatch.empty()
+    if not flows:
+        return batch
+    src, dst, src_port, dst_port, proto, start, end, packets, octets = zip(*flows)
+    src_hi, src_lo = zip(*map(_pack_address, src))
+    dst_hi, dst_lo = zip(*map(_pack_address, dst))
+    _append_columns(batch.columns, {
+        "start": start, "end": end, "src_hi": src_hi, "src_lo": src_lo, "dst_hi": dst_hi, "dst_lo": dst_lo,
+        "src_port": src_port, "dst_port": dst_port, "proto": proto, "packets": packets, "bytes": octets
+    })
+    batch._length = len(flows)
+    return batch
+
+
+# Zeek conn.log
+
+ZEEK_CONN_FIELDS = ("ts", "id.orig_h", "id.orig_p", "id.resp_h", "id.resp_p", "proto",
+                    "duration", "orig_bytes", "resp_bytes", "orig_pkts", "resp_pkts")
+_ZEEK_UNSET = ("-", "(empty)", "", None)
+
+# Connection logs repeat the same hosts on most rows
+_pack_cached = lru_cache(maxsize=65536)(pack_ip)
+
+
+def _zeek_numbers(values: Iterable, convert) -> List:
+    return [convert(value) if value not in _ZEEK_UNSET else convert(0) for value in values]
+
+
+def zeek_conn_batch(lines: Iterable[str]) -> FlowBatch:
+    """
+    Zeek conn.log rows, in TSV form with its ``#fields`` header or as JSON
+    lines, into a FlowBatch. Bytes and packets count both directions.
+    """
+    separator, pick, rows = "\t", None, []
+    for line in lines:
+        if not line or line[0] in "\r\n":
+            continue
+        if line[0] == "#":
+            if line.startswith("#separator"):
+                separator = line.split(" ", 1)[1].strip().encode().decode("unicode_escape")
+            elif line.startswith("#fields"):
+                fields = line.rstrip("\r\n").split(separator)[1:]
+                missing = [field for field in ZEEK_CONN_FIELDS if field not in fields]
+                if missing:
+                    raise ValueError(f"Zeek conn log lacks fields {missing}")
+                pick = itemgetter(*(fields.index(field) for field in ZEEK_CONN_FIELDS))
+            continue
+        if line[0] == "{":
+            record = loads_json(line)
+            rows.append([record.get(field) for field in ZEEK_CONN_FIELDS])
+        elif pick is not None:
+            try:
+                rows.append(pick(line.rstrip("\r\n").split(separator)))
+            except IndexError:
+                continue  # truncated row, e.g. the tail of a log still being written
+        else:
+            raise ValueError("Zeek TSV rows before the #fields header")
+    batch = FlowBatch.empty()
+    if not rows:
+        return batch
+    ts, src, src_port, dst, dst_port, proto, duration, orig_bytes, resp_bytes, orig_pkts, resp_pkts = zip(*rows)
+    start = _zeek_numbers(ts, float)
+    src_hi, src_lo = zip(*map(_pack_cached, map(str, src)))
+    dst_hi, dst_lo = zip(*map(_pack_cached, map(str, dst)))
+    _append_columns(batch.columns, {
+        "start": start, "end": map(add, start, _zeek_numbers(duration, float)),
+        "src_hi": src_hi, "src_lo": src_lo, "dst_hi": dst_hi, "dst_lo": dst_lo,
+        "src_port": _zeek_numbers(src_port, int), "dst_port": _zeek_numbers(dst_port, int),
+        "proto": [PROTOCOL_NUMBERS.get(str(name).lower(), 0) for name in proto],
+        "packets": map(add, _zeek_numbers(orig_pkts, int), _zeek_numbers(resp_pkts, int)),
+        "bytes": map(add, _zeek_numbers(orig_bytes, int), _zeek_numbers(resp_bytes, int))
+    })
+    batch._length = len(rows)
+    return batch
+
+
+def read_zeek_conn(path: str) -> FlowBatch:
+    with open(path, encoding="utf-8", errors="replace") as handle:
+        return zeek_conn_batch(handle)
+
+
+def read_flows(path: str) -> FlowBatch:
+    """Detect the file format from its first bytes"""
+    with open(path, "rb") as handle:
+        head = handle.read(4)
+    if head[:1] in (b"#", b"{"):
+        return read_zeek_conn(path)
+    if head in _PCAP_MAGIC:
+        reader = read_pcap
+    elif head[:2] == b"\x00\x0a":
+        reader = read_ipfix
+    elif head[:2] == b"\x00\x05":
+        reader = read_netflow_v5
+    else:
+        raise ValueError(f"Unrecognized flow file format: {path}")
+    try:
+        return reader(path)
+    except (struct.error, IndexError) as e:
+        # A header or packet cut off mid-field, e.g. a capture still being written
+        raise ValueError(f"{path} is truncated: {e}") from e
+
+
+# Periodicity
+
+def _fft(values: List[complex], inverse: bool = False) -> List[complex]:
+    """Iterative radix-2 FFT; ``len(values)`` must be a power of two"""
+    size = len(values)
+    result = list(values)
+    j = 0
+    for i in range(1, size):
+        bit = size >> 1
+        while j & bit:
+            j ^= bit
+            bit >>= 1
+        j |= bit
+        if i < j:
+            result[i], result[j] = result[j], result[i]
+    sign = 2j if inverse else -2j
+    width = 2
+    while width <= size:
+        half = width // 2
+        twiddles = [cmath.exp(sign * cmath.pi * k / width) for k in range(half)]
+        for start in range(0, size, width):
+            for k in range(half):
+                low = start + k
+                even, odd = result[low], result[low + half] * twiddles[k]
+                result[low], result[low + half] = even + odd, even - odd
+        width *= 2
+    if inverse:
+        return [value / size for value in result]
+    return result
+
+
+def gap_statistics(times: Sequence[float]) -> Tuple[float, float]:
+    """Mean inter-arrival gap of sorted event times and its coefficient of variation"""
+    gaps = list(map(sub, times[1:], times[:-1]))
+    if not gaps:
+        return 0.0, float("inf")
+    mean = sum(gaps) / len(gaps)
+    if mean <= 0:
+        return 0.0, float("inf")
+    variance = max(0.0, sum(map(mul, gaps, gaps)) / len(gaps) - mean * mean)
+    return mean, variance ** 0.5 / mean
+
+
+def spectral_periodicity(times: Sequence[float], resolution: int = 8, max_bins: int = 4096) -> Tuple[float, float]:
+    """
+    Dominant period of sorted event times and its strength in [0, 1].
+
+    Events are binned ``resolution`` bins per median gap and transformed with
+    the FFT. The magnitude at frequency f divided by the event count is the
+    Rayleigh statistic: how consistently the events fall at the same phase of
+    a cycle of length 1/f.
+    - Strict periodicity scores 1 at the fundamental.
+    - Missed beacons do not lower the score.
+    - Interleaved unrelated connections dilute it in proportion.
+    - Jitter lowers it gradually.
+    Random arrivals also produce a best peak. Strength is therefore 0 unless
+    the peak is significant at about 1% across all frequencies tried.
+    """
+    count = len(times)
+    if count < 3 or times[-1] <= times[0]:
+        return 0.0, 0.0
+    gaps = sorted(map(sub, times[1:], times[:-1]))
+    span = times[-1] - times[0]
+    width = max(gaps[count // 2 - 1] / resolution, span / (max_bins - 1))
+    if width <= 0:
+        return 0.0, 0.0
+    used = int(span / width) + 1
+    bins = 1 << used.bit_length()
+    counts = [0.0] * bins
+    for moment in times:
+        counts[int((moment - times[0]) / width)] += 1.0
+    # Without the mean, the zero padding past the span leaks into the low frequencies
+    mean = count / used
+    for index in range(used):
+        counts[index] -= mean
+    # At least two cycles inside the span, and below the binning's Nyquist limit
+    lowest = max(2, int(bins * width / span * 2))
+    magnitudes = [abs(value) / count for value in _fft(counts)[lowest:bins // 2]]
+    if not magnitudes:
+        return 0.0, 0.0
+    best = max(magnitudes)
+    frequency = magnitudes.index(best) + lowest
+    # Harmonics of a periodic train are as coherent as the fundamental; prefer the longest period
+    for divisor in (3, 2):
+        if frequency % divisor == 0 and frequency // divisor >= lowest \
+                and magnitudes[frequency // divisor - lowest] >= 0.8 * best:
+            frequency //= divisor
+            break
+    if count * best * best < math.log(len(magnitudes)) + math.log(100):
+        return bins * width / frequency, 0.0
+    return bins * width / frequency, min(1.0, best)
+
+
+# Aggregation
+
+class FlowAnalytics:
+    def __init__(self, link_capacity_bps: float = 1e9, utilization_threshold: float = 0.8,
+                 concentration_threshold: float = 0.3, min_beacon_events: int = 6,
+                 max_beacon_jitter: float = 0.2, min_beacon_interval: float = 1.0, min_periodicity: float = 0.5,
+                 spectral_budget: int = 256):
+        self.link_capacity_bps = link_capacity_bps
+        self.utilization_threshold = utilization_threshold
+        self.concentration_threshold = concentration_threshold
+        self.min_beacon_events = min_beacon_events
+        self.max_beacon_jitter = max_beacon_jitter
+        self.min_beacon_interval = min_beacon_interval
+        self.min_periodicity = min_periodicity
+        self.spectral_budget = spectral_budget
+
+    def analyze(self, flows: FlowBatch, top: int = 10) -> Dict:
+        if not len(flows):
+            return {"flows": 0, "bytes": 0, "duration": 0.0, "top_talkers": [], "bottlenecks": [], "beaconing": []}
+        columns = flows.columns
+        # (src_hi, src_lo, dst_hi, dst_lo) per row
+        pairs = list(zip(columns["src_hi"], columns["src_lo"], columns["dst_hi"], columns["dst_lo"]))
+        # One pass over the rows; per-host totals come from the (much smaller) pair table
+        pair_bytes: Dict[tuple, int] = {}
+        get = pair_bytes.get
+        for pair, volume in zip(pairs, columns["bytes"]):
+            pair_bytes[pair] = get(pair, 0) + volume
+        duration = max(1.0, max(columns["end"]) - min(columns["start"]))
+        total = sum(pair_bytes.values())
+        return {
+            "flows": len(flows),
+            "bytes": total,
+            "duration": round(duration, 3),
+            "top_talkers": self.top_talkers(pairs, pair_bytes, total, top),
+            "bottlenecks": self.bottlenecks(pair_bytes, total, duration),
+            "beaconing": self.beaconing(pairs, columns["dst_port"], columns["start"], top)
+        }
+
+    def top_talkers(self, pairs: List[tuple], pair_bytes: Dict[tuple, int], total: int, top: int) -> List[Dict]:
+        sent: Counter = Counter()
+        for (src_hi, src_lo, _, _), volume in pair_bytes.items():
+            sent[src_hi, src_lo] += volume
+        flow_counts = Counter(map(itemgetter(0, 1), pairs))
+        return [
+            {"host": unpack_ip(*source), "bytes": volume, "share": round(volume / total, 4) if total else 0.0,
+             "flows": flow_counts[source]}
+            for source, volume in sent.most_common(top)
+        ]
+
+    def bottlenecks(self, pair_bytes: Dict[tuple, int], total: int, duration: float) -> List[Dict]:
+        """Destinations carrying a large share of all bytes, or running close to link capacity"""
+        received: Counter = Counter()
+        senders: Counter = Counter()
+        for (_, _, dst_hi, dst_lo), volume in pair_bytes.items():
+            received[dst_hi, dst_lo] += volume
+            senders[dst_hi, dst_lo] += 1
+        found = []
+        for destination, volume in received.most_common(50):
+            bps = 8 * volume / duration
+            share = volume / total if total else 0.0
+            if share >= self.concentration_threshold or bps >= self.utilization_threshold * self.link_capacity_bps:
+                found.append({"host": unpack_ip(*destination), "bps": round(bps), "share": round(share, 4),
+                              "sources": senders[destination]})
+        return found
+
+    def beaconing(self, pairs: List[tuple], ports, starts, top: int) -> List[Dict]:
+        """Host pairs whose connection start times recur at near-constant intervals"""
+        keys = list(map(add, pairs, zip(ports)))
+        frequent = {key for key, count in Counter(keys).items() if count >= self.min_beacon_events}
+        if not frequent:
+            return []
+        times: Dict[tuple, List[float]] = {key: [] for key in frequent}
+        for key, start in compress(zip(keys, starts), map(frequent.__contains__, keys)):
+            times[key].append(start)
+        return self.rank_beacons(times.items(), top)
+
+    def rank_beacons(self, series: Iterable[Tuple[tuple, List[float]]], top: int,
+                     totals: Optional[Dict[tuple, int]] = None) -> List[Dict]:
+        """
+        Score (src_hi, src_lo, dst_hi, dst_lo, dst_port) -> connection times
+        series and return the strongest beacon candidates. The times lists
+        are sorted in place. ``totals`` gives connection counts when the
+        times are only a sample.
+        """
+        screened = []
+        for key, times in series:
+            if len(times) < self.min_beacon_events:
+                continue
+            times.sort()
+            mean, jitter = gap_statistics(times)
+            if mean >= self.min_beacon_interval:
+                screened.append((jitter, key, times))
+        # The spectrum costs far more than gap statistics; spend it on the most regular pairs first
+        screened.sort(key=itemgetter(0))
+        candidates = []
+        for _, (src_hi, src_lo, dst_hi, dst_lo, port), times in screened[:self.spectral_budget]:
+            finding = self.score_beacon(times)
+            if finding is not None:
+                if totals is not None:
+                    finding["connections"] = totals.get((src_hi, src_lo, dst_hi, dst_lo, port), len(times))
+                candidates.append({"src": unpack_ip(src_hi, src_lo), "dst": unpack_ip(dst_hi, dst_lo),
+                                   "dst_port": port, **finding})
+        candidates.sort(key=lambda candidate: (-candidate["periodicity"], candidate["jitter"]))
+        return candidates[:top]
+
+    def score_beacon(self, times: Sequence[float]) -> Optional[Dict]:
+        """
+        Beacon statistics for one pair's sorted connection times, or None.
+        Regular gaps are enough. Failing that, the spectrum has to show a
+        period, which still catches beacons with missed check-ins or
+        interleaved noise.
+        """
+        mean, jitter = gap_statistics(times)
+        if mean < self.min_beacon_interval:
+            return None
+        period, periodicity = spectral_periodicity(times)
+        if jitter > self.max_beacon_jitter and periodicity < self.min_periodicity:
+            return None
+        return {
+            "connections": len(times), "interval": round(period if periodicity else mean, 2),
+            "jitter": round(jitter, 3), "periodicity": round(periodicity, 3)
+        }
+
+
+def benchmark(path: str) -> Dict:
+    """Read and analyze a flow or capture file, reporting throughput"""
+    size = os.path.getsize(path)
+    began = time.perf_counter()
+    flows = read_flows(path)
+    parsed = time.perf_counter()
+    report = FlowAnalytics().analyze(flows)
+    done = time.perf_counter()
+    return {
+        "file_mb": round(size / 1e6, 1),
+        "flows": len(flows),
+        "read_mb_per_s": round(size / 1e6 / max(parsed - began, 1e-9), 1),
+        "analyze_s": round(done - parsed, 3),
+        "top_talkers": report["top_talkers"][:3],
+        "bottlenecks": report["bottlenecks"],
+        "beaconing": report["beaconing"][:3],
+        "protocols": {PROTOCOL_NAMES.get(proto, proto): count
+                      for proto, count in Counter(flows.columns["proto"]).most_common(5)}
+    }
+
+
+if __name__ == "__main__":
+    for key, value in benchmark(sys.argv[1]).items():
+        print(f"{key}: {value}")
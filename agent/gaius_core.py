@@ -1,12 +1,24 @@
 import os
+import asyncio
 from dotenv import load_dotenv
-from typing import Dict, List
+from typing import Dict, List, Optional
 import logging
+import time
+from collections import deque
 from datetime import datetime
 from enum import Enum
-from openai import OpenAI
-from response_database import ResponseDatabase
+from caching import LRUCache
+from prompt_builder import PromptResult
+from llm_batcher import LLMQueueTimeout
+from llm_resilience import ResilientLLM
+from shared_resources import DEFAULT_TENANT, SharedResources, TenantQuotas
 from handlers.siem import SplunkHandler, ElasticHandler, QRadarHandler  # Import SplunkHandler, ElasticHandler, and QRadarHandler from the appropriate module
+from handlers.edr import CrowdStrikeHandler, SentinelOneHandler, CarbonBlackHandler
+from handlers.soar import PhantomHandler, DemistoHandler, SwimlaneHandler
+from handlers.api import close_clients
+from history_store import HistoryStore, tenant_history_path
+from scenario_simulator import ScenarioSimulator
+from situation_monitor import SITUATION_INPUTS, SituationMonitor
 
 # Load environment variables
 load_dotenv()
@@ -17,62 +29,72 @@ class ThreatLevel(Enum):
     HIGH = 3
     CRITICAL = 4
 
+# Core strategic principles; read-only and shared by every tenant
+STRATEGIC_PRINCIPLES = {
+    "divide_et_impera": {
+        "principle": "Divide and conquer",
+        "applications": [
+            "Split enemy forces",
+            "Exploit internal divisions",
+            "Create strategic alliances",
+            "Isolate threats individually"
+        ]
+    },
+    "rapid_deployment": {
+        "principle": "Speed and mobility",
+        "applications": [
+            "Swift response to threats",
+            "Surprise attacks",
+            "Strategic positioning",
+            "Resource mobilization"
+        ]
+    },
+    "intelligence_network": {
+        "principle": "Information superiority",
+        "applications": [
+            "Scout network deployment",
+            "Local informant cultivation",
+            "Pattern recognition",
+            "Predictive analysis"
+        ]
+    },
+    "adaptive_leadership": {
+        "principle": "Flexible command",
+        "applications": [
+            "Situation-based strategy",
+            "Resource optimization",
+            "Morale management",
+            "Tactical adaptation"
+        ]
+    }
+}
+
 class GaiusGeneral:
-    def __init__(self):
+    # A force ratio below a bound means that threat level; at or above the last one, LOW
+    THREAT_BANDS = ((0.5, ThreatLevel.CRITICAL), (0.8, ThreatLevel.HIGH), (1.2, ThreatLevel.MEDIUM))
+    # Enemy unity below this opens divide and conquer
+    DIVISION_THRESHOLD = 0.8
+    # Fewer backup sites than this limits failover
+    MIN_BACKUP_SITES = 2
+    # Principles recommended in this share of what-if scenarios become contingency plans
+    CONTINGENCY_SHARE = 0.25
+
+    def __init__(self, shared: Optional[SharedResources] = None, tenant_id: str = DEFAULT_TENANT,
+                 quotas: Optional[TenantQuotas] = None):
         self.name = "Gaius Julius Caesar"
         self.title = "Imperator"
-        self.response_database = ResponseDatabase()
-        
-        #  Deepseek API key from environment variable
-        deepseek_api_key = os.getenv("DEEPSEEK_API_KEY")
-        if not deepseek_api_key:
-            raise ValueError("DEEPSEEK_API_KEY not found in environment variables")
-            
-        # Initialize API client with Deepseek endpoint and key
-        self.openai_client = OpenAI(
-            api_key=deepseek_api_key,
-            base_url="https://api.deepseek.com/v1"
-        )
-        
-        # Core strategic principles
-        self.strategic_principles = {
-            "divide_et_impera": {
-                "principle": "Divide and conquer",
-                "applications": [
-                    "Split enemy forces",
-                    "Exploit internal divisions",
-                    "Create strategic alliances",
-                    "Isolate threats individually"
-                ]
-            },
-            "rapid_deployment": {
-                "principle": "Speed and mobility",
-                "applications": [
-                    "Swift response to threats",
-                    "Surprise attacks",
-                    "Strategic positioning",
-                    "Resource mobilization"
-                ]
-            },
-            "intelligence_network": {
-                "principle": "Information superiority",
-                "applications": [
-                    "Scout network deployment",
-                    "Local informant cultivation",
-                    "Pattern recognition",
-                    "Predictive analysis"
-                ]
-            },
-            "adaptive_leadership": {
-                "principle": "Flexible command",
-                "applications": [
-                    "Situation-based strategy",
-                    "Resource optimization",
-                    "Morale management",
-                    "Tactical adaptation"
-                ]
-            }
-        }
+        self.tenant_id = tenant_id
+        self.quotas = quotas or TenantQuotas()
+        # Principles, templates, prompt preamble and LLM clients are shared across tenants
+        self.shared = shared or SharedResources(STRATEGIC_PRINCIPLES)
+        self.response_database = self.shared.response_database
+        self.openai_client = self.shared.openai_client
+        self.llm_batcher = self.shared.llm_batcher
+        # Answers cached for degraded mode stay per tenant; provider health is shared
+        self.llm = ResilientLLM(self.shared.llm_breaker, timeout=self.shared.llm_timeout,
+                                hedge=self.shared.llm_hedge)
+        self._llm_slots = asyncio.Semaphore(self.quotas.max_concurrent_llm)
+        self.strategic_principles = self.shared.strategic_principles
         
         # Decision making framework
         self.decision_framework = {
@@ -116,10 +138,39 @@ class GaiusGeneral:
                 "data_handlers": {}
             }
         }
+        # "siem:<platform>" -> epoch seconds of the last successful gather; kept in state
+        # snapshots so a restarted SIEM integration resumes where it left off
+        self.checkpoints: Dict[str, float] = {}
+
+        # Memoized analysis results; terrain is keyed on topology fingerprint
+        cache_entries = self.quotas.cache_entries
+        self.terrain_cache = LRUCache(maxsize=max(1, cache_entries // 4))
+        self.principle_cache = LRUCache(maxsize=cache_entries)
+        self.strength_cache = LRUCache(maxsize=cache_entries)
+
+        self.prompt_builder = self.shared.prompt_builder
+        self.prompt_stats = deque(maxlen=200)
+
+        # Assessments, threat level changes and chat turns outlive conversation_context
+        self.history = HistoryStore(tenant_history_path(os.getenv("GAIUS_HISTORY_DB", "gaius_history.db"), tenant_id))
+
+        # Live assessment fed by the security tools; recomputed only when its inputs move
+        self.situation = SituationMonitor(self)
+        # Monte Carlo what-ifs behind formulate_strategy
+        self.simulator = ScenarioSimulator(self)
 
     async def evaluate_situation(self, context: Dict) -> Dict:
-        """Enhanced situation evaluation with security platform data"""
-        base_assessment = self._perform_base_assessment(context)
+        """
+        Enhanced situation evaluation with security platform data. Without
+        explicit situation inputs this reuses the live assessment kept by
+        self.situation instead of recomputing it.
+        """
+        session = context.get("session_id")
+        if any(key in context for key in SITUATION_INPUTS):
+            base_assessment = self._perform_base_assessment(context)
+            self._record_assessment(base_assessment, session)
+        else:
+            base_assessment = dict(self.situation.current)
         
         # Gather data from integrated platforms
         security_data = await self._gather_security_platform_data()
@@ -135,42 +186,34 @@ class GaiusGeneral:
                 "previous_responses": self.conversation_context["previous_responses"][-3:]
             }
             
-            response = await self._generate_enhanced_response(response_context)
-            self.conversation_context["previous_responses"].append(response)
+            self.history.record_chat_turn("user", context["chat_message"], session, base_assessment["threat_level"])
+            response = await self._generate_enhanced_response(response_context, base_assessment)
+            previous_responses = self.conversation_context["previous_responses"]
+            previous_responses.append(response)
+            del previous_responses[:-self.quotas.max_previous_responses]
+            self.history.record_chat_turn("assistant", response, session, base_assessment["threat_level"])
             
             return self._merge_assessments(base_assessment, response)
             
         return base_assessment
 
+    def _record_assessment(self, assessment: Dict, session: str = None):
+        """Persist an assessment and note threat level changes in threat_history"""
+        self.history.record_assessment(assessment, session, sector=self._identify_affected_sector(assessment))
+        level = assessment.get("threat_level")
+        threat_history = self.conversation_context["threat_history"]
+        if level is not None and (not threat_history or threat_history[-1]["threat_level"] != level):
+            threat_history.append({"timestamp": datetime.now().isoformat(), "threat_level": level})
+            del threat_history[:-100]
+            self.history.record_threat_level(level, session)
+
     async def _enhance_with_llm(self, base_assessment: Dict, principles: Dict, context: Dict) -> Dict:
         """Modified to use async/await with proper error handling"""
         try:
             if "chat_message" in context:
-                try:
-                    # Attempt to use Deepseek API
-                    response = await self.openai_client.chat.completions.create(
-                        model="deepseek-chat",
-                        messages=[
-                            {
-                                "role": "system",
-                                "content": "You are Gaius Julius Caesar's strategic AI advisor. Respond as Caesar would."
-                            },
-                            {
-                                "role": "user",
-                                "content": context["chat_message"]
-                            }
-                        ],
-                        temperature=0.7,
-                        max_tokens=500
-                    )
-                    return self._merge_assessments(base_assessment, response.choices[0].message.content)
-                    
-                except Exception as api_error:
-                    logging.error(f"Deepseek API error: {api_error}")
-                    # Enhanced fallback responses
-                    msg = context["chat_message"].lower()
-                    response_text = self._get_fallback_response(msg)
-                    return self._merge_assessments(base_assessment, response_text)
+                prompt = self.prompt_builder.build(context, base_assessment)
+                response_text = await self._complete_prompt(prompt, context["chat_message"])
+                return self._merge_assessments(base_assessment, response_text)
                     
             return base_assessment
             
@@ -178,6 +221,72 @@ class GaiusGeneral:
             logging.error(f"Error in LLM enhancement: {e}")
             return self._merge_assessments(base_assessment, "Ave! I am currently regrouping my thoughts. Please try again shortly.")
 
+    async def _generate_enhanced_response(self, response_context: Dict, assessment: Optional[Dict] = None) -> str:
+        """
+        Generate Gaius's chat reply from the situation and conversation context.
+        Without an explicit assessment the live one is used, so key factors and
+        opportunities reach chat prompts too.
+        """
+        prompt = self.prompt_builder.build(
+            response_context, assessment if assessment is not None else self.situation.current
+        )
+        return await self._complete_prompt(prompt, response_context.get("chat_message", ""))
+
+    async def generate_strategic_advice(self, assessment: Dict, context: Dict) -> str:
+        """Ask the LLM for a strategic response to an assessment (no chat message)"""
+        prompt = self.prompt_builder.build(context, assessment)
+        return await self._complete_prompt(prompt, "")
+
+    async def _complete_prompt(self, prompt: PromptResult, chat_message: str) -> str:
+        """
+        Send a built prompt to the LLM through the circuit breaker. While the
+        provider is unhealthy this returns a cached or canned answer immediately.
+        """
+        self.prompt_stats.append({**prompt.stats, "timestamp": datetime.now().isoformat()})
+        logging.info(f"LLM prompt size: {prompt.stats['total_tokens']} tokens "
+                     f"({prompt.stats['facts_included']}/{prompt.stats['facts_considered']} facts)")
+
+        max_tokens = 500
+        cost_tokens = prompt.stats["total_tokens"] + max_tokens
+        prompt_key = tuple(message["content"] for message in prompt.messages)
+        msg = chat_message.lower()
+        cache_key = " ".join(msg.split()) or prompt_key
+        # Enhanced fallback responses
+        fallback = lambda: self._get_fallback_response(msg)
+
+        async def provider_call() -> str:
+            # Attempt to use Deepseek API
+            response = await self.openai_client.chat.completions.create(
+                model="deepseek-chat",
+                messages=prompt.messages,
+                temperature=0.7,
+                max_tokens=max_tokens
+            )
+            return response.choices[0].message.content
+
+        async def resilient_call() -> str:
+            # Runs once the batcher has a rate-limit slot, so the breaker times only the provider;
+            # a hedge goes out only if the rate limits have room for it
+            return await self.llm.call(provider_call, cache_key, fallback,
+                                       hedge_permit=lambda: self.llm_batcher.try_acquire(cost_tokens))
+
+        # This tenant's own slots and the shared rate limits are waited for under one queue
+        # deadline, both outside the shared breaker, so a busy tenant can't open it for the rest
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.shared.llm_queue_wait
+        try:
+            await asyncio.wait_for(self._llm_slots.acquire(), self.shared.llm_queue_wait)
+        except asyncio.TimeoutError:
+            return self.llm.queue_timeout(cache_key, fallback)
+        try:
+            # Identical prompts share one provider call
+            return await self.llm_batcher.submit(prompt_key, resilient_call, cost_tokens=cost_tokens,
+                                                 max_wait=max(0.0, deadline - loop.time()))
+        except LLMQueueTimeout:
+            return self.llm.queue_timeout(cache_key, fallback)
+        finally:
+            self._llm_slots.release()
+
     async def integrate_security_platform(self, platform_type: str, config: Dict) -> bool:
         """Integrate with external security platforms"""
         try:
@@ -192,6 +301,8 @@ class GaiusGeneral:
                 
             # Initialize connection handler
             handler = await self._create_platform_handler(platform_type, config)
+            if platform_type == "siem":
+                handler.since = self.checkpoints.get(f"siem:{platform_name}")
             self.security_integrations[platform_type]["data_handlers"][platform_name] = handler
             
             # Test connection
@@ -224,6 +335,30 @@ class GaiusGeneral:
         elif platform == "qradar":
             return QRadarHandler(config)
 
+    async def _create_edr_handler(self, config: Dict):
+        """Create EDR integration handler"""
+        platform = config.get("platform_name")
+        if platform == "crowdstrike":
+            return CrowdStrikeHandler(config)
+        elif platform == "sentinel":
+            return SentinelOneHandler(config)
+        elif platform == "carbon_black":
+            return CarbonBlackHandler(config)
+
+    async def _create_soar_handler(self, config: Dict):
+        """Create SOAR integration handler"""
+        platform = config.get("platform_name")
+        if platform == "phantom":
+            return PhantomHandler(config)
+        elif platform == "demisto":
+            return DemistoHandler(config)
+        elif platform == "swimlane":
+            return SwimlaneHandler(config)
+
+    async def close_integrations(self):
+        """Release pooled platform connections"""
+        await close_clients()
+
     async def _test_platform_connection(self, handler) -> bool:
         """Test connection to security platform"""
         try:
@@ -234,19 +369,26 @@ class GaiusGeneral:
 
     async def _gather_security_platform_data(self) -> Dict:
         """Gather data from integrated security platforms"""
-        security_data = {}
-        
-        for platform_type, config in self.security_integrations.items():
-            platform_data = {}
-            for platform, handler in config["data_handlers"].items():
-                if config["connection_status"].get(platform) == "connected":
-                    try:
-                        platform_data[platform] = await handler.gather_data()
-                    except Exception as e:
-                        logging.error(f"Error gathering data from {platform}: {e}")
-                        
-            security_data[platform_type] = platform_data
-            
+        security_data = {platform_type: {} for platform_type in self.security_integrations}
+        sources = [
+            (platform_type, platform, handler)
+            for platform_type, config in self.security_integrations.items()
+            for platform, handler in config["data_handlers"].items()
+            if config["connection_status"].get(platform) == "connected"
+        ]
+        # Platforms are queried concurrently; one slow console doesn't stall the rest
+        started = time.time()
+        results = await asyncio.gather(
+            *(handler.gather_data() for _, _, handler in sources), return_exceptions=True
+        )
+        for (platform_type, platform, handler), result in zip(sources, results):
+            if isinstance(result, Exception):
+                logging.error(f"Error gathering data from {platform}: {result}")
+                continue
+            security_data[platform_type][platform] = result
+            if platform_type == "siem" and "error" not in result:
+                handler.since = self.checkpoints[f"siem:{platform}"] = started
+
         return security_data
 
     def _get_fallback_response(self, msg: str) -> str:
@@ -276,12 +418,37 @@ class GaiusGeneral:
             return random.choice(responses["status"])
         return random.choice(responses["default"])
 
-    def formulate_strategy(self, assessment):
+    async def formulate_strategy(self, context: Optional[Dict] = None, **simulation) -> Dict:
         """
-        Develops comprehensive strategy based on situation assessment
-        Incorporates relevant strategic principles
+        Develops comprehensive strategy based on situation assessment.
+        Each recommended principle is rated by how many what-if variations of
+        the situation still call for it (see scenario_simulator); principles
+        that often appear in those variations become contingency plans.
+        Without a context the live situation inputs are used
         """
-        pass
+        if context is None:
+            context = dict(self.situation.inputs)
+        result = await self.simulator.simulate(context, **simulation)
+        baseline, principles = result["baseline"], result["principles"]
+        contingencies = [principle for principle, share in principles["alternatives"].items()
+                         if share >= self.CONTINGENCY_SHARE]
+
+        execution = self.decision_framework["execution"]
+        execution["primary_strategy"] = baseline["strategy"]
+        execution["contingency_plans"] = contingencies
+        return {
+            "threat_level": baseline["threat_level"],
+            "strategy": baseline["strategy"],
+            "principles": [{"key": principle, **self.strategic_principles[principle],
+                            "robustness": principles["robustness"][principle]}
+                           for principle in baseline["recommended_principles"]],
+            "contingency_plans": [{"key": principle, **self.strategic_principles[principle],
+                                   "share": principles["alternatives"][principle]}
+                                  for principle in contingencies],
+            # Share of scenarios recommending exactly the baseline principles
+            "confidence": principles["unchanged"],
+            "simulation": result
+        }
 
     def adapt_principles(self, modern_context):
         """
@@ -302,10 +469,20 @@ class GaiusGeneral:
             "opportunities": [],
             "recommended_principles": []
         }
+
+        # Alert volume attributed to sectors by the detection-zone index
+        if context.get('sector_activity'):
+            assessment['affected_sectors'] = self._rank_sectors(context['sector_activity'])
         
         # 1. Terrain and Position Analysis (Caesar always started here)
-        terrain_factors = self._analyze_terrain(context.get('terrain', {}))
+        terrain_factors = self._get_terrain_factors(context.get('terrain', {}))
         assessment['key_factors'].extend(terrain_factors)
+
+        # Enemy movements observed on the ground: beaconing and lateral movement
+        behavior = context.get('behavior') or {}
+        assessment['key_factors'].extend(self._analyze_behavior(behavior))
+        if behavior.get('sectors'):
+            assessment['behavior_sectors'] = dict(behavior['sectors'])
         
         # 2. Force Comparison (Caesar's strength/weakness evaluation)
         force_analysis = self._analyze_forces(
@@ -319,15 +496,41 @@ class GaiusGeneral:
         assessment['opportunities'] = opportunities
         
         # 4. Principle Selection (Which strategies best fit the situation)
-        applicable_principles = self._select_strategic_principles(
+        principle_key = (
             assessment['threat_level'],
-            assessment['key_factors'],
-            opportunities
+            tuple(assessment['key_factors']),
+            tuple(opportunities)
+        )
+        applicable_principles = self.principle_cache.get_or_compute(
+            principle_key,
+            lambda: tuple(self._select_strategic_principles(*principle_key))
         )
-        assessment['recommended_principles'] = applicable_principles
+        assessment['recommended_principles'] = list(applicable_principles)
         
         return assessment
 
+    def _get_terrain_factors(self, network_topology: Dict) -> List[str]:
+        """Terrain analysis memoized on the snapshot fingerprint when one is available"""
+        fingerprint = getattr(network_topology, "fingerprint", None)
+        if fingerprint is None:
+            return self._analyze_terrain(network_topology)
+        factors = self.terrain_cache.get_or_compute(
+            fingerprint,
+            lambda: tuple(self._analyze_terrain(network_topology))
+        )
+        return list(factors)
+
+    def invalidate_terrain(self, fingerprint: str):
+        """Drop terrain analysis cached for a topology that is no longer current"""
+        self.terrain_cache.invalidate(fingerprint)
+
+    def get_cache_stats(self) -> Dict:
+        return {
+            "terrain": self.terrain_cache.stats(),
+            "principles": self.principle_cache.stats(),
+            "defense_strength": self.strength_cache.stats()
+        }
+
     def _analyze_terrain(self, network_topology: Dict) -> List[str]:
         """
         Caesar's terrain analysis methodology adapted for network infrastructure
@@ -354,7 +557,7 @@ class GaiusGeneral:
     
         # Failover Systems (Exit Routes)
         failover = network_topology.get('failover_systems', {})
-        if failover.get('backup_sites', 0) < 2:
+        if failover.get('backup_sites', 0) < self.MIN_BACKUP_SITES:
             key_factors.append('limited_failover_options')
         if failover.get('disaster_recovery'):
             key_factors.append('recovery_capability')
@@ -363,6 +566,17 @@ class GaiusGeneral:
         
         return key_factors
 
+    def _analyze_behavior(self, behavior: Dict) -> List[str]:
+        """Key factors from behavioral findings (see behavior_detection)"""
+        key_factors = []
+        # Beaconing implants mean the enemy already holds ground inside the walls
+        if behavior.get('beaconing'):
+            key_factors.extend(['command_and_control_beaconing', 'network_vulnerability'])
+        # Admin-protocol fan-out between internal hosts means stolen credentials in use
+        if behavior.get('lateral_movement'):
+            key_factors.extend(['lateral_movement', 'authentication_breach'])
+        return key_factors
+
     def _analyze_forces(self, friendly: Dict, enemy: Dict) -> Dict:
         """Caesar's force comparison methodology"""
         return {
@@ -373,12 +587,9 @@ class GaiusGeneral:
 
     def _determine_threat_level(self, force_analysis: Dict) -> ThreatLevel:
         """Caesar's threat assessment methodology"""
-        if force_analysis['strength_ratio'] < 0.5:
-            return ThreatLevel.CRITICAL
-        elif force_analysis['strength_ratio'] < 0.8:
-            return ThreatLevel.HIGH
-        elif force_analysis['strength_ratio'] < 1.2:
-            return ThreatLevel.MEDIUM
+        for bound, level in self.THREAT_BANDS:
+            if force_analysis['strength_ratio'] < bound:
+                return level
         return ThreatLevel.LOW
 
     def _identify_opportunities(self, context: Dict, force_analysis: Dict) -> List[str]:
@@ -386,7 +597,7 @@ class GaiusGeneral:
         opportunities = []
         
         # Look for divide and conquer opportunities
-        if context.get('enemy_unity', 1.0) < 0.8:
+        if context.get('enemy_unity', 1.0) < self.DIVISION_THRESHOLD:
             opportunities.append('internal_division_exploit')
             
         # Quick strike opportunities
@@ -396,6 +607,13 @@ class GaiusGeneral:
         # Supply line attacks (Caesar's favorite)
         if not force_analysis['supply_advantage']:
             opportunities.append('supply_line_vulnerability')
+
+        # Cut the enemy's lines of communication, and wall off the hosts it is moving through
+        behavior = context.get('behavior') or {}
+        if behavior.get('beaconing'):
+            opportunities.append('c2_channel_disruption')
+        if behavior.get('lateral_movement'):
+            opportunities.append('segment_isolation')
             
         return opportunities
 
@@ -411,6 +629,12 @@ class GaiusGeneral:
         if 'rapid_strike' in opportunities:
             selected_principles.append('rapid_deployment')
             
+        if 'segment_isolation' in opportunities and 'divide_et_impera' not in selected_principles:
+            selected_principles.append('divide_et_impera')
+
+        if 'c2_channel_disruption' in opportunities and 'rapid_deployment' not in selected_principles:
+            selected_principles.append('rapid_deployment')
+
         if threat_level in [ThreatLevel.HIGH, ThreatLevel.CRITICAL]:
             selected_principles.append('intelligence_network')
             
@@ -418,18 +642,8 @@ class GaiusGeneral:
 
     def _construct_strategic_prompt(self, base_assessment: Dict, principles: Dict, context: Dict) -> str:
         """Constructs prompt for LLM strategic enhancement"""
-        return f"""
-        Initial Assessment:
-        - Threat Level: {base_assessment['threat_level']}
-        - Key Factors: {', '.join(base_assessment['key_factors'])}
-        - Opportunities: {', '.join(base_assessment['opportunities'])}
-        
-        Given this situation, formulate a strategic response considering:
-        1. Immediate defensive actions
-        2. Resource allocation
-        3. Long-term strategic positioning
-        4. Risk mitigation measures
-        """
+        prompt = self.prompt_builder.build(context, base_assessment)
+        return prompt.messages[-1]["content"]
 
     def _merge_assessments(self, base_assessment: Dict, llm_response: str) -> Dict:
         """Merges base assessment with LLM insights"""
@@ -443,8 +657,17 @@ class GaiusGeneral:
             logging.error(f"Error merging assessments: {e}")
             return base_assessment
 
+    def _rank_sectors(self, sector_activity: Dict[str, Dict[str, int]]) -> Dict[str, int]:
+        """Total alerts per sector, busiest first"""
+        totals = {sector: sum(origins.values()) for sector, origins in sector_activity.items()}
+        return dict(sorted(totals.items(), key=lambda item: item[1], reverse=True))
+
     def _identify_affected_sector(self, assessment: Dict) -> str:
         """Determine which sector is most relevant to the current situation"""
+        if assessment.get("affected_sectors"):
+            return next(iter(assessment["affected_sectors"]))
+        if assessment.get("behavior_sectors"):
+            return next(iter(assessment["behavior_sectors"]))
         if "network_vulnerability" in assessment.get("key_factors", []):
             return "network perimeter"
         elif "authentication_breach" in assessment.get("key_factors", []):
@@ -453,13 +676,23 @@ class GaiusGeneral:
 
     def _determine_strategy(self, assessment: Dict) -> str:
         """Select appropriate strategic response"""
-        if assessment["threat_level"] in [ThreatLevel.HIGH, ThreatLevel.CRITICAL]:
+        key_factors = assessment.get("key_factors", [])
+        if "lateral_movement" in key_factors:
+            return "containment protocol"
+        if assessment["threat_level"] in [ThreatLevel.HIGH, ThreatLevel.CRITICAL] \
+                or "command_and_control_beaconing" in key_factors:
             return "active defense protocol"
         return "standard defensive posture"
 
     def _calculate_defense_strength(self, assessment: Dict) -> int:
         """Calculate current defensive capability percentage"""
-        factors = assessment.get("key_factors", [])
+        factors = tuple(assessment.get("key_factors", []))
+        return self.strength_cache.get_or_compute(
+            factors,
+            lambda: self._score_defense_factors(factors)
+        )
+
+    def _score_defense_factors(self, factors) -> int:
         strengths = len([f for f in factors if "advantage" in f or "capability" in f])
         weaknesses = len([f for f in factors if "vulnerability" in f or "limited" in f])
         
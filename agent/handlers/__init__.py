@@ -1,3 +1,7 @@
 from .siem import SplunkHandler, ElasticHandler, QRadarHandler
+from .edr import CrowdStrikeHandler, SentinelOneHandler, CarbonBlackHandler
+from .soar import PhantomHandler, DemistoHandler, SwimlaneHandler
 
-__all__ = ['SplunkHandler', 'ElasticHandler', 'QRadarHandler']
\ No newline at end of file
+__all__ = ['SplunkHandler', 'ElasticHandler', 'QRadarHandler',
+           'CrowdStrikeHandler', 'SentinelOneHandler', 'CarbonBlackHandler',
+           'PhantomHandler', 'DemistoHandler', 'SwimlaneHandler']
\ No newline at end of file
@@ -0,0 +1,176 @@
+"""
+Shared HTTP plumbing for platform handlers.
+
+Handlers talking to the same host share one pooled httpx.AsyncClient, and every
+request goes through PlatformAPI, which bounds concurrency per handler, backs
+off on 429/503 using the platform's Retry-After/rate-limit headers and walks
+paginated endpoints.
+"""
+import asyncio
+import re
+import time
+from email.utils import parsedate_to_datetime
+from typing import AsyncIterator, Callable, Dict, Iterable, List, Optional, Tuple
+
+import httpx
+
+_clients: Dict[Tuple[str, bool], httpx.AsyncClient] = {}
+
+RETRY_STATUSES = (429, 502, 503, 504)
+
+# Host ids, hostnames, IPv4/IPv6 addresses and CIDRs, user names and hashes. Excludes
+# quotes, whitespace, commas and backslashes, which could end a quoted value, split
+# a list or start another command when a target is spliced into a platform query
+IDENTIFIER = re.compile(r"[A-Za-z0-9][A-Za-z0-9._:@/-]{0,254}")
+
+
+def shared_client(base_url: str, verify: bool = True, max_connections: int = 20,
+                  timeout: float = 30.0) -> httpx.AsyncClient:
+    """Pooled client per (origin, verify); reused across handlers and requests"""
+    url = httpx.URL(base_url)
+    key = (f"{url.scheme}://{url.netloc.decode('ascii')}", verify)
+    client = _clients.get(key)
+    if client is None or client.is_closed:
+        client = _clients[key] = httpx.AsyncClient(
+            base_url=key[0],
+            verify=verify,
+            timeout=timeout,
+            limits=httpx.Limits(max_connections=max_connections,
+                                max_keepalive_connections=max_connections)
+        )
+    return client
+
+
+async def close_clients():
+    clients = list(_clients.values())
+    _clients.clear()
+    await asyncio.gather(*(client.aclose() for client in clients), return_exceptions=True)
+
+
+def check_identifiers(values: Iterable, what: str = "target") -> List:
+    """The values as a list if each is an int or matches IDENTIFIER; raises ValueError otherwise"""
+    values = list(values)
+    for value in values:
+        if isinstance(value, bool) or not (isinstance(value, int) or
+                                           isinstance(value, str) and IDENTIFIER.fullmatch(value)):
+            raise ValueError(f"Invalid {what}: {value!r}")
+    return values
+
+
+def chunked(values: Iterable, size: int) -> List[List]:
+    values = list(values)
+    return [values[i:i + size] for i in range(0, len(values), size)]
+
+
+def retry_delay(response: httpx.Response, default: float) -> float:
+    """Seconds to wait before retrying, from Retry-After or rate-limit reset headers"""
+    headers = response.headers
+    retry_after = headers.get("retry-after")
+    if retry_after:
+        try:
+            return max(0.0, float(retry_after))
+        except ValueError:
+            try:
+                return max(0.0, parsedate_to_datetime(retry_after).timestamp() - time.time())
+            except (TypeError, ValueError):
+                pass
+    # CrowdStrike and others send an absolute epoch when the window resets
+    reset = headers.get("x-ratelimit-retryafter") or headers.get("x-ratelimit-reset")
+    if reset:
+        try:
+            reset_value = float(reset)
+            return max(0.0, reset_value - time.time() if reset_value > 1e9 else reset_value)
+        except ValueError:
+            pass
+    return default
+
+
+class PlatformAPIError(Exception):
+    """Raised when a platform request fails after retries"""
+
+
+class PlatformAPI:
+    """Rate-limit aware request helper bound to one platform endpoint"""
+    def __init__(self, base_url: str, verify: bool = True, max_concurrency: int = 8,
+                 max_retries: int = 4, backoff: float = 0.5, max_delay: float = 60.0):
+        self.base_url = base_url.rstrip("/")
+        self.client = shared_client(self.base_url, verify)
+        self._prefix = httpx.URL(self.base_url).path.rstrip("/")
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.max_delay = max_delay
+        self.counters = {"requests": 0, "retries": 0, "rate_limited_seconds": 0.0, "errors": 0}
+
+    async def request(self, method: str, path: str, **kwargs) -> httpx.Response:
+        attempt = 0
+        while True:
+            async with self._semaphore:
+                self.counters["requests"] += 1
+                try:
+                    response = await self.client.request(method, self._prefix + path, **kwargs)
+                except httpx.TransportError as e:
+                    response = None
+                    error = e
+            if response is not None and response.status_code not in RETRY_STATUSES:
+                if response.is_error:
+                    self.counters["errors"] += 1
+                    raise PlatformAPIError(f"{method} {path} returned {response.status_code}")
+                # Slow down before the platform starts rejecting us
+                if response.headers.get("x-ratelimit-remaining") == "0":
+                    await self._pause(retry_delay(response, 0.0))
+                return response
+            if attempt >= self.max_retries:
+                self.counters["errors"] += 1
+                detail = f"status {response.status_code}" if response is not None else str(error)
+                raise PlatformAPIError(f"{method} {path} failed after {attempt + 1} attempts: {detail}")
+            default = self.backoff * 2 ** attempt
+            await self._pause(retry_delay(response, default) if response is not None else default)
+            self.counters["retries"] += 1
+            attempt += 1
+
+    async def _pause(self, delay: float):
+        delay = min(delay, self.max_delay)
+        if delay > 0:
+            self.counters["rate_limited_seconds"] += delay
+            await asyncio.sleep(delay)
+
+    async def json(self, method: str, path: str, **kwargs) -> Dict:
+        response = await self.request(method, path, **kwargs)
+        return response.json() if response.content else {}
+
+    async def paginate(self, method: str, path: str, items: Callable[[Dict], List],
+                       next_page: Callable[[Dict, Dict], Optional[Dict]], limit: Optional[int] = None,
+                       **kwargs) -> AsyncIterator[Dict]:
+        """
+        Yield items across pages. ``next_page(body, kwargs)`` returns the request
+        kwargs for the following page, or None when the last page was reached.
+        """
+        yielded = 0
+        while kwargs is not None:
+            body = await self.json(method, path, **kwargs)
+            for item in items(body):
+                yield item
+                yielded += 1
+                if limit is not None and yielded >= limit:
+                    return
+            kwargs = next_page(body, kwargs)
+
+    async def gather_batches(self, values: Iterable, size: int, fetch: Callable) -> List:
+        """Run ``fetch(batch)`` for each chunk of ``values`` concurrently and flatten the results"""
+        results = await asyncio.gather(*(fetch(batch) for batch in chunked(values, size)))
+        return [item for batch in results for item in batch]
+
+    def snapshot(self) -> Dict:
+        return {**self.counters, "rate_limited_seconds": round(self.counters["rate_limited_seconds"], 3)}
+
+
+def with_params(kwargs: Dict, **params) -> Dict:
+    """Copy request kwargs with query parameters updated"""
+    return {**kwargs, "params": {**kwargs.get("params", {}), **params}}
+
+
+def with_json(kwargs: Dict, **fields) -> Dict:
+    """Copy request kwargs with JSON body fields updated"""
+    return {**kwargs, "json": {**kwargs.get("json", {}), **fields}}
+
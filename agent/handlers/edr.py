@@ -0,0 +1,306 @@
+from typing import Dict, Any, Iterable, List, Optional
+import asyncio
+import logging
+import time
+
+from .api import PlatformAPI, check_identifiers, with_json, with_params
+
+SEVERITIES = ("info", "low", "medium", "high", "critical")
+
+
+def _severity(value) -> str:
+    """Map numeric (0-100 or 1-5/1-10) or named platform severities onto ours"""
+    if isinstance(value, str):
+        value = value.lower()
+        return value if value in SEVERITIES else "medium"
+    if value is None:
+        return "medium"
+    score = float(value)
+    if score > 10:
+        score /= 20
+    elif score > 5:
+        score /= 2
+    return SEVERITIES[min(4, max(0, int(round(score)) - 1))]
+
+
+def _device_ids(host_ids: List[str]) -> List:
+    """Carbon Black device ids are integers on the wire"""
+    return [int(host_id) if str(host_id).isdigit() else host_id for host_id in host_ids]
+
+
+class BaseEDRHandler:
+    """
+    Base class for all EDR handlers. Host lookups, detection queries and
+    isolation are batched ``batch_size`` ids per request and the batches run
+    concurrently over the platform's shared connection pool. Host ids are
+    checked against api.IDENTIFIER first, since some platforms take them
+    inside query strings.
+    """
+    platform = "edr"
+    batch_size = 100
+    page_size = 500
+
+    def __init__(self, config: Dict):
+        self.url = config["url"]
+        self.gather_limit = config.get("gather_limit", 1000)
+        self.api = PlatformAPI(
+            self.url,
+            verify=config.get("verify_ssl", True),
+            max_concurrency=config.get("max_concurrency", 8)
+        )
+
+    async def _headers(self) -> Dict[str, str]:
+        raise NotImplementedError
+
+    async def _fetch_hosts(self, host_ids: List[str]) -> List[Dict]:
+        raise NotImplementedError
+
+    async def _fetch_detections(self, host_ids: Optional[List[str]], limit: int) -> List[Dict]:
+        raise NotImplementedError
+
+    async def _isolate(self, host_ids: List[str], release: bool) -> List[str]:
+        """Isolate (or release) one batch; returns the ids the platform accepted"""
+        raise NotImplementedError
+
+    async def test_connection(self) -> bool:
+        try:
+            await self._fetch_detections(None, 1)
+            return True
+        except Exception as e:
+            logging.error(f"{self.platform} connection test failed: {e}")
+            return False
+
+    async def get_hosts(self, host_ids: Iterable[str]) -> List[Dict]:
+        host_ids = check_identifiers(host_ids, "host id")
+        return await self.api.gather_batches(dict.fromkeys(host_ids), self.batch_size, self._fetch_hosts)
+
+    async def get_detections(self, host_ids: Optional[Iterable[str]] = None, limit: int = 500) -> List[Dict]:
+        if host_ids is None:
+            return await self._fetch_detections(None, limit)
+        host_ids = check_identifiers(host_ids, "host id")
+        return (await self.api.gather_batches(
+            dict.fromkeys(host_ids), self.batch_size,
+            lambda batch: self._fetch_detections(batch, limit)
+        ))[:limit]
+
+    async def isolate_hosts(self, host_ids: Iterable[str], release: bool = False) -> Dict[str, bool]:
+        """Contain hosts in batches; maps each host id to whether the platform accepted it"""
+        host_ids = list(dict.fromkeys(check_identifiers(host_ids, "host id")))
+        accepted = set(await self.api.gather_batches(
+            host_ids, self.batch_size, lambda batch: self._isolate(batch, release)
+        ))
+        return {host_id: host_id in accepted for host_id in host_ids}
+
+    async def gather_data(self) -> Dict[str, Any]:
+        try:
+            detections = await self.get_detections(limit=self.gather_limit)
+            affected = {detection["host_id"] for detection in detections if detection.get("host_id")}
+            return {
+                "alerts": detections,
+                "metrics": {
+                    "detections": len(detections),
+                    "affected_hosts": len(affected),
+                    "api": self.api.snapshot()
+                },
+                "status": "operational"
+            }
+        except Exception as e:
+            logging.error(f"Error gathering {self.platform} data: {e}")
+            return {"error": str(e)}
+
+
+class CrowdStrikeHandler(BaseEDRHandler):
+    platform = "crowdstrike"
+
+    def __init__(self, config: Dict):
+        super().__init__(config)
+        self.client_id = config["client_id"]
+        self.client_secret = config["client_secret"]
+        self._token: Optional[str] = None
+        self._token_expires = 0.0
+        self._token_lock = asyncio.Lock()
+
+    async def _headers(self) -> Dict[str, str]:
+        async with self._token_lock:
+            if self._token is None or time.monotonic() >= self._token_expires:
+                body = await self.api.json("POST", "/oauth2/token", data={
+                    "client_id": self.client_id, "client_secret": self.client_secret
+                })
+                self._token = body["access_token"]
+                # Refresh a minute early so in-flight batches never carry a stale token
+                self._token_expires = time.monotonic() + body.get("expires_in", 1800) - 60
+        return {"Authorization": f"Bearer {self._token}"}
+
+    async def _fetch_hosts(self, host_ids: List[str]) -> List[Dict]:
+        body = await self.api.json("GET", "/devices/entities/devices/v2",
+                                   params={"ids": host_ids}, headers=await self._headers())
+        return [{
+            "id": device.get("device_id"),
+            "hostname": device.get("hostname"),
+            "ip": device.get("local_ip"),
+            "os": device.get("os_version"),
+            "status": device.get("status")
+        } for device in body.get("resources") or []]
+
+    async def _fetch_detections(self, host_ids: Optional[List[str]], limit: int) -> List[Dict]:
+        headers = await self._headers()
+        params = {"limit": min(limit, self.page_size), "offset": 0, "sort": "last_behavior|desc"}
+        if host_ids:
+            params["filter"] = "device.device_id:[" + ",".join(f"'{host_id}'" for host_id in host_ids) + "]"
+
+        def next_page(body: Dict, kwargs: Dict) -> Optional[Dict]:
+            pagination = (body.get("meta") or {}).get("pagination") or {}
+            offset = pagination.get("offset", 0) + len(body.get("resources") or [])
+            if not body.get("resources") or offset >= pagination.get("total", 0):
+                return None
+            return with_params(kwargs, offset=offset)
+
+        detection_ids = [detection_id async for detection_id in self.api.paginate(
+            "GET", "/detects/queries/detects/v1", lambda body: body.get("resources") or [],
+            next_page, limit=limit, params=params, headers=headers
+        )]
+
+        async def summaries(batch: List[str]) -> List[Dict]:
+            body = await self.api.json("POST", "/detects/entities/summaries/GET/v1",
+                                       json={"ids": batch}, headers=headers)
+            return body.get("resources") or []
+
+        return [{
+            "id": detection.get("detection_id"),
+            "host_id": (detection.get("device") or {}).get("device_id"),
+            "hostname": (detection.get("device") or {}).get("hostname"),
+            "severity": _severity(detection.get("max_severity_displayname") or detection.get("max_severity")),
+            "name": (detection.get("behaviors") or [{}])[0].get("tactic", "detection"),
+            "timestamp": detection.get("last_behavior") or detection.get("created_timestamp"),
+            "platform": self.platform
+        } for detection in await self.api.gather_batches(detection_ids, self.batch_size, summaries)]
+
+    async def _isolate(self, host_ids: List[str], release: bool) -> List[str]:
+        body = await self.api.json(
+            "POST", "/devices/entities/devices-actions/v2",
+            params={"action_name": "lift_containment" if release else "contain"},
+            json={"ids": host_ids}, headers=await self._headers()
+        )
+        return [resource.get("id") for resource in body.get("resources") or []]
+
+
+class SentinelOneHandler(BaseEDRHandler):
+    platform = "sentinel"
+
+    def __init__(self, config: Dict):
+        super().__init__(config)
+        self.api_token = config["api_token"]
+
+    async def _headers(self) -> Dict[str, str]:
+        return {"Authorization": f"ApiToken {self.api_token}"}
+
+    @staticmethod
+    def _next_cursor(body: Dict, kwargs: Dict) -> Optional[Dict]:
+        cursor = (body.get("pagination") or {}).get("nextCursor")
+        return with_params(kwargs, cursor=cursor) if cursor else None
+
+    async def _fetch_hosts(self, host_ids: List[str]) -> List[Dict]:
+        params = {"ids": ",".join(host_ids), "limit": min(len(host_ids), 1000)}
+        return [{
+            "id": agent.get("id"),
+            "hostname": agent.get("computerName"),
+            "ip": agent.get("lastIpToMgmt"),
+            "os": agent.get("osName"),
+            "status": "isolated" if agent.get("networkStatus") == "disconnected" else agent.get("networkStatus")
+        } async for agent in self.api.paginate(
+            "GET", "/web/api/v2.1/agents", lambda body: body.get("data") or [], self._next_cursor,
+            params=params, headers=await self._headers()
+        )]
+
+    async def _fetch_detections(self, host_ids: Optional[List[str]], limit: int) -> List[Dict]:
+        params = {"limit": min(limit, self.page_size), "sortBy": "createdAt", "sortOrder": "desc"}
+        if host_ids:
+            params["agentIds"] = ",".join(host_ids)
+        detections = []
+        async for threat in self.api.paginate(
+            "GET", "/web/api/v2.1/threats", lambda body: body.get("data") or [], self._next_cursor,
+            limit=limit, params=params, headers=await self._headers()
+        ):
+            info = threat.get("threatInfo") or {}
+            agent = threat.get("agentRealtimeInfo") or {}
+            detections.append({
+                "id": threat.get("id"),
+                "host_id": agent.get("agentId"),
+                "hostname": agent.get("agentComputerName"),
+                "severity": "high" if info.get("confidenceLevel") == "malicious" else "medium",
+                "name": info.get("threatName", "threat"),
+                "timestamp": info.get("createdAt"),
+                "platform": self.platform
+            })
+        return detections
+
+    async def _isolate(self, host_ids: List[str], release: bool) -> List[str]:
+        action = "connect" if release else "disconnect"
+        body = await self.api.json("POST", f"/web/api/v2.1/agents/actions/{action}",
+                                   json={"filter": {"ids": host_ids}}, headers=await self._headers())
+        # SentinelOne reports only a count; a full count means every id was accepted
+        affected = (body.get("data") or {}).get("affected", 0)
+        return host_ids if affected >= len(host_ids) else host_ids[:affected]
+
+
+class CarbonBlackHandler(BaseEDRHandler):
+    platform = "carbon_black"
+
+    def __init__(self, config: Dict):
+        super().__init__(config)
+        self.api_id = config["api_id"]
+        self.api_key = config["api_key"]
+        self.org_key = config["org_key"]
+
+    async def _headers(self) -> Dict[str, str]:
+        return {"X-Auth-Token": f"{self.api_key}/{self.api_id}"}
+
+    @property
+    def _org_path(self) -> str:
+        return f"/appservices/v6/orgs/{self.org_key}"
+
+    def _next_rows(self, body: Dict, kwargs: Dict) -> Optional[Dict]:
+        start = kwargs["json"].get("start", 0) + len(body.get("results") or [])
+        if not body.get("results") or start >= body.get("num_found", 0):
+            return None
+        return with_json(kwargs, start=start)
+
+    async def _fetch_hosts(self, host_ids: List[str]) -> List[Dict]:
+        query = {"criteria": {"id": _device_ids(host_ids)}, "start": 0, "rows": len(host_ids)}
+        return [{
+            "id": str(device.get("id")),
+            "hostname": device.get("name"),
+            "ip": device.get("last_internal_ip_address"),
+            "os": device.get("os_version"),
+            "status": "isolated" if device.get("quarantined") else device.get("status", "").lower()
+        } async for device in self.api.paginate(
+            "POST", f"{self._org_path}/devices/_search", lambda body: body.get("results") or [],
+            self._next_rows, json=query, headers=await self._headers()
+        )]
+
+    async def _fetch_detections(self, host_ids: Optional[List[str]], limit: int) -> List[Dict]:
+        query = {"criteria": {}, "start": 0, "rows": min(limit, self.page_size),
+                 "sort": [{"field": "last_update_time", "order": "DESC"}]}
+        if host_ids:
+            query["criteria"]["device_id"] = _device_ids(host_ids)
+        return [{
+            "id": alert.get("id"),
+            "host_id": str(alert.get("device_id")),
+            "hostname": alert.get("device_name"),
+            "severity": _severity(alert.get("severity")),
+            "name": alert.get("reason") or alert.get("type", "alert"),
+            "timestamp": alert.get("last_update_time"),
+            "platform": self.platform
+        } async for alert in self.api.paginate(
+            "POST", f"{self._org_path}/alerts/_search", lambda body: body.get("results") or [],
+            self._next_rows, limit=limit, json=query, headers=await self._headers()
+        )]
+
+    async def _isolate(self, host_ids: List[str], release: bool) -> List[str]:
+        await self.api.request("POST", f"{self._org_path}/device_actions", headers=await self._headers(), json={
+            "action_type": "QUARANTINE",
+            "device_id": _device_ids(host_ids),
+            "options": {"toggle": "OFF" if release else "ON"}
+        })
+        # Device actions are accepted as a whole (204) or raise
+        return host_ids
@@ -1,8 +1,12 @@
-from typing import Dict, Any
+from typing import Dict, Any, Optional
 import logging
 
 class BaseSIEMHandler:
     """Base class for all SIEM handlers"""
+    # Epoch seconds of the last successful gather (restored across restarts); queries only
+    # need events newer than this
+    since: Optional[float] = None
+
     async def test_connection(self) -> bool:
         raise NotImplementedError
         
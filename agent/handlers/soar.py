@@ -0,0 +1,243 @@
+from typing import Dict, Any, Iterable, List, Optional
+import logging
+import re
+from urllib.parse import quote
+
+from .api import PlatformAPI, check_identifiers, with_json, with_params
+from .edr import SEVERITIES, _severity
+
+
+class BaseSOARHandler:
+    """
+    Base class for all SOAR handlers. Actions against many targets are sent
+    ``batch_size`` targets per request, with batches dispatched concurrently.
+    Targets must match api.IDENTIFIER.
+    """
+    platform = "soar"
+    batch_size = 50
+    page_size = 200
+
+    def __init__(self, config: Dict):
+        self.url = config["url"]
+        self.gather_limit = config.get("gather_limit", 500)
+        self.api = PlatformAPI(
+            self.url,
+            verify=config.get("verify_ssl", True),
+            max_concurrency=config.get("max_concurrency", 8)
+        )
+
+    async def _headers(self) -> Dict[str, str]:
+        raise NotImplementedError
+
+    async def _fetch_incidents(self, limit: int) -> List[Dict]:
+        raise NotImplementedError
+
+    async def _execute(self, action: str, targets: List[str], parameters: Dict) -> List[str]:
+        """Run ``action`` against one batch of targets; returns the targets accepted"""
+        raise NotImplementedError
+
+    async def run_playbook(self, playbook: str, incident_id: Optional[str] = None,
+                           inputs: Optional[Dict] = None) -> Dict:
+        raise NotImplementedError
+
+    async def test_connection(self) -> bool:
+        try:
+            await self._fetch_incidents(1)
+            return True
+        except Exception as e:
+            logging.error(f"{self.platform} connection test failed: {e}")
+            return False
+
+    async def get_incidents(self, limit: int = 200) -> List[Dict]:
+        return await self._fetch_incidents(limit)
+
+    async def execute_action(self, action: str, targets: Iterable[str],
+                             parameters: Optional[Dict] = None) -> Dict[str, bool]:
+        """Run an action (block_ip, disable_user, ...) across targets; maps target to acceptance"""
+        targets = list(dict.fromkeys(check_identifiers(targets)))
+        accepted = set(await self.api.gather_batches(
+            targets, self.batch_size, lambda batch: self._execute(action, batch, parameters or {})
+        ))
+        return {target: target in accepted for target in targets}
+
+    async def gather_data(self) -> Dict[str, Any]:
+        try:
+            incidents = await self.get_incidents(self.gather_limit)
+            return {
+                "alerts": incidents,
+                "metrics": {
+                    "incidents": len(incidents),
+                    "open_incidents": sum(1 for incident in incidents if incident.get("status") != "closed"),
+                    "api": self.api.snapshot()
+                },
+                "status": "operational"
+            }
+        except Exception as e:
+            logging.error(f"Error gathering {self.platform} data: {e}")
+            return {"error": str(e)}
+
+
+class PhantomHandler(BaseSOARHandler):
+    platform = "phantom"
+
+    def __init__(self, config: Dict):
+        super().__init__(config)
+        self.token = config["token"]
+        self.container_id = config.get("container_id")
+        self.asset = config.get("asset")
+
+    async def _headers(self) -> Dict[str, str]:
+        return {"ph-auth-token": self.token}
+
+    async def _fetch_incidents(self, limit: int) -> List[Dict]:
+        def next_page(body: Dict, kwargs: Dict) -> Optional[Dict]:
+            page = kwargs["params"]["page"] + 1
+            return with_params(kwargs, page=page) if page < body.get("num_pages", 0) else None
+
+        params = {"page": 0, "page_size": min(limit, self.page_size), "sort": "create_time", "order": "desc"}
+        return [{
+            "id": str(container.get("id")),
+            "name": container.get("name"),
+            "severity": _severity(container.get("severity")),
+            "status": container.get("status"),
+            "timestamp": container.get("create_time"),
+            "platform": self.platform
+        } async for container in self.api.paginate(
+            "GET", "/rest/container", lambda body: body.get("data") or [], next_page,
+            limit=limit, params=params, headers=await self._headers()
+        )]
+
+    async def _execute(self, action: str, targets: List[str], parameters: Dict) -> List[str]:
+        target = {"app_id": parameters.get("app_id"), "assets": [self.asset] if self.asset else [],
+                  "parameters": [{**parameters.get("fields", {}), "target": value} for value in targets]}
+        body = await self.api.json("POST", "/rest/action_run", headers=await self._headers(), json={
+            "action": action,
+            "container_id": parameters.get("container_id", self.container_id),
+            "name": f"gaius_{action}",
+            "targets": [target]
+        })
+        return targets if body.get("success", "action_run_id" in body) else []
+
+    async def run_playbook(self, playbook: str, incident_id: Optional[str] = None,
+                           inputs: Optional[Dict] = None) -> Dict:
+        run = {
+            "container_id": incident_id or self.container_id,
+            "playbook_id": playbook,
+            "scope": "new",
+            "run": True
+        }
+        if inputs:
+            # Input playbooks take their parameters alongside the run request
+            run["inputs"] = inputs
+        body = await self.api.json("POST", "/rest/playbook_run", headers=await self._headers(), json=run)
+        return {"id": body.get("playbook_run_id"), "status": "running" if body.get("success", True) else "failed"}
+
+
+class DemistoHandler(BaseSOARHandler):
+    platform = "demisto"
+    # War room commands are parsed as text: names are bare words, values sit inside double quotes
+    command_name = re.compile(r"[A-Za-z][A-Za-z0-9_-]*")
+    unsafe_value = re.compile(r'["\\\r\n]')
+
+    def __init__(self, config: Dict):
+        super().__init__(config)
+        self.api_key = config["api_key"]
+        self.investigation_id = config.get("investigation_id")
+
+    async def _headers(self) -> Dict[str, str]:
+        return {"Authorization": self.api_key, "Accept": "application/json"}
+
+    async def _fetch_incidents(self, limit: int) -> List[Dict]:
+        def next_page(body: Dict, kwargs: Dict) -> Optional[Dict]:
+            search = kwargs["json"]["filter"]
+            page = search["page"] + 1
+            if page * search["size"] >= body.get("total", 0):
+                return None
+            return with_json(kwargs, filter={**search, "page": page})
+
+        query = {"filter": {"page": 0, "size": min(limit, self.page_size),
+                            "sort": [{"field": "created", "asc": False}]}}
+        return [{
+            "id": str(incident.get("id")),
+            "name": incident.get("name"),
+            # XSOAR severities run 0 (unknown) to 4 (critical)
+            "severity": SEVERITIES[min(4, int(incident.get("severity") or 0))],
+            "status": "closed" if incident.get("status") == 2 else "open",
+            "timestamp": incident.get("created"),
+            "platform": self.platform
+        } async for incident in self.api.paginate(
+            "POST", "/incidents/search", lambda body: body.get("data") or [], next_page,
+            limit=limit, json=query, headers=await self._headers()
+        )]
+
+    async def _execute(self, action: str, targets: List[str], parameters: Dict) -> List[str]:
+        # Integration commands take comma separated lists, so a batch is one war room entry
+        argument = parameters.get("argument", "value")
+        fields = parameters.get("fields", {})
+        for name in (action, argument, *fields):
+            if not isinstance(name, str) or not self.command_name.fullmatch(name):
+                raise ValueError(f"Invalid command or argument name: {name!r}")
+        for value in fields.values():
+            if self.unsafe_value.search(str(value)):
+                raise ValueError(f"Invalid argument value: {value!r}")
+        extra = " ".join(f'{name}="{value}"' for name, value in fields.items())
+        await self.api.request("POST", "/entry", headers=await self._headers(), json={
+            "investigationId": parameters.get("investigation_id", self.investigation_id),
+            "data": f'!{action} {argument}="{",".join(targets)}" {extra}'.strip()
+        })
+        return targets
+
+    async def run_playbook(self, playbook: str, incident_id: Optional[str] = None,
+                           inputs: Optional[Dict] = None) -> Dict:
+        incident_id = incident_id or self.investigation_id
+        check_identifiers([playbook], "playbook")
+        check_identifiers([incident_id], "incident")
+        # IDENTIFIER admits "/", which must not split the path
+        path = f"/inv-playbook/{quote(str(playbook), safe='')}/{quote(str(incident_id), safe='')}"
+        await self.api.request("POST", path, headers=await self._headers(), json=inputs or {})
+        return {"id": f"{incident_id}:{playbook}", "status": "running"}
+
+
+class SwimlaneHandler(BaseSOARHandler):
+    platform = "swimlane"
+
+    def __init__(self, config: Dict):
+        super().__init__(config)
+        self.token = config["token"]
+        self.app_id = config["app_id"]
+
+    async def _headers(self) -> Dict[str, str]:
+        return {"Private-Token": self.token}
+
+    async def _fetch_incidents(self, limit: int) -> List[Dict]:
+        def next_page(body: Dict, kwargs: Dict) -> Optional[Dict]:
+            offset = kwargs["json"]["offset"] + kwargs["json"]["pageSize"]
+            return with_json(kwargs, offset=offset) if offset < body.get("count", 0) else None
+
+        query = {"applicationIds": [self.app_id], "pageSize": min(limit, self.page_size), "offset": 0,
+                 "sorts": {"createdDate": "Descending"}}
+        return [{
+            "id": record.get("id"),
+            "name": (record.get("values") or {}).get("name") or record.get("name"),
+            "severity": _severity((record.get("values") or {}).get("severity")),
+            "status": ((record.get("values") or {}).get("status") or "open").lower(),
+            "timestamp": record.get("createdDate"),
+            "platform": self.platform
+        } async for record in self.api.paginate(
+            "POST", "/api/search", lambda body: (body.get("results") or {}).get(self.app_id) or [],
+            next_page, limit=limit, json=query, headers=await self._headers()
+        )]
+
+    async def _create_record(self, values: Dict) -> Dict:
+        return await self.api.json("POST", f"/api/app/{self.app_id}/record", headers=await self._headers(),
+                                   json={"applicationId": self.app_id, "values": values})
+
+    async def _execute(self, action: str, targets: List[str], parameters: Dict) -> List[str]:
+        # Swimlane workflows trigger on record creation; one record carries a batch of targets
+        await self._create_record({**parameters.get("fields", {}), "action": action, "targets": targets})
+        return targets
+
+    async def run_playbook(self, playbook: str, incident_id: Optional[str] = None,
+                           inputs: Optional[Dict] = None) -> Dict:
+        body = await self._create_record({**(inputs or {}), "playbook": playbook, "incident": incident_id})
+        return {"id": body.get("id"), "status": "running"}
@@ -0,0 +1,261 @@
+"""
+Persistent history of assessments, threat levels and chat turns.
+
+Backed by SQLite in WAL mode. Writes are queued without blocking and committed
+in batches by a single writer thread; queries run on worker threads with
+their own read connections, so neither touches the event loop. Everything
+queued before close() is committed; writes after it are rejected and counted.
+"""
+import asyncio
+import logging
+import os
+import queue
+import sqlite3
+import threading
+import time
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Union
+
+from serialization import dumps_json, loads_json
+from shared_resources import DEFAULT_TENANT
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS assessments (
+    id INTEGER PRIMARY KEY,
+    ts REAL NOT NULL,
+    session TEXT,
+    threat_level INTEGER,
+    sector TEXT,
+    payload TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS assessments_ts ON assessments (ts);
+CREATE INDEX IF NOT EXISTS assessments_session_ts ON assessments (session, ts);
+CREATE INDEX IF NOT EXISTS assessments_level_ts ON assessments (threat_level, ts);
+
+CREATE TABLE IF NOT EXISTS threat_history (
+    id INTEGER PRIMARY KEY,
+    ts REAL NOT NULL,
+    session TEXT,
+    threat_level INTEGER NOT NULL,
+    source TEXT
+);
+CREATE INDEX IF NOT EXISTS threat_history_ts ON threat_history (ts);
+CREATE INDEX IF NOT EXISTS threat_history_level_ts ON threat_history (threat_level, ts);
+
+CREATE TABLE IF NOT EXISTS chat_turns (
+    id INTEGER PRIMARY KEY,
+    ts REAL NOT NULL,
+    session TEXT,
+    role TEXT NOT NULL,
+    content TEXT NOT NULL,
+    threat_level INTEGER
+);
+CREATE INDEX IF NOT EXISTS chat_turns_session_ts ON chat_turns (session, ts);
+CREATE INDEX IF NOT EXISTS chat_turns_ts ON chat_turns (ts);
+"""
+
+INSERTS = {
+    "assessments": "INSERT INTO assessments (ts, session, threat_level, sector, payload) VALUES (?, ?, ?, ?, ?)",
+    "threat_history": "INSERT INTO threat_history (ts, session, threat_level, source) VALUES (?, ?, ?, ?)",
+    "chat_turns": "INSERT INTO chat_turns (ts, session, role, content, threat_level) VALUES (?, ?, ?, ?, ?)"
+}
+
+Timestamp = Union[datetime, float, int, str, None]
+
+
+def to_epoch(value: Timestamp) -> Optional[float]:
+    if value is None or isinstance(value, (int, float)):
+        return value
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value)
+    return value.timestamp()
+
+
+def _ts(timestamp: Timestamp) -> float:
+    """Row timestamp: now when none is given; an explicit epoch 0 is kept"""
+    return time.time() if timestamp is None else to_epoch(timestamp)
+
+
+def tenant_history_path(path: str, tenant_id: str) -> str:
+    """Each tenant gets its own database file next to the default one"""
+    if tenant_id in (None, "", DEFAULT_TENANT):
+        return path
+    root, extension = os.path.splitext(path)
+    return f"{root}.{tenant_id}{extension or '.db'}"
+
+
+def level_value(level: Any) -> Optional[int]:
+    """ThreatLevel members, their names or their values as the stored integer"""
+    if level is None:
+        return None
+    if hasattr(level, "value"):
+        return level.value
+    if isinstance(level, str):
+        names = {"low": 1, "medium": 2, "high": 3, "critical": 4}
+        return names[level.lower()] if level.lower() in names else int(level)
+    return int(level)
+
+
+class HistoryStore:
+    def __init__(self, path: str = "gaius_history.db", max_batch: int = 500, flush_interval: float = 0.25):
+        self.path = path
+        self.max_batch = max_batch
+        self.flush_interval = flush_interval
+        self._queue: "queue.SimpleQueue" = queue.SimpleQueue()
+        self._local = threading.local()
+        self.counters = {"queued": 0, "written": 0, "batches": 0, "failed": 0, "rejected": 0}
+        # Guards the closed flag so no write lands in the queue behind the stop marker
+        self._closing = threading.Lock()
+        self.closed = False
+
+        connection = self._connect()
+        connection.executescript(SCHEMA)
+        connection.commit()
+        self._writer = threading.Thread(target=self._write_loop, args=(connection,),
+                                        name="gaius-history-writer", daemon=True)
+        self._writer.start()
+
+    def _connect(self) -> sqlite3.Connection:
+        connection = sqlite3.connect(self.path, check_same_thread=False)
+        connection.execute("PRAGMA journal_mode=WAL")
+        connection.execute("PRAGMA synchronous=NORMAL")
+        connection.row_factory = sqlite3.Row
+        return connection
+
+    # Writes: enqueue only, never block the caller
+
+    def _enqueue(self, table: str, row: tuple):
+        with self._closing:
+            if not self.closed:
+                self._queue.put((table, row))
+                self.counters["queued"] += 1
+                return
+        self.counters["rejected"] += 1
+        logging.warning(f"History store {self.path} is closed; dropped a {table} row")
+
+    def record_assessment(self, assessment: Dict, session: Optional[str] = None,
+                          sector: Optional[str] = None, timestamp: Timestamp = None):
+        self._enqueue("assessments", (_ts(timestamp), session, level_value(assessment.get("threat_level")),
+                                      sector, dumps_json(assessment).decode("utf-8")))
+
+    def record_threat_level(self, level: Any, session: Optional[str] = None, source: str = "assessment",
+                            timestamp: Timestamp = None):
+        self._enqueue("threat_history", (_ts(timestamp), session, level_value(level), source))
+
+    def record_chat_turn(self, role: str, content: str, session: Optional[str] = None,
+                         threat_level: Any = None, timestamp: Timestamp = None):
+        self._enqueue("chat_turns", (_ts(timestamp), session, role, content,
+                                     level_value(threat_level)))
+
+    def _write_loop(self, connection: sqlite3.Connection):
+        while True:
+            item = self._queue.get()
+            batch = [item]
+            # Let a burst accumulate so it commits as one transaction
+            deadline = time.monotonic() + self.flush_interval
+            while len(batch) < self.max_batch:
+                try:
+                    batch.append(self._queue.get(timeout=max(0.0, deadline - time.monotonic())))
+                except queue.Empty:
+                    break
+            if not self._write_batch(connection, batch):
+                connection.close()
+                return
+
+    def _write_batch(self, connection: sqlite3.Connection, batch: List) -> bool:
+        """Commit queued rows; False once the stop marker is reached"""
+        rows: Dict[str, List[tuple]] = {}
+        waiters, running = [], True
+        for table, payload in batch:
+            if table == "flush":
+                waiters.append(payload)
+            elif table == "stop":
+                waiters.append(payload)
+                running = False
+            else:
+                rows.setdefault(table, []).append(payload)
+        if rows:
+            try:
+                with connection:
+                    for table, values in rows.items():
+                        connection.executemany(INSERTS[table], values)
+                self.counters["written"] += sum(len(values) for values in rows.values())
+                self.counters["batches"] += 1
+            except sqlite3.Error as e:
+                self.counters["failed"] += sum(len(values) for values in rows.values())
+                logging.error(f"Error writing history batch: {e}")
+        for waiter in waiters:
+            waiter.set()
+        return running
+
+    async def flush(self):
+        """Wait until everything queued so far is committed"""
+        done = threading.Event()
+        with self._closing:
+            if self.closed:
+                # close() already committed everything that was accepted
+                return await asyncio.to_thread(self._writer.join)
+            self._queue.put(("flush", done))
+        await asyncio.to_thread(done.wait)
+
+    async def close(self):
+        """Commit everything queued so far and stop the writer; later writes are rejected"""
+        done = threading.Event()
+        with self._closing:
+            if self.closed:
+                return await asyncio.to_thread(self._writer.join)
+            self.closed = True
+            self._queue.put(("stop", done))
+        await asyncio.to_thread(done.wait)
+
+    # Reads: run on worker threads with per-thread connections
+
+    def _reader(self) -> sqlite3.Connection:
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            connection = self._local.connection = self._connect()
+        return connection
+
+    def _select(self, sql: str, params: tuple) -> List[Dict]:
+        return [dict(row) for row in self._reader().execute(sql, params)]
+
+    async def _query(self, table: str, columns: str, filters: Dict[str, Any], since: Timestamp,
+                     until: Timestamp, limit: int, min_level: bool = False) -> List[Dict]:
+        clauses, params = [], []
+        for column, value in filters.items():
+            if value is not None:
+                clauses.append(f"{column} >= ?" if column == "threat_level" and min_level else f"{column} = ?")
+                params.append(value)
+        if since is not None:
+            clauses.append("ts >= ?")
+            params.append(to_epoch(since))
+        if until is not None:
+            clauses.append("ts < ?")
+            params.append(to_epoch(until))
+        where = f" WHERE {' AND '.join(clauses)}" if clauses else ""
+        sql = f"SELECT {columns} FROM {table}{where} ORDER BY ts DESC LIMIT ?"
+        return await asyncio.to_thread(self._select, sql, tuple(params) + (limit,))
+
+    async def query_assessments(self, threat_level: Any = None, session: Optional[str] = None,
+                                since: Timestamp = None, until: Timestamp = None, limit: int = 100,
+                                at_least: bool = False) -> List[Dict]:
+        """e.g. ``query_assessments("critical", since=datetime.now() - timedelta(days=7))``"""
+        rows = await self._query("assessments", "id, ts, session, threat_level, sector, payload",
+                                 {"threat_level": level_value(threat_level), "session": session},
+                                 since, until, limit, at_least)
+        for row in rows:
+            row["assessment"] = loads_json(row.pop("payload"))
+        return rows
+
+    async def threat_history(self, since: Timestamp = None, until: Timestamp = None,
+                             session: Optional[str] = None, limit: int = 1000) -> List[Dict]:
+        return await self._query("threat_history", "ts, session, threat_level, source",
+                                 {"session": session}, since, until, limit)
+
+    async def chat_history(self, session: Optional[str] = None, since: Timestamp = None,
+                           until: Timestamp = None, limit: int = 100) -> List[Dict]:
+        return await self._query("chat_turns", "ts, session, role, content, threat_level",
+                                 {"session": session}, since, until, limit)
+
+    def snapshot(self) -> Dict:
+        return {**self.counters, "backlog": self._queue.qsize(), "path": self.path}
@@ -0,0 +1,202 @@
+"""
+Micro-batching front end for LLM completion requests.
+
+Requests arriving within a short window are collected, identical prompts are
+coalesced into one provider call, and the unique calls are dispatched with
+bounded concurrency under request and token rate limits. A request that cannot
+get a rate-limit slot before its queue deadline fails with LLMQueueTimeout;
+that is our own throttling, not a provider failure, so callers must not report
+it to the circuit breaker.
+"""
+import asyncio
+import logging
+import time
+from typing import Awaitable, Callable, Dict, Hashable, List, Optional, Set, Tuple, TypeVar
+
+T = TypeVar("T")
+
+
+class LLMQueueTimeout(Exception):
+    """A request waited past its queue deadline for a concurrency or rate-limit slot"""
+
+
+class TokenBucket:
+    """Async token bucket refilled continuously at ``rate`` tokens per second"""
+    def __init__(self, rate: float, capacity: float, clock: Callable[[], float] = time.monotonic):
+        if rate <= 0 or capacity <= 0:
+            raise ValueError("rate and capacity must be positive")
+        self.rate = rate
+        self.capacity = capacity
+        self._clock = clock
+        self._tokens = capacity
+        self._updated = clock()
+        self._lock = asyncio.Lock()
+
+    def _refill(self):
+        now = self._clock()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    @property
+    def available(self) -> float:
+        self._refill()
+        return self._tokens
+
+    def try_acquire(self, cost: float = 1.0) -> bool:
+        """Take ``cost`` tokens only if they are available now and nobody is queued for them"""
+        cost = min(cost, self.capacity)
+        if self._lock.locked():
+            return False
+        self._refill()
+        if self._tokens < cost:
+            return False
+        self._tokens -= cost
+        return True
+
+    def refund(self, cost: float = 1.0):
+        self._tokens = min(self.capacity, self._tokens + cost)
+
+    async def acquire(self, cost: float = 1.0) -> float:
+        """Wait until ``cost`` tokens are available; returns the time spent waiting"""
+        cost = min(cost, self.capacity)
+        waited = 0.0
+        # The lock keeps waiters FIFO so large requests are not starved
+        async with self._lock:
+            while True:
+                self._refill()
+                if self._tokens >= cost:
+                    self._tokens -= cost
+                    return waited
+                delay = (cost - self._tokens) / self.rate
+                waited += delay
+                await asyncio.sleep(delay)
+
+
+class LLMBatcher:
+    """
+    Collects requests for ``window`` seconds (or until ``max_batch`` are queued)
+    and dispatches them together. Callers with the same key share one call and
+    one result; callers that give up (e.g. a websocket timeout) do not cancel
+    the shared call for everyone else.
+    """
+    def __init__(self, window: float = 0.005, max_batch: int = 32, max_concurrency: int = 4,
+                 requests_per_minute: float = 60.0, tokens_per_minute: Optional[float] = None):
+        self.window = window
+        self.max_batch = max_batch
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self.max_concurrency = max_concurrency
+        self._request_bucket = TokenBucket(requests_per_minute / 60.0, max(1.0, requests_per_minute / 6.0))
+        self._token_bucket = (
+            TokenBucket(tokens_per_minute / 60.0, tokens_per_minute / 6.0)
+            if tokens_per_minute else None
+        )
+        # (key, call, cost in tokens, queue deadline on the loop clock, future)
+        self._pending: List[Tuple[Hashable, Callable[[], Awaitable], float, Optional[float], asyncio.Future]] = []
+        self._inflight: Dict[Hashable, asyncio.Future] = {}
+        self._flush_handle: Optional[asyncio.TimerHandle] = None
+        self._tasks: Set[asyncio.Task] = set()
+        self.counters = {"submitted": 0, "deduplicated": 0, "dispatched": 0, "batches": 0,
+                         "failed": 0, "queue_timeouts": 0, "extra_admitted": 0, "rate_limited_seconds": 0.0}
+
+    async def submit(self, key: Hashable, call: Callable[[], Awaitable[T]], cost_tokens: float = 0.0,
+                     max_wait: Optional[float] = None) -> T:
+        """
+        Run ``call`` once a slot is free, sharing it with identical ``key``s. With
+        ``max_wait``, raises LLMQueueTimeout if no slot frees up within that many seconds
+        """
+        self.counters["submitted"] += 1
+        future = self._inflight.get(key)
+        if future is not None:
+            self.counters["deduplicated"] += 1
+            return await asyncio.shield(future)
+
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._inflight[key] = future
+        deadline = loop.time() + max_wait if max_wait is not None else None
+        self._pending.append((key, call, cost_tokens, deadline, future))
+
+        if len(self._pending) >= self.max_batch:
+            self._flush()
+        elif self._flush_handle is None:
+            self._flush_handle = loop.call_later(self.window, self._flush)
+        return await asyncio.shield(future)
+
+    def _flush(self):
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        batch, self._pending = self._pending, []
+        if not batch:
+            return
+        self.counters["batches"] += 1
+        for key, call, cost, deadline, future in batch:
+            task = asyncio.ensure_future(self._dispatch(key, call, cost, deadline, future))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    def try_acquire(self, cost_tokens: float = 0.0) -> bool:
+        """
+        Admit one extra request, such as a hedge, only if the rate limits have room
+        right now; it never waits and does not take a concurrency slot
+        """
+        if not self._request_bucket.try_acquire(1):
+            return False
+        if self._token_bucket is not None and cost_tokens and not self._token_bucket.try_acquire(cost_tokens):
+            self._request_bucket.refund(1)
+            return False
+        self.counters["extra_admitted"] += 1
+        return True
+
+    async def _acquire(self, cost: float) -> float:
+        """Take a concurrency slot and rate-limit tokens; returns the time spent rate limited"""
+        await self._semaphore.acquire()
+        try:
+            waited = await self._request_bucket.acquire(1)
+            if self._token_bucket is not None and cost:
+                waited += await self._token_bucket.acquire(cost)
+        except BaseException:
+            self._semaphore.release()
+            raise
+        return waited
+
+    async def _dispatch(self, key: Hashable, call: Callable[[], Awaitable], cost: float,
+                        deadline: Optional[float], future: asyncio.Future):
+        try:
+            if deadline is None:
+                waited = await self._acquire(cost)
+            else:
+                try:
+                    waited = await asyncio.wait_for(self._acquire(cost),
+                                                    max(0.0, deadline - asyncio.get_running_loop().time()))
+                except asyncio.TimeoutError:
+                    self.counters["queue_timeouts"] += 1
+                    raise LLMQueueTimeout("No LLM request slot before the queue deadline")
+            try:
+                self.counters["rate_limited_seconds"] += waited
+                self.counters["dispatched"] += 1
+                result = await call()
+            finally:
+                self._semaphore.release()
+            if not future.done():
+                future.set_result(result)
+        except Exception as e:
+            if not isinstance(e, LLMQueueTimeout):
+                self.counters["failed"] += 1
+                logging.error(f"Batched LLM request failed: {e}")
+            if not future.done():
+                future.set_exception(e)
+                # Mark retrieved so unawaited shared failures don't warn at shutdown
+                future.exception()
+        finally:
+            if self._inflight.get(key) is future:
+                del self._inflight[key]
+
+    def snapshot(self) -> Dict:
+        return {
+            **self.counters,
+            "rate_limited_seconds": round(self.counters["rate_limited_seconds"], 3),
+            "pending": len(self._pending),
+            "inflight": len(self._inflight),
+            "max_concurrency": self.max_concurrency
+        }
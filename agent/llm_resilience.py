@@ -0,0 +1,264 @@
+"""
+Circuit breaking and request hedging for LLM provider calls.
+
+While the provider is unhealthy (error rate or p95 latency over threshold in a
+rolling window) calls short-circuit to cached or fallback answers instead of
+waiting out the full failure latency. Only the provider request itself is
+timed: callers queue for rate-limit and concurrency slots before entering
+ResilientLLM.call, so our own throttling never counts against the provider.
+"""
+import asyncio
+import logging
+import time
+from collections import deque
+from enum import Enum
+from typing import Awaitable, Callable, Dict, Hashable, Optional
+
+from caching import LRUCache
+
+
+class BreakerState(Enum):
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+
+class CircuitBreaker:
+    """
+    Rolling-window circuit breaker.
+
+    Opens when, over the last ``window_seconds``, at least ``min_requests`` calls
+    were seen and either the error rate reaches ``error_threshold`` or the p95
+    latency reaches ``latency_threshold``. After ``open_seconds`` a limited number
+    of half-open probes decide whether to close again.
+    """
+    def __init__(self, window_seconds: float = 30.0, min_requests: int = 5,
+                 error_threshold: float = 0.5, latency_threshold: float = 6.0,
+                 open_seconds: float = 15.0, half_open_probes: int = 1,
+                 clock: Callable[[], float] = time.monotonic):
+        self.window_seconds = window_seconds
+        self.min_requests = min_requests
+        self.error_threshold = error_threshold
+        self.latency_threshold = latency_threshold
+        self.open_seconds = open_seconds
+        self.half_open_probes = half_open_probes
+        self._clock = clock
+        self._outcomes = deque()  # (timestamp, ok, latency)
+        self._state = BreakerState.CLOSED
+        self._opened_at = 0.0
+        self._probes_in_flight = 0
+        self.transitions = deque(maxlen=100)
+        self.counters = {"allowed": 0, "rejected": 0, "opened": 0, "half_opened": 0, "closed": 0}
+
+    @property
+    def state(self) -> BreakerState:
+        if self._state is BreakerState.OPEN and self._clock() - self._opened_at >= self.open_seconds:
+            self._transition(BreakerState.HALF_OPEN, "cooldown elapsed")
+        return self._state
+
+    def allow_request(self) -> bool:
+        state = self.state
+        if state is BreakerState.CLOSED:
+            self.counters["allowed"] += 1
+            return True
+        if state is BreakerState.HALF_OPEN and self._probes_in_flight < self.half_open_probes:
+            self._probes_in_flight += 1
+            self.counters["allowed"] += 1
+            return True
+        self.counters["rejected"] += 1
+        return False
+
+    def record_success(self, latency: float):
+        self._record(True, latency)
+        if self._state is BreakerState.HALF_OPEN:
+            self._probes_in_flight = max(0, self._probes_in_flight - 1)
+            if latency < self.latency_threshold:
+                self._outcomes.clear()
+                self._transition(BreakerState.CLOSED, f"probe succeeded in {latency:.2f}s")
+            else:
+                self._open(f"probe slow ({latency:.2f}s)")
+            return
+        self._evaluate()
+
+    def record_failure(self, latency: float, error: Optional[BaseException] = None):
+        self._record(False, latency)
+        if self._state is BreakerState.HALF_OPEN:
+            self._probes_in_flight = max(0, self._probes_in_flight - 1)
+            self._open(f"probe failed: {type(error).__name__ if error else 'error'}")
+            return
+        self._evaluate()
+
+    def release(self):
+        """Return an allowed request that ended without an outcome, such as one its caller cancelled"""
+        if self._state is BreakerState.HALF_OPEN:
+            self._probes_in_flight = max(0, self._probes_in_flight - 1)
+
+    def p95_latency(self) -> Optional[float]:
+        latencies = sorted(latency for _, ok, latency in self._outcomes if ok)
+        if not latencies:
+            return None
+        return latencies[min(len(latencies) - 1, int(0.95 * len(latencies)))]
+
+    def error_rate(self) -> float:
+        if not self._outcomes:
+            return 0.0
+        return sum(1 for _, ok, _ in self._outcomes if not ok) / len(self._outcomes)
+
+    def snapshot(self) -> Dict:
+        self._trim()
+        p95 = self.p95_latency()
+        return {
+            "state": self.state.value,
+            "window_requests": len(self._outcomes),
+            "error_rate": round(self.error_rate(), 3),
+            "p95_latency": round(p95, 3) if p95 is not None else None,
+            "counters": dict(self.counters),
+            "transitions": list(self.transitions)
+        }
+
+    def _record(self, ok: bool, latency: float):
+        self._outcomes.append((self._clock(), ok, latency))
+        self._trim()
+
+    def _trim(self):
+        horizon = self._clock() - self.window_seconds
+        while self._outcomes and self._outcomes[0][0] < horizon:
+            self._outcomes.popleft()
+
+    def _evaluate(self):
+        if self._state is not BreakerState.CLOSED or len(self._outcomes) < self.min_requests:
+            return
+        error_rate = self.error_rate()
+        if error_rate >= self.error_threshold:
+            self._open(f"error rate {error_rate:.0%}")
+            return
+        p95 = self.p95_latency()
+        if p95 is not None and p95 >= self.latency_threshold:
+            self._open(f"p95 latency {p95:.2f}s")
+
+    def _open(self, reason: str):
+        self._opened_at = self._clock()
+        self._probes_in_flight = 0
+        self._transition(BreakerState.OPEN, reason)
+
+    def _transition(self, state: BreakerState, reason: str):
+        previous = self._state
+        self._state = state
+        self.counters[{"open": "opened", "half_open": "half_opened", "closed": "closed"}[state.value]] += 1
+        self.transitions.append({
+            "from": previous.value,
+            "to": state.value,
+            "reason": reason,
+            "at": time.time()
+        })
+        log = logging.warning if state is BreakerState.OPEN else logging.info
+        log(f"LLM circuit {previous.value} -> {state.value}: {reason}")
+
+
+class ResilientLLM:
+    """
+    Runs LLM calls through a circuit breaker, with an optional hedged second
+    request once the first has been outstanding for the observed p95 latency.
+    Successful answers are kept per cache key to serve while the circuit is open.
+    """
+    def __init__(self, breaker: Optional[CircuitBreaker] = None, timeout: float = 8.0,
+                 hedge: bool = False, min_hedge_delay: float = 0.25, cache_size: int = 256):
+        self.breaker = breaker or CircuitBreaker()
+        self.timeout = timeout
+        self.hedge = hedge
+        self.min_hedge_delay = min_hedge_delay
+        self.answers = LRUCache(maxsize=cache_size)
+        self.counters = {"calls": 0, "short_circuited": 0, "served_from_cache": 0,
+                         "fallbacks": 0, "queue_timeouts": 0, "hedged": 0, "hedge_wins": 0,
+                         "hedges_denied": 0}
+
+    async def call(self, request: Callable[[], Awaitable[str]], cache_key: Hashable,
+                   fallback: Callable[[], str], hedge_permit: Optional[Callable[[], bool]] = None) -> str:
+        """
+        ``request`` must be the provider call alone, already past any queueing.
+        ``hedge_permit`` is asked before sending a hedge, e.g. to take a rate-limit token
+        """
+        self.counters["calls"] += 1
+        if not self.breaker.allow_request():
+            self.counters["short_circuited"] += 1
+            return self._degraded(cache_key, fallback)
+
+        started = time.monotonic()
+        try:
+            answer = await asyncio.wait_for(self._run(request, hedge_permit), timeout=self.timeout)
+        except Exception as e:
+            self.breaker.record_failure(time.monotonic() - started, e)
+            logging.error(f"LLM request failed: {type(e).__name__}: {e}")
+            return self._degraded(cache_key, fallback)
+        except BaseException:
+            # Cancelled by our caller: no verdict on the provider, but a probe slot must not leak
+            self.breaker.release()
+            raise
+
+        self.breaker.record_success(time.monotonic() - started)
+        self.answers.put(cache_key, answer)
+        return answer
+
+    def queue_timeout(self, cache_key: Hashable, fallback: Callable[[], str]) -> str:
+        """Degraded answer for a request that never got a slot; the provider is not blamed"""
+        self.counters["queue_timeouts"] += 1
+        return self._degraded(cache_key, fallback)
+
+    async def _run(self, request: Callable[[], Awaitable[str]],
+                   hedge_permit: Optional[Callable[[], bool]] = None) -> str:
+        hedge_delay = self._hedge_delay()
+        if hedge_delay is None:
+            return await request()
+
+        primary = asyncio.ensure_future(request())
+        tasks = [primary]
+        try:
+            done, _ = await asyncio.wait(tasks, timeout=hedge_delay)
+            if done:
+                return primary.result()
+            if hedge_permit is not None and not hedge_permit():
+                self.counters["hedges_denied"] += 1
+                return await primary
+
+            self.counters["hedged"] += 1
+            secondary = asyncio.ensure_future(request())
+            tasks.append(secondary)
+            pending = set(tasks)
+            error: Optional[BaseException] = None
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        if task is secondary:
+                            self.counters["hedge_wins"] += 1
+                        return task.result()
+                    error = task.exception()
+            raise error
+        finally:
+            # Also reached when our caller is cancelled or times out
+            for task in tasks:
+                if not task.done():
+                    task.cancel()
+
+    def _hedge_delay(self) -> Optional[float]:
+        if not self.hedge or self.breaker.state is not BreakerState.CLOSED:
+            return None
+        p95 = self.breaker.p95_latency()
+        if p95 is None:
+            return None
+        return max(self.min_hedge_delay, p95)
+
+    def _degraded(self, cache_key: Hashable, fallback: Callable[[], str]) -> str:
+        cached = self.answers.get(cache_key)
+        if cached is not None:
+            self.counters["served_from_cache"] += 1
+            return cached
+        self.counters["fallbacks"] += 1
+        return fallback()
+
+    def snapshot(self) -> Dict:
+        return {
+            "breaker": self.breaker.snapshot(),
+            "counters": dict(self.counters),
+            "hedging": self.hedge
+        }
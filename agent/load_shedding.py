@@ -0,0 +1,177 @@
+"""
+Adaptive load shedding for IDS alert floods.
+
+AlertCounters keeps exact counts for every ingested alert, per signature and
+severity. Counting uses a C-level Counter over the packed columns, so it
+stays cheap at any volume.
+
+LoadShedder watches the ingest rate. When the rate rises above
+``enter_eps`` it switches to overload mode. In that mode each batch is
+reduced to a stratified sample before the per-row work (zone attribution,
+live streaming, assessment):
+
+- Strata are (signature, severity) pairs.
+- Alerts at or above ``keep_severity`` are always kept.
+- Every other stratum contributes an equal share of ``sample_budget`` rows.
+  Each kept row carries a weight, so estimates can be scaled back to true
+  volume.
+
+Overload mode turns off once the rate has stayed below ``exit_eps`` for
+``cool_down`` seconds. The exit is also checked on every snapshot (the
+dashboard heartbeat takes one every few seconds), so it happens even when
+the flood stops and no further batch arrives.
+"""
+import logging
+import random
+import time
+from array import array
+from collections import Counter
+from typing import Callable, Dict, Optional, Tuple
+
+from alert_batch import AlertBatch, SEVERITY_CODES, SEVERITY_LEVELS, StringTable
+from telemetry import RollingWindow
+
+
+class AlertCounters:
+    """Exact alert counts by (signature id, severity code), whether or not rows are sampled"""
+    def __init__(self):
+        self.total = 0
+        self.strata: Counter = Counter()
+        self.severities = dict.fromkeys(SEVERITY_LEVELS, 0)
+        self._signatures = None
+
+    def record(self, batch: AlertBatch) -> Counter:
+        """Count a batch; returns this batch's per-stratum counts"""
+        strata = Counter(zip(batch.column("signature"), batch.column("severity")))
+        self.strata.update(strata)
+        for (_, severity), count in strata.items():
+            self.severities[SEVERITY_LEVELS[severity]] += count
+        self.total += len(batch)
+        self._signatures = batch.signatures
+        return strata
+
+    def top_signatures(self, limit: int = 10) -> list:
+        lookup = self._signatures.lookup if self._signatures is not None else str
+        return [
+            {"signature": lookup(signature), "severity": SEVERITY_LEVELS[severity], "count": count}
+            for (signature, severity), count in self.strata.most_common(limit)
+        ]
+
+    def snapshot(self) -> Dict:
+        return {"total": self.total, "by_severity": dict(self.severities), "top_signatures": self.top_signatures()}
+
+    def export_state(self) -> Dict:
+        # Signature ids are only meaningful within this process's intern table
+        lookup = self._signatures.lookup if self._signatures is not None else str
+        return {"total": self.total, "severities": dict(self.severities),
+                "strata": [[lookup(signature), severity, count] for (signature, severity), count in self.strata.items()]}
+
+    def restore_state(self, state: Dict, signatures: StringTable):
+        self.total = state["total"]
+        self.severities.update(state["severities"])
+        self.strata = Counter({(signatures.intern(signature), severity): count
+                               for signature, severity, count in state["strata"]})
+        self._signatures = signatures
+
+
+class LoadShedder:
+    def __init__(self, enter_eps: float = 5000, exit_eps: Optional[float] = None, cool_down: float = 10.0,
+                 sample_budget: int = 2000, keep_severity: str = "critical",
+                 on_change: Optional[Callable[[Dict], None]] = None,
+                 clock: Callable[[], float] = time.monotonic):
+        self.enter_eps = enter_eps
+        self.exit_eps = exit_eps if exit_eps is not None else enter_eps / 2
+        self.cool_down = cool_down
+        self.sample_budget = sample_budget
+        self.keep_severity = SEVERITY_CODES[keep_severity]
+        self.on_change = on_change
+        self.clock = clock
+        self.rate = RollingWindow(5.0, 0.5, clock)
+        self.active = False
+        self.since: Optional[float] = None
+        self._calm_since: Optional[float] = None
+        self.counters = {"activations": 0, "sampled_batches": 0, "rows_in": 0, "rows_kept": 0}
+
+    def observe(self, count: int) -> bool:
+        """Account for an incoming batch; True while overload mode is on"""
+        now = self.clock()
+        self.rate.add(count, now)
+        return self._evaluate(now)
+
+    def tick(self) -> bool:
+        """
+        Re-evaluate without a new batch, so sampling turns off after a flood
+        that stopped abruptly; called from snapshot(), i.e. every heartbeat and /status
+        """
+        return self._evaluate(self.clock())
+
+    def _evaluate(self, now: float) -> bool:
+        eps = self.rate.rate(now)
+        if not self.active and eps > self.enter_eps:
+            self.active, self.since, self._calm_since = True, time.time(), None
+            self.counters["activations"] += 1
+            logging.warning(f"Alert flood at {eps:.0f} alerts/s: sampling enabled")
+            self._changed()
+        elif self.active:
+            if eps >= self.exit_eps:
+                self._calm_since = None
+            elif self._calm_since is None:
+                self._calm_since = now
+            elif now - self._calm_since >= self.cool_down:
+                self.active, self.since = False, None
+                logging.warning(f"Alert rate back to {eps:.0f} alerts/s: sampling disabled")
+                self._changed()
+        return self.active
+
+    def _changed(self):
+        if self.on_change is not None:
+            try:
+                self.on_change(self.snapshot())
+            except Exception as e:
+                logging.error(f"Error reporting load-shedding change: {e}")
+
+    def sample(self, batch: AlertBatch, strata: Counter) -> Tuple[AlertBatch, array]:
+        """
+        Stratified sample of a batch plus the weight (rows represented) of each
+        kept row. The stratum sizes are already known from the exact counts, so
+        each stratum gets a uniform sample of its rows. This is the same result
+        a per-stratum reservoir would give. It still sorts every row index and
+        builds the kept list in Python, so it is O(rows); what it saves is the
+        per-row work downstream (zone lookups, fan-out), which sees at most
+        about ``sample_budget`` rows plus the kept severities.
+        """
+        sampled = [key for key in strata if key[1] < self.keep_severity]
+        share = max(1, self.sample_budget // len(sampled)) if sampled else 0
+        keys = list(zip(batch.column("signature"), batch.column("severity")))
+        order = sorted(range(len(keys)), key=keys.__getitem__)
+
+        kept = []  # (row index, weight)
+        start = 0
+        for key in sorted(strata):
+            count = strata[key]
+            rows = order[start:start + count]
+            start += count
+            if key[1] >= self.keep_severity or count <= share:
+                kept.extend((row, 1.0) for row in rows)
+            else:
+                weight = count / share
+                kept.extend((row, weight) for row in random.sample(rows, share))
+        kept.sort()
+
+        self.counters["sampled_batches"] += 1
+        self.counters["rows_in"] += len(batch)
+        self.counters["rows_kept"] += len(kept)
+        return batch.take([row for row, _ in kept]), array("d", [weight for _, weight in kept])
+
+    def snapshot(self) -> Dict:
+        self.tick()
+        rows_in = self.counters["rows_in"]
+        return {
+            "sampling": self.active,
+            "since": self.since,
+            "alerts_per_second": round(self.rate.rate(), 1),
+            "enter_eps": self.enter_eps,
+            "exit_eps": self.exit_eps,
+            "kept_ratio": round(self.counters["rows_kept"] / rows_in, 4) if rows_in else 1.0,
+            **self.counters
+        }
@@ -0,0 +1,123 @@
+"""
+Event-loop health monitoring.
+
+LoopMonitor measures scheduling lag continuously from a heartbeat task. With
+a slow-callback threshold set, a watchdog thread samples the loop thread's
+stack whenever the heartbeat stalls past the threshold. Each stall's samples
+are kept with the frames from this package called out, so a blocking call can
+be traced to the exact gaius_core/commander/web_interface line.
+"""
+import asyncio
+import os
+import sys
+import threading
+import time
+import traceback
+from collections import Counter, deque
+from typing import Deque, Dict, List, Optional
+
+PACKAGE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+def _percentile(ordered: List[float], fraction: float) -> float:
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))] if ordered else 0.0
+
+
+class Stall:
+    """One period where the loop thread did not get back to the heartbeat"""
+    def __init__(self, started: float):
+        self.started = started
+        self.wall_started = time.time()
+        self.duration = 0.0
+        self.samples: List[List[str]] = []
+        self.frames: Counter = Counter()
+
+    def add_sample(self, frame, max_depth: int = 40):
+        stack = traceback.extract_stack(frame, limit=max_depth)
+        self.samples.append([f"{entry.filename}:{entry.lineno} in {entry.name}" for entry in stack])
+        for entry in stack:
+            if entry.filename.startswith(PACKAGE_DIR):
+                self.frames[f"{os.path.basename(entry.filename)}:{entry.lineno} in {entry.name}"] += 1
+
+    def to_dict(self, max_samples: int = 3) -> Dict:
+        return {
+            "started": self.wall_started,
+            "duration_ms": round(self.duration * 1000, 1),
+            "samples": len(self.samples),
+            "package_frames": [{"frame": frame, "samples": count} for frame, count in self.frames.most_common(10)],
+            "stacks": self.samples[:max_samples]
+        }
+
+
+class LoopMonitor:
+    def __init__(self, interval: float = 0.1, slow_callback_ms: Optional[float] = None,
+                 window: int = 600, max_stalls: int = 50):
+        self.interval = interval
+        self.slow_callback = slow_callback_ms / 1000 if slow_callback_ms else None
+        self.lags: Deque[float] = deque(maxlen=window)
+        self.stalls: Deque[Stall] = deque(maxlen=max_stalls)
+        self.stall_count = 0
+        self._heartbeat = time.monotonic()
+        self._loop_thread: Optional[int] = None
+        self._task: Optional[asyncio.Task] = None
+        self._watchdog: Optional[threading.Thread] = None
+        self._stopped = threading.Event()
+
+    def start(self):
+        self._loop_thread = threading.get_ident()
+        self._heartbeat = time.monotonic()
+        self._stopped.clear()
+        self._task = asyncio.create_task(self._beat())
+        if self.slow_callback:
+            self._watchdog = threading.Thread(target=self._watch, name="gaius-loop-watchdog", daemon=True)
+            self._watchdog.start()
+
+    async def stop(self):
+        self._stopped.set()
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+
+    async def _beat(self):
+        # Beat often enough that the watchdog can tell a stall from an idle sleep
+        interval = min(self.interval, self.slow_callback / 2) if self.slow_callback else self.interval
+        while True:
+            expected = time.monotonic() + interval
+            await asyncio.sleep(interval)
+            now = time.monotonic()
+            self._heartbeat = now
+            self.lags.append(max(0.0, now - expected))
+
+    def _watch(self):
+        """Runs on its own thread: sample the loop thread's stack while the heartbeat is overdue"""
+        stall: Optional[Stall] = None
+        budget = self.slow_callback + min(self.interval, self.slow_callback / 2)
+        while not self._stopped.wait(self.slow_callback / 4):
+            overdue = time.monotonic() - self._heartbeat
+            if overdue > budget:
+                frame = sys._current_frames().get(self._loop_thread)
+                if stall is None:
+                    stall = Stall(self._heartbeat)
+                    self.stall_count += 1
+                    self.stalls.append(stall)
+                if frame is not None:
+                    stall.add_sample(frame)
+                stall.duration = overdue
+            elif stall is not None:
+                stall = None
+
+    def snapshot(self, max_stalls: int = 10) -> Dict:
+        ordered = sorted(self.lags)
+        return {
+            "interval_ms": self.interval * 1000,
+            "lag_ms": {
+                "p50": round(_percentile(ordered, 0.50) * 1000, 2),
+                "p95": round(_percentile(ordered, 0.95) * 1000, 2),
+                "p99": round(_percentile(ordered, 0.99) * 1000, 2),
+                "max": round(ordered[-1] * 1000, 2) if ordered else 0.0,
+                "samples": len(ordered)
+            },
+            "slow_callback_ms": self.slow_callback * 1000 if self.slow_callback else None,
+            "stalls": self.stall_count,
+            "recent_stalls": [stall.to_dict() for stall in list(self.stalls)[-max_stalls:]][::-1]
+        }
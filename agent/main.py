@@ -1,3 +1,8 @@
 from web_interface import GaiusDashboard
 
 app = GaiusDashboard().app
+
+if __name__ == "__main__":
+    import uvicorn
+    # permessage-deflate is negotiated with clients that offer it
+    uvicorn.run(app, host="0.0.0.0", port=8000, ws="websockets", ws_per_message_deflate=True)
@@ -0,0 +1,212 @@
+"""
+Token-budgeted prompt construction for Gaius's LLM calls.
+
+Assessment, platform and alert data are reduced to short, deduplicated facts,
+ranked by importance and packed into a fixed token budget. The static system
+and principles preamble is rendered once and reused for every request.
+"""
+import heapq
+import math
+import re
+from collections import Counter
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+from alert_batch import AlertBatch, SEVERITY_CODES, SEVERITY_LEVELS
+
+# Rough English/JSON average for the chat models we target; no tokenizer dependency
+CHARS_PER_TOKEN = 4
+
+SYSTEM_PREAMBLE = (
+    "You are Gaius Julius Caesar's strategic AI advisor for cyber defense. "
+    "Respond as Caesar would: decisive, concise and grounded in the situation report. "
+    "Only rely on the facts provided; say so when information is missing."
+)
+
+# Assessment facts score 89-100; alert facts land well below via _alert_score
+_SEVERITY_WEIGHT = {"info": 0.0, "low": 10.0, "medium": 20.0, "high": 30.0, "critical": 40.0}
+_WHITESPACE = re.compile(r"\s+")
+
+
+def _alert_score(severity: str, count: int) -> float:
+    """Severity dominates; volume breaks ties between alerts of equal severity"""
+    return _SEVERITY_WEIGHT[severity] + math.log10(count)
+
+
+def estimate_tokens(text: str) -> int:
+    return max(1, math.ceil(len(text) / CHARS_PER_TOKEN)) if text else 0
+
+
+def truncate_to_tokens(text: str, tokens: int) -> str:
+    limit = tokens * CHARS_PER_TOKEN
+    if len(text) <= limit:
+        return text
+    return text[:max(0, limit - 3)].rstrip() + "..."
+
+
+class Fact(NamedTuple):
+    score: float
+    text: str
+
+
+class PromptResult(NamedTuple):
+    messages: List[Dict[str, str]]
+    stats: Dict[str, int]
+
+
+class PromptBuilder:
+    """Builds chat messages that never exceed ``budget_tokens``"""
+    def __init__(self, strategic_principles: Dict, budget_tokens: int = 1200,
+                 max_facts: int = 24, max_message_tokens: int = 300):
+        self.budget_tokens = budget_tokens
+        self.max_facts = max_facts
+        self.max_message_tokens = max_message_tokens
+        self._system_message = self._render_system(strategic_principles)
+        self._system_tokens = estimate_tokens(self._system_message["content"])
+        if self._system_tokens >= budget_tokens:
+            raise ValueError(f"System prompt needs {self._system_tokens} tokens; budget is {budget_tokens}")
+
+    @staticmethod
+    def _render_system(strategic_principles: Dict) -> Dict[str, str]:
+        lines = [SYSTEM_PREAMBLE, "", "Strategic principles:"]
+        for key, principle in strategic_principles.items():
+            lines.append(f"- {key} ({principle['principle']}): {', '.join(principle['applications'])}")
+        return {"role": "system", "content": "\n".join(lines)}
+
+    @property
+    def system_message(self) -> Dict[str, str]:
+        return self._system_message
+
+    def build(self, context: Dict, assessment: Optional[Dict] = None) -> PromptResult:
+        """Render the situation report and question for a single request"""
+        message = truncate_to_tokens(
+            _WHITESPACE.sub(" ", str(context.get("chat_message", "")).strip()),
+            self.max_message_tokens
+        )
+        question = f"Commander's message: {message}" if message else (
+            "Formulate a strategic response covering immediate defensive actions, "
+            "resource allocation, long-term positioning and risk mitigation."
+        )
+        # The question is cut before the budget is exceeded; facts only fill what is left
+        question = truncate_to_tokens(question, self.budget_tokens - self._system_tokens)
+
+        facts = _dedupe(self._collect_facts(context, assessment or {}), self.max_facts)
+        header = "Situation report:"
+        available = (self.budget_tokens - self._system_tokens
+                     - estimate_tokens(question) - estimate_tokens(header) - 4)
+
+        included: List[str] = []
+        for fact in facts:
+            cost = estimate_tokens(fact.text) + 1
+            if cost > available:
+                continue
+            included.append(f"- {fact.text}")
+            available -= cost
+
+        body = "\n".join([header, *included, "", question]) if included else question
+        user_message = {"role": "user", "content": body}
+        user_tokens = estimate_tokens(body)
+        return PromptResult(
+            messages=[self._system_message, user_message],
+            stats={
+                "system_tokens": self._system_tokens,
+                "user_tokens": user_tokens,
+                "total_tokens": self._system_tokens + user_tokens,
+                "budget_tokens": self.budget_tokens,
+                "facts_considered": len(facts),
+                "facts_included": len(included)
+            }
+        )
+
+    def _collect_facts(self, context: Dict, assessment: Dict) -> Iterable[Fact]:
+        yield from _assessment_facts({**context, **assessment})
+        yield from _platform_facts(context.get("security_platform_data") or {})
+        yield from _threat_data_facts(context.get("threat_data"))
+        ioc = (context.get("enemy_forces") or {}).get("ioc_matches")
+        if ioc and ioc.get("matched_alerts"):
+            yield Fact(97.0, f"Threat intel: {ioc['matched_alerts']} of {ioc['alerts']} alerts hit known IOCs "
+                            f"(worst {ioc['max_severity']})")
+        for age, previous in enumerate(reversed(context.get("previous_responses") or [])):
+            yield Fact(55.0 - age, f"Earlier you said: {truncate_to_tokens(str(previous), 40)}")
+
+
+def _threat_level_name(level) -> str:
+    return getattr(level, "name", str(level)).lower()
+
+
+def _assessment_facts(data: Dict) -> Iterable[Fact]:
+    if data.get("threat_level") is not None:
+        yield Fact(100.0, f"Threat level: {_threat_level_name(data['threat_level'])}")
+    if data.get("sector"):
+        yield Fact(95.0, f"Most affected sector: {data['sector']}")
+    if data.get("affected_sectors"):
+        busiest = ", ".join(f"{sector} ({count})" for sector, count in list(data["affected_sectors"].items())[:3])
+        yield Fact(94.0, f"Alert volume by sector: {busiest}")
+    if data.get("strategy"):
+        yield Fact(93.0, f"Current strategy: {data['strategy']}")
+    if data.get("strength") is not None:
+        yield Fact(92.0, f"Defense strength: {data['strength']}%")
+    if data.get("key_factors"):
+        yield Fact(91.0, f"Key factors: {', '.join(data['key_factors'])}")
+    if data.get("opportunities"):
+        yield Fact(90.0, f"Opportunities: {', '.join(data['opportunities'])}")
+    if data.get("recommended_principles"):
+        yield Fact(89.0, f"Recommended principles: {', '.join(data['recommended_principles'])}")
+
+
+def _alert_key(alert: Dict) -> Tuple[str, str]:
+    name = (alert.get("signature") or alert.get("rule") or alert.get("name")
+            or alert.get("title") or alert.get("description") or "unnamed alert")
+    severity = str(alert.get("severity", "medium")).lower()
+    return str(name), severity if severity in SEVERITY_CODES else "medium"
+
+
+def _platform_facts(platform_data: Dict) -> Iterable[Fact]:
+    for platform_type, platforms in platform_data.items():
+        for platform, data in (platforms or {}).items():
+            if not isinstance(data, dict):
+                continue
+            if data.get("error"):
+                yield Fact(50.0, f"{platform} ({platform_type}) unavailable: {truncate_to_tokens(str(data['error']), 20)}")
+                continue
+            alerts = data.get("alerts") or []
+            grouped = Counter(_alert_key(alert) for alert in alerts if isinstance(alert, dict))
+            for (name, severity), count in grouped.items():
+                yield Fact(
+                    _alert_score(severity, count),
+                    f"{platform}: {count}x {truncate_to_tokens(name, 25)} ({severity})"
+                )
+
+
+def _threat_data_facts(threat_data) -> Iterable[Fact]:
+    if isinstance(threat_data, AlertBatch):
+        if not len(threat_data):
+            return
+        counts = {level: count for level, count in threat_data.severity_counts().items() if count}
+        summary = ", ".join(f"{count} {level}" for level, count in counts.items())
+        yield Fact(96.0, f"IDS alerts in window: {len(threat_data)} ({summary})")
+        # Counter over the interned id column keeps this proportional to distinct signatures
+        pairs = Counter(zip(threat_data.column("signature"), threat_data.column("severity")))
+        for (signature, severity), count in pairs.items():
+            name = threat_data.signatures.lookup(signature) or "unnamed signature"
+            level = SEVERITY_LEVELS[severity]
+            yield Fact(
+                _alert_score(level, count),
+                f"IDS: {count}x {truncate_to_tokens(name, 25)} ({level})"
+            )
+    elif isinstance(threat_data, list):
+        grouped = Counter(_alert_key(alert) for alert in threat_data if isinstance(alert, dict))
+        for (name, severity), count in grouped.items():
+            yield Fact(
+                _alert_score(severity, count),
+                f"Alert: {count}x {truncate_to_tokens(name, 25)} ({severity})"
+            )
+
+
+def _dedupe(facts: Iterable[Fact], limit: int) -> List[Fact]:
+    """Highest-scoring ``limit`` distinct facts, best first"""
+    best: Dict[str, Fact] = {}
+    for fact in facts:
+        key = fact.text.lower()
+        if key not in best or fact.score > best[key].score:
+            best[key] = fact
+    return heapq.nlargest(limit, best.values(), key=lambda fact: fact.score)
@@ -0,0 +1,364 @@
+"""
+Replay recorded traffic against an in-process GaiusDashboard for load testing.
+
+Recorded IDS alerts (Suricata EVE or Zeek notice logs) go through
+``SecurityToolsInterface.ingest_alerts``. Chat transcripts are replayed over
+``/ws/chat``, observers hold ``/ws/dashboard`` open, and ``/status`` is polled
+over real sockets served by uvicorn. The LLM is the local FakeLLMServer, and
+recorded platform API responses are served by a stub so the EDR/SOAR handlers
+make their usual HTTP calls. The SIEM handlers are still offline stubs and
+need no server.
+
+    python replay.py --eve eve.json --transcript chat.jsonl --speed 10 --report report.json
+
+Transcripts are JSON lines of {"ts" or "offset", "session", "message"}. The
+platform file is {"integrations": [{"type", "config"}], "responses":
+{"GET /path": body-or-list-of-bodies}}.
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import resource
+import socket
+import tempfile
+import time
+from datetime import datetime
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from alert_batch import parse_timestamp
+from sensor_manager import zeek_notice_events
+
+
+def percentiles(values: List[float]) -> Dict[str, float]:
+    if not values:
+        return {"count": 0}
+    ordered = sorted(values)
+
+    def at(fraction: float) -> float:
+        return round(ordered[min(len(ordered) - 1, int(fraction * len(ordered)))], 3)
+    return {"count": len(ordered), "p50": at(0.50), "p95": at(0.95), "p99": at(0.99), "max": round(ordered[-1], 3)}
+
+
+def rss_mb() -> float:
+    """Current resident set size; peak RSS where /proc is unavailable"""
+    try:
+        with open("/proc/self/statm") as statm:
+            return round(int(statm.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2 ** 20, 1)
+    except (OSError, ValueError):
+        return round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)
+
+
+def read_eve(path: str) -> Iterator[Tuple[float, Dict]]:
+    with open(path) as log:
+        for line in log:
+            if not line.strip():
+                continue
+            event = json.loads(line)
+            if event.get("event_type") == "alert":
+                yield parse_timestamp(event["timestamp"]), event
+
+
+def read_zeek(path: str) -> Iterator[Tuple[float, Dict]]:
+    """Zeek notice.log in TSV (with a #fields header) or JSON form, as EVE-shaped alerts"""
+    with open(path) as log:
+        for event in zeek_notice_events(log):
+            yield event["timestamp"], event
+
+
+def read_transcript(path: str) -> List[Tuple[float, str, str]]:
+    turns, first = [], None
+    with open(path) as transcript:
+        for line in transcript:
+            if not line.strip():
+                continue
+            turn = json.loads(line)
+            if "offset" in turn:
+                offset = float(turn["offset"])
+            else:
+                ts = parse_timestamp(turn["ts"])
+                first = ts if first is None else first
+                offset = ts - first
+            turns.append((offset, turn.get("session", "replay"), turn["message"]))
+    return sorted(turns)
+
+
+class StubPlatformServer:
+    """Serves recorded platform API responses by "METHOD /path", cycling through lists"""
+    def __init__(self, responses: Dict[str, object], host: str = "127.0.0.1", port: int = 0):
+        self.responses = {route: body if isinstance(body, list) else [body] for route, body in responses.items()}
+        self.host = host
+        self.port = port
+        self.requests = 0
+        self._cursor: Dict[str, int] = {}
+        self._server: Optional[asyncio.AbstractServer] = None
+
+    async def start(self):
+        self._server = await asyncio.start_server(self._handle, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+
+    async def stop(self):
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+
+    @property
+    def base_url(self) -> str:
+        return f"http://{self.host}:{self.port}"
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            method, target, _ = (await reader.readline()).decode("latin-1").split(" ", 2)
+            length = 0
+            while True:
+                line = await reader.readline()
+                if line in (b"\r\n", b"\n", b""):
+                    break
+                name, _, value = line.decode("latin-1").partition(":")
+                if name.strip().lower() == "content-length":
+                    length = int(value)
+            await reader.readexactly(length)
+            route = f"{method} {target.split('?', 1)[0]}"
+            self.requests += 1
+            bodies = self.responses.get(route)
+            if bodies is None:
+                status, body = "404 Not Found", {"error": f"no recording for {route}"}
+            else:
+                index = self._cursor.get(route, 0)
+                self._cursor[route] = index + 1
+                status, body = "200 OK", bodies[index % len(bodies)]
+            data = json.dumps(body).encode("utf-8")
+            writer.write(f"HTTP/1.1 {status}\r\nContent-Type: application/json\r\n"
+                         f"Content-Length: {len(data)}\r\n\r\n".encode("latin-1") + data)
+            await writer.drain()
+        except (ConnectionError, ValueError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+
+class ReplayHarness:
+    def __init__(self, dashboard, base_url: str, speed: float = 1.0, tick: float = 0.05,
+                 dashboard_clients: int = 5, status_interval: float = 5.0, sample_interval: float = 1.0):
+        self.dashboard = dashboard
+        self.base_url = base_url
+        self.ws_url = base_url.replace("http", "ws", 1)
+        self.speed = speed
+        self.tick = tick
+        self.dashboard_clients = dashboard_clients
+        self.status_interval = status_interval
+        self.sample_interval = sample_interval
+        self.metrics = {
+            "alerts": 0, "alert_batches": 0, "ingest_ms": [], "chat_ms": [], "chat_errors": 0,
+            "status_ms": [], "status_errors": 0, "dashboard_messages": 0, "dashboard_lag_ms": [],
+            "loop_lag_ms": [], "timeline": []
+        }
+        self._done = asyncio.Event()
+
+    async def replay_alerts(self, events: List[Tuple[float, Dict]]):
+        from alert_batch import AlertBatchBuilder
+        if not events:
+            return
+        tools = self.dashboard.security_tools
+        builder = AlertBatchBuilder(tools.signature_table, tools.sensor_table)
+        first, start = events[0][0], time.monotonic()
+        for ts, event in events:
+            due = start + (ts - first) / self.speed
+            if due - time.monotonic() > self.tick:
+                self._ingest(builder)
+                await asyncio.sleep(due - time.monotonic())
+            builder.append_eve(event)
+        self._ingest(builder)
+
+    def _ingest(self, builder):
+        if not len(builder):
+            return
+        batch = builder.build()
+        began = time.perf_counter()
+        self.dashboard.security_tools.ingest_alerts(batch)
+        self.metrics["ingest_ms"].append((time.perf_counter() - began) * 1000)
+        self.metrics["alerts"] += len(batch)
+        self.metrics["alert_batches"] += 1
+
+    async def replay_chat(self, turns: List[Tuple[float, str, str]]):
+        sessions: Dict[str, List[Tuple[float, str]]] = {}
+        for offset, session, message in turns:
+            sessions.setdefault(session, []).append((offset, message))
+        start = time.monotonic()
+        await asyncio.gather(*(self._chat_session(session, messages, start)
+                               for session, messages in sessions.items()))
+
+    async def _chat_session(self, session: str, messages: List[Tuple[float, str]], start: float):
+        import websockets
+        async with websockets.connect(f"{self.ws_url}/ws/chat?session={session}") as websocket:
+            for offset, message in messages:
+                await asyncio.sleep(max(0.0, start + offset / self.speed - time.monotonic()))
+                began = time.perf_counter()
+                await websocket.send(message)
+                reply = json.loads(await websocket.recv())
+                self.metrics["chat_ms"].append((time.perf_counter() - began) * 1000)
+                if reply.get("type") == "error":
+                    self.metrics["chat_errors"] += 1
+
+    async def observe_dashboard(self):
+        import websockets
+        async with websockets.connect(f"{self.ws_url}/ws/dashboard") as websocket:
+            while True:
+                message = json.loads(await websocket.recv())
+                self.metrics["dashboard_messages"] += 1
+                stamp = (message.get("data") or {}).get("timestamp")
+                if message.get("type") == "update" and stamp:
+                    lag = time.time() - datetime.fromisoformat(stamp).timestamp()
+                    self.metrics["dashboard_lag_ms"].append(lag * 1000)
+
+    async def poll_status(self):
+        import httpx
+        async with httpx.AsyncClient(base_url=self.base_url, timeout=30) as client:
+            while True:
+                began = time.perf_counter()
+                try:
+                    response = await client.get("/status")
+                    if response.is_error:
+                        self.metrics["status_errors"] += 1
+                except httpx.HTTPError:
+                    self.metrics["status_errors"] += 1
+                self.metrics["status_ms"].append((time.perf_counter() - began) * 1000)
+                await asyncio.sleep(self.status_interval)
+
+    async def probe_loop(self, interval: float = 0.05):
+        """Loop lag is how late a short sleep wakes up"""
+        while True:
+            began = time.perf_counter()
+            await asyncio.sleep(interval)
+            self.metrics["loop_lag_ms"].append(max(0.0, time.perf_counter() - began - interval) * 1000)
+
+    async def sample(self, started: float):
+        seen = 0
+        while True:
+            await asyncio.sleep(self.sample_interval)
+            lags = self.metrics["loop_lag_ms"][seen:]
+            seen = len(self.metrics["loop_lag_ms"])
+            self.metrics["timeline"].append({
+                "t": round(time.monotonic() - started, 2),
+                "rss_mb": rss_mb(),
+                "loop_lag_ms_max": round(max(lags), 2) if lags else 0.0,
+                "alerts": self.metrics["alerts"],
+                "chat_turns": len(self.metrics["chat_ms"])
+            })
+
+    async def run(self, events: List[Tuple[float, Dict]], turns: List[Tuple[float, str, str]],
+                  duration: Optional[float] = None) -> Dict:
+        started = time.monotonic()
+        background = [asyncio.create_task(self.probe_loop()), asyncio.create_task(self.sample(started))]
+        background += [asyncio.create_task(self.observe_dashboard()) for _ in range(self.dashboard_clients)]
+        if self.status_interval > 0:
+            background.append(asyncio.create_task(self.poll_status()))
+        try:
+            await asyncio.wait_for(asyncio.gather(self.replay_alerts(events), self.replay_chat(turns)), duration)
+        except asyncio.TimeoutError:
+            logging.info("Replay duration reached before the recording finished")
+        finally:
+            for task in background:
+                task.cancel()
+            await asyncio.gather(*background, return_exceptions=True)
+        return self.report(time.monotonic() - started)
+
+    def report(self, wall: float) -> Dict:
+        m = self.metrics
+        return {
+            "speed": self.speed,
+            "wall_seconds": round(wall, 2),
+            "alerts": {"events": m["alerts"], "batches": m["alert_batches"],
+                       "throughput_per_s": round(m["alerts"] / wall, 1) if wall else 0.0,
+                       "ingest_ms": percentiles(m["ingest_ms"])},
+            "chat": {"turns": len(m["chat_ms"]), "errors": m["chat_errors"], "latency_ms": percentiles(m["chat_ms"])},
+            "status": {"errors": m["status_errors"], "latency_ms": percentiles(m["status_ms"])},
+            "dashboard": {"clients": self.dashboard_clients, "messages": m["dashboard_messages"],
+                          "delivery_lag_ms": percentiles(m["dashboard_lag_ms"])},
+            "loop_lag_ms": percentiles(m["loop_lag_ms"]),
+            "rss_mb": {"start": m["timeline"][0]["rss_mb"] if m["timeline"] else rss_mb(), "end": rss_mb()},
+            "timeline": m["timeline"]
+        }
+
+
+async def _serve_dashboard(dashboard):
+    import uvicorn
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.bind(("127.0.0.1", 0))
+    server = uvicorn.Server(uvicorn.Config(dashboard.app, log_level="warning", ws="websockets"))
+    task = asyncio.create_task(server.serve(sockets=[sock]))
+    while not server.started:
+        if task.done():
+            task.result()
+        await asyncio.sleep(0.05)
+    return server, task, f"http://127.0.0.1:{sock.getsockname()[1]}"
+
+
+async def _main(args) -> Dict:
+    from fake_llm import FakeLLMServer
+
+    llm = FakeLLMServer(port=0, latency=args.llm_latency, error_rate=args.llm_error_rate)
+    await llm.start()
+    os.environ["DEEPSEEK_BASE_URL"] = llm.base_url
+    os.environ.setdefault("DEEPSEEK_API_KEY", "replay")
+    history_dir = tempfile.TemporaryDirectory()
+    os.environ.setdefault("GAIUS_HISTORY_DB", os.path.join(history_dir.name, "history.db"))
+
+    from web_interface import GaiusDashboard
+    dashboard = GaiusDashboard()
+
+    platforms = None
+    if args.platforms:
+        with open(args.platforms) as recorded:
+            recording = json.load(recorded)
+        platforms = StubPlatformServer(recording.get("responses", {}))
+        await platforms.start()
+        for integration in recording.get("integrations", []):
+            config = {**integration["config"], "url": platforms.base_url}
+            if not await dashboard.gaius.integrate_security_platform(integration["type"], config):
+                logging.warning(f"Could not integrate {config.get('platform_name')} against the stub")
+
+    events: List[Tuple[float, Dict]] = []
+    for path in args.eve or []:
+        events.extend(read_eve(path))
+    for path in args.zeek or []:
+        events.extend(read_zeek(path))
+    events.sort(key=lambda item: item[0])
+    turns = [turn for path in args.transcript or [] for turn in read_transcript(path)]
+
+    server, serve_task, base_url = await _serve_dashboard(dashboard)
+    try:
+        harness = ReplayHarness(dashboard, base_url, args.speed, dashboard_clients=args.dashboard_clients,
+                                status_interval=args.status_interval)
+        return await harness.run(events, sorted(turns), args.duration)
+    finally:
+        server.should_exit = True
+        await serve_task
+        await llm.stop()
+        if platforms is not None:
+            await platforms.stop()
+        history_dir.cleanup()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Replay recorded traffic against Gaius")
+    parser.add_argument("--eve", action="append", help="Suricata EVE JSON log (repeatable)")
+    parser.add_argument("--zeek", action="append", help="Zeek notice.log, TSV or JSON (repeatable)")
+    parser.add_argument("--transcript", action="append", help="chat transcript JSON lines (repeatable)")
+    parser.add_argument("--platforms", help="recorded EDR/SOAR integrations and API responses")
+    parser.add_argument("--speed", type=float, default=1.0, help="replay speed multiplier, e.g. 1, 10, 100")
+    parser.add_argument("--duration", type=float, help="stop after this many wall-clock seconds")
+    parser.add_argument("--dashboard-clients", type=int, default=5)
+    parser.add_argument("--status-interval", type=float, default=5.0, help="seconds between /status polls; 0 disables")
+    parser.add_argument("--llm-latency", type=float, default=0.2)
+    parser.add_argument("--llm-error-rate", type=float, default=0.0)
+    parser.add_argument("--report", help="write the JSON report here instead of stdout")
+    logging.basicConfig(level=logging.WARNING)
+    cli_args = parser.parse_args()
+    result = asyncio.run(_main(cli_args))
+    if cli_args.report:
+        with open(cli_args.report, "w") as out:
+            json.dump(result, out, indent=2)
+    else:
+        print(json.dumps(result, indent=2))
@@ -0,0 +1,287 @@
+"""
+Suricata/Snort rule loader with a (gid, sid)-indexed table and an on-disk cache.
+
+Text rules are parsed once; the parsed table is stored as JSON next to the
+rules and reused on restart as long as every source file keeps the same
+mtime/size or, failing that, the same SHA-256 digest. The cache is plain data,
+so a tampered cache file can at worst make the index wrong, never run code.
+"""
+import hashlib
+import logging
+import os
+import re
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+from serialization import dumps_json, loads_json
+
+CACHE_FORMAT_VERSION = 2
+
+# Default priorities from the stock classification.config
+CLASSTYPE_PRIORITIES = {
+    "attempted-admin": 1,
+    "successful-admin": 1,
+    "attempted-user": 1,
+    "successful-user": 1,
+    "shellcode-detect": 1,
+    "trojan-activity": 1,
+    "web-application-attack": 1,
+    "exploit-kit": 1,
+    "command-and-control": 1,
+    "domain-c2": 1,
+    "targeted-activity": 1,
+    "credential-theft": 1,
+    "attempted-dos": 2,
+    "attempted-recon": 2,
+    "bad-unknown": 2,
+    "denial-of-service": 2,
+    "misc-attack": 2,
+    "policy-violation": 1,
+    "social-engineering": 2,
+    "successful-recon-limited": 2,
+    "successful-recon-largescale": 2,
+    "suspicious-filename-detect": 2,
+    "suspicious-login": 2,
+    "unusual-client-port-connection": 2,
+    "web-application-activity": 2,
+    "coin-mining": 2,
+    "misc-activity": 3,
+    "network-scan": 3,
+    "not-suspicious": 3,
+    "protocol-command-decode": 3,
+    "string-detect": 3,
+    "unknown": 3,
+    "icmp-event": 3
+}
+DEFAULT_PRIORITY = 3
+
+_RULE_HEADER = re.compile(r"^\s*(?P<disabled>#\s*)?(?P<action>alert|drop|reject|pass|log|rejectsrc|rejectdst|rejectboth)\s+(?P<header>[^(]*)\((?P<options>.*)\)\s*$")
+_OPTION = re.compile(r'\s*([a-zA-Z0-9_.\-]+)\s*(?::\s*((?:[^;"\\]|\\.|"(?:[^"\\]|\\.)*")*))?;')
+_ESCAPE = re.compile(r"\\(.)")
+_MITRE_TACTIC = re.compile(r"\bmitre_tactic_(?:id|name)\s+(\S+)")
+_MITRE_TECHNIQUE = re.compile(r"\bmitre_technique_(?:id|name)\s+(\S+)")
+
+
+class RuleRecord(NamedTuple):
+    sid: int
+    gid: int
+    rev: int
+    action: str
+    msg: str
+    classtype: str
+    priority: int
+    mitre_tactics: Tuple[str, ...]
+    mitre_techniques: Tuple[str, ...]
+    enabled: bool
+    source: str
+
+
+def parse_rule(line: str, source: str = "") -> Optional[RuleRecord]:
+    """Parse a single rule line, returning None for comments and malformed rules"""
+    match = _RULE_HEADER.match(line)
+    if not match:
+        return None
+
+    options: Dict[str, List[str]] = {}
+    for name, value in _OPTION.findall(match.group("options")):
+        options.setdefault(name.lower(), []).append(value.strip())
+
+    try:
+        sid = int(options["sid"][0])
+    except (KeyError, ValueError):
+        return None
+
+    classtype = options.get("classtype", [""])[0]
+    try:
+        priority = int(options["priority"][0])
+    except (KeyError, ValueError):
+        priority = CLASSTYPE_PRIORITIES.get(classtype, DEFAULT_PRIORITY)
+
+    metadata = " , ".join(options.get("metadata", []))
+    return RuleRecord(
+        sid=sid,
+        gid=_first_int(options.get("gid"), 1),
+        rev=_first_int(options.get("rev"), 1),
+        action=match.group("action"),
+        msg=_unquote(options.get("msg", [""])[0]),
+        classtype=classtype,
+        priority=priority,
+        mitre_tactics=tuple(value.rstrip(",") for value in _MITRE_TACTIC.findall(metadata)),
+        mitre_techniques=tuple(value.rstrip(",") for value in _MITRE_TECHNIQUE.findall(metadata)),
+        enabled=match.group("disabled") is None,
+        source=source
+    )
+
+
+def _unquote(value: str) -> str:
+    """Drop the quotes around an option value, then its backslash escapes"""
+    if len(value) >= 2 and value[0] == value[-1] == '"':
+        value = value[1:-1]
+    return _ESCAPE.sub(r"\1", value)
+
+
+def _first_int(values: Optional[List[str]], default: int) -> int:
+    try:
+        return int(values[0]) if values else default
+    except ValueError:
+        return default
+
+
+def _rule_files(rules_path: str) -> List[str]:
+    if os.path.isdir(rules_path):
+        return sorted(
+            os.path.join(rules_path, name)
+            for name in os.listdir(rules_path)
+            if name.endswith(".rules")
+        )
+    return [rules_path]
+
+
+def _file_digest(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as handle:
+        for chunk in iter(lambda: handle.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _file_stamp(path: str) -> Tuple[int, int]:
+    stat = os.stat(path)
+    return stat.st_mtime_ns, stat.st_size
+
+
+RuleKey = Tuple[int, int]  # (gid, sid)
+
+
+class RuleIndex:
+    """(gid, sid)-indexed rule table supporting O(1) alert enrichment"""
+    def __init__(self, rules: Dict[RuleKey, RuleRecord], sources: Dict[str, Dict]):
+        self.rules = rules
+        self.sources = sources
+        self._stamps_refreshed = False
+
+    def __len__(self) -> int:
+        return len(self.rules)
+
+    def __contains__(self, sid: int) -> bool:
+        return (1, sid) in self.rules
+
+    def lookup(self, sid: int, gid: int = 1) -> Optional[RuleRecord]:
+        return self.rules.get((gid, sid))
+
+    def enrich(self, alert: Dict) -> Dict:
+        """Attach rule metadata to an alert dict keyed by its ``gid`` (default 1) and ``sid``"""
+        rule = self.rules.get((alert.get("gid") or 1, alert.get("sid")))
+        if rule is None:
+            return alert
+        return {
+            **alert,
+            "classtype": rule.classtype,
+            "priority": rule.priority,
+            "rule_msg": rule.msg,
+            "mitre_tactics": list(rule.mitre_tactics),
+            "mitre_techniques": list(rule.mitre_techniques)
+        }
+
+    @classmethod
+    def parse(cls, rules_path: str) -> "RuleIndex":
+        rules: Dict[RuleKey, RuleRecord] = {}
+        sources: Dict[str, Dict] = {}
+        for path in _rule_files(rules_path):
+            source = os.path.basename(path)
+            with open(path, "r", encoding="utf-8", errors="replace") as handle:
+                for line in _logical_lines(handle):
+                    rule = parse_rule(line, source)
+                    if rule is not None:
+                        rules[rule.gid, rule.sid] = rule
+            mtime_ns, size = _file_stamp(path)
+            sources[path] = {"mtime_ns": mtime_ns, "size": size, "sha256": _file_digest(path)}
+        return cls(rules, sources)
+
+    @classmethod
+    def load(cls, rules_path: str, cache_path: Optional[str] = None) -> "RuleIndex":
+        """Load rules, reusing the JSON cache when the source files are unchanged"""
+        cache_path = cache_path or default_cache_path(rules_path)
+        cached = _read_cache(cache_path)
+        if cached is not None and cached.sources_match(rules_path):
+            if cached._stamps_refreshed:
+                _write_cache(cache_path, cached)
+            return cached
+
+        index = cls.parse(rules_path)
+        _write_cache(cache_path, index)
+        return index
+
+    def sources_match(self, rules_path: str) -> bool:
+        """Whether ``rules_path`` still holds the files this index was parsed from"""
+        paths = _rule_files(rules_path)
+        if sorted(paths) != sorted(self.sources):
+            return False
+        refreshed = False
+        for path in paths:
+            recorded = self.sources[path]
+            mtime_ns, size = _file_stamp(path)
+            if (mtime_ns, size) == (recorded["mtime_ns"], recorded["size"]):
+                continue
+            # Touched but possibly unchanged: fall back to the content hash
+            if size != recorded["size"] or _file_digest(path) != recorded["sha256"]:
+                return False
+            recorded["mtime_ns"] = mtime_ns
+            refreshed = True
+        self._stamps_refreshed = refreshed
+        if refreshed:
+            logging.info("Rule files touched without content changes; reusing rule index cache")
+        return True
+
+
+def default_cache_path(rules_path: str) -> str:
+    if os.path.isdir(rules_path):
+        return os.path.join(rules_path, ".gaius-rules.idx")
+    return f"{rules_path}.idx"
+
+
+def _logical_lines(handle) -> Iterable[str]:
+    """Join backslash-continued rule lines"""
+    pending = ""
+    for raw in handle:
+        line = raw.rstrip("\r\n")
+        if line.endswith("\\"):
+            pending += line[:-1]
+            continue
+        yield pending + line
+        pending = ""
+    if pending:
+        yield pending
+
+
+def _read_cache(cache_path: str) -> Optional[RuleIndex]:
+    try:
+        with open(cache_path, "rb") as handle:
+            payload = loads_json(handle.read())
+        if payload.get("version") != CACHE_FORMAT_VERSION:
+            return None
+        rules = {}
+        for fields in payload["rules"]:
+            rule = RuleRecord(*fields)
+            rules[rule.gid, rule.sid] = rule._replace(mitre_tactics=tuple(rule.mitre_tactics),
+                                                      mitre_techniques=tuple(rule.mitre_techniques))
+        return RuleIndex(rules, dict(payload["sources"]))
+    except FileNotFoundError:
+        return None
+    except Exception as e:
+        logging.warning(f"Ignoring unreadable rule index cache {cache_path}; rebuilding it: {e}")
+        return None
+
+
+def _write_cache(cache_path: str, index: RuleIndex):
+    payload = {
+        "version": CACHE_FORMAT_VERSION,
+        "sources": index.sources,
+        "rules": list(index.rules.values())
+    }
+    tmp_path = f"{cache_path}.tmp"
+    try:
+        with open(tmp_path, "wb") as handle:
+            handle.write(dumps_json(payload))
+        os.replace(tmp_path, cache_path)
+    except OSError as e:
+        logging.warning(f"Could not write rule index cache {cache_path}: {e}")
@@ -0,0 +1,370 @@
+"""
+Monte Carlo what-if analysis of the base assessment.
+
+ScenarioSimulator perturbs the inputs of GaiusGeneral._perform_base_assessment
+and reports how the outcome moves:
+- each force value (strength, mobility and supplies on both sides), enemy
+  unity and the number of backup sites is scaled by a uniform random factor
+  within ``spread`` of 1
+- each terrain flag is flipped with probability ``flip_probability``
+Behavioral findings are observations rather than estimates, so they are held
+fixed.
+
+Scenarios are evaluated column-wise, like AlertBatch and FlowBatch. Each input
+is one column of samples, and the comparisons the assessment makes are mapped
+over whole columns: force ratio against the threat bands, mobility and supply
+advantage, enemy unity and failover thresholds, terrain flags. Their results
+pack into one small integer per scenario, its outcome class. The assessment
+rules run once per distinct class rather than once per scenario, so results
+always agree with GaiusGeneral.
+
+Large runs are split into shards across a process pool. Shards return only
+counts, which the parent merges. A time budget bounds the latency of a run.
+When it runs out, the scenarios completed so far are reported. The pool is
+shared by every tenant, so a run submits shards lazily, about one per worker
+at a time, and none once its budget is spent. A shard that has started
+cannot be cancelled, so with a budget shards are sized from a first local
+batch to take at most half the remaining time.
+
+A run reports:
+- threat level, strategy and defense strength distributions
+- the sensitivity of threat level and defense strength to each input. This
+  is the correlation ratio of the outcome over bins of the input, i.e. the
+  share of the outcome's variance that the input explains on its own
+- the robustness of each recommended principle, meaning the share of
+  scenarios that still recommend it
+"""
+import asyncio
+import random
+import threading
+import time
+from bisect import bisect_right
+from collections import Counter
+from concurrent.futures import FIRST_COMPLETED, wait
+from itertools import repeat
+from operator import add, gt, lt, truediv, xor
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+FORCE_FIELDS = ("strength", "mobility", "supplies")
+# Perturbed numeric inputs, in the column order run_shard unpacks
+NUMERIC_INPUTS = tuple(f"{side}.{field}" for side in ("friendly_forces", "enemy_forces") for field in FORCE_FIELDS) \
+    + ("enemy_unity", "terrain.failover_systems.backup_sites")
+# Terrain flags read by GaiusGeneral._analyze_terrain, in outcome bit order
+TERRAIN_FLAGS = (
+    ("monitoring_points", "ids_coverage"),
+    ("monitoring_points", "siem_coverage"),
+    ("monitoring_points", "netflow_analytics"),
+    ("data_routes", "encrypted_channels"),
+    ("data_routes", "redundant_paths"),
+    ("data_routes", "bottlenecks"),
+    ("failover_systems", "disaster_recovery"),
+    ("failover_systems", "backup_power")
+)
+SIMULATION_OPTIONS = ("scenarios", "spread", "flip_probability", "spreads", "seed", "budget")
+MAX_SCENARIOS = 1_000_000
+# Keeps every perturbed value positive, so the force ratio is always defined
+MAX_SPREAD = 0.95
+BINS = 10
+# Outcome class bits: threat band (2 bits), mobility advantage, supply advantage,
+# enemy division, limited failover, then one per terrain flag. Per-input counts
+# put the input's bin above them
+_FIRST_FLAG_BIT = 6
+_BIN_SHIFT = 16
+
+
+class ScenarioSpec(NamedTuple):
+    """What to perturb and the assessment's thresholds; all a worker process needs"""
+    numeric: Tuple[Tuple[str, float, float], ...]  # name, base value, spread
+    flags: Tuple[Tuple[str, bool, float], ...]  # name, base value, flip probability
+    threat_bounds: Tuple[float, ...]
+    division_threshold: float
+    min_backup_sites: int
+
+
+class Outcome(NamedTuple):
+    threat_level: object  # ThreatLevel
+    principles: Tuple[str, ...]
+    strategy: str
+    defense_strength: int
+
+
+def _empty_counts() -> Dict:
+    return {"scenarios": 0, "outcomes": Counter(), "inputs": {}}
+
+
+def _merge(total: Dict, part: Dict):
+    total["scenarios"] += part["scenarios"]
+    total["outcomes"].update(part["outcomes"])
+    for name, joint in part["inputs"].items():
+        total["inputs"].setdefault(name, Counter()).update(joint)
+
+
+def run_shard(spec: ScenarioSpec, count: int, seed: int) -> Dict:
+    """
+    Simulate ``count`` scenarios. Returns outcome class counts, overall and
+    jointly with the bin of every perturbed input
+    """
+    rng = random.Random(seed)
+    columns, binned = [], {}
+    for name, base, spread in spec.numeric:
+        draws = [rng.random() for _ in range(count)]
+        offset, scale = base * (1.0 - spread), base * 2.0 * spread
+        columns.append(list(map(offset.__add__, map(scale.__mul__, draws))))
+        if scale:
+            binned[name] = list(map(int, map(float(BINS).__mul__, draws)))
+    (friendly_strength, friendly_mobility, friendly_supplies,
+     enemy_strength, enemy_mobility, enemy_supplies, unity, backup_sites) = columns
+
+    outcome = list(map(bisect_right, repeat(spec.threat_bounds, count), map(truediv, friendly_strength, enemy_strength)))
+    bits = [map(gt, friendly_mobility, enemy_mobility),
+            map(gt, friendly_supplies, enemy_supplies),
+            map(lt, unity, repeat(spec.division_threshold, count)),
+            map(lt, backup_sites, repeat(spec.min_backup_sites, count))]
+    for name, base, probability in spec.flags:
+        values = list(map(xor, repeat(base, count), [rng.random() < probability for _ in range(count)]))
+        bits.append(values)
+        if probability:
+            binned[name] = values
+    for bit, column in enumerate(bits, 2):
+        outcome = list(map(add, outcome, map((1 << bit).__mul__, column)))
+
+    return {
+        "scenarios": count,
+        "outcomes": Counter(outcome),
+        "inputs": {name: Counter(map(add, map((1 << _BIN_SHIFT).__mul__, column), outcome))
+                   for name, column in binned.items()}
+    }
+
+
+class ScenarioSimulator:
+    def __init__(self, gaius, batch: int = 2000, shard_size: int = 25000, pool_threshold: int = 50000):
+        self.gaius = gaius
+        self.batch = batch
+        self.shard_size = shard_size
+        # Below this many scenarios a process pool costs more than it saves
+        self.pool_threshold = pool_threshold
+        self._lock = threading.Lock()
+        self.last: Dict = {}
+        self.counters = {"runs": 0, "scenarios": 0, "truncated": 0, "pooled": 0}
+
+    def build_spec(self, context: Dict, spread: float = 0.2, flip_probability: float = 0.1,
+                   spreads: Optional[Dict[str, float]] = None) -> ScenarioSpec:
+        """
+        Perturbations around ``context``'s situation inputs. ``spreads``
+        overrides single inputs by name: a spread for numeric inputs, a flip
+        probability for terrain flags (e.g. "terrain.data_routes.bottlenecks")
+        """
+        gaius = self.gaius
+        friendly = context.get("friendly_forces") or {}
+        enemy = context.get("enemy_forces") or {}
+        terrain = context.get("terrain") or {}
+        # Same defaults the assessment applies to missing values
+        bases = [friendly.get(field, 0) for field in FORCE_FIELDS] \
+            + [enemy.get("strength", 1), enemy.get("mobility", 0), enemy.get("supplies", 0),
+               context.get("enemy_unity", 1.0), terrain.get("failover_systems", {}).get("backup_sites", 0)]
+        flag_names = [f"terrain.{section}.{flag}" for section, flag in TERRAIN_FLAGS]
+
+        spreads = dict(spreads or {})
+        unknown = set(spreads) - set(NUMERIC_INPUTS) - set(flag_names)
+        if unknown:
+            raise ValueError(f"Unknown simulation inputs: {', '.join(sorted(unknown))}")
+        try:
+            # Backup sites are not rounded: the assessment compares the count as given,
+            # so a fractional base must land on the same side of the threshold as the baseline
+            numeric = tuple((name, float(base), min(MAX_SPREAD, max(0.0, float(spreads.get(name, spread)))))
+                            for name, base in zip(NUMERIC_INPUTS, bases))
+            flags = tuple((name, bool(terrain.get(section, {}).get(flag)),
+                           min(1.0, max(0.0, float(spreads.get(name, flip_probability)))))
+                          for name, (section, flag) in zip(flag_names, TERRAIN_FLAGS))
+        except (TypeError, ValueError) as e:
+            raise ValueError(f"Situation inputs and spreads must be numbers: {e}")
+        return ScenarioSpec(numeric, flags, tuple(bound for bound, _ in gaius.THREAT_BANDS),
+                            gaius.DIVISION_THRESHOLD, gaius.MIN_BACKUP_SITES)
+
+    async def simulate(self, context: Dict, scenarios: int = 5000, spread: float = 0.2,
+                       flip_probability: float = 0.1, spreads: Optional[Dict[str, float]] = None,
+                       seed: Optional[int] = None, budget: Optional[float] = 0.5) -> Dict:
+        """
+        Run up to ``scenarios`` what-ifs around ``context`` within ``budget``
+        seconds. The sampling runs off the event loop, the assessment rules on it
+        """
+        if not 0 < scenarios <= MAX_SCENARIOS:
+            raise ValueError(f"scenarios must be between 1 and {MAX_SCENARIOS}")
+        if budget is not None and budget <= 0:
+            raise ValueError("budget must be positive")
+        baseline = self.gaius._perform_base_assessment(context)
+        spec = self.build_spec(context, spread, flip_probability, spreads)
+        started = time.perf_counter()
+        counts = await asyncio.to_thread(self.run, spec, scenarios, seed, budget)
+        result = self.summarize(counts, baseline, context)
+        result.update(requested=scenarios, truncated=counts["scenarios"] < scenarios,
+                      seconds=round(time.perf_counter() - started, 3))
+
+        self.counters["runs"] += 1
+        self.counters["scenarios"] += counts["scenarios"]
+        self.counters["truncated"] += result["truncated"]
+        self.last = {key: result[key] for key in ("scenarios", "requested", "seconds")}
+        return result
+
+    def run(self, spec: ScenarioSpec, scenarios: int, seed: Optional[int] = None,
+            budget: Optional[float] = None) -> Dict:
+        """Blocking; simulates up to ``scenarios``, stopping early once ``budget`` seconds have passed"""
+        rng = random.Random(seed)
+        deadline = None if budget is None else time.monotonic() + budget
+        if scenarios >= self.pool_threshold:
+            pool = self.gaius.shared.scenario_pool()
+            if pool is not None:
+                return self._run_pooled(pool, spec, scenarios, rng, deadline)
+        counts = _empty_counts()
+        while counts["scenarios"] < scenarios:
+            _merge(counts, run_shard(spec, min(self.batch, scenarios - counts["scenarios"]), rng.getrandbits(64)))
+            if deadline is not None and time.monotonic() >= deadline:
+                break
+        return counts
+
+    def _run_pooled(self, pool, spec: ScenarioSpec, scenarios: int, rng: random.Random,
+                    deadline: Optional[float]) -> Dict:
+        counts = _empty_counts()
+        shard_size, cutoff = self.shard_size, None
+        if deadline is not None:
+            # A local batch measures the speed (and reports something however short the budget)
+            started = time.monotonic()
+            _merge(counts, run_shard(spec, min(self.batch, scenarios), rng.getrandbits(64)))
+            per_scenario = max(time.monotonic() - started, 1e-6) / counts["scenarios"]
+            shard_size = max(self.batch, min(self.shard_size, int((deadline - time.monotonic()) / 2 / per_scenario)))
+            # Shards started before the deadline are waited for about as long as one takes
+            cutoff = deadline + shard_size * per_scenario
+        workers = max(1, self.gaius.shared.scenario_workers)
+        submitted, running = counts["scenarios"], set()
+        while True:
+            while submitted < scenarios and len(running) < workers and (deadline is None or time.monotonic() < deadline):
+                size = min(shard_size, scenarios - submitted)
+                running.add(pool.submit(run_shard, spec, size, rng.getrandbits(64)))
+                submitted += size
+            if not running:
+                break
+            done, running = wait(running, timeout=None if cutoff is None else max(0.0, cutoff - time.monotonic()),
+                                 return_when=FIRST_COMPLETED)
+            for future in done:
+                _merge(counts, future.result())
+            if not done:
+                break
+        for future in running:
+            # Only shards still queued behind other runs can be cancelled; started ones are short
+            future.cancel()
+        with self._lock:
+            self.counters["pooled"] += 1
+        return counts
+
+    def summarize(self, counts: Dict, baseline: Dict, context: Dict) -> Dict:
+        """Evaluate each outcome class with the assessment rules and aggregate over scenarios"""
+        behavior = context.get("behavior") or {}
+        outcomes = {key: self._evaluate(key, behavior) for key in counts["outcomes"]}
+        total = counts["scenarios"]
+
+        levels, strategies, strengths, principle_sets, principles = Counter(), Counter(), Counter(), Counter(), Counter()
+        for key, count in counts["outcomes"].items():
+            outcome = outcomes[key]
+            levels[outcome.threat_level] += count
+            strategies[outcome.strategy] += count
+            strengths[outcome.defense_strength] += count
+            principle_sets[outcome.principles] += count
+            for principle in outcome.principles:
+                principles[principle] += count
+
+        recommended = baseline["recommended_principles"]
+        # Scored directly: hypothetical factor sets would only crowd the tenant's strength cache
+        baseline_strength = self.gaius._score_defense_factors(tuple(baseline["key_factors"]))
+        return {
+            "scenarios": total,
+            "baseline": {
+                "threat_level": baseline["threat_level"].name.lower(),
+                "strategy": self.gaius._determine_strategy(baseline),
+                "defense_strength": baseline_strength,
+                "recommended_principles": recommended
+            },
+            "threat_levels": {level.name.lower(): round(levels[level] / total, 4)
+                              for level in sorted(levels, key=lambda level: level.value)},
+            "strategies": {strategy: round(count / total, 4) for strategy, count in strategies.most_common()},
+            "defense_strength": self._distribution(strengths, total),
+            "principles": {
+                "robustness": {principle: round(principles[principle] / total, 4) for principle in recommended},
+                "alternatives": {principle: round(count / total, 4) for principle, count in principles.most_common()
+                                 if principle not in recommended},
+                "unchanged": round(principle_sets[tuple(recommended)] / total, 4)
+            },
+            "sensitivity": self._sensitivity(counts["inputs"], outcomes)
+        }
+
+    def _evaluate(self, key: int, behavior: Dict) -> Outcome:
+        """Rebuild a representative situation for an outcome class and run the assessment rules on it"""
+        gaius = self.gaius
+        bounds = [bound for bound, _ in gaius.THREAT_BANDS]
+        band = key & 3
+        threat_level = gaius._determine_threat_level({"strength_ratio": bounds[band - 1] if band else bounds[0] - 1})
+        terrain = {section: {} for section, _ in TERRAIN_FLAGS}
+        terrain["failover_systems"]["backup_sites"] = 0 if key >> 5 & 1 else gaius.MIN_BACKUP_SITES
+        for bit, (section, flag) in enumerate(TERRAIN_FLAGS, _FIRST_FLAG_BIT):
+            terrain[section][flag] = bool(key >> bit & 1)
+        unity = gaius.DIVISION_THRESHOLD - 1 if key >> 4 & 1 else gaius.DIVISION_THRESHOLD
+        force_analysis = {"mobility_advantage": bool(key >> 2 & 1), "supply_advantage": bool(key >> 3 & 1)}
+
+        factors = gaius._analyze_terrain(terrain) + gaius._analyze_behavior(behavior)
+        opportunities = gaius._identify_opportunities({"enemy_unity": unity, "behavior": behavior}, force_analysis)
+        assessment = {"threat_level": threat_level, "key_factors": factors}
+        return Outcome(threat_level, tuple(gaius._select_strategic_principles(threat_level, factors, opportunities)),
+                       gaius._determine_strategy(assessment), gaius._score_defense_factors(tuple(factors)))
+
+    @staticmethod
+    def _distribution(values: Counter, total: int) -> Dict:
+        ordered = sorted(values.items())
+        def percentile(share: float) -> float:
+            seen = 0
+            for value, count in ordered:
+                seen += count
+                if seen >= share * total:
+                    return value
+            return ordered[-1][0]
+        return {
+            "mean": round(sum(value * count for value, count in ordered) / total, 2),
+            "p10": percentile(0.1),
+            "median": percentile(0.5),
+            "p90": percentile(0.9)
+        }
+
+    @staticmethod
+    def _sensitivity(inputs: Dict[str, Counter], outcomes: Dict[int, Outcome]) -> List[Dict]:
+        """Correlation ratio of threat level and defense strength over each input's bins, most influential first"""
+        values = {key: (outcome.threat_level.value, outcome.defense_strength) for key, outcome in outcomes.items()}
+        mask = (1 << _BIN_SHIFT) - 1
+        results = []
+        for name, joint in inputs.items():
+            # bin -> [scenarios, threat sum, threat sum of squares, strength sum, strength sum of squares]
+            bins: Dict[int, List[float]] = {}
+            for combined, count in joint.items():
+                threat, strength = values[combined & mask]
+                totals = bins.get(combined >> _BIN_SHIFT)
+                if totals is None:
+                    totals = bins[combined >> _BIN_SHIFT] = [0, 0, 0, 0, 0]
+                totals[0] += count
+                totals[1] += count * threat
+                totals[2] += count * threat * threat
+                totals[3] += count * strength
+                totals[4] += count * strength * strength
+            columns = list(zip(*bins.values()))
+            scenarios = sum(columns[0])
+            result = {"input": name}
+            for measure, column in (("threat_level", 1), ("defense_strength", 3)):
+                mean = sum(columns[column]) / scenarios
+                variance = sum(columns[column + 1]) / scenarios - mean * mean
+                between = sum(count * (total / count - mean) ** 2
+                              for count, total in zip(columns[0], columns[column])) / scenarios
+                result[measure] = round(between / variance, 4) if variance > 1e-9 else 0.0
+            # Threat level change from the lowest bin of the input to the highest
+            low, high = bins[min(bins)], bins[max(bins)]
+            result["threat_shift"] = round(high[1] / high[0] - low[1] / low[0], 3)
+            results.append(result)
+        return sorted(results, key=lambda result: (result["threat_level"], result["defense_strength"]), reverse=True)
+
+    def snapshot(self) -> Dict:
+        return {**self.counters, "last": self.last}
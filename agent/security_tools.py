@@ -1,87 +1,450 @@
-from typing import Dict, List
+from typing import Dict, List, Optional
+import asyncio
+import os
 import subprocess
 import re
+import time
 import logging
+from collections import Counter
+from itertools import compress, islice
 from gaius_core import GaiusGeneral
+from caching import TopologySnapshot, TrackedDict
+from alert_batch import AlertBatch, AlertBatchBuilder, SEVERITY_CODES, StringTable, unpack_ip
+from rule_index import RuleIndex
+from zone_index import ZoneIndex
+from ioc_store import IOCMatch, IOCStore
+from alert_stream import AlertBroadcaster
+from capability_scoring import CapabilityScorer, SENSOR_CONTROLS
+from load_shedding import AlertCounters, LoadShedder
+from sensor_telemetry import ACTIVE, SILENT, SensorTelemetry
+from telemetry import RollingCounts
+from serialization import loads_json
+from flow_analytics import FlowAnalytics, read_flows, zeek_conn_batch
+from behavior_detection import BehaviorDetector
+from sensor_manager import SENSOR_TYPES, SensorChunk, SensorConfig, SensorManager
+from history_store import tenant_history_path
 
 
 class SecurityToolsInterface:
     def __init__(self, gaius: GaiusGeneral):
         self.gaius = gaius
-        self.ids_config = {
+        # Topology snapshots are rebuilt only after the state they derive from changes
+        self._topology_version = 0
+        self._topology_snapshot: Optional[TopologySnapshot] = None
+        self._zone_index: Optional[ZoneIndex] = None
+        # Windows, counters and sketches a state snapshot restores (see restorable_state)
+        for name, component in self.restorable_state().items():
+            setattr(self, name, component)
+        # Threat-intel indicators matched against every gathered alert batch; with state
+        # snapshots enabled the index comes from the snapshot, or is loaded when restoring
+        self.ioc_store = IOCStore(os.getenv("GAIUS_IOC_FEED_DIR"), autoload=not os.getenv("GAIUS_SNAPSHOT_DIR"))
+        # Live fan-out of ingested alerts to /ws/alerts subscribers
+        self.alert_stream = AlertBroadcaster()
+        # Stratified sampling of the per-row work during floods
+        self.load_shedder = LoadShedder(
+            enter_eps=float(os.getenv("GAIUS_SHED_ENTER_EPS", "5000")),
+            sample_budget=int(os.getenv("GAIUS_SHED_SAMPLE_BUDGET", "2000"))
+        )
+        # Latest NetFlow/IPFIX/PCAP analysis behind netflow_analytics and data_routes.bottlenecks
+        self.flow_analytics = FlowAnalytics(link_capacity_bps=float(os.getenv("GAIUS_LINK_CAPACITY_BPS", "1e9")))
+        self.flow_report: Optional[Dict] = None
+        # Flow files named by API callers must live under this directory
+        self.flow_dir = os.getenv("GAIUS_FLOW_DIR")
+
+        self.ids_config = TrackedDict({
             "sensors": [],
+            # Sensor name -> IDS type and deployment location
+            "sensor_types": {},
+            "sensor_locations": {},
             "alert_levels": {
                 "high": [],
                 "medium": [],
                 "low": []
             },
             "rules_active": [],
-            "detection_zones": []
-        }
+            "detection_zones": [],
+            "asset_groups": []
+        }, on_change=self._on_ids_config_change)
         # Initialize supported_tools with default values
-        self.supported_tools = {
+        self.supported_tools = TrackedDict({
             "ids": {"connected": False},
             "siem": {"connected": False},
             "netflow": {"connected": False}
+        }, on_change=self._on_supported_tools_change)
+        # Intern tables shared by every alert batch this interface produces
+        self.signature_table = StringTable()
+        self.sensor_table = StringTable()
+        self.rule_index: Optional[RuleIndex] = None
+        # Suricata/Zeek sensors tailed in parallel and merged by timestamp (GAIUS_SENSORS_CONFIG),
+        # loaded when the manager starts
+        self.sensor_manager = SensorManager(self, log_dir=os.getenv("GAIUS_SENSOR_LOG_DIR"))
+        sensors_config = os.getenv("GAIUS_SENSORS_CONFIG")
+        if sensors_config:
+            self.sensor_manager.config_path = tenant_history_path(sensors_config, self.gaius.tenant_id)
+        self.refresh_situation()
+
+    def restorable_state(self) -> Dict:
+        """
+        Fresh instances of the components a state snapshot restores. A restore
+        fills a new set and swaps it in only once all of it loaded.
+        """
+        return {
+            # Per-sector alert counts split by External/Internal origin, and IOC matches,
+            # both summed over the last five minutes of ingested batches
+            "sector_window": RollingCounts(window=300.0, bucket=10.0),
+            "ioc_window": RollingCounts(window=300.0, bucket=10.0),
+            # Rolling telemetry behind get_defense_capabilities and the threat timeline
+            "capabilities": CapabilityScorer(),
+            # Per-sensor ingestion rates, lag and errors; new sensors are added to ids_config["sensors"]
+            "sensor_telemetry": SensorTelemetry(on_new_sensor=self._register_sensor),
+            # Exact alert counts, whether or not rows are sampled
+            "alert_counters": AlertCounters(),
+            # Beaconing and lateral-movement detection over every connection record seen
+            "behavior": BehaviorDetector(fanout_threshold=int(os.getenv("GAIUS_LATERAL_FANOUT", "20")))
         }
-        
-    def connect_ids(self, ids_type: str, config: Dict) -> bool:
+
+    async def connect_ids(self, ids_type: str, config: Dict) -> bool:
         """
-        Connect to common IDS systems like Snort, Suricata, etc.
+        Connect a Snort, Suricata or Zeek sensor. Every call adds a sensor;
+        with a ``log_path`` (under GAIUS_SENSOR_LOG_DIR) its log is tailed too
         """
-        supported_ids = ["snort", "suricata", "zeek"]
-        if ids_type.lower() not in supported_ids:
+        if ids_type.lower() not in SENSOR_TYPES:
             return False
-            
-        self.ids_config["type"] = ids_type
-        self.ids_config["location"] = config.get("sensor_location")
-        self.ids_config["rules_path"] = config.get("rules_path")
+        name = config.get("sensor_name") or config.get("sensor_location") or ids_type.lower()
+        if config.get("log_path"):
+            try:
+                await self.sensor_manager.add(SensorConfig.from_dict({
+                    "name": name, "type": ids_type, "path": self.sensor_manager.resolve_path(config["log_path"]),
+                    **{key: config[key] for key in ("log", "rules_path", "max_eps", "from_start") if key in config},
+                    "location": config.get("sensor_location")
+                }))
+            except (PermissionError, ValueError) as e:
+                logging.error(f"Cannot add IDS sensor {name}: {e}")
+                return False
+        else:
+            self.register_ids_sensor(SensorConfig(name, ids_type.lower(), "", location=config.get("sensor_location"),
+                                                  rules_path=config.get("rules_path")))
+        if config.get("rules_path"):
+            self.load_rules(config["rules_path"], config.get("rules_cache_path"))
         return True
 
-    def analyze_ids_alerts(self) -> Dict:
+    def register_ids_sensor(self, config: SensorConfig):
+        """Record a sensor's type and location; every sensor counts toward IDS coverage"""
+        self.ids_config["sensor_types"][config.name] = config.type
+        self._register_sensor(config.name)
+        if config.location:
+            self.ids_config["sensor_locations"][config.name] = config.location
+
+    def unregister_ids_sensor(self, name: str):
+        """Forget a removed sensor, including its health, so /metrics stops exporting it"""
+        for key in ("sensor_types", "sensor_locations"):
+            self.ids_config[key].pop(name, None)
+        if name in self.ids_config["sensors"]:
+            self.ids_config["sensors"].remove(name)
+        self.sensor_telemetry.sensors.pop(name, None)
+        self.capabilities.sensors.pop(name, None)
+
+    def load_rules(self, rules_path: str, cache_path: Optional[str] = None) -> bool:
+        """
+        Load the IDS rule set into a (gid, sid) index, reusing the on-disk cache when possible
+        """
+        try:
+            # Parsed once per process; tenants loading the same rules share the index
+            self.rule_index = self.gaius.shared.rule_index(rules_path, cache_path)
+        except OSError as e:
+            logging.error(f"Failed to load IDS rules from {rules_path}: {e}")
+            return False
+        self.ids_config["rules_active"] = sorted({rule.source for rule in self.rule_index.rules.values()})
+        logging.info(f"Loaded {len(self.rule_index)} IDS rules from {rules_path}")
+        return True
+
+    def enrich_alerts(self, alerts: List[Dict]) -> List[Dict]:
+        """Attach classtype, priority and MITRE metadata to alert rows by sid"""
+        if self.rule_index is None:
+            return alerts
+        return [self.rule_index.enrich(alert) for alert in alerts]
+
+    async def analyze_ids_alerts(self) -> Dict:
         """
         Analyze IDS alerts using Gaius's strategic principles
         """
-        alerts = self._gather_ids_alerts()
-        terrain_data = {
-            "monitoring_points": {
-                "ids_coverage": True,
-                "sensor_positions": self.ids_config["sensors"]
-            }
-        }
-        
-        # Let Gaius evaluate the situation
-        assessment = self.gaius.evaluate_situation({
-            "terrain": terrain_data,
-            "threat_data": alerts
-        })
-        
+        alerts = self.ingest_alerts(self._gather_ids_alerts())
+
+        # Ingestion already fed Gaius's live assessment; it is only recomputed if the alerts moved it
+        assessment = await self.gaius.evaluate_situation({"threat_data": alerts})
+
         return assessment
 
-    def _gather_ids_alerts(self) -> List[Dict]:
+    def ingest_eve(self, lines, sensor: str) -> AlertBatch:
         """
-        Gather and categorize IDS alerts
+        Parse raw Suricata EVE JSON lines from one sensor and ingest the alerts.
+        Bytes read and unparseable lines are counted for the sensor; ``stats``
+        records report the sensor's own capture drops.
         """
-        alerts = []
-        # Implementation specific to IDS type
-        # Example for Snort/Suricata log parsing
+        chunk = self.parse_eve(lines, sensor)
+        self.record_sensor_read(sensor, chunk)
+        return self.ingest_alerts(chunk.alerts)
+
+    def parse_eve(self, lines, sensor: str) -> SensorChunk:
+        """
+        Parse EVE JSON lines without ingesting them. Only the intern tables are
+        touched, so sensor tailers run this on worker threads
+        """
+        builder = AlertBatchBuilder(self.signature_table, self.sensor_table)
+        stats, nbytes, parse_errors = [], 0, 0
+        for line in lines:
+            nbytes += len(line)
+            if not line.strip():
+                continue
+            try:
+                event = loads_json(line)
+                event_type = event.get("event_type")
+                if event_type == "alert":
+                    builder.append_eve(event, sensor)
+                elif event_type == "stats":
+                    stats.append(event.get("stats", {}))
+            except (ValueError, TypeError, KeyError, AttributeError):
+                parse_errors += 1
+        return SensorChunk(builder.build(), stats, nbytes, parse_errors + builder.rejected)
+
+    def record_sensor_read(self, sensor: str, chunk: SensorChunk):
+        """Account for a parsed chunk: capture drops from its stats records, bytes and errors"""
+        for stats in chunk.stats:
+            self._record_capture_stats(sensor, stats)
+        self.sensor_telemetry.record_read(sensor, chunk.nbytes, chunk.parse_errors)
+
+    def _record_capture_stats(self, sensor: str, stats: Dict):
+        capture = stats.get("capture", {})
+        delta = self.sensor_telemetry.capture_delta(sensor, {
+            "packets": capture.get("kernel_packets", 0),
+            "drops": capture.get("kernel_drops", 0)
+        })
+        # Capture stats only come from IDS engines; a type capability scoring doesn't know
+        # (set by an API caller, say) is still IDS evidence, not a malformed record
+        kind = self.ids_config["sensor_types"].get(sensor) or "ids"
+        if kind.lower() not in SENSOR_CONTROLS:
+            kind = "ids"
+        self.capabilities.report_sensor(sensor, kind, received=delta["packets"], dropped=delta["drops"])
+
+    def report_sensor_queue(self, sensor: str, depth: int):
+        """Events a sensor's reader has buffered but not yet ingested"""
+        self.sensor_telemetry.record_queue_depth(sensor, depth)
+
+    def _register_sensor(self, sensor: str):
+        if sensor not in self.ids_config["sensors"]:
+            self.ids_config["sensors"].append(sensor)
+
+    @property
+    def sector_activity(self) -> Dict[str, Dict[str, int]]:
+        return self.sector_window.totals()
+
+    @property
+    def ioc_matches(self) -> IOCMatch:
+        return IOCMatch.from_counts(self.ioc_window.totals())
+
+    def ingest_alerts(self, alerts: AlertBatch) -> AlertBatch:
+        """
+        Single entry point for normalized alerts: sector attribution, IOC
+        matching and live streaming. Never blocks on slow consumers.
+
+        Counts, sensor telemetry and IOC matching always see every alert. During
+        a flood the load shedder reduces the batch to a stratified sample first,
+        so sector activity is a weighted estimate, subscribers receive the
+        sample, and the sample is what gets returned.
+        """
+        self._record_sensor_events(alerts)
+        strata = self.alert_counters.record(alerts)
+        self.ioc_window.add(self.ioc_store.match_batch(alerts).to_counts())
+        weights = None
+        if self.load_shedder.observe(len(alerts)):
+            alerts, weights = self.load_shedder.sample(alerts, strata)
+        zone_index = self.get_zone_index()
+        zone_ids, activity = zone_index.analyze_batch(alerts, weights)
+        self.sector_window.add(activity)
+        self.alert_stream.publish(alerts, zone_ids, zone_index)
+        self._record_alert_telemetry(strata, alerts)
+        self.gaius.situation.update(sector_activity=self.sector_activity,
+                                    friendly_forces=self.get_defense_capabilities(),
+                                    enemy_forces=self.get_threat_intelligence())
         return alerts
 
-    def get_network_topology(self) -> Dict:
+    def _record_sensor_events(self, alerts: AlertBatch, lag_sample: int = 1024):
+        """
+        Exact per-sensor event counts; lag behind wall-clock time is estimated from
+        an evenly strided sample of rows so floods don't pay a per-row Python cost
+        """
+        if not len(alerts):
+            return
+        now = time.time()
+        sensors, timestamps = alerts.column("sensor"), alerts.column("timestamp")
+        counts = Counter(sensors)
+        step = max(1, len(alerts) // lag_sample)
+        lags: Dict[int, list] = {}  # sensor id -> [sampled rows, lag total, lag max]
+        for sensor_id, timestamp in zip(sensors[::step], timestamps[::step]):
+            entry = lags.get(sensor_id)
+            if entry is None:
+                entry = lags[sensor_id] = [0, 0.0, 0.0]
+            lag = max(0.0, now - timestamp) if timestamp else 0.0
+            entry[0] += 1
+            entry[1] += lag
+            entry[2] = max(entry[2], lag)
+        for sensor_id, count in counts.items():
+            sampled, lag_total, lag_max = lags.get(sensor_id, (0, 0.0, 0.0))
+            name = alerts.sensors.lookup(sensor_id) or "unattributed"
+            mean_lag = lag_total / sampled if sampled else 0.0
+            # The checkpoint is exact: one C-level pass per sensor, and batches rarely mix many
+            newest = max(timestamps if len(counts) == 1 else
+                         compress(timestamps, map(sensor_id.__eq__, sensors)))
+            self.sensor_telemetry.record_events(name, count, mean_lag * count, lag_max, newest)
+
+    def _record_alert_telemetry(self, strata: Dict, alerts: AlertBatch, max_indicators: int = 256):
+        """
+        High and critical alerts count as detected threats, and their addresses are
+        what a later block or isolation is matched against for MTTR; subscriber
+        buffers count as backlog. ``alerts`` may be the load shedder's sample.
+        """
+        high = SEVERITY_CODES["high"]
+        detected = sum(count for (_, severity), count in strata.items() if severity >= high)
+        indicators = []
+        if detected:
+            columns = alerts.columns
+            flags = list(map(high.__le__, columns["severity"]))
+            addresses = set(compress(zip(columns["src_hi"], columns["src_lo"]), flags))
+            addresses.update(compress(zip(columns["dst_hi"], columns["dst_lo"]), flags))
+            addresses.discard((0, 0))
+            indicators = [unpack_ip(hi, lo) for hi, lo in islice(addresses, max_indicators)]
+        self.capabilities.record_detected(detected, indicators)
+        subscriptions = list(self.alert_stream.subscriptions)
+        self.capabilities.record_backlog(sum(subscription.size for subscription in subscriptions),
+                                         sum(subscription.capacity for subscription in subscriptions))
+
+    def report_sensor_telemetry(self, name: str, kind: str, healthy: bool = True,
+                                received: int = 0, dropped: int = 0):
+        """
+        Heartbeat from a firewall, IDS, IdP, SIEM or backup sensor with the events
+        it received and dropped since its last report
+        """
+        self.capabilities.report_sensor(name, kind, healthy, received, dropped)
+        self.gaius.situation.update(friendly_forces=self.get_defense_capabilities())
+
+    def add_detection_zone(self, name: str, cidrs: List[str], sector: Optional[str] = None,
+                           criticality: int = 1, kind: str = "zone") -> bool:
+        """
+        Register a detection zone (or asset group with kind="asset_group") by CIDR
+        """
+        try:
+            ZoneIndex.build([{"name": name, "cidrs": cidrs}])
+        except ValueError as e:
+            logging.error(f"Invalid CIDR for zone {name}: {e}")
+            return False
+        key = "asset_groups" if kind == "asset_group" else "detection_zones"
+        self.ids_config[key].append({
+            "name": name,
+            "cidrs": list(cidrs),
+            "sector": sector,
+            "criticality": criticality,
+            "kind": kind
+        })
+        return True
+
+    def get_zone_index(self) -> ZoneIndex:
+        """Longest-prefix-match index over detection zones and asset groups"""
+        if self._zone_index is None:
+            self._zone_index = ZoneIndex.build(
+                [*self.ids_config["detection_zones"], *self.ids_config["asset_groups"]]
+            )
+        return self._zone_index
+
+    def _gather_ids_alerts(self) -> AlertBatch:
+        """
+        Gather and categorize IDS alerts into a compact column batch
+        """
+        alerts = AlertBatchBuilder(self.signature_table, self.sensor_table)
+        # Implementation specific to IDS type
+        # Example for Snort/Suricata log parsing: alerts.append_eve(event)
+        return alerts.build()
+
+    async def analyze_flows(self, path: str) -> Dict:
+        """
+        Analyze a NetFlow v5, IPFIX or PCAP file for top talkers, bottlenecks
+        and beaconing, and feed the results into the terrain
+        """
+        report = await asyncio.to_thread(self._analyze_flow_file, path)
+        self.flow_report = report
+        if self.supported_tools["netflow"]["connected"]:
+            # Same tools, new bottlenecks: the topology still has to be rebuilt
+            self._drop_topology()
+        else:
+            self.supported_tools["netflow"]["connected"] = True
+        self.gaius.situation.update(behavior=self.behavior_summary())
+        return report
+
+    async def ingest_connections(self, lines) -> Dict:
+        """Feed Zeek conn.log lines (TSV with header, or JSON) to the behavioral detector"""
+        findings = await asyncio.to_thread(self._observe_connections, lines)
+        self.gaius.situation.update(behavior=self.behavior_summary())
+        return findings
+
+    def _observe_connections(self, lines) -> Dict:
+        self.behavior.observe(zeek_conn_batch(lines))
+        return self.behavior.score()
+
+    def _analyze_flow_file(self, path: str) -> Dict:
+        if self.flow_dir:
+            root = os.path.realpath(self.flow_dir)
+            path = os.path.realpath(os.path.join(root, path))
+            if not path.startswith(root + os.sep):
+                raise ValueError(f"Flow files must be under {self.flow_dir}")
+        started = time.perf_counter()
+        flows = read_flows(path)
+        report = self.flow_analytics.analyze(flows)
+        self.behavior.observe(flows)
+        findings = self.behavior.score(force=True)
+        report["lateral_movement"] = findings["lateral_movement"]
+        report["source"] = os.path.basename(path)
+        report["analyzed_at"] = time.time()
+        report["elapsed_seconds"] = round(time.perf_counter() - started, 3)
+        return report
+
+    def behavior_summary(self) -> Dict:
+        """Counts of current behavioral findings and the sectors their source hosts sit in"""
+        findings = self.behavior.findings
+        zone_index = self.get_zone_index()
+        sectors = Counter()
+        for finding in findings["beaconing"] + findings["lateral_movement"]:
+            zone = zone_index.lookup(finding["src"])
+            if zone is not None:
+                sectors[zone.sector] += 1
+        return {
+            "beaconing": len(findings["beaconing"]),
+            "lateral_movement": len(findings["lateral_movement"]),
+            "pivots": sum(len(finding["pivots"]) for finding in findings["lateral_movement"]),
+            "sectors": dict(sectors.most_common())
+        }
+
+    def get_network_topology(self) -> TopologySnapshot:
         """
         Gather network topology data from connected tools
-        Returns format compatible with Gaius's terrain analysis
+        Returns format compatible with Gaius's terrain analysis. The snapshot is
+        shared between callers until supported_tools or ids_config changes and
+        must not be mutated.
         """
+        if self._topology_snapshot is None:
+            self._topology_snapshot = self._new_snapshot(self._build_network_topology())
+        return self._topology_snapshot
+
+    def _build_network_topology(self) -> Dict:
         topology = {
             "monitoring_points": {
-                "ids_coverage": self.supported_tools["ids"]["connected"],
+                "ids_coverage": self.supported_tools["ids"]["connected"] or bool(self.ids_config["sensor_types"]),
+                "sensor_positions": list(self.ids_config["sensors"]),
                 "siem_coverage": self.supported_tools["siem"]["connected"],
-                "netflow_analytics": False
+                "netflow_analytics": self.supported_tools["netflow"]["connected"]
             },
             "data_routes": {
                 "encrypted_channels": True,
                 "redundant_paths": False,
-                "bottlenecks": []
+                "bottlenecks": list(self.flow_report["bottlenecks"]) if self.flow_report else []
             },
             "failover_systems": {
                 "backup_sites": 1,
@@ -91,24 +454,51 @@ class SecurityToolsInterface:
         }
         return topology
 
-    def evaluate_security_posture(self) -> Dict:
+    def _new_snapshot(self, topology: Dict) -> TopologySnapshot:
+        self._topology_version += 1
+        return TopologySnapshot(topology, version=self._topology_version)
+
+    def _on_supported_tools_change(self):
+        self._drop_topology()
+
+    def _on_ids_config_change(self):
+        self._zone_index = None
+        self._drop_topology()
+
+    def _drop_topology(self):
+        """Discard a stale snapshot and the terrain analysis cached for it, then reassess"""
+        snapshot = self._topology_snapshot
+        if snapshot is not None:
+            self._topology_snapshot = None
+            self.gaius.invalidate_terrain(snapshot.fingerprint)
+            self.gaius.situation.update(terrain=self.get_network_topology())
+
+    def refresh_situation(self):
+        """Push every current input to Gaius's live assessment; unchanged ones cost nothing"""
+        self.gaius.situation.update(
+            terrain=self.get_network_topology(),
+            friendly_forces=self.get_defense_capabilities(),
+            enemy_forces=self.get_threat_intelligence(),
+            sector_activity=self.sector_activity,
+            behavior=self.behavior_summary()
+        )
+
+    async def evaluate_security_posture(self) -> Dict:
         """
         Trigger Gaius's evaluation based on current security tool data
         """
-        topology = self.get_network_topology()
-        return self.gaius.evaluate_situation({
-            "terrain": topology,
-            "friendly_forces": self.get_defense_capabilities(),
-            "enemy_forces": self.get_threat_intelligence()
-        })
+        self.refresh_situation()
+        return await self.gaius.evaluate_situation({})
 
     def get_defense_capabilities(self) -> Dict:
         """
         Assess current defensive capabilities from security tools
         """
         try:
+            controls = self.capabilities.control_scores(self._configured_controls())
+
             logging.info("Calculating defense strength...")
-            strength = self._calculate_defense_strength()
+            strength = self._calculate_defense_strength(controls)
             logging.info(f"Defense strength: {strength}")
 
             logging.info("Calculating response capability...")
@@ -122,76 +512,150 @@ class SecurityToolsInterface:
             return {
                 "strength": strength,
                 "mobility": mobility,
-                "supplies": supplies
+                "supplies": supplies,
+                **controls
             }
         except Exception as e:
             logging.error(f"Error in get_defense_capabilities: {e}", exc_info=True)
             raise
 
+    def configure_threat_intel(self, feed_dir: str) -> bool:
+        """
+        Point the IOC store at a directory of STIX/CSV feed files and load it
+        """
+        if not os.path.isdir(feed_dir):
+            logging.error(f"IOC feed directory not found: {feed_dir}")
+            return False
+        self.ioc_store.feed_dir = feed_dir
+        self.ioc_store.reload()
+        self.gaius.situation.update(enemy_forces=self.get_threat_intelligence())
+        return True
+
     def get_threat_intelligence(self) -> Dict:
         """
         Gather threat intelligence from security tools
+        Enemy forces are derived from IOC match rates and severities, on the same
+        percentage scale as get_defense_capabilities
         """
         return {
             "strength": self._aggregate_threat_levels(),
-            "mobility": 0.7,  # Default assumption for attacker mobility
-            "supplies": 0.8   # Default assumption for attacker resources
+            "mobility": self._estimate_attacker_mobility(),
+            "supplies": self._estimate_attacker_resources(),
+            "ioc_matches": self.ioc_matches.to_dict()
         }
 
+    def _aggregate_threat_levels(self) -> int:
+        """
+        Baseline of 50 plus up to 150 for severity-weighted IOC hits, so that
+        heavy known-bad traffic pushes the force ratio into HIGH/CRITICAL
+        """
+        matches = self.ioc_matches
+        if not matches.alerts:
+            return 50
+        weights = {"info": 0.0, "low": 0.25, "medium": 0.5, "high": 0.75, "critical": 1.0}
+        weighted = sum(weights[level] * count for level, count in matches.severity_counts.items())
+        pressure = min(1.0, 2 * weighted / matches.alerts)
+        return round(50 + 150 * pressure)
+
+    def _estimate_attacker_mobility(self) -> int:
+        """Distinct known-bad indicators in play, as a proxy for attacker agility"""
+        return min(100, 40 + 6 * len(self.ioc_matches.indicators))
+
+    def _estimate_attacker_resources(self) -> int:
+        """Worst matched IOC severity, as a proxy for attacker capability"""
+        levels = {"info": 40, "low": 50, "medium": 65, "high": 80, "critical": 95}
+        return levels[self.ioc_matches.max_severity]
+
     def get_threat_metrics(self) -> Dict:
-        """Get hourly threat metrics"""
+        """Get hourly threat metrics for the last seven hours, oldest first"""
         return {
-            "hourly_threats": [self._count_threats_in_hour(hour) for hour in range(7)],
-            "hourly_mitigated": [self._count_mitigated_in_hour(hour) for hour in range(7)]
+            "hourly_threats": [int(count) for count in reversed(self.capabilities.detected_hourly.buckets(7))],
+            "hourly_mitigated": [int(count) for count in reversed(self.capabilities.mitigated_hourly.buckets(7))]
         }
 
     def _get_active_systems(self) -> List[Dict]:
-        """Get status of all defense systems"""
-        return [
+        """Get status of all defense systems from sensor and integration telemetry"""
+        sensors = self.sensor_telemetry.snapshot()
+        statuses = {entry["status"] for entry in sensors}
+        if not sensors:
+            ids_status = "not reporting"
+        elif statuses == {ACTIVE}:
+            ids_status = "active"
+        elif statuses == {SILENT}:
+            ids_status = "offline"
+        else:
+            ids_status = "degraded"
+        edr = self.gaius.security_integrations["edr"]["connection_status"]
+        edr_status = self.capabilities.sensor_status(["edr"])
+        if edr_status is None and edr:
+            edr_status = "active" if "connected" in edr.values() else "offline"
+        systems = [
             {
                 "name": "Intrusion Detection",
-                "status": "active",
-                "description": "Real-time network monitoring"
+                "status": ids_status,
+                "description": f"Real-time network monitoring: {len(sensors)} sensor(s), "
+                               f"{sum(entry['eps'] for entry in sensors):.1f} events/s"
             },
             {
                 "name": "Firewall",
-                "status": "active",
+                "status": self.capabilities.sensor_status(["firewall", "waf"]) or "not reporting",
                 "description": "Perimeter defense"
             },
             {
                 "name": "Endpoint Protection",
-                "status": "active",
+                "status": edr_status or "not reporting",
                 "description": "Device security"
             }
         ]
+        for entry in sensors:
+            systems.append({
+                "name": f"IDS sensor {entry['sensor']}",
+                "status": entry["status"],
+                "description": f"{entry['eps']} events/s, lag {entry['lag_seconds']['mean']}s, "
+                               f"{entry['parse_errors']} parse errors, queue {entry['queue_depth']}"
+            })
+        return systems
 
     def _count_threats_in_hour(self, hour: int) -> int:
-        """Count threats detected in specific hour"""
-        # Implementation soon
-        return 0
+        """Count threats detected in specific hour (0 is the current hour)"""
+        return int(self.capabilities.detected_hourly.buckets(hour + 1)[hour])
 
     def _count_mitigated_in_hour(self, hour: int) -> int:
-        """Count threats mitigated in specific hour"""
-        # Implementation soon
-        return 0
+        """Count threats mitigated in specific hour (0 is the current hour)"""
+        return int(self.capabilities.mitigated_hourly.buckets(hour + 1)[hour])
+
+    def _configured_controls(self) -> Dict[str, Optional[float]]:
+        """
+        Control scores implied by configuration alone, used where no sensor reports.
+        Connected tools without telemetry count as half strength: present but unverified.
+        """
+        topology = self.get_network_topology()
+        monitoring = topology["monitoring_points"]
+        failover = topology["failover_systems"]
+        return {
+            "ids": 50 if monitoring["ids_coverage"] else None,
+            "monitoring": 50 if monitoring["siem_coverage"] or monitoring["netflow_analytics"] else None,
+            "encryption": 100 if topology["data_routes"]["encrypted_channels"] else 0,
+            "backup": 100 * (min(failover["backup_sites"], 2) / 2 + bool(failover["disaster_recovery"])
+                             + bool(failover["backup_power"])) / 3
+        }
 
-    def _calculate_defense_strength(self) -> int:
+    def _calculate_defense_strength(self, controls: Optional[Dict] = None) -> int:
         """
-        Calculate the overall defense strength based on active systems and configurations.
+        Calculate the overall defense strength as the mean of the controls we have evidence for.
         """
-        # Placeholder logic: return a fixed value or calculate based on actual data
-        return 75  # Example: 75% defense strength
+        if controls is None:
+            controls = self.capabilities.control_scores(self._configured_controls())
+        return self.capabilities.defense_strength(controls)
 
     def _calculate_response_capability(self) -> int:
         """
-        Calculate the system's response capability (e.g., speed of threat mitigation).
+        Calculate the system's response capability from mitigation coverage and estimated MTTR.
         """
-        # Placeholder logic: return a fixed value or calculate based on actual data
-        return 80  # Example: 80% response capability
+        return self.capabilities.response_capability()
 
     def _calculate_resource_availability(self) -> int:
         """
-        Calculate the availability of resources for defense operations.
+        Calculate the headroom left after sensor drops and alert backlog.
         """
-        # Placeholder logic: return a fixed value or calculate based on actual data
-        return 90  # Example: 90% resource availability
+        return self.capabilities.resource_availability()
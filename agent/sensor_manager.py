@@ -0,0 +1,562 @@
+"""
+Many IDS sensors tailed in parallel and merged into one time-ordered alert stream.
+
+Sensors come from a JSON config file (``GAIUS_SENSORS_CONFIG``) or from
+``connect_ids``, and can be added, changed or removed at runtime:
+
+    {"reorder_window": 2.0,
+     "sensors": [
+        {"name": "dmz-1", "type": "suricata", "path": "/var/log/suricata/eve.json", "max_eps": 5000},
+        {"name": "core", "type": "zeek", "log": "notice", "path": "/opt/zeek/logs/current/notice.log"},
+        {"name": "core-conn", "type": "zeek", "log": "conn", "path": "/opt/zeek/logs/current/conn.log"}]}
+
+Each sensor has its own tailing task. It reads at most ``read_bytes`` per
+step and parses the chunk on a worker thread. Parsed chunks go into the
+sensor's own bounded queue. A token bucket holds the sensor to its
+``max_eps``. A hot sensor therefore only backs up its own log file: it
+waits on its own queue and bucket, and the other sensors keep their share
+of the reader threads and of the merger.
+
+The merger drains every queue on each tick. It releases alerts in
+timestamp order up to a watermark, which is the newest timestamp every
+recently active sensor has reached. That gives a slow sensor time to catch
+up. The watermark never trails the newest alert by more than
+``reorder_window`` seconds, and the buffer never holds more than
+``max_buffered`` alerts. A sensor that falls further behind than that has
+its alerts ingested as late, unordered. Zeek conn logs skip the merger and
+feed the behavioral detector directly, since it orders by record time
+itself.
+
+Tails follow rotation (draining the old file first) and truncation. Their
+file positions are part of state snapshots, so a restarted process resumes
+each log where it stopped.
+"""
+import asyncio
+import logging
+import os
+import time
+from bisect import bisect_right
+from typing import Callable, Dict, Iterable, Iterator, List, NamedTuple, Optional, Tuple
+
+from alert_batch import AlertBatch, AlertBatchBuilder, parse_timestamp
+from flow_analytics import zeek_conn_batch
+from serialization import loads_json
+
+SENSOR_TYPES = ("suricata", "snort", "zeek")
+# Log kinds a sensor can be tailed for; EVE is Suricata/Snort JSON, notice/conn are Zeek logs
+SENSOR_LOGS = ("eve", "notice", "conn")
+# Zeek notice framework -> EVE alert priority (1 high .. 3 low, 4 informational)
+ZEEK_PRIORITY = {"Scan": 3, "SSL": 3, "HTTP": 2, "Weird": 4, "SSH": 2}
+
+
+class SensorConfig(NamedTuple):
+    name: str
+    type: str
+    path: str
+    log: str = "eve"
+    location: Optional[str] = None
+    rules_path: Optional[str] = None
+    max_eps: float = 5000.0
+    from_start: bool = False
+
+    @classmethod
+    def from_dict(cls, config: Dict) -> "SensorConfig":
+        """Validate one sensor entry; raises ValueError on anything unusable"""
+        unknown = set(config) - set(cls._fields)
+        if unknown:
+            raise ValueError(f"Unknown sensor settings: {sorted(unknown)}")
+        sensor_type = str(config.get("type", "")).lower()
+        if sensor_type not in SENSOR_TYPES:
+            raise ValueError(f"Unsupported sensor type: {config.get('type')!r}")
+        log = config.get("log") or ("notice" if sensor_type == "zeek" else "eve")
+        if log not in SENSOR_LOGS or (log == "eve") == (sensor_type == "zeek"):
+            raise ValueError(f"{sensor_type} sensors cannot be tailed for {log!r} logs")
+        if not config.get("name") or not config.get("path"):
+            raise ValueError("Sensors need a name and a log path")
+        return cls(**{**config, "type": sensor_type, "log": log, "max_eps": float(config.get("max_eps", 5000.0))})
+
+
+class SensorChunk(NamedTuple):
+    """One parsed read from a sensor log"""
+    alerts: AlertBatch
+    stats: List[Dict]
+    nbytes: int
+    parse_errors: int
+    # Records the chunk stands for when they are not alerts, e.g. Zeek connections
+    connections: int = 0
+
+    @property
+    def events(self) -> int:
+        return self.connections or len(self.alerts)
+
+
+def _zeek_int(value) -> int:
+    """Zeek writes unset fields as "-" """
+    return 0 if value in (None, "", "-") else int(value)
+
+
+def zeek_notice_events(lines: Iterable[str], host: str = "zeek",
+                       on_error: Optional[Callable[[str, Exception], None]] = None) -> Iterator[Dict]:
+    """
+    Zeek notice.log rows, TSV with its #fields header or JSON lines, as
+    EVE-shaped alerts. A malformed row is skipped and passed to ``on_error``;
+    the rows after it are still read
+    """
+    fields: Optional[List[str]] = None
+    for line in lines:
+        line = line.rstrip("\r\n")
+        if line.startswith("#fields"):
+            fields = line.split("\t")[1:]
+            continue
+        if not line or line.startswith("#"):
+            continue
+        try:
+            event = _zeek_notice_event(line, fields, host)
+        except (ValueError, TypeError, AttributeError) as e:
+            if on_error is not None:
+                on_error(line, e)
+            continue
+        yield event
+
+
+def _zeek_notice_event(line: str, fields: Optional[List[str]], host: str) -> Dict:
+    record = loads_json(line) if line.startswith("{") else dict(zip(fields or [], line.split("\t")))
+    note = record.get("note", "zeek")
+    if record.get("ts") in (None, "", "-"):
+        raise ValueError("notice without a timestamp")
+    return {
+        # Epoch seconds by default; ISO-8601 when Zeek logs with JSON::TS_ISO8601
+        "timestamp": parse_timestamp(record["ts"]),
+        "src_ip": record.get("id.orig_h", record.get("src", "")),
+        "dest_ip": record.get("id.resp_h", record.get("dst", "")),
+        "src_port": _zeek_int(record.get("id.orig_p")),
+        "dest_port": _zeek_int(record.get("id.resp_p")),
+        "proto": "" if record.get("proto") in (None, "-") else record["proto"],
+        "host": host,
+        "alert": {"signature": f"{note}: {record.get('msg', '')}".strip(": "),
+                  "severity": ZEEK_PRIORITY.get(str(note).split("::")[0], 2)}
+    }
+
+
+class LogTail:
+    """
+    Incremental line reader for one growing log. Follows rotation, draining
+    the old file before switching, and starts over when the file is truncated.
+    Header lines (``#fields`` and the like) are kept in ``headers`` so that
+    chunks read mid-file can still be parsed.
+    """
+    def __init__(self, path: str, from_start: bool = False, position: Optional[Tuple[int, int]] = None):
+        self.path = path
+        self.from_start = from_start
+        self.position = position  # (inode, offset) to resume from
+        self.headers: Dict[str, str] = {}
+        self.backlog = 0  # bytes written but not yet read
+        self._handle = None
+        self._inode: Optional[int] = None
+        self._partial = b""
+
+    def _open(self) -> bool:
+        try:
+            handle = open(self.path, "rb")
+        except FileNotFoundError:
+            return False
+        stat = os.fstat(handle.fileno())
+        self.headers = self._read_headers(handle)
+        if self.position is not None and self.position[0] == stat.st_ino and self.position[1] <= stat.st_size:
+            handle.seek(self.position[1])
+        elif self.position is not None or self.from_start or self._inode is not None:
+            # A file that replaced the one we were reading is read in full
+            handle.seek(0)
+        else:
+            handle.seek(0, os.SEEK_END)
+        self._handle, self._inode, self._partial = handle, stat.st_ino, b""
+        return True
+
+    @staticmethod
+    def _read_headers(handle, limit: int = 65536) -> Dict[str, str]:
+        headers = {}
+        for line in handle.read(limit).split(b"\n"):
+            if not line.startswith(b"#"):
+                break
+            text = line.decode("utf-8", errors="replace")
+            headers[text.split(None, 1)[0]] = text
+        handle.seek(0)
+        return headers
+
+    def read(self, max_bytes: int) -> List[str]:
+        """Complete lines appended since the last read, at most about ``max_bytes`` of them"""
+        if self._handle is None and not self._open():
+            return []
+        data = self._handle.read(max_bytes)
+        if not data and self._replaced():
+            self._handle.close()
+            self._handle = None
+            if not self._open():
+                return []
+            data = self._handle.read(max_bytes)
+        offset = self._handle.tell()
+        try:
+            self.backlog = max(0, os.fstat(self._handle.fileno()).st_size - offset)
+        except OSError:
+            self.backlog = 0
+        lines = (self._partial + data).split(b"\n")
+        self._partial = lines.pop()
+        # Resume from the start of the incomplete line, not past it
+        self.position = (self._inode, offset - len(self._partial))
+        text = [line.decode("utf-8", errors="replace") for line in lines if line]
+        for line in text:
+            if line.startswith("#"):
+                self.headers[line.split(None, 1)[0]] = line
+        return text
+
+    def _replaced(self) -> bool:
+        """True when the path now names another file, or ours was truncated (then we rewind)"""
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            return False
+        if stat.st_ino != self._inode:
+            return True
+        if stat.st_size < self._handle.tell():
+            self._handle.seek(0)
+            self._partial = b""
+        return False
+
+    def close(self):
+        if self._handle is not None:
+            self._handle.close()
+            self._handle = None
+
+
+class RateLimiter:
+    """Token bucket of ``rate`` events per second with one second of burst"""
+    def __init__(self, rate: float):
+        self.rate = rate
+        self._allowance = rate
+        self._checked = time.monotonic()
+        self.throttled = 0.0
+
+    async def take(self, count: int):
+        now = time.monotonic()
+        self._allowance = min(self.rate, self._allowance + (now - self._checked) * self.rate) - count
+        self._checked = now
+        if self._allowance < 0:
+            delay = -self._allowance / self.rate
+            self.throttled += delay
+            await asyncio.sleep(delay)
+
+
+class StreamMerger:
+    """Bounded reordering of alert chunks from many sensors into timestamp order"""
+    def __init__(self, reorder_window: float = 2.0, max_buffered: int = 50_000, idle_after: float = 5.0):
+        self.reorder_window = reorder_window
+        self.max_buffered = max_buffered
+        self.idle_after = idle_after
+        self._pending: List[AlertBatch] = []
+        self._buffered = 0
+        # sensor -> [newest timestamp, monotonic time of its last chunk]
+        self._progress: Dict[str, List[float]] = {}
+        self.watermark = 0.0
+        self.counters = {"released": 0, "late": 0, "forced": 0}
+
+    def push(self, sensor: str, batch: AlertBatch):
+        if not len(batch):
+            return
+        timestamps = batch.column("timestamp")
+        newest = max(timestamps)
+        progress = self._progress.setdefault(sensor, [newest, 0.0])
+        progress[0], progress[1] = max(progress[0], newest), time.monotonic()
+        if min(timestamps) < self.watermark:
+            self.counters["late"] += sum(map(self.watermark.__gt__, timestamps))
+        self._pending.append(batch)
+        self._buffered += len(batch)
+
+    def forget(self, sensor: str):
+        """A removed sensor no longer holds the watermark back"""
+        self._progress.pop(sensor, None)
+
+    def release(self, flush: bool = False) -> Optional[AlertBatch]:
+        """Alerts up to the watermark (everything when flushing), oldest first"""
+        if not self._pending:
+            return None
+        now = time.monotonic()
+        active = [newest for newest, seen in self._progress.values() if now - seen <= self.idle_after]
+        newest = max((newest for newest, _ in self._progress.values()), default=float("inf"))
+        watermark = max(min(active, default=newest), newest - self.reorder_window)
+        batch = self._pending[0] if len(self._pending) == 1 else AlertBatch.concat(self._pending)
+        timestamps = batch.column("timestamp")
+        order = sorted(range(len(batch)), key=timestamps.__getitem__)
+        cut = len(order) if flush else bisect_right(list(map(timestamps.__getitem__, order)), watermark)
+        if len(order) - cut > self.max_buffered:
+            self.counters["forced"] += len(order) - cut - self.max_buffered
+            cut = len(order) - self.max_buffered
+        self.watermark = max(self.watermark, watermark)
+        kept = batch.take(order[cut:]) if cut < len(order) else None
+        self._pending = [kept] if kept is not None else []
+        self._buffered = len(kept) if kept is not None else 0
+        if not cut:
+            return None
+        self.counters["released"] += cut
+        return batch.take(order[:cut])
+
+    def snapshot(self) -> Dict:
+        return {**self.counters, "buffered": self._buffered, "watermark": self.watermark}
+
+
+class SensorFeed:
+    """One configured sensor: its tail, rate limit, queue to the merger and tailing task"""
+    def __init__(self, config: SensorConfig, queue_chunks: int, position: Optional[Tuple[int, int]] = None):
+        self.config = config
+        self.tail = LogTail(config.path, config.from_start, position)
+        self.limiter = RateLimiter(config.max_eps)
+        self.queue: "asyncio.Queue[SensorChunk]" = asyncio.Queue(maxsize=queue_chunks)
+        self.queued = 0  # alerts waiting in the queue
+        self.task: Optional[asyncio.Task] = None
+        self.counters = {"reads": 0, "lines": 0, "events": 0, "errors": 0}
+
+
+class SensorManager:
+    def __init__(self, security_tools, reorder_window: float = 2.0, max_buffered: int = 50_000,
+                 flush_interval: float = 0.2, read_bytes: int = 1 << 18, queue_chunks: int = 8,
+                 poll_interval: float = 0.25, log_dir: Optional[str] = None):
+        self.tools = security_tools
+        self.merger = StreamMerger(reorder_window, max_buffered)
+        self.flush_interval = flush_interval
+        self.read_bytes = read_bytes
+        self.queue_chunks = queue_chunks
+        self.poll_interval = poll_interval
+        # Log paths named by API callers must live under this directory
+        self.log_dir = log_dir
+        self.config_path: Optional[str] = None
+        self.sensors: Dict[str, SensorFeed] = {}
+        self._positions: Dict[str, Tuple[int, int]] = {}
+        self._merge_task: Optional[asyncio.Task] = None
+        self.running = False
+
+    # Configuration
+
+    async def load_config(self, path: str) -> List[str]:
+        """
+        Make the running sensors match a config file: new entries are added,
+        changed ones restarted and missing ones removed. Returns the names.
+        """
+        with open(path, encoding="utf-8") as handle:
+            document = loads_json(handle.read())
+        configs = [SensorConfig.from_dict(entry) for entry in document.get("sensors", [])]
+        names = [config.name for config in configs]
+        if len(set(names)) != len(names):
+            raise ValueError("Sensor names must be unique")
+        self.merger.reorder_window = float(document.get("reorder_window", self.merger.reorder_window))
+        self.config_path = path
+        for name in set(self.sensors) - set(names):
+            await self.remove(name)
+        for config in configs:
+            await self.add(config)
+        return names
+
+    async def reload(self) -> List[str]:
+        if not self.config_path:
+            raise ValueError("No sensor config file loaded")
+        return await self.load_config(self.config_path)
+
+    def resolve_path(self, path: str) -> str:
+        """Confine a caller-supplied log path to ``log_dir``"""
+        if not self.log_dir:
+            raise PermissionError("Adding sensors at runtime needs GAIUS_SENSOR_LOG_DIR")
+        root = os.path.realpath(self.log_dir)
+        resolved = os.path.realpath(os.path.join(root, path))
+        if not resolved.startswith(root + os.sep):
+            raise ValueError(f"Sensor logs must be under {self.log_dir}")
+        return resolved
+
+    async def add(self, config: SensorConfig) -> bool:
+        """Register a sensor, or restart it with a changed config; False if it is unchanged"""
+        current = self.sensors.get(config.name)
+        if current is not None and current.config == config:
+            return False
+        position = self._positions.pop(config.name, None)
+        if current is not None:
+            await self.remove(config.name)
+            # Same log, new settings: carry on from where the old tail stopped, its last read included
+            position = current.tail.position if current.config.path == config.path else None
+        feed = self.sensors[config.name] = SensorFeed(config, self.queue_chunks, position)
+        self.tools.register_ids_sensor(config)
+        if self.running:
+            self._start_feed(feed)
+        logging.info(f"Added {config.type} sensor {config.name} tailing {config.path}")
+        return True
+
+    async def remove(self, name: str) -> bool:
+        feed = self.sensors.pop(name, None)
+        if feed is None:
+            return False
+        if feed.task is not None:
+            # The task pushes the chunk of a read still in flight; it must land before the sensor is forgotten
+            feed.task.cancel()
+            await asyncio.gather(feed.task, return_exceptions=True)
+            feed.task = None
+        self._drain(feed)
+        feed.tail.close()
+        self.merger.forget(name)
+        self.tools.unregister_ids_sensor(name)
+        logging.info(f"Removed sensor {name}")
+        return True
+
+    def sensor_type(self, name: str) -> Optional[str]:
+        feed = self.sensors.get(name)
+        return feed.config.type if feed is not None else None
+
+    # Running
+
+    async def start(self):
+        """Load the config file, if one was given, and start tailing every sensor"""
+        if self.running:
+            return
+        if self.config_path:
+            try:
+                await self.load_config(self.config_path)
+            except (OSError, ValueError) as e:
+                logging.error(f"Failed to load sensor config {self.config_path}: {e}")
+        self.running = True
+        for feed in self.sensors.values():
+            self._start_feed(feed)
+        self._merge_task = asyncio.create_task(self._merge())
+
+    async def stop(self):
+        """Stop tailing and ingest whatever is still queued or buffered"""
+        if not self.running:
+            return
+        self.running = False
+        tasks = [feed.task for feed in self.sensors.values() if feed.task is not None] + [self._merge_task]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        for feed in self.sensors.values():
+            feed.task = None
+            self._drain(feed)
+        self._ingest(self.merger.release(flush=True))
+
+    def _start_feed(self, feed: SensorFeed):
+        feed.task = asyncio.create_task(self._tail(feed))
+
+    async def _tail(self, feed: SensorFeed):
+        config = feed.config
+        while True:
+            read = asyncio.ensure_future(asyncio.to_thread(self._read_chunk, feed))
+            try:
+                chunk = await asyncio.shield(read)
+            except asyncio.CancelledError:
+                # Lines already consumed from the log must not be lost with the task
+                chunk = await read
+                if chunk is not None:
+                    self.tools.record_sensor_read(config.name, chunk)
+                    self.merger.push(config.name, chunk.alerts)
+                raise
+            except Exception as e:
+                feed.counters["errors"] += 1
+                logging.error(f"Error tailing sensor {config.name}: {e}")
+                await asyncio.sleep(self.poll_interval * 4)
+                continue
+            if chunk is None:
+                await asyncio.sleep(self.poll_interval)
+                continue
+            self.tools.record_sensor_read(config.name, chunk)
+            if config.log == "conn":
+                # Connections went straight to the behavioral detector on the worker thread
+                self.tools.sensor_telemetry.record_events(config.name, chunk.events)
+                self.tools.gaius.situation.update(behavior=self.tools.behavior_summary())
+                await feed.limiter.take(chunk.events)
+                continue
+            # Only this sensor waits when it outruns its budget or the merger
+            await feed.limiter.take(chunk.events)
+            await feed.queue.put(chunk)
+            feed.queued += chunk.events
+            self.tools.report_sensor_queue(config.name, feed.queued)
+
+    def _read_chunk(self, feed: SensorFeed) -> Optional[SensorChunk]:
+        """Worker thread: read and parse the next chunk of one sensor's log"""
+        lines = feed.tail.read(self.read_bytes)
+        if not lines:
+            return None
+        config = feed.config
+        feed.counters["reads"] += 1
+        feed.counters["lines"] += len(lines)
+        if config.log == "eve":
+            chunk = self.tools.parse_eve(lines, config.name)
+        else:
+            nbytes = sum(map(len, lines))
+            if feed.tail.headers:
+                lines = [*feed.tail.headers.values(), *lines]
+            if config.log == "notice":
+                builder = AlertBatchBuilder(self.tools.signature_table, self.tools.sensor_table)
+
+                def reject(line: str, error: Exception):
+                    builder.rejected += 1
+                for event in zeek_notice_events(lines, config.name, reject):
+                    builder.append_eve(event, config.name)
+                chunk = SensorChunk(builder.build(), [], nbytes, builder.rejected)
+            else:
+                connections = zeek_conn_batch(lines)
+                self.tools.behavior.observe(connections)
+                self.tools.behavior.score()
+                chunk = SensorChunk(AlertBatch.empty(self.tools.signature_table, self.tools.sensor_table),
+                                    [], nbytes, 0, len(connections))
+        feed.counters["events"] += chunk.events
+        return chunk
+
+    def _drain(self, feed: SensorFeed):
+        while not feed.queue.empty():
+            chunk = feed.queue.get_nowait()
+            self.merger.push(feed.config.name, chunk.alerts)
+        feed.queued = 0
+
+    async def _merge(self):
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            try:
+                for feed in list(self.sensors.values()):
+                    if feed.queued:
+                        self._drain(feed)
+                        self.tools.report_sensor_queue(feed.config.name, 0)
+                self._ingest(self.merger.release())
+            except Exception as e:
+                logging.error(f"Error merging sensor streams: {e}")
+
+    def _ingest(self, batch: Optional[AlertBatch]):
+        if batch is not None and len(batch):
+            self.tools.ingest_alerts(batch)
+
+    # Snapshots and status
+
+    def export_state(self) -> Dict[str, List[int]]:
+        """File position of each tail, so a restart resumes where it stopped"""
+        positions = {name: list(position) for name, position in self._positions.items()}
+        positions.update({name: list(feed.tail.position) for name, feed in self.sensors.items()
+                          if feed.tail.position is not None})
+        return positions
+
+    def restore_state(self, positions: Dict[str, List[int]]):
+        """Resume positions for sensors configured now or later"""
+        for name, position in positions.items():
+            feed = self.sensors.get(name)
+            if feed is not None and feed.task is None:
+                feed.tail.position = tuple(position)
+            elif feed is None:
+                self._positions[name] = tuple(position)
+
+    def snapshot(self) -> Dict:
+        return {
+            "config_path": self.config_path,
+            "running": self.running,
+            "merge": self.merger.snapshot(),
+            "sensors": [
+                {
+                    **feed.config._asdict(),
+                    **feed.counters,
+                    "queued": feed.queued,
+                    "backlog_bytes": feed.tail.backlog,
+                    "throttled_seconds": round(feed.limiter.throttled, 3)
+                }
+                for feed in self.sensors.values()
+            ]
+        }
@@ -0,0 +1,196 @@
+"""
+Per-sensor ingestion telemetry for the IDS pipeline.
+
+Each sensor keeps rolling counts of events, bytes read and parse errors, the
+lag between event timestamps and ingest time, and its current queue depth.
+All of these live in fixed-size RollingWindow buckets, so memory stays
+constant per sensor whatever the event rate. A sensor that goes quiet, falls
+behind or starts producing unparseable records is reported as degraded or
+silent. A quiet sensor would otherwise look like a quiet network.
+"""
+import time
+from typing import Callable, Dict, List, Optional
+
+from telemetry import RollingStats, RollingWindow
+
+# Metric name -> (Prometheus type, help text)
+METRICS = {
+    "gaius_sensor_events_per_second": ("gauge", "Events ingested per second over the rolling window"),
+    "gaius_sensor_bytes_per_second": ("gauge", "Bytes read per second over the rolling window"),
+    "gaius_sensor_parse_errors": ("gauge", "Unparseable records in the rolling window"),
+    "gaius_sensor_lag_seconds": ("gauge", "Delay between event timestamp and ingest"),
+    "gaius_sensor_queue_depth": ("gauge", "Events waiting to be ingested"),
+    "gaius_sensor_events_total": ("counter", "Events ingested since startup"),
+    "gaius_sensor_up": ("gauge", "1 unless the sensor has gone silent")
+}
+
+ACTIVE = "active"
+DEGRADED = "degraded"
+SILENT = "silent"
+
+
+def _label(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+class SensorStats:
+    def __init__(self, name: str, window: float, bucket: float, clock: Callable[[], float]):
+        self.name = name
+        self.events = RollingWindow(window, bucket, clock)
+        self.bytes = RollingWindow(window, bucket, clock)
+        self.parse_errors = RollingWindow(window, bucket, clock)
+        self.lag = RollingStats(window, bucket, clock)
+        self.queue_depth = 0
+        self.total_events = 0
+        self.last_event: Optional[float] = None  # monotonic
+        # Newest event timestamp ingested (epoch seconds): where a restarted reader resumes
+        self.checkpoint: Optional[float] = None
+        # Last cumulative capture counters from the sensor's own stats records
+        self.capture: Dict[str, int] = {}
+
+
+class SensorTelemetry:
+    def __init__(self, window: float = 60.0, bucket: float = 1.0, silent_after: float = 120.0,
+                 max_lag: float = 30.0, max_error_rate: float = 0.01, max_queue_depth: int = 10000,
+                 on_new_sensor: Optional[Callable[[str], None]] = None,
+                 clock: Callable[[], float] = time.monotonic):
+        self.window = window
+        self.bucket = bucket
+        self.silent_after = silent_after
+        self.max_lag = max_lag
+        self.max_error_rate = max_error_rate
+        self.max_queue_depth = max_queue_depth
+        self.on_new_sensor = on_new_sensor
+        self.clock = clock
+        self.sensors: Dict[str, SensorStats] = {}
+
+    def sensor(self, name: str) -> SensorStats:
+        stats = self.sensors.get(name)
+        if stats is None:
+            stats = self.sensors[name] = SensorStats(name, self.window, self.bucket, self.clock)
+            if self.on_new_sensor is not None:
+                self.on_new_sensor(name)
+        return stats
+
+    def record_events(self, name: str, count: int, lag_total: float = 0.0, lag_max: float = 0.0,
+                      newest: Optional[float] = None):
+        """
+        ``count`` events ingested whose lags behind wall-clock time sum to
+        ``lag_total``; ``newest`` is the latest event timestamp among them
+        """
+        if not count:
+            return
+        stats = self.sensor(name)
+        stats.events.add(count)
+        stats.total_events += count
+        stats.last_event = self.clock()
+        stats.lag.observe(lag_total, count, lag_max)
+        if newest and (stats.checkpoint is None or newest > stats.checkpoint):
+            stats.checkpoint = newest
+
+    def checkpoints(self) -> Dict[str, Optional[float]]:
+        return {name: stats.checkpoint for name, stats in self.sensors.items()}
+
+    def record_read(self, name: str, nbytes: int, parse_errors: int = 0):
+        stats = self.sensor(name)
+        stats.bytes.add(nbytes)
+        if parse_errors:
+            stats.parse_errors.add(parse_errors)
+
+    def record_queue_depth(self, name: str, depth: int):
+        self.sensor(name).queue_depth = depth
+
+    def capture_delta(self, name: str, counters: Dict[str, int]) -> Dict[str, int]:
+        """Turn a sensor's cumulative capture counters into increments since its last report"""
+        stats = self.sensor(name)
+        delta = {}
+        for key, value in counters.items():
+            previous = stats.capture.get(key, 0)
+            # A counter that went backwards means the sensor restarted
+            delta[key] = value - previous if value >= previous else value
+            stats.capture[key] = value
+        return delta
+
+    def status(self, stats: SensorStats, now: Optional[float] = None) -> str:
+        now = self.clock() if now is None else now
+        if stats.last_event is None or now - stats.last_event > self.silent_after:
+            return SILENT
+        events = stats.events.total(now)
+        errors = stats.parse_errors.total(now)
+        if (stats.lag.mean(now) > self.max_lag or stats.queue_depth > self.max_queue_depth
+                or (errors and errors / (events + errors) > self.max_error_rate)):
+            return DEGRADED
+        return ACTIVE
+
+    def sensor_snapshot(self, stats: SensorStats, now: Optional[float] = None) -> Dict:
+        now = self.clock() if now is None else now
+        return {
+            "sensor": stats.name,
+            "status": self.status(stats, now),
+            "eps": round(stats.events.rate(now), 2),
+            "bytes_per_second": round(stats.bytes.rate(now), 1),
+            "parse_errors": int(stats.parse_errors.total(now)),
+            "lag_seconds": {"mean": round(stats.lag.mean(now), 3), "max": round(stats.lag.max(now), 3)},
+            "queue_depth": stats.queue_depth,
+            "events_total": stats.total_events,
+            "idle_seconds": round(now - stats.last_event, 1) if stats.last_event is not None else None
+        }
+
+    def snapshot(self) -> List[Dict]:
+        now = self.clock()
+        return [self.sensor_snapshot(stats, now) for stats in self.sensors.values()]
+
+    def export_state(self) -> Dict:
+        now = self.clock()
+        return {
+            name: {
+                "events": stats.events.export_state(now), "bytes": stats.bytes.export_state(now),
+                "parse_errors": stats.parse_errors.export_state(now), "lag": stats.lag.export_state(now),
+                "total_events": stats.total_events, "checkpoint": stats.checkpoint, "capture": dict(stats.capture),
+                "idle": now - stats.last_event if stats.last_event is not None else None
+            }
+            for name, stats in self.sensors.items()
+        }
+
+    def restore_state(self, state: Dict, elapsed: float = 0.0):
+        """Reload sensors exported ``elapsed`` seconds ago; they count as idle for that long"""
+        now = self.clock()
+        for name, saved in state.items():
+            stats = self.sensor(name)
+            stats.events.restore_state(saved["events"], elapsed, now)
+            stats.bytes.restore_state(saved["bytes"], elapsed, now)
+            stats.parse_errors.restore_state(saved["parse_errors"], elapsed, now)
+            stats.lag.restore_state(saved["lag"], elapsed, now)
+            stats.total_events = saved["total_events"]
+            stats.checkpoint = saved["checkpoint"]
+            stats.capture = dict(saved["capture"])
+            stats.last_event = now - saved["idle"] - elapsed if saved["idle"] is not None else None
+
+    def prometheus(self, labels: str = "") -> Dict[str, List[str]]:
+        """
+        Samples in Prometheus text format grouped by metric name (see METRICS);
+        ``labels`` is prepended to each label set
+        """
+        samples: Dict[str, List[str]] = {name: [] for name in METRICS}
+        prefix = f"{labels}," if labels else ""
+        for entry in self.snapshot():
+            sensor = f'{prefix}sensor="{_label(entry["sensor"])}"'
+            lag = entry["lag_seconds"]
+            samples["gaius_sensor_events_per_second"].append(f"{{{sensor}}} {entry['eps']}")
+            samples["gaius_sensor_bytes_per_second"].append(f"{{{sensor}}} {entry['bytes_per_second']}")
+            samples["gaius_sensor_parse_errors"].append(f"{{{sensor}}} {entry['parse_errors']}")
+            samples["gaius_sensor_lag_seconds"].append(f'{{{sensor},stat="mean"}} {lag["mean"]}')
+            samples["gaius_sensor_lag_seconds"].append(f'{{{sensor},stat="max"}} {lag["max"]}')
+            samples["gaius_sensor_queue_depth"].append(f"{{{sensor}}} {entry['queue_depth']}")
+            samples["gaius_sensor_events_total"].append(f"{{{sensor}}} {entry['events_total']}")
+            samples["gaius_sensor_up"].append(f"{{{sensor}}} {0 if entry['status'] == SILENT else 1}")
+        return samples
+
+
+def render_prometheus(groups: List[Dict[str, List[str]]]) -> str:
+    """Merge sample groups (e.g. one per tenant) into one exposition document"""
+    lines = []
+    for name, (kind, description) in METRICS.items():
+        lines += [f"# HELP {name} {description}", f"# TYPE {name} {kind}"]
+        lines += [f"{name}{sample}" for group in groups for sample in group.get(name, ())]
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,112 @@
+"""
+Wire encoding for websocket and streaming payloads.
+
+orjson is used when installed and falls back to the standard json module;
+MessagePack is available to clients that ask for it when msgpack is installed.
+Enum members are written as their lowercased name by every encoder.
+"""
+import json
+import logging
+from datetime import datetime
+from enum import Enum
+from typing import Any, Dict, Tuple
+
+try:
+    import orjson
+except ImportError:  # optional speedup
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:  # optional encoding
+    msgpack = None
+
+JSON = "json"
+MSGPACK = "msgpack"
+
+
+def _enum_names(value: Any) -> Any:
+    """
+    Replace Enum members with their lowercased names. orjson, json (for int and
+    str enums) and msgpack (for int enums) would otherwise each write the value
+    """
+    if isinstance(value, Enum):
+        return value.name.lower()
+    if isinstance(value, dict):
+        return {_enum_names(key): _enum_names(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_enum_names(item) for item in value]
+    return value
+
+
+def _default(value: Any) -> Any:
+    if isinstance(value, Enum):
+        return value.name.lower()
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, (set, frozenset, tuple)):
+        return _enum_names(list(value))
+    if hasattr(value, "to_dict"):
+        return _enum_names(value.to_dict())
+    if hasattr(value, "to_dicts"):
+        return _enum_names(value.to_dicts())
+    raise TypeError(f"Object of type {type(value).__name__} is not serializable")
+
+
+def dumps_json(payload: Any) -> bytes:
+    payload = _enum_names(payload)
+    if orjson is not None:
+        return orjson.dumps(payload, default=_default, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(payload, default=_default, separators=(",", ":")).encode("utf-8")
+
+
+def loads_json(data) -> Any:
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def available_encodings() -> Tuple[str, ...]:
+    return (JSON, MSGPACK) if msgpack is not None else (JSON,)
+
+
+def negotiate(requested: str) -> str:
+    """Pick the client's requested encoding if we can produce it, else JSON"""
+    requested = (requested or JSON).lower()
+    if requested == MSGPACK and msgpack is None:
+        logging.warning("Client requested msgpack but msgpack is not installed; using JSON")
+        return JSON
+    return requested if requested in available_encodings() else JSON
+
+
+def encode(payload: Any, encoding: str = JSON) -> bytes:
+    if encoding == MSGPACK:
+        return msgpack.packb(_enum_names(payload), default=_default, use_bin_type=True)
+    return dumps_json(payload)
+
+
+class EncodedMessage:
+    """A payload serialized lazily, at most once per encoding, for fan-out to many clients"""
+    __slots__ = ("payload", "_encoded")
+
+    def __init__(self, payload: Dict):
+        self.payload = payload
+        self._encoded: Dict[str, bytes] = {}
+
+    def encoded(self, encoding: str) -> bytes:
+        data = self._encoded.get(encoding)
+        if data is None:
+            data = self._encoded[encoding] = encode(self.payload, encoding)
+        return data
+
+
+async def send_encoded(websocket, data: bytes, encoding: str):
+    """JSON goes out as text frames so browsers can JSON.parse; MessagePack as binary"""
+    if encoding == MSGPACK:
+        await websocket.send_bytes(data)
+    else:
+        await websocket.send_text(data.decode("utf-8"))
+
+
+async def send_payload(websocket, payload: Dict, encoding: str = JSON):
+    await send_encoded(websocket, encode(payload, encoding), encoding)
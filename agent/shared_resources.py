@@ -0,0 +1,98 @@
+"""
+Process-wide state shared by every tenant.
+
+Tenants get their own GaiusGeneral, security tools, caches and history, but
+read-only data is built once: the strategic principles and the prompt
+preamble rendered from them, response templates, and parsed IDS rule
+indexes. The same goes for the expensive clients: the LLM client, the
+provider circuit breaker, the rate-limited batcher and the process pool for
+large scenario simulations. Nothing here may hold tenant data.
+"""
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, NamedTuple, Optional, Tuple
+
+from openai import AsyncOpenAI
+
+from llm_batcher import LLMBatcher
+from llm_resilience import CircuitBreaker
+from prompt_builder import PromptBuilder
+from response_database import ResponseDatabase
+from rule_index import RuleIndex
+
+DEFAULT_TENANT = "default"
+
+
+class TenantQuotas(NamedTuple):
+    """Per-tenant resource bounds so one busy tenant can't starve the rest"""
+    max_concurrent_requests: int = 16
+    max_queued_requests: int = 64
+    max_concurrent_llm: int = 2
+    cache_entries: int = 256
+    max_previous_responses: int = 50
+    max_alert_buffer: int = 20000
+    max_alert_subscribers: int = 25
+
+
+class SharedResources:
+    def __init__(self, strategic_principles: Dict):
+        self.strategic_principles = strategic_principles
+        self.response_database = ResponseDatabase()
+        # Prompt construction reuses the rendered system/principles preamble
+        self.prompt_builder = PromptBuilder(strategic_principles)
+
+        #  Deepseek API key from environment variable
+        deepseek_api_key = os.getenv("DEEPSEEK_API_KEY")
+        if not deepseek_api_key:
+            raise ValueError("DEEPSEEK_API_KEY not found in environment variables")
+
+        # Initialize API client with Deepseek endpoint and key; retries and
+        # timeouts are owned by the circuit breaker, not the client
+        self.openai_client = AsyncOpenAI(
+            api_key=deepseek_api_key,
+            base_url=os.getenv("DEEPSEEK_BASE_URL", "https://api.deepseek.com/v1"),
+            max_retries=0
+        )
+        # Provider health is the same for every tenant, so they share one breaker
+        self.llm_breaker = CircuitBreaker()
+        self.llm_timeout = float(os.getenv("GAIUS_LLM_TIMEOUT", "8"))
+        self.llm_hedge = os.getenv("GAIUS_LLM_HEDGE", "").lower() in ("1", "true", "yes")
+        # Longest a request queues for a rate-limit slot before answering from cache or fallback
+        self.llm_queue_wait = float(os.getenv("GAIUS_LLM_QUEUE_WAIT", "2"))
+        # Coalesces identical prompts and keeps provider calls within the account's rate limits
+        tokens_per_minute = os.getenv("GAIUS_LLM_TPM")
+        self.llm_batcher = LLMBatcher(
+            window=float(os.getenv("GAIUS_LLM_BATCH_WINDOW_MS", "5")) / 1000,
+            max_concurrency=int(os.getenv("GAIUS_LLM_CONCURRENCY", "4")),
+            requests_per_minute=float(os.getenv("GAIUS_LLM_RPM", "60")),
+            tokens_per_minute=float(tokens_per_minute) if tokens_per_minute else None
+        )
+        self._rule_indexes: Dict[Tuple[str, Optional[str]], RuleIndex] = {}
+        # Large what-if simulations are sharded across worker processes; off unless set above 1
+        self.scenario_workers = int(os.getenv("GAIUS_SCENARIO_WORKERS", "0"))
+        self._scenario_pool: Optional[ProcessPoolExecutor] = None
+        self._pool_lock = threading.Lock()
+
+    def rule_index(self, rules_path: str, cache_path: Optional[str] = None) -> RuleIndex:
+        """Parsed rule set for a path, loaded once and reused by every tenant using it"""
+        key = (os.path.abspath(rules_path), cache_path)
+        index = self._rule_indexes.get(key)
+        if index is None or not index.sources_match(rules_path):
+            index = self._rule_indexes[key] = RuleIndex.load(rules_path, cache_path)
+        return index
+
+    def scenario_pool(self) -> Optional[ProcessPoolExecutor]:
+        """Worker processes for scenario simulations, started on first use; None when disabled"""
+        if self.scenario_workers < 2:
+            return None
+        with self._pool_lock:
+            if self._scenario_pool is None:
+                self._scenario_pool = ProcessPoolExecutor(max_workers=self.scenario_workers)
+            return self._scenario_pool
+
+    def close(self):
+        with self._pool_lock:
+            if self._scenario_pool is not None:
+                self._scenario_pool.shutdown(wait=False, cancel_futures=True)
+                self._scenario_pool = None
@@ -0,0 +1,157 @@
+"""
+Event-driven situation assessment.
+
+SituationMonitor holds the latest value of each input to the base assessment:
+terrain, friendly and enemy forces, per-sector alert activity and behavioral
+findings. Security tools push new values as they arrive. An update only
+triggers a reassessment when it is relevant, meaning it moves a force value
+by more than a few points, crosses a threat-level band, shifts alert volume
+noticeably, changes the busiest sector, replaces the terrain snapshot, or
+makes a behavior appear or disappear. Updates that arrive in the same loop
+iteration are coalesced into one recomputation. When the result differs from
+the previous assessment, a change event goes to every subscriber. While
+nothing changes, reading the assessment costs nothing.
+"""
+import asyncio
+import logging
+from datetime import datetime
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Set
+
+SITUATION_INPUTS = ("terrain", "friendly_forces", "enemy_forces", "sector_activity", "behavior")
+FORCE_FIELDS = ("strength", "mobility", "supplies")
+# Assessment fields whose change is worth telling the dashboard about
+WATCHED_FIELDS = ("threat_level", "key_factors", "opportunities", "recommended_principles", "affected_sectors",
+                  "behavior_sectors")
+
+
+class SituationMonitor:
+    def __init__(self, gaius, force_threshold: float = 5, activity_threshold: float = 0.1):
+        self.gaius = gaius
+        self.force_threshold = force_threshold
+        self.activity_threshold = activity_threshold
+        self.inputs: Dict[str, Any] = {}
+        # Inputs as they were when the current assessment was computed
+        self._assessed: Dict[str, Any] = {}
+        self._assessment: Optional[Dict] = None
+        self._triggers: Set[str] = set()
+        self._scheduled = False
+        self._listeners: List[Callable[[Dict], Awaitable]] = []
+        self._tasks: Set[asyncio.Task] = set()
+        self.version = 0
+        self.counters = {"updates": 0, "ignored": 0, "recomputes": 0, "changes": 0}
+
+    def subscribe(self, listener: Callable[[Dict], Awaitable]):
+        """Call ``listener(event)`` whenever the assessment changes"""
+        self._listeners.append(listener)
+
+    def update(self, **inputs):
+        """Record new input values; schedules a reassessment if any of them matter"""
+        for name, value in inputs.items():
+            if name not in SITUATION_INPUTS:
+                raise ValueError(f"Unknown situation input: {name}")
+            self.counters["updates"] += 1
+            self.inputs[name] = value
+            if self._assessment is None or self._is_relevant(name, value):
+                self._triggers.add(name)
+            else:
+                self.counters["ignored"] += 1
+        if self._triggers and not self._scheduled:
+            try:
+                loop = asyncio.get_running_loop()
+            except RuntimeError:
+                return  # recomputed lazily on the next read
+            self._scheduled = True
+            loop.call_soon(self._flush)
+
+    @property
+    def current(self) -> Dict:
+        """Latest assessment, recomputed first only if a relevant input changed"""
+        if self._triggers or self._assessment is None:
+            self._recompute()
+        return self._assessment
+
+    def _flush(self):
+        self._scheduled = False
+        if self._triggers:
+            self._recompute()
+
+    def _recompute(self):
+        triggers, self._triggers = sorted(self._triggers), set()
+        previous = self._assessment
+        self._assessed = dict(self.inputs)
+        self._assessment = self.gaius._perform_base_assessment(self._assessed)
+        self.counters["recomputes"] += 1
+        changed = [field for field in WATCHED_FIELDS
+                   if previous is None or previous.get(field) != self._assessment.get(field)]
+        if not changed:
+            return
+        self.version += 1
+        self.counters["changes"] += 1
+        self.gaius._record_assessment(self._assessment)
+        self._notify({
+            "version": self.version,
+            "timestamp": datetime.now().isoformat(),
+            "threat_level": self._assessment["threat_level"],
+            "changed": changed,
+            "triggers": triggers,
+            "assessment": self._assessment
+        })
+
+    def _notify(self, event: Dict):
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return
+        for listener in self._listeners:
+            task = loop.create_task(self._deliver(listener, event))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    @staticmethod
+    async def _deliver(listener: Callable[[Dict], Awaitable], event: Dict):
+        try:
+            await listener(event)
+        except Exception as e:
+            logging.error(f"Error delivering situation change: {e}")
+
+    # Relevance checks against the inputs of the current assessment
+
+    def _is_relevant(self, name: str, value: Any) -> bool:
+        old = self._assessed.get(name)
+        if name == "terrain":
+            return getattr(value, "fingerprint", value) != getattr(old, "fingerprint", old)
+        if name == "sector_activity":
+            return self._activity_shifted(old or {}, value or {})
+        if name == "behavior":
+            return self._behavior_shifted(old or {}, value or {})
+        return self._forces_moved(old or {}, value or {}) or self._crosses_threat_band(name, value)
+
+    def _forces_moved(self, old: Dict, new: Dict) -> bool:
+        return any(abs(new.get(field, 0) - old.get(field, 0)) >= self.force_threshold for field in FORCE_FIELDS)
+
+    def _crosses_threat_band(self, name: str, value: Dict) -> bool:
+        """A small move can still push the force ratio into another threat level"""
+        forces = {**self._assessed, name: value}
+        analysis = self.gaius._analyze_forces(forces.get("friendly_forces", {}), forces.get("enemy_forces", {}))
+        return self.gaius._determine_threat_level(analysis) != self._assessment["threat_level"]
+
+    def _activity_shifted(self, old: Dict, new: Dict) -> bool:
+        old_totals = self.gaius._rank_sectors(old)
+        new_totals = self.gaius._rank_sectors(new)
+        if old_totals.keys() != new_totals.keys() or next(iter(old_totals), None) != next(iter(new_totals), None):
+            return True
+        old_total, new_total = sum(old_totals.values()), sum(new_totals.values())
+        return abs(new_total - old_total) >= max(1, self.activity_threshold * old_total)
+
+    def _behavior_shifted(self, old: Dict, new: Dict) -> bool:
+        """Only a change in which behaviors are present, or where, matters; counts alone do not"""
+        return (self.gaius._analyze_behavior(old) != self.gaius._analyze_behavior(new)
+                or next(iter(old.get("sectors") or {}), None) != next(iter(new.get("sectors") or {}), None))
+
+    def snapshot(self) -> Dict:
+        return {
+            **self.counters,
+            "version": self.version,
+            "threat_level": self._assessment["threat_level"].name.lower() if self._assessment else None,
+            "pending": sorted(self._triggers)
+        }
@@ -0,0 +1,316 @@
+"""
+Snapshots of a tenant's in-memory analytics state, for warm restarts.
+
+A snapshot holds the tenant's alert counters, rolling telemetry windows,
+sector activity, flow report, behavioral sketches, IOC index and its
+ingestion and SIEM checkpoints. Without them, a restart leaves dashboards
+blank until traffic refills the windows, and SIEMs are polled from scratch.
+
+StateSnapshotter writes one snapshot every ``interval`` seconds and a final
+one on shutdown. The state is gathered on the event loop, where it is cheap.
+Everything costly (exporting the detector's sketches and the IOC index,
+encoding, checksums, disk I/O) runs on a worker thread. Each snapshot is a
+new numbered file. It is written to a temporary name, synced and renamed
+into place, so a crash never leaves a half-written snapshot. The newest
+``retain`` snapshots are kept.
+
+File layout (native byte order, which the header records):
+
+    header    magic "GAIUSNAP", format version, section count, byte order, created
+    table     per section: offset, length, CRC-32, typecode
+    sections  section 0 is the JSON document; the others are raw arrays and
+              byte strings, each aligned to 8 bytes
+
+Arrays and byte strings held in nested dicts of the state are moved into
+their own sections. In the JSON they are replaced with {"$section": n}. The
+loader maps the file, checks each section's CRC, and copies every array out
+of the mapping with a single ``frombytes``. Restoring is therefore
+dominated by rebuilding the Python objects, not by parsing.
+
+After a restore, the snapshotter catches up:
+
+- The assessment is recomputed from the restored inputs.
+- IOC feeds that changed since the snapshot are reloaded.
+- SIEM integrations resume from their checkpoints once they reconnect.
+- Tailed sensor logs resume from their saved file positions. External
+  readers can resume from the per-sensor checkpoints.
+"""
+import asyncio
+import logging
+import mmap
+import os
+import re
+import struct
+import sys
+import time
+import zlib
+from array import array
+from typing import Dict, List, Optional, Tuple
+
+from serialization import dumps_json, loads_json
+
+MAGIC = b"GAIUSNAP"
+SNAPSHOT_VERSION = 2
+HEADER = struct.Struct("<8sHHBxxxd")
+SECTION = struct.Struct("<QQIc")
+JSON_SECTION = b"j"
+BYTES_SECTION = b"-"
+ALIGNMENT = 8
+
+
+class SnapshotError(ValueError):
+    """A snapshot file is truncated, corrupt or from another format version"""
+
+
+def _extract(value, sections: List[Tuple[bytes, memoryview]]):
+    """Move arrays and byte strings out of nested dicts into binary sections"""
+    if isinstance(value, dict):
+        return {key: _extract(item, sections) for key, item in value.items()}
+    if isinstance(value, array):
+        sections.append((value.typecode.encode(), memoryview(value).cast("B")))
+        return {"$section": len(sections)}
+    if isinstance(value, (bytes, bytearray)):
+        sections.append((BYTES_SECTION, memoryview(value)))
+        return {"$section": len(sections)}
+    return value
+
+
+def _inject(value, sections: List):
+    if isinstance(value, dict):
+        if "$section" in value and len(value) == 1:
+            return sections[value["$section"]]
+        return {key: _inject(item, sections) for key, item in value.items()}
+    return value
+
+
+def write_snapshot(path: str, state: Dict) -> int:
+    """Atomically write ``state`` to ``path``; returns the file size"""
+    sections: List[Tuple[bytes, memoryview]] = []
+    document = _extract(state, sections)
+    sections.insert(0, (JSON_SECTION, memoryview(dumps_json(document))))
+
+    table, offset = [], HEADER.size + SECTION.size * len(sections)
+    for typecode, data in sections:
+        offset += -offset % ALIGNMENT
+        table.append(SECTION.pack(offset, data.nbytes, zlib.crc32(data), typecode))
+        offset += data.nbytes
+
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb") as handle:
+        handle.write(HEADER.pack(MAGIC, SNAPSHOT_VERSION, len(sections), sys.byteorder == "big", time.time()))
+        handle.write(b"".join(table))
+        position = HEADER.size + SECTION.size * len(sections)
+        for _, data in sections:
+            padding = -position % ALIGNMENT
+            handle.write(bytes(padding))
+            handle.write(data)
+            position += padding + data.nbytes
+        handle.flush()
+        os.fsync(handle.fileno())
+    os.replace(tmp_path, path)
+    return position
+
+
+def read_snapshot(path: str) -> Dict:
+    """Load a snapshot written by ``write_snapshot``; raises SnapshotError if it is unusable"""
+    with open(path, "rb") as handle:
+        try:
+            mapped = mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            raise SnapshotError(f"{path} is empty")
+    try:
+        return _decode(mapped, path)
+    finally:
+        mapped.close()
+
+
+def _decode(mapped: mmap.mmap, path: str) -> Dict:
+    if len(mapped) < HEADER.size:
+        raise SnapshotError(f"{path} is truncated")
+    magic, version, count, big_endian, _ = HEADER.unpack_from(mapped)
+    if magic != MAGIC:
+        raise SnapshotError(f"{path} is not a state snapshot")
+    if version != SNAPSHOT_VERSION:
+        raise SnapshotError(f"{path} has snapshot format {version}, expected {SNAPSHOT_VERSION}")
+    if len(mapped) < HEADER.size + SECTION.size * count:
+        raise SnapshotError(f"{path} is truncated")
+    swap = bool(big_endian) != (sys.byteorder == "big")
+
+    sections = []
+    with memoryview(mapped) as view:
+        for position in range(count):
+            offset, length, checksum, typecode = SECTION.unpack_from(mapped, HEADER.size + SECTION.size * position)
+            if offset + length > len(mapped):
+                raise SnapshotError(f"{path} is truncated")
+            with view[offset:offset + length] as data:
+                if zlib.crc32(data) != checksum:
+                    raise SnapshotError(f"{path} section {position} fails its checksum")
+                if typecode in (JSON_SECTION, BYTES_SECTION):
+                    sections.append(bytes(data))
+                    continue
+                values = array(typecode.decode())
+                values.frombytes(data)
+            if swap:
+                values.byteswap()
+            sections.append(values)
+    return _inject(loads_json(sections[0]), sections)
+
+
+class StateSnapshotter:
+    def __init__(self, tenant, directory: str, interval: float = 60.0, retain: int = 3):
+        self.tenant = tenant
+        self.directory = directory
+        self.interval = interval
+        self.retain = max(1, retain)
+        self._pattern = re.compile(rf"^{re.escape(tenant.tenant_id)}\.(\d+)\.snap$")
+        self.sequence = max((sequence for sequence, _ in self.snapshots()), default=0)
+        self.restored_from: Optional[str] = None
+        self.restore_seconds: Optional[float] = None
+        self.last: Dict = {}
+        self.counters = {"saved": 0, "failed": 0, "restored": 0, "unreadable": 0}
+
+    def snapshots(self) -> List[Tuple[int, str]]:
+        """(sequence, path) of this tenant's snapshots, newest first"""
+        try:
+            names = os.listdir(self.directory)
+        except OSError:
+            return []
+        found = [(int(match.group(1)), os.path.join(self.directory, match.string))
+                 for match in map(self._pattern.match, names) if match]
+        return sorted(found, reverse=True)
+
+    def capture(self) -> Dict:
+        """
+        State as of now. Runs on the event loop, so everything here is a cheap
+        copy; the detector and IOC index are exported later on the writer thread
+        """
+        tools, gaius = self.tenant.security_tools, self.tenant.gaius
+        return {
+            "tenant": self.tenant.tenant_id,
+            "saved_at": time.time(),
+            "alert_counters": tools.alert_counters.export_state(),
+            "load_shedding": dict(tools.load_shedder.counters),
+            "capabilities": tools.capabilities.export_state(),
+            "sensors": tools.sensor_telemetry.export_state(),
+            "sector_activity": tools.sector_window.export_state(),
+            "ioc_matches": tools.ioc_window.export_state(),
+            "flow_report": tools.flow_report,
+            "checkpoints": {"siem": dict(gaius.checkpoints), "tails": tools.sensor_manager.export_state()},
+            # The detector takes its own lock; IOC indexes are immutable
+            "behavior": tools.behavior.export_state,
+            "ioc": tools.ioc_store.index.export_state
+        }
+
+    async def save(self) -> Optional[str]:
+        """Write a snapshot without blocking the loop; returns its path, or None if it failed"""
+        state = self.capture()
+        self.sequence += 1
+        path = os.path.join(self.directory, f"{self.tenant.tenant_id}.{self.sequence:08d}.snap")
+        try:
+            size, elapsed = await asyncio.to_thread(self._write, path, state)
+        except Exception as e:
+            self.counters["failed"] += 1
+            logging.error(f"Failed to snapshot state of tenant {self.tenant.tenant_id}: {e}")
+            return None
+        self.counters["saved"] += 1
+        self.last = {"path": path, "bytes": size, "seconds": round(elapsed, 3), "saved_at": state["saved_at"]}
+        return path
+
+    def _write(self, path: str, state: Dict) -> Tuple[int, float]:
+        started = time.perf_counter()
+        state = {name: value() if callable(value) else value for name, value in state.items()}
+        os.makedirs(self.directory, exist_ok=True)
+        size = write_snapshot(path, state)
+        for _, old_path in self.snapshots()[self.retain:]:
+            try:
+                os.remove(old_path)
+            except OSError as e:
+                logging.warning(f"Could not remove old snapshot {old_path}: {e}")
+        return size, time.perf_counter() - started
+
+    async def restore(self) -> bool:
+        """Load the newest readable snapshot; older ones are tried if it is damaged"""
+        for _, path in self.snapshots():
+            started = time.perf_counter()
+            try:
+                state = await asyncio.to_thread(read_snapshot, path)
+                self._apply(state)
+            except (OSError, ValueError, KeyError, TypeError) as e:  # SnapshotError is a ValueError
+                self.counters["unreadable"] += 1
+                logging.warning(f"Skipping state snapshot {path}: {e}")
+                continue
+            self.counters["restored"] += 1
+            self.restored_from = path
+            self.restore_seconds = round(time.perf_counter() - started, 3)
+            logging.info(f"Restored tenant {self.tenant.tenant_id} state from {path} in {self.restore_seconds}s")
+            return True
+        return False
+
+    def _apply(self, state: Dict):
+        """
+        Restore into fresh components and swap them in only once everything has
+        loaded, so a bad snapshot leaves the tenant as it was
+        """
+        tools, gaius = self.tenant.security_tools, self.tenant.gaius
+        elapsed = max(0.0, time.time() - state["saved_at"])
+        fresh = tools.restorable_state()
+        telemetry = fresh["sensor_telemetry"]
+        # Restored sensors join ids_config only after the swap
+        register, telemetry.on_new_sensor = telemetry.on_new_sensor, None
+        fresh["alert_counters"].restore_state(state["alert_counters"], tools.signature_table)
+        fresh["capabilities"].restore_state(state["capabilities"], elapsed)
+        telemetry.restore_state(state["sensors"], elapsed)
+        fresh["sector_window"].restore_state(state["sector_activity"], elapsed)
+        fresh["ioc_window"].restore_state(state["ioc_matches"], elapsed)
+        fresh["behavior"].restore_state(state["behavior"])
+        shedding = {key: int(value) for key, value in state["load_shedding"].items()}
+        siem = dict(state["checkpoints"]["siem"])
+        tails = {str(name): [int(value) for value in position]
+                 for name, position in state["checkpoints"].get("tails", {}).items()}
+        flow_report = state["flow_report"]
+        # Feeds that changed while we were down are reloaded by catch_up instead.
+        # The index is replaced in one assignment, and only if it decodes
+        tools.ioc_store.restore_state(state["ioc"])
+
+        # Nothing below can fail
+        for name, component in fresh.items():
+            setattr(tools, name, component)
+        telemetry.on_new_sensor = register
+        for name in telemetry.sensors:
+            register(name)
+        tools.load_shedder.counters.update(shedding)
+        if flow_report is not None:
+            tools.flow_report = flow_report
+            tools.supported_tools["netflow"]["connected"] = True
+        gaius.checkpoints.update(siem)
+        tools.sensor_manager.restore_state(tails)
+
+    async def catch_up(self):
+        """Bring restored state up to date with what changed while the process was down"""
+        tools = self.tenant.security_tools
+        tools.refresh_situation()
+        try:
+            await asyncio.to_thread(tools.ioc_store.reload_if_changed)
+        except Exception as e:
+            logging.error(f"Failed to reload IOC feeds of tenant {self.tenant.tenant_id}: {e}")
+
+    async def run(self):
+        """Catch up once, then snapshot every ``interval`` seconds until cancelled"""
+        await self.catch_up()
+        while True:
+            await asyncio.sleep(self.interval)
+            await self.save()
+
+    def snapshot(self) -> Dict:
+        return {
+            **self.counters,
+            "interval": self.interval,
+            "restored_from": self.restored_from,
+            "restore_seconds": self.restore_seconds,
+            "last": self.last,
+            "checkpoints": {
+                "sensors": self.tenant.security_tools.sensor_telemetry.checkpoints(),
+                "tails": self.tenant.security_tools.sensor_manager.export_state(),
+                "siem": self.tenant.gaius.checkpoints
+            }
+        }
@@ -0,0 +1,186 @@
+"""
+Constant-memory rolling counters for streaming telemetry.
+
+A RollingWindow keeps one running sum per fixed-width time bucket plus the
+total across the whole window. Adding a value is O(1), and so is reading the
+window total; expired buckets are subtracted as time moves on. Memory is
+bounded by window / bucket no matter how many events are counted.
+
+Windows export their buckets by age rather than by clock reading, so state
+saved before a restart lines up with the new process's monotonic clock.
+"""
+import time
+from collections import deque
+from typing import Callable, Deque, Dict, List, Optional
+
+
+class RollingWindow:
+    def __init__(self, window: float = 300.0, bucket: float = 10.0,
+                 clock: Callable[[], float] = time.monotonic):
+        if bucket <= 0 or window < bucket:
+            raise ValueError("window must be at least one positive bucket wide")
+        self.window = window
+        self.bucket = bucket
+        self.clock = clock
+        self.size = int(round(window / bucket))
+        self._buckets: Deque[List[float]] = deque()  # [bucket index, sum]
+        self._total = 0.0
+        self._started = clock()
+
+    def _index(self, now: Optional[float]) -> int:
+        return int((self.clock() if now is None else now) // self.bucket)
+
+    def _expire(self, index: int):
+        oldest = index - self.size
+        buckets = self._buckets
+        while buckets and buckets[0][0] <= oldest:
+            self._total -= buckets.popleft()[1]
+
+    def add(self, value: float = 1.0, now: Optional[float] = None):
+        index = self._index(now)
+        self._expire(index)
+        if self._buckets and self._buckets[-1][0] == index:
+            self._buckets[-1][1] += value
+        else:
+            self._buckets.append([index, value])
+        self._total += value
+
+    def total(self, now: Optional[float] = None) -> float:
+        self._expire(self._index(now))
+        return self._total
+
+    def rate(self, now: Optional[float] = None) -> float:
+        """Per-second rate over the window, or over the time observed if that is shorter"""
+        now = self.clock() if now is None else now
+        elapsed = min(self.window, max(self.bucket, now - self._started))
+        return self.total(now) / elapsed
+
+    def buckets(self, count: Optional[int] = None, now: Optional[float] = None) -> List[float]:
+        """Per-bucket sums, newest first, including empty buckets"""
+        index = self._index(now)
+        self._expire(index)
+        count = self.size if count is None else min(count, self.size)
+        sums = {bucket_index: value for bucket_index, value in self._buckets}
+        return [sums.get(index - offset, 0.0) for offset in range(count)]
+
+    def export_state(self, now: Optional[float] = None) -> Dict:
+        """Bucket sums keyed by age in buckets, so they survive a restart's new clock"""
+        now = self.clock() if now is None else now
+        index = self._index(now)
+        self._expire(index)
+        return {"observed": now - self._started,
+                "buckets": [[index - bucket_index, value] for bucket_index, value in self._buckets]}
+
+    def restore_state(self, state: Dict, elapsed: float = 0.0, now: Optional[float] = None):
+        """Reload a window exported ``elapsed`` seconds ago; buckets that aged out meanwhile are dropped"""
+        now = self.clock() if now is None else now
+        index = self._index(now)
+        shift = int(elapsed // self.bucket)
+        self._buckets = deque([index - age - shift, value] for age, value in state["buckets"])
+        self._total = sum(value for _, value in self._buckets)
+        self._started = now - state["observed"] - elapsed
+        self._expire(index)
+
+
+class RollingStats:
+    """Count, sum and max of observations over a rolling window, e.g. ingest lag"""
+    def __init__(self, window: float = 300.0, bucket: float = 10.0,
+                 clock: Callable[[], float] = time.monotonic):
+        self.count = RollingWindow(window, bucket, clock)
+        self.sum = RollingWindow(window, bucket, clock)
+        self._peaks: Deque[List[float]] = deque()  # [bucket index, max]
+
+    def observe(self, value: float, count: int = 1, maximum: Optional[float] = None, now: Optional[float] = None):
+        """Record ``count`` observations summing to ``value`` (pre-aggregated per batch)"""
+        self.count.add(count, now)
+        self.sum.add(value, now)
+        index = self._expire_peaks(now)
+        peak = value if maximum is None else maximum
+        if self._peaks and self._peaks[-1][0] == index:
+            self._peaks[-1][1] = max(self._peaks[-1][1], peak)
+        else:
+            self._peaks.append([index, peak])
+
+    def _expire_peaks(self, now: Optional[float]) -> int:
+        index = self.count._index(now)
+        while self._peaks and self._peaks[0][0] <= index - self.count.size:
+            self._peaks.popleft()
+        return index
+
+    def mean(self, now: Optional[float] = None) -> float:
+        count = self.count.total(now)
+        return self.sum.total(now) / count if count else 0.0
+
+    def max(self, now: Optional[float] = None) -> float:
+        self._expire_peaks(now)
+        return max((peak for _, peak in self._peaks), default=0.0)
+
+    def export_state(self, now: Optional[float] = None) -> Dict:
+        now = self.count.clock() if now is None else now
+        index = self._expire_peaks(now)
+        return {"count": self.count.export_state(now), "sum": self.sum.export_state(now),
+                "peaks": [[index - bucket_index, peak] for bucket_index, peak in self._peaks]}
+
+    def restore_state(self, state: Dict, elapsed: float = 0.0, now: Optional[float] = None):
+        now = self.count.clock() if now is None else now
+        self.count.restore_state(state["count"], elapsed, now)
+        self.sum.restore_state(state["sum"], elapsed, now)
+        index = self.count._index(now)
+        shift = int(elapsed // self.count.bucket)
+        self._peaks = deque([index - age - shift, peak] for age, peak in state["peaks"])
+        self._expire_peaks(now)
+
+
+class RollingCounts:
+    """Nested counts ({group: {key: count}}) summed over a rolling window, e.g. alerts per sector and origin"""
+    def __init__(self, window: float = 300.0, bucket: float = 10.0,
+                 clock: Callable[[], float] = time.monotonic):
+        if bucket <= 0 or window < bucket:
+            raise ValueError("window must be at least one positive bucket wide")
+        self.bucket = bucket
+        self.clock = clock
+        self.size = int(round(window / bucket))
+        self._buckets: Deque[list] = deque()  # [bucket index, {group: {key: count}}]
+
+    def _index(self, now: Optional[float]) -> int:
+        return int((self.clock() if now is None else now) // self.bucket)
+
+    def _expire(self, now: Optional[float]) -> int:
+        index = self._index(now)
+        while self._buckets and self._buckets[0][0] <= index - self.size:
+            self._buckets.popleft()
+        return index
+
+    def add(self, counts: Dict[str, Dict[str, float]], now: Optional[float] = None):
+        index = self._expire(now)
+        if not self._buckets or self._buckets[-1][0] != index:
+            self._buckets.append([index, {}])
+        merged = self._buckets[-1][1]
+        for group, values in counts.items():
+            target = merged.setdefault(group, {})
+            for key, count in values.items():
+                target[key] = target.get(key, 0) + count
+
+    def totals(self, now: Optional[float] = None) -> Dict[str, Dict[str, float]]:
+        """Counts summed across the window; a fresh dict on every call"""
+        self._expire(now)
+        if len(self._buckets) == 1:
+            return {group: dict(values) for group, values in self._buckets[0][1].items()}
+        totals: Dict[str, Dict[str, float]] = {}
+        for _, counts in self._buckets:
+            for group, values in counts.items():
+                target = totals.setdefault(group, {})
+                for key, count in values.items():
+                    target[key] = target.get(key, 0) + count
+        return totals
+
+    def export_state(self, now: Optional[float] = None) -> Dict:
+        index = self._expire(now)
+        return {"buckets": [[index - bucket_index, {group: dict(values) for group, values in counts.items()}]
+                            for bucket_index, counts in self._buckets]}
+
+    def restore_state(self, state: Dict, elapsed: float = 0.0, now: Optional[float] = None):
+        index = self._index(now)
+        shift = int(elapsed // self.bucket)
+        self._buckets = deque([index - age - shift, counts] for age, counts in state["buckets"])
+        self._expire(now)
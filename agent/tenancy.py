@@ -0,0 +1,190 @@
+"""
+Tenant-scoped Gaius instances for serving several business units from one process.
+
+Each tenant owns its GaiusGeneral, security tools, commander, dashboard feed,
+action executor and history. All of them are built on one SharedResources
+instance, so principles, templates, rule indexes and the LLM client exist
+once. Every tenant has request, LLM concurrency, cache and alert-buffer
+quotas, so a noisy tenant queues or is rejected on its own budget and does
+not slow everyone down.
+
+Tenants are configured with ``GAIUS_TENANTS=default,finance,retail``. Quota
+overrides go in ``GAIUS_TENANT_QUOTAS='{"retail": {"max_concurrent_llm": 1}}'``.
+With ``GAIUS_SNAPSHOT_DIR`` set, each tenant's analytics state is snapshotted
+there every ``GAIUS_SNAPSHOT_INTERVAL`` seconds and restored on startup.
+"""
+import asyncio
+import json
+import logging
+import os
+import re
+from contextlib import asynccontextmanager
+from typing import Dict, Iterable, List, Optional, Set
+
+from gaius_core import GaiusGeneral, STRATEGIC_PRINCIPLES
+from security_tools import SecurityToolsInterface
+from commander import CommandInterface
+from dashboard_feed import DashboardFeed
+from action_executor import ActionExecutor
+from shared_resources import DEFAULT_TENANT, SharedResources, TenantQuotas
+from state_snapshot import StateSnapshotter
+
+TENANT_ID = re.compile(r"^[A-Za-z0-9_-]{1,64}$")
+
+
+class TenantOverloaded(Exception):
+    """A tenant is at its request concurrency limit with a full queue"""
+
+
+class Tenant:
+    def __init__(self, tenant_id: str, shared: SharedResources, quotas: Optional[TenantQuotas] = None,
+                 snapshot_dir: Optional[str] = None, snapshot_interval: float = 60.0):
+        self.tenant_id = tenant_id
+        self.quotas = quotas or TenantQuotas()
+        self.gaius = GaiusGeneral(shared, tenant_id, self.quotas)
+        self.security_tools = SecurityToolsInterface(self.gaius)
+        self.commander = CommandInterface(self.gaius, self.security_tools)
+        # Sequenced updates shared by this tenant's dashboard sockets
+        self.dashboard_feed = DashboardFeed()
+        # Containment actions fan out to EDR/SOAR handlers; progress goes to the dashboard feed
+        self.action_executor = ActionExecutor(self.gaius, on_progress=self._publish_action_progress,
+                                              on_mitigated=self._record_mitigated)
+        # Assessment changes reach dashboards as soon as they happen, not on the next poll
+        self.gaius.situation.subscribe(self._publish_situation)
+        # Dashboards show immediately when alert sampling turns on or off
+        self.security_tools.load_shedder.on_change = self._publish_load_shedding
+        # Warm restarts: counters, windows, sketches and checkpoints survive a redeploy
+        self.snapshotter = (StateSnapshotter(self, snapshot_dir, snapshot_interval)
+                            if snapshot_dir else None)
+        self._tasks: Set[asyncio.Task] = set()
+        self._slots = asyncio.Semaphore(self.quotas.max_concurrent_requests)
+        self._waiting = 0
+        self.counters = {"admitted": 0, "rejected": 0}
+
+    async def _publish_action_progress(self, progress: Dict):
+        await self.dashboard_feed.publish({"action_progress": progress})
+
+    async def _publish_situation(self, event: Dict):
+        await self.dashboard_feed.publish({"situation": event})
+
+    def _record_mitigated(self, count: int, targets: List[str]):
+        # Looked up per call: a snapshot restore replaces the scorer
+        self.security_tools.capabilities.record_mitigated(count, targets)
+
+    def _publish_load_shedding(self, state: Dict):
+        # Called from synchronous ingestion; without a running loop the heartbeat carries it
+        try:
+            task = asyncio.get_running_loop().create_task(self.dashboard_feed.publish({"load_shedding": state}))
+        except RuntimeError:
+            return
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    @asynccontextmanager
+    async def admit(self):
+        """Hold one of the tenant's request slots; reject when too many are already waiting"""
+        if self._slots.locked() and self._waiting >= self.quotas.max_queued_requests:
+            self.counters["rejected"] += 1
+            raise TenantOverloaded(self.tenant_id)
+        self._waiting += 1
+        try:
+            await self._slots.acquire()
+        finally:
+            self._waiting -= 1
+        self.counters["admitted"] += 1
+        try:
+            yield self
+        finally:
+            self._slots.release()
+
+    def alert_capacity(self, requested: int) -> int:
+        return max(1, min(requested, self.quotas.max_alert_buffer))
+
+    def can_subscribe_alerts(self) -> bool:
+        return len(self.security_tools.alert_stream.subscriptions) < self.quotas.max_alert_subscribers
+
+    async def close(self):
+        # Tails stop first so the final snapshot holds their last file positions
+        await self.security_tools.sensor_manager.stop()
+        if self.snapshotter is not None:
+            await self.snapshotter.save()
+        await self.gaius.close_integrations()
+        await self.gaius.history.close()
+
+    def snapshot(self) -> Dict:
+        return {
+            "quotas": self.quotas._asdict(),
+            "requests": {**self.counters, "waiting": self._waiting},
+            "caches": self.gaius.get_cache_stats(),
+            "situation": self.gaius.situation.snapshot(),
+            "capabilities": self.security_tools.capabilities.snapshot(),
+            "load_shedding": self.security_tools.load_shedder.snapshot(),
+            "alert_counts": self.security_tools.alert_counters.snapshot(),
+            "behavior": self.security_tools.behavior.snapshot(),
+            "scenarios": self.gaius.simulator.snapshot(),
+            "sensors": self.security_tools.sensor_manager.merger.snapshot(),
+            "history": self.gaius.history.snapshot(),
+            "snapshots": self.snapshotter.snapshot() if self.snapshotter is not None else None,
+            "actions": self.action_executor.snapshot(),
+            "alert_stream": self.security_tools.alert_stream.stats()
+        }
+
+
+class TenantRegistry:
+    def __init__(self, tenant_ids: Iterable[str] = (DEFAULT_TENANT,),
+                 quotas: Optional[Dict[str, TenantQuotas]] = None, shared: Optional[SharedResources] = None,
+                 snapshot_dir: Optional[str] = None, snapshot_interval: float = 60.0):
+        self.shared = shared or SharedResources(STRATEGIC_PRINCIPLES)
+        self.snapshot_dir = snapshot_dir
+        self.snapshot_interval = snapshot_interval
+        self.tenants: Dict[str, Tenant] = {}
+        quotas = quotas or {}
+        for tenant_id in tenant_ids:
+            self.register(tenant_id, quotas.get(tenant_id))
+
+    @classmethod
+    def from_env(cls) -> "TenantRegistry":
+        tenant_ids = [tenant.strip() for tenant in os.getenv("GAIUS_TENANTS", DEFAULT_TENANT).split(",")
+                      if tenant.strip()]
+        overrides = json.loads(os.getenv("GAIUS_TENANT_QUOTAS") or "{}")
+        quotas = {tenant_id: TenantQuotas(**settings) for tenant_id, settings in overrides.items()}
+        return cls(tenant_ids or [DEFAULT_TENANT], quotas, snapshot_dir=os.getenv("GAIUS_SNAPSHOT_DIR"),
+                   snapshot_interval=float(os.getenv("GAIUS_SNAPSHOT_INTERVAL", "60")))
+
+    def register(self, tenant_id: str, quotas: Optional[TenantQuotas] = None) -> Tenant:
+        if not TENANT_ID.match(tenant_id):
+            raise ValueError(f"Invalid tenant id: {tenant_id!r}")
+        if tenant_id in self.tenants:
+            raise ValueError(f"Tenant {tenant_id} already registered")
+        tenant = self.tenants[tenant_id] = Tenant(tenant_id, self.shared, quotas,
+                                                  self.snapshot_dir, self.snapshot_interval)
+        logging.info(f"Registered tenant {tenant_id}")
+        return tenant
+
+    def get(self, tenant_id: Optional[str]) -> Tenant:
+        """Raises KeyError for tenants that were never registered"""
+        return self.tenants[tenant_id or self.default_id]
+
+    @property
+    def default_id(self) -> str:
+        return DEFAULT_TENANT if DEFAULT_TENANT in self.tenants else next(iter(self.tenants))
+
+    @property
+    def default(self) -> Tenant:
+        return self.tenants[self.default_id]
+
+    def __iter__(self):
+        return iter(self.tenants.values())
+
+    async def restore(self) -> List[asyncio.Task]:
+        """
+        Restore every tenant's snapshot concurrently, then start each one's
+        catch-up and periodic snapshots; returns those background tasks
+        """
+        snapshotters = [tenant.snapshotter for tenant in self.tenants.values() if tenant.snapshotter is not None]
+        await asyncio.gather(*(snapshotter.restore() for snapshotter in snapshotters))
+        return [asyncio.create_task(snapshotter.run()) for snapshotter in snapshotters]
+
+    async def close(self):
+        await asyncio.gather(*(tenant.close() for tenant in self.tenants.values()), return_exceptions=True)
+        self.shared.close()
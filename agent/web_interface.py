@@ -1,14 +1,26 @@
 import traceback
-from fastapi import FastAPI, WebSocket, HTTPException, WebSocketDisconnect
+from fastapi import FastAPI, WebSocket, HTTPException, WebSocketDisconnect, Query, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse
 from fastapi.staticfiles import StaticFiles
-from typing import List, Dict
+from typing import AsyncIterator, List, Dict, Optional
 import asyncio
 import logging
+import os
+import uuid
+from contextlib import asynccontextmanager
 from datetime import datetime, timedelta
-from gaius_core import GaiusGeneral
-from security_tools import SecurityToolsInterface
-from commander import CommandInterface
+from serialization import negotiate, send_encoded, send_payload
+from alert_stream import AlertFilter, POLICIES
+from loop_monitor import LoopMonitor
+from tenancy import Tenant, TenantOverloaded, TenantRegistry
+from sensor_telemetry import render_prometheus
+from sensor_manager import SensorConfig
+
+# History queries run SQLite scans on worker threads; these bound what one request can ask for
+MAX_HISTORY_ROWS = 10000
+MAX_HISTORY_DAYS = 3650
+
 
 def log_error(error: Exception, context: str = ""):
     """Enhanced error logging"""
@@ -32,9 +44,19 @@ class GaiusDashboard:
         )
         
         self.active_connections: List[WebSocket] = []
-        self.gaius = GaiusGeneral()
-        self.security_tools = SecurityToolsInterface(self.gaius)
-        self.commander = CommandInterface(self.gaius, self.security_tools)
+        self._background_tasks: List[asyncio.Task] = []
+        # One isolated Gaius per tenant (GAIUS_TENANTS), selected by the X-Tenant-ID
+        # header or ?tenant= query parameter; unscoped requests use the default tenant
+        self.tenants = TenantRegistry.from_env()
+        default = self.tenants.default
+        self.gaius = default.gaius
+        self.security_tools = default.security_tools
+        self.commander = default.commander
+        self.dashboard_feed = default.dashboard_feed
+        self.action_executor = default.action_executor
+        # GAIUS_SLOW_CALLBACK_MS enables stack sampling of callbacks that block the loop
+        slow_callback_ms = os.getenv("GAIUS_SLOW_CALLBACK_MS")
+        self.loop_monitor = LoopMonitor(slow_callback_ms=float(slow_callback_ms) if slow_callback_ms else None)
         
         # removing static files mounting since it's not needed yet
         # self.app.mount("/static", StaticFiles(directory="static"), name="static")
@@ -45,64 +67,324 @@ class GaiusDashboard:
         @self.app.on_event("startup")
         async def startup_event():
             await self._setup_websocket_routes()
+            self.loop_monitor.start()
+            # Dashboards come back with the pre-restart state; live data catches up behind it
+            self._background_tasks.extend(await self.tenants.restore())
+            for tenant in self.tenants:
+                await tenant.security_tools.sensor_manager.start()
+            self._background_tasks.append(asyncio.create_task(self._publish_dashboard_heartbeat()))
+
+        @self.app.on_event("shutdown")
+        async def shutdown_event():
+            for task in self._background_tasks:
+                task.cancel()
+            await self.loop_monitor.stop()
+            await self.tenants.close()
+
+    async def _publish_dashboard_heartbeat(self):
+        """Publish the periodic dashboard status once for all connected screens"""
+        while True:
+            for tenant in self.tenants:
+                try:
+                    await tenant.dashboard_feed.publish({
+                        "timestamp": datetime.now().isoformat(),
+                        "status": "active",
+                        "sensors": tenant.security_tools.sensor_telemetry.snapshot(),
+                        "load_shedding": tenant.security_tools.load_shedder.snapshot()
+                    })
+                except Exception as e:
+                    log_error(e, f"Dashboard heartbeat for tenant {tenant.tenant_id}")
+            await asyncio.sleep(5)  # Send updates every 5 seconds
+
+    def _tenant(self, connection) -> Tenant:
+        """Tenant named by the X-Tenant-ID header or ?tenant= (websockets can't set headers)"""
+        tenant_id = connection.headers.get("x-tenant-id") or connection.query_params.get("tenant")
+        try:
+            return self.tenants.get(tenant_id)
+        except KeyError:
+            raise HTTPException(status_code=404, detail=f"Unknown tenant {tenant_id}")
 
     def _setup_routes(self):
         """Setup dashboard API endpoints"""
         @self.app.get("/status")
-        async def get_security_status():
+        async def get_security_status(request: Request):
+            tenant = self._tenant(request)
             try:
-                logging.info("Fetching defense capabilities...")
-                defense_status = self.security_tools.get_defense_capabilities()
-                logging.info(f"Defense capabilities: {defense_status}")
+                async with tenant.admit():
+                    logging.info("Fetching defense capabilities...")
+                    defense_status = tenant.security_tools.get_defense_capabilities()
+                    logging.info(f"Defense capabilities: {defense_status}")
 
-                logging.info("Analyzing current threats...")
-                threats = await self.commander.analyze_current_threats({})
-                logging.info(f"Threats: {threats}")
+                    logging.info("Analyzing current threats...")
+                    threats = await tenant.commander.analyze_current_threats({})
+                    logging.info(f"Threats: {threats}")
 
-                return {
-                    "current_posture": {
-                        "defense_capabilities": defense_status,
-                        "active_systems": self.security_tools._get_active_systems()
-                    },
-                    "active_threats": threats,
-                    "gaius_recommendations": self._get_actionable_items(),
-                    "threat_timeline": self._format_timeline_data(),
-                    "defense_radar": self._format_radar_data(defense_status),
-                    "risk_heatmap": self._format_risk_heatmap_data()
-                }
+                    return {
+                        "current_posture": {
+                            "defense_capabilities": defense_status,
+                            "active_systems": tenant.security_tools._get_active_systems(),
+                            "sensors": tenant.security_tools.sensor_telemetry.snapshot(),
+                            "load_shedding": tenant.security_tools.load_shedder.snapshot()
+                        },
+                        "active_threats": threats,
+                        "gaius_recommendations": await self._get_actionable_items(tenant),
+                        "threat_timeline": self._format_timeline_data(tenant),
+                        "defense_radar": self._format_radar_data(defense_status),
+                        "risk_heatmap": self._format_risk_heatmap_data(tenant)
+                    }
+            except TenantOverloaded:
+                raise HTTPException(status_code=429, detail=f"Tenant {tenant.tenant_id} is over its request quota")
             except Exception as e:
                 log_error(e, "/status endpoint")
                 raise HTTPException(status_code=500, detail="Internal server error")
 
         @self.app.post("/action/{action_id}")
-        async def execute_recommendation(self, action_id: str):
+        async def execute_recommendation(action_id: str, request: Request):
             """Execute one-click actions recommended by Gaius"""
-            return self._execute_action(action_id)
+            body = await self._json_body(request)
+            async with self._admitted(request) as tenant:
+                return self._execute_action(tenant, action_id, body, request.headers.get("idempotency-key"))
+
+        @self.app.post("/flows/analyze")
+        async def analyze_flows(request: Request):
+            """Analyze a NetFlow/IPFIX/PCAP file under GAIUS_FLOW_DIR, e.g. {"path": "edge-0900.pcap"}"""
+            body = await self._json_body(request)
+            async with self._admitted(request) as tenant:
+                if not tenant.security_tools.flow_dir:
+                    raise HTTPException(status_code=403, detail="Flow analysis is disabled; set GAIUS_FLOW_DIR")
+                result = await tenant.commander.analyze_flows(body)
+            if result["status"] != "success":
+                raise HTTPException(status_code=400, detail=result["message"])
+            return result["flow_analysis"]
+
+        @self.app.get("/flows")
+        async def get_flow_report(request: Request):
+            async with self._admitted(request) as tenant:
+                report = tenant.security_tools.flow_report
+            if report is None:
+                raise HTTPException(status_code=404, detail="No flow data has been analyzed")
+            return report
+
+        @self.app.post("/behavior/conn")
+        async def ingest_connections(request: Request):
+            """Zeek conn.log lines (TSV with its header, or JSON lines) for beaconing/lateral-movement detection"""
+            body = (await request.body()).decode("utf-8", errors="replace")
+            try:
+                async with self._admitted(request) as tenant:
+                    return await tenant.security_tools.ingest_connections(body.splitlines())
+            except ValueError as e:
+                raise HTTPException(status_code=400, detail=str(e))
+
+        @self.app.get("/behavior")
+        async def get_behavior(request: Request):
+            """Current beaconing and lateral-movement findings with the fan-out graph"""
+            async with self._admitted(request) as tenant:
+                return tenant.security_tools.behavior.findings
+
+        @self.app.post("/strategy")
+        async def formulate_strategy(request: Request):
+            """What-if strategy, e.g. {"scenarios": 5000, "budget": 0.5, "spreads": {"enemy_forces.strength": 0.5}}"""
+            body = await self._json_body(request)
+            async with self._admitted(request) as tenant:
+                result = await tenant.commander.formulate_strategy(body)
+            if result["status"] != "success":
+                raise HTTPException(status_code=400, detail=result["message"])
+            return result["strategy"]
+
+        @self.app.get("/sensors")
+        async def get_sensors(request: Request):
+            """Tailed IDS sensors with their read backlog, throttling and the merge watermark"""
+            async with self._admitted(request) as tenant:
+                return tenant.security_tools.sensor_manager.snapshot()
+
+        @self.app.post("/sensors")
+        async def add_sensor(request: Request):
+            """Add or reconfigure a sensor, e.g. {"name": "dmz-2", "type": "suricata", "path": "dmz-2/eve.json"}"""
+            body = await self._json_body(request)
+            async with self._admitted(request) as tenant:
+                manager = tenant.security_tools.sensor_manager
+                try:
+                    config = SensorConfig.from_dict({**body, "path": manager.resolve_path(str(body.get("path", "")))})
+                except PermissionError as e:
+                    raise HTTPException(status_code=403, detail=str(e))
+                except ValueError as e:
+                    raise HTTPException(status_code=400, detail=str(e))
+                return {"name": config.name, "changed": await manager.add(config)}
+
+        @self.app.delete("/sensors/{name}")
+        async def remove_sensor(name: str, request: Request):
+            async with self._admitted(request) as tenant:
+                if not await tenant.security_tools.sensor_manager.remove(name):
+                    raise HTTPException(status_code=404, detail=f"Unknown sensor {name}")
+            return {"name": name, "removed": True}
+
+        @self.app.post("/sensors/reload")
+        async def reload_sensors(request: Request):
+            """Re-read the sensor config file and apply additions, changes and removals"""
+            try:
+                async with self._admitted(request) as tenant:
+                    return {"sensors": await tenant.security_tools.sensor_manager.reload()}
+            except (OSError, ValueError) as e:
+                raise HTTPException(status_code=400, detail=str(e))
+
+        @self.app.get("/checkpoints")
+        async def get_checkpoints(request: Request):
+            """Newest event time ingested per sensor and last SIEM gathers; readers resume from these"""
+            async with self._admitted(request) as tenant:
+                return {
+                    "sensors": tenant.security_tools.sensor_telemetry.checkpoints(),
+                    "siem": tenant.gaius.checkpoints
+                }
+
+        @self.app.get("/metrics", response_class=PlainTextResponse)
+        async def get_metrics():
+            """Per-sensor ingestion telemetry for every tenant in Prometheus text format"""
+            return render_prometheus([
+                tenant.security_tools.sensor_telemetry.prometheus(f'tenant="{tenant.tenant_id}"')
+                for tenant in self.tenants
+            ])
+
+        @self.app.get("/diagnostics")
+        async def get_diagnostics(request: Request, stalls: int = Query(10, ge=0, le=1000)):
+            """Event-loop lag, recent blocking stalls and subsystem counters"""
+            async with self._admitted(request) as tenant:
+                return {
+                    "event_loop": self.loop_monitor.snapshot(stalls),
+                    "llm": {"resilience": tenant.gaius.llm.snapshot(), "batcher": tenant.gaius.llm_batcher.snapshot()},
+                    "tenant": tenant.tenant_id,
+                    **tenant.snapshot(),
+                    "tenants": {other.tenant_id: other.counters for other in self.tenants}
+                }
+
+        @self.app.get("/history/assessments")
+        async def get_assessment_history(request: Request, threat_level: str = None, session: str = None,
+                                         days: float = Query(7, gt=0, le=MAX_HISTORY_DAYS),
+                                         limit: int = Query(100, ge=1, le=MAX_HISTORY_ROWS), at_least: bool = False):
+            """Stored assessments, e.g. ?threat_level=critical&days=7"""
+            async with self._admitted(request) as tenant:
+                try:
+                    return await tenant.gaius.history.query_assessments(
+                        threat_level, session, since=datetime.now() - timedelta(days=days),
+                        limit=limit, at_least=at_least
+                    )
+                except (KeyError, ValueError):
+                    raise HTTPException(status_code=400, detail=f"Unknown threat level {threat_level}")
+
+        @self.app.get("/history/threats")
+        async def get_threat_history(request: Request, days: float = Query(7, gt=0, le=MAX_HISTORY_DAYS),
+                                     limit: int = Query(1000, ge=1, le=MAX_HISTORY_ROWS)):
+            async with self._admitted(request) as tenant:
+                return await tenant.gaius.history.threat_history(
+                    since=datetime.now() - timedelta(days=days), limit=limit
+                )
+
+        @self.app.get("/history/chat")
+        async def get_chat_history(request: Request, session: str = None,
+                                   days: float = Query(7, gt=0, le=MAX_HISTORY_DAYS),
+                                   limit: int = Query(100, ge=1, le=MAX_HISTORY_ROWS)):
+            async with self._admitted(request) as tenant:
+                return await tenant.gaius.history.chat_history(
+                    session, since=datetime.now() - timedelta(days=days), limit=limit
+                )
+
+        @self.app.get("/action/{action_id}")
+        async def get_action_status(request: Request, action_id: str, detail: bool = False):
+            async with self._admitted(request) as tenant:
+                run = tenant.action_executor.runs.get(action_id)
+            if run is None:
+                raise HTTPException(status_code=404, detail=f"Action {action_id} has not been executed")
+            return run.to_dict(detail)
 
     async def _setup_websocket_routes(self):
         @self.app.websocket("/ws/dashboard")
         async def websocket_endpoint(websocket: WebSocket):
-            await websocket.accept()
+            # ?encoding=msgpack for binary frames, ?since=<seq>&epoch=<epoch> to resume after a reconnect
+            encoding = negotiate(websocket.query_params.get("encoding"))
+            since = websocket.query_params.get("since")
+            seq = int(since) if since and since.isdigit() else None
+            epoch = websocket.query_params.get("epoch")
+            tenant = await self._accept_tenant(websocket)
+            if tenant is None:
+                return
+            feed = tenant.dashboard_feed
             self.active_connections.append(websocket)
+            disconnected = self._start_disconnect_watch(websocket)
             try:
                 while True:
-                    data = {
-                        "timestamp": datetime.now().isoformat(),
-                        "status": "active",
-                        # will Add more real-time data here
-                    }
-                    await websocket.send_json(data)
-                    await asyncio.sleep(5)  # Send updates every 5 seconds
+                    for message in feed.since(seq, epoch):
+                        await send_encoded(websocket, message.encoded(encoding), encoding)
+                        # Updates published during the send are picked up on the next pass
+                        seq, epoch = message.payload["seq"], message.payload["epoch"]
+                    await self._wait_unless_disconnected(feed.wait_for_update(seq, timeout=30), disconnected)
             except WebSocketDisconnect:
                 self.active_connections.remove(websocket)
             except Exception as e:
                 log_error(e, "WebSocket /ws/dashboard")
                 if websocket in self.active_connections:
                     self.active_connections.remove(websocket)
+            finally:
+                disconnected.cancel()
+
+        @self.app.websocket("/ws/alerts")
+        async def alerts_endpoint(websocket: WebSocket):
+            """
+            Stream normalized alerts. Query parameters: severity (minimum level),
+            sector, sensor, signature (comma-separated), policy
+            (drop_oldest | drop_newest | sample), buffer (max queued alerts), encoding
+            """
+            params = websocket.query_params
+            encoding = negotiate(params.get("encoding"))
+            try:
+                alert_filter = AlertFilter.from_query(params)
+                policy = params.get("policy") or "drop_oldest"
+                if policy not in POLICIES:
+                    raise ValueError(f"Unknown overload policy: {policy}")
+                capacity = int(params.get("buffer") or 5000)
+            except ValueError as e:
+                await websocket.accept()
+                await send_payload(websocket, {"type": "error", "content": str(e)}, encoding)
+                await websocket.close(code=1003)
+                return
+
+            tenant = await self._accept_tenant(websocket)
+            if tenant is None:
+                return
+            if not tenant.can_subscribe_alerts():
+                await send_payload(websocket, {"type": "error", "content": "Alert subscriber quota reached"}, encoding)
+                await websocket.close(code=1013)
+                return
+            alert_stream = tenant.security_tools.alert_stream
+            subscription = alert_stream.subscribe(alert_filter, tenant.alert_capacity(capacity), policy)
+            disconnected = self._start_disconnect_watch(websocket)
+            try:
+                while True:
+                    await self._wait_unless_disconnected(subscription.ready.wait(), disconnected)
+                    alerts, lost = subscription.drain()
+                    if not alerts and not lost:
+                        continue
+                    await send_payload(websocket, {
+                        "type": "alerts",
+                        # Classtype, priority and MITRE tags from the loaded rule set
+                        "alerts": tenant.security_tools.enrich_alerts(alerts),
+                        "dropped": lost,
+                        "buffered": subscription.size
+                    }, encoding)
+            except WebSocketDisconnect:
+                logging.info("Alert stream WebSocket disconnected")
+            except Exception as e:
+                log_error(e, "WebSocket /ws/alerts")
+            finally:
+                disconnected.cancel()
+                alert_stream.unsubscribe(subscription)
 
         @self.app.websocket("/ws/chat")
         async def chat_endpoint(websocket: WebSocket):
-            await websocket.accept()
+            encoding = negotiate(websocket.query_params.get("encoding"))
+            # ?session=<id> keeps a conversation's history together across reconnects
+            session_id = websocket.query_params.get("session") or uuid.uuid4().hex
+            tenant = await self._accept_tenant(websocket)
+            if tenant is None:
+                return
             try:
                 while True:
                     message = await websocket.receive_text()
@@ -110,13 +392,15 @@ class GaiusDashboard:
                     
                     try:
                         # Get Gaius's response with timeout
-                        response = await asyncio.wait_for(
-                            self.gaius.evaluate_situation({
-                                "chat_message": message,
-                                "current_context": self.security_tools.get_defense_capabilities()
-                            }),
-                            timeout=10.0
-                        )
+                        async with tenant.admit():
+                            response = await asyncio.wait_for(
+                                tenant.gaius.evaluate_situation({
+                                    "chat_message": message,
+                                    "session_id": session_id,
+                                    "current_context": tenant.security_tools.get_defense_capabilities()
+                                }),
+                                timeout=10.0
+                            )
                         
                         # Ensure we have a valid response
                         if not response or "ai_insights" not in response:
@@ -131,21 +415,27 @@ class GaiusDashboard:
                             "timestamp": datetime.now().isoformat()
                         }
                         
-                        await websocket.send_json(chat_response)
+                        await send_payload(websocket, chat_response, encoding)
                         
                     except asyncio.TimeoutError:
-                        await websocket.send_json({
+                        await send_payload(websocket, {
                             "type": "error",
                             "content": "Response timeout. My strategic calculations are taking longer than expected.",
                             "timestamp": datetime.now().isoformat()
-                        })
+                        }, encoding)
+                    except TenantOverloaded:
+                        await send_payload(websocket, {
+                            "type": "error",
+                            "content": "The legions are stretched thin. Please send your query again shortly.",
+                            "timestamp": datetime.now().isoformat()
+                        }, encoding)
                     except Exception as e:
                         log_error(e, "Chat WebSocket message processing")
-                        await websocket.send_json({
+                        await send_payload(websocket, {
                             "type": "error",
                             "content": "My apologies, I encountered an error in my strategic analysis.",
                             "timestamp": datetime.now().isoformat()
-                        })
+                        }, encoding)
                         
             except WebSocketDisconnect:
                 logging.info("Chat WebSocket disconnected")
@@ -153,22 +443,88 @@ class GaiusDashboard:
                 log_error(e, "Chat WebSocket")
                 await websocket.close()
 
-    def _get_dashboard_updates(self) -> Dict:
+    async def _accept_tenant(self, websocket: WebSocket) -> Optional[Tenant]:
+        """Accept the socket for its tenant, or close it with a policy violation if unknown"""
+        tenant_id = websocket.query_params.get("tenant") or websocket.headers.get("x-tenant-id")
+        try:
+            tenant = self.tenants.get(tenant_id)
+        except KeyError:
+            await websocket.close(code=1008)
+            return None
+        await websocket.accept()
+        return tenant
+
+    @asynccontextmanager
+    async def _admitted(self, request: Request) -> AsyncIterator[Tenant]:
+        """The request's tenant, holding one of its request slots; 429 when it is over quota"""
+        tenant = self._tenant(request)
+        try:
+            async with tenant.admit():
+                yield tenant
+        except TenantOverloaded:
+            raise HTTPException(status_code=429, detail=f"Tenant {tenant.tenant_id} is over its request quota")
+
+    @staticmethod
+    async def _json_body(request: Request) -> Dict:
+        """The request's JSON object body ({} when empty); 400 for malformed JSON or any other type"""
+        if not await request.body():
+            return {}
+        try:
+            body = await request.json()
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Request body is not valid JSON")
+        if not isinstance(body, dict):
+            raise HTTPException(status_code=400, detail="Request body must be a JSON object")
+        return body
+
+    @classmethod
+    def _start_disconnect_watch(cls, websocket: WebSocket) -> asyncio.Task:
+        watcher = asyncio.create_task(cls._watch_disconnect(websocket))
+        watcher.add_done_callback(cls._log_watcher_failure)
+        return watcher
+
+    @staticmethod
+    def _log_watcher_failure(watcher: asyncio.Task):
+        """Retrieve the watcher's exception so a failed receive is logged, not reported at shutdown"""
+        if not watcher.cancelled() and watcher.exception() is not None:
+            logging.error(f"WebSocket disconnect watcher failed: {watcher.exception()!r}")
+
+    @staticmethod
+    async def _watch_disconnect(websocket: WebSocket):
+        """Consume inbound frames on push-only sockets until the client goes away"""
+        while True:
+            message = await websocket.receive()
+            if message["type"] == "websocket.disconnect":
+                return
+
+    @staticmethod
+    async def _wait_unless_disconnected(awaitable, disconnected: asyncio.Task):
+        """Await ``awaitable`` but stop waiting as soon as the client disconnects"""
+        waiter = asyncio.ensure_future(awaitable)
+        try:
+            await asyncio.wait({waiter, disconnected}, return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            waiter.cancel()
+        if disconnected.done():
+            raise WebSocketDisconnect()
+
+    async def _get_dashboard_updates(self, tenant: Tenant) -> Dict:
         """Get real-time dashboard data"""
+        advice = await tenant.commander.cached_tactical_advice()
         return {
             "threat_landscape": {
-                "current_level": self.commander.analyze_current_threats({}),
+                "current_level": await tenant.commander.analyze_current_threats({}),
                 "trend": self._calculate_threat_trend(),
-                "hotspots": self._identify_security_hotspots()
+                "hotspots": self._identify_security_hotspots(tenant)
             },
             "defense_status": {
-                "readiness": self.security_tools.get_defense_capabilities(),
+                "readiness": tenant.security_tools.get_defense_capabilities(),
                 "active_countermeasures": self._get_active_defenses(),
                 "resource_utilization": self._get_resource_metrics()
             },
             "gaius_insights": {
-                "strategic_advice": self.commander.get_tactical_advice({}),
-                "recommended_actions": self._get_actionable_items(),
+                "strategic_advice": advice,
+                "recommended_actions": await self._get_actionable_items(tenant, advice),
                 "risk_assessment": self._calculate_risk_metrics()
             }
         }
@@ -176,8 +532,12 @@ class GaiusDashboard:
     def _calculate_threat_trend(self):
         return {"trend": "increasing", "rate": 0.15}
 
-    def _identify_security_hotspots(self):
-        return ["network_perimeter", "user_endpoints"]
+    def _identify_security_hotspots(self, tenant: Tenant):
+        activity = tenant.security_tools.sector_activity
+        if not activity:
+            return ["network_perimeter", "user_endpoints"]
+        ranked = sorted(activity.items(), key=lambda item: sum(item[1].values()), reverse=True)
+        return [sector.replace(" ", "_") for sector, _ in ranked[:3]]
 
     def _get_active_defenses(self):
         return ["ids", "firewall", "endpoint_protection"]
@@ -188,58 +548,83 @@ class GaiusDashboard:
     def _calculate_risk_metrics(self):
         return {"overall": "medium", "critical_assets": "low"}
 
-    def _execute_action(self, action_id: str):
-        return {"status": "success", "message": f"Action {action_id} executed"}
+    def _execute_action(self, tenant: Tenant, action_id: str, body: Dict, request_key: str = None):
+        """
+        Start a proposed action, or an ad-hoc one described by the request body
+        ({"action", "targets", "parameters", "platform"}), without waiting for it
+        """
+        try:
+            if body.get("action"):
+                tenant.action_executor.propose(
+                    body["action"], body.get("targets", []), body.get("description", ""),
+                    body.get("parameters"), body.get("platform"), action_id=action_id
+                )
+            run = tenant.action_executor.start(action_id, request_key)
+        except KeyError:
+            raise HTTPException(status_code=404, detail=f"Unknown action {action_id}")
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        return run.to_dict()
 
-    def _get_actionable_items(self):
+    async def _get_actionable_items(self, tenant: Tenant, assessment: Dict = None):
         """Convert Gaius's strategic advice into clickable actions"""
-        assessment = self.commander.get_tactical_advice({})
+        if assessment is None:
+            assessment = await tenant.commander.cached_tactical_advice()
         return {
-            "immediate_actions": self._format_actions(assessment),
+            "immediate_actions": self._format_actions(tenant, assessment),
             "strategic_changes": self._format_strategic_items(assessment),
             "resource_needs": self._format_resource_requests(assessment)
         }
 
-    def _format_timeline_data(self) -> Dict:
+    def _format_timeline_data(self, tenant: Tenant) -> Dict:
         """Format threat timeline data for frontend"""
         try:
             current_time = datetime.now()
             return {
                 "labels": [(current_time - timedelta(hours=x)).strftime("%H:%M") 
                           for x in range(6, -1, -1)],
-                "values": self.security_tools.get_threat_metrics()["hourly_threats"],
-                "mitigated": self.security_tools.get_threat_metrics()["hourly_mitigated"]
+                "values": tenant.security_tools.get_threat_metrics()["hourly_threats"],
+                "mitigated": tenant.security_tools.get_threat_metrics()["hourly_mitigated"]
             }
         except Exception as e:
             log_error(e, "Formatting timeline data")
             return {"labels": [], "values": [], "mitigated": []}
 
     def _format_radar_data(self, defense_status: Dict) -> Dict:
-        """Format defense capabilities for radar chart"""
+        """Format defense capabilities for radar chart; controls with no evidence stay null"""
         try:
             return {
                 "labels": ["Firewall", "IDS/IPS", "Encryption", "Authentication", 
                           "Monitoring", "Backup"],
                 "values": [
-                    defense_status.get("firewall", 0),
-                    defense_status.get("ids", 0),
-                    defense_status.get("encryption", 0),
-                    defense_status.get("authentication", 0),
-                    defense_status.get("monitoring", 0),
-                    defense_status.get("backup", 0)
+                    defense_status.get("firewall"),
+                    defense_status.get("ids"),
+                    defense_status.get("encryption"),
+                    defense_status.get("authentication"),
+                    defense_status.get("monitoring"),
+                    defense_status.get("backup")
                 ]
             }
         except Exception as e:
             log_error(e, "Formatting radar data")
             return {"labels": [], "values": []}
 
-    def _format_risk_heatmap_data(self):
-        # Placeholder method
-        return {}
+    def _format_risk_heatmap_data(self, tenant: Tenant):
+        """Format per-sector alert volume for the risk heatmap"""
+        activity = tenant.security_tools.sector_activity
+        if not activity:
+            return {}
+        peak = max(count for origins in activity.values() for count in origins.values()) or 1
+        return {
+            "values": [
+                {"x": sector.title(), "y": origin, "value": round(count / peak, 2)}
+                for sector, origins in activity.items()
+                for origin, count in origins.items()
+            ]
+        }
 
-    def _format_actions(self, assessment):
-        # Placeholder method
-        return []
+    def _format_actions(self, tenant: Tenant, assessment):
+        return tenant.action_executor.proposals()
 
     def _format_strategic_items(self, assessment):
         # Placeholder method
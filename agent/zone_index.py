@@ -0,0 +1,144 @@
+"""
+Longest-prefix-match index mapping IP addresses to detection zones and asset groups.
+
+Nested CIDRs are flattened into sorted, non-overlapping intervals over the
+IPv4-mapped 128-bit address space, so each lookup is a single bisect and the
+most specific prefix always wins.
+"""
+import ipaddress
+from array import array
+from bisect import bisect_right
+from itertools import repeat
+from typing import Dict, Iterable, List, NamedTuple, Optional, Sequence, Tuple
+
+from alert_batch import AlertBatch, pack_ip
+
+NO_ZONE = -1
+DEFAULT_SECTOR = "general defense"
+
+
+class Zone(NamedTuple):
+    name: str
+    sector: str
+    kind: str
+    criticality: int
+
+
+def _network_bounds(cidr: str) -> Tuple[int, int]:
+    network = ipaddress.ip_network(cidr, strict=False)
+    hi, lo = pack_ip(str(network.network_address))
+    start = (hi << 64) | lo
+    return start, start + network.num_addresses - 1
+
+
+class ZoneIndex:
+    """Immutable interval index; rebuild it when the zone configuration changes"""
+    def __init__(self, zones: List[Zone], starts: List[int], labels: array):
+        self.zones = zones
+        self._starts = starts
+        self._labels = labels
+
+    def __len__(self) -> int:
+        return len(self.zones)
+
+    @classmethod
+    def build(cls, entries: Iterable[Dict]) -> "ZoneIndex":
+        """
+        Build from entries shaped like ``{"name", "cidrs", "sector", "kind", "criticality"}``.
+        Later entries win when the exact same prefix is listed twice.
+        """
+        zones: List[Zone] = []
+        prefixes: List[Tuple[int, int, int, int]] = []
+        for entry in entries:
+            zone_id = len(zones)
+            zones.append(Zone(
+                name=entry["name"],
+                sector=entry.get("sector") or DEFAULT_SECTOR,
+                kind=entry.get("kind", "zone"),
+                criticality=int(entry.get("criticality", 1))
+            ))
+            for cidr in entry.get("cidrs", []):
+                start, end = _network_bounds(cidr)
+                prefixes.append((start, -end, len(prefixes), zone_id))
+
+        starts: List[int] = []
+        labels = array("i")
+
+        def emit(position: int, label: int):
+            if starts and starts[-1] == position:
+                labels[-1] = label
+            elif not labels or labels[-1] != label:
+                starts.append(position)
+                labels.append(label)
+
+        # CIDRs are either nested or disjoint, so a stack sweep yields the LPM segments
+        stack: List[Tuple[int, int]] = []
+        for start, neg_end, _, zone_id in sorted(prefixes):
+            while stack and stack[-1][0] < start:
+                closed_end, _ = stack.pop()
+                emit(closed_end + 1, stack[-1][1] if stack else NO_ZONE)
+            emit(start, zone_id)
+            stack.append((-neg_end, zone_id))
+        while stack:
+            closed_end, _ = stack.pop()
+            emit(closed_end + 1, stack[-1][1] if stack else NO_ZONE)
+
+        return cls(zones, starts, labels)
+
+    def lookup_int(self, address: int) -> int:
+        position = bisect_right(self._starts, address) - 1
+        return self._labels[position] if position >= 0 else NO_ZONE
+
+    def lookup(self, address: str) -> Optional[Zone]:
+        hi, lo = pack_ip(address)
+        zone_id = self.lookup_int((hi << 64) | lo)
+        return self.zones[zone_id] if zone_id != NO_ZONE else None
+
+    def lookup_columns(self, hi_column, lo_column) -> array:
+        """Zone id per row for a pair of packed address columns"""
+        starts, labels = self._starts, self._labels
+        result = array("i", [NO_ZONE]) * len(hi_column)
+        if not starts:
+            return result
+        # Alert streams repeat addresses heavily; memoize within the batch
+        seen: Dict[int, int] = {}
+        for row, (hi, lo) in enumerate(zip(hi_column, lo_column)):
+            address = (hi << 64) | lo
+            zone_id = seen.get(address)
+            if zone_id is None:
+                position = bisect_right(starts, address) - 1
+                zone_id = labels[position] if position >= 0 else NO_ZONE
+                seen[address] = zone_id
+            result[row] = zone_id
+        return result
+
+    def attribute_batch(self, batch: AlertBatch) -> array:
+        """Zone id per alert, preferring the destination and falling back to the source"""
+        return self.analyze_batch(batch)[0]
+
+    def sector_activity(self, batch: AlertBatch) -> Dict[str, Dict[str, int]]:
+        return self.analyze_batch(batch)[1]
+
+    def analyze_batch(self, batch: AlertBatch,
+                      weights: Optional[Sequence[float]] = None) -> Tuple[array, Dict[str, Dict[str, int]]]:
+        """
+        Zone id per alert (destination first, then source) together with alert
+        counts per sector split by origin: ``External`` when the source is
+        outside every zone, otherwise ``Internal``. For a sampled batch,
+        ``weights`` gives the number of alerts each row stands for.
+        """
+        columns = batch.columns
+        dst_zones = self.lookup_columns(columns["dst_hi"], columns["dst_lo"])
+        src_zones = self.lookup_columns(columns["src_hi"], columns["src_lo"])
+        zone_ids = array("i", [dst if dst != NO_ZONE else src for dst, src in zip(dst_zones, src_zones)])
+
+        activity: Dict[str, Dict[str, int]] = {}
+        for zone_id, src, weight in zip(zone_ids, src_zones, weights if weights is not None else repeat(1)):
+            sector = self.zones[zone_id].sector if zone_id != NO_ZONE else DEFAULT_SECTOR
+            origin = "External" if src == NO_ZONE else "Internal"
+            counts = activity.setdefault(sector, {"External": 0, "Internal": 0})
+            counts[origin] += weight
+        if weights is not None:
+            for counts in activity.values():
+                counts["External"], counts["Internal"] = round(counts["External"]), round(counts["Internal"])
+        return zone_ids, activity
@@ -1,14 +1,17 @@
-import { useEffect, useState, useCallback } from "react";
+import { useEffect, useState, useCallback, useRef } from "react";
 import { motion, AnimatePresence } from 'framer-motion';
 
 const WebSocketManager = ({ onUpdate }) => {
   const [ws, setWs] = useState(null);
   const [status, setStatus] = useState('disconnected');
   const [showStatus, setShowStatus] = useState(false);
+  // Last sequence number seen, so reconnects resume instead of resyncing
+  const lastSeq = useRef(null);
 
   const connect = useCallback(() => {
     setStatus('connecting');
-    const websocket = new WebSocket("ws://localhost:8000/ws/dashboard");
+    const resume = lastSeq.current !== null ? `?since=${lastSeq.current}` : "";
+    const websocket = new WebSocket(`ws://localhost:8000/ws/dashboard${resume}`);
     
     websocket.onerror = (error) => {
       console.error("WebSocket error:", error);
@@ -28,8 +31,11 @@ const WebSocketManager = ({ onUpdate }) => {
     setWs(websocket);
 
     websocket.onmessage = (event) => {
-      const data = JSON.parse(event.data);
-      onUpdate(data);
+      const message = JSON.parse(event.data);
+      if (typeof message.seq === "number") {
+        lastSeq.current = message.seq;
+      }
+      onUpdate(message.data ?? message, message.type);
     };
     
     websocket.onclose = () => {
@@ -45,7 +45,8 @@ const Dashboard = () => {
 
   // Handle WebSocket updates
   const handleWebSocketUpdate = (data) => {
-    setDashboardData(data);
+    // Updates are partial; merge them into the current state
+    setDashboardData(prev => ({ ...prev, ...data }));
   };
 
   return (
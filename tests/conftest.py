@@ -0,0 +1,11 @@
+import os
+import sys
+import tempfile
+
+# Agent modules import each other by bare name, as they do when run from agent/
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "agent"))
+
+# The LLM client needs a key; nothing in the suite talks to a real provider
+os.environ.setdefault("DEEPSEEK_API_KEY", "test")
+os.environ.setdefault("DEEPSEEK_BASE_URL", "http://127.0.0.1:9/v1")
+os.environ.setdefault("GAIUS_HISTORY_DB", os.path.join(tempfile.mkdtemp(prefix="gaius-tests-"), "history.db"))
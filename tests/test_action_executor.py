@@ -0,0 +1,62 @@
+import asyncio
+
+import pytest
+from fastapi.testclient import TestClient
+
+from action_executor import ActionExecutor, ActionPlan, SUCCEEDED
+
+
+class FakeEDR:
+    batch_size = 50
+
+    def __init__(self):
+        self.calls = []
+
+    async def isolate_hosts(self, host_ids, release=False):
+        self.calls.append(("release" if release else "isolate", list(host_ids)))
+        return {host_id: True for host_id in host_ids}
+
+
+class FakeGaius:
+    def __init__(self, handler):
+        self.security_integrations = {"edr": {"data_handlers": {"crowdstrike": handler},
+                                              "connection_status": {"crowdstrike": "connected"}}}
+
+
+def test_isolate_after_release_runs_again():
+    async def scenario():
+        edr = FakeEDR()
+        executor = ActionExecutor(FakeGaius(edr))
+        for n, kind in enumerate(["isolate_host", "isolate_host", "release_host", "isolate_host"]):
+            executor.propose(kind, ["host-1"], action_id=f"a{n}")
+            run = await executor.execute(f"a{n}")
+            assert run.status == SUCCEEDED
+        # The repeated isolate is reused; the one after the release is not
+        assert edr.calls == [("isolate", ["host-1"]), ("release", ["host-1"]), ("isolate", ["host-1"])]
+    asyncio.run(scenario())
+
+
+def test_completed_actions_expire():
+    async def scenario():
+        edr = FakeEDR()
+        executor = ActionExecutor(FakeGaius(edr), completed_ttl=0.0)
+        for n in range(2):
+            executor.propose("isolate_host", ["host-1"], action_id=f"a{n}")
+            await executor.execute(f"a{n}")
+        assert len(edr.calls) == 2
+    asyncio.run(scenario())
+
+
+@pytest.mark.parametrize("targets", ["host-1", [1, 2], {"host": "x"}])
+def test_plan_targets_must_be_a_list_of_strings(targets):
+    with pytest.raises(ValueError):
+        ActionPlan("a", "isolate_host", targets)
+
+
+def test_action_route_rejects_bad_bodies():
+    from web_interface import GaiusDashboard
+    client = TestClient(GaiusDashboard().app)
+    assert client.post("/action/a1", content=b"{not json").status_code == 400
+    assert client.post("/action/a1", json=["isolate_host"]).status_code == 400
+    assert client.post("/action/a1", json={"action": "isolate_host", "targets": "host-1"}).status_code == 400
+    assert client.post("/action/unknown", json={}).status_code == 404
@@ -0,0 +1,60 @@
+import pytest
+
+from alert_batch import AlertBatch, AlertBatchBuilder, benchmark_memory, parse_timestamp
+
+
+def test_builder_round_trips_rows():
+    builder = AlertBatchBuilder()
+    builder.append(1700000000.0, "10.0.0.1", "2001:db8::1", 40000, 443, "TCP", "high", "ET SCAN", "dmz-1", 2001)
+    builder.append(1700000001.5, "192.168.1.2", "10.0.0.1", proto="udp", severity="low")
+    rows = builder.build().to_dicts()
+    assert rows[0] == {
+        "timestamp": "2023-11-14T22:13:20+00:00", "src_ip": "10.0.0.1", "dst_ip": "2001:db8::1",
+        "src_port": 40000, "dst_port": 443, "proto": "tcp", "severity": "high",
+        "signature": "ET SCAN", "sid": 2001, "sensor": "dmz-1"
+    }
+    assert rows[1]["proto"] == "udp" and rows[1]["signature"] == "" and rows[1]["sid"] == 0
+
+
+@pytest.mark.parametrize("field, value", [
+    ("src_port", "80"),  # TypeError
+    ("dest_port", 70000),  # OverflowError
+    ("src_ip", "10.0.0.999"),  # ValueError
+    ("timestamp", "yesterday"),
+])
+def test_bad_eve_rows_are_rejected_without_misaligning_columns(field, value):
+    good = {"timestamp": "2024-01-01T00:00:00Z", "src_ip": "10.0.0.1", "dest_ip": "10.0.0.2",
+            "src_port": 1234, "dest_port": 80, "proto": "TCP",
+            "alert": {"signature": "ET TEST", "signature_id": 7, "severity": 1}}
+    builder = AlertBatchBuilder()
+    assert builder.append_eve(good)
+    assert not builder.append_eve({**good, field: value})
+    assert builder.append_eve({**good, "src_ip": "10.0.0.3"})
+    batch = builder.build()
+    assert builder.rejected == 1
+    assert len({len(view) for view in batch.columns.values()}) == 1
+    assert [row["src_ip"] for row in batch.to_dicts()] == ["10.0.0.1", "10.0.0.3"]
+
+
+def test_slices_take_and_concat():
+    builder = AlertBatchBuilder()
+    for i in range(10):
+        builder.append(float(i), f"10.0.0.{i}", "10.0.1.1", severity=("low", "critical")[i % 2])
+    batch = builder.build()
+    assert [row["src_ip"] for row in batch[2:4]] == ["10.0.0.2", "10.0.0.3"]
+    assert len(batch.with_min_severity("critical")) == 5
+    joined = AlertBatch.concat([batch[:3], batch.take([9])])
+    assert [row["timestamp"][-14:-6] for row in joined] == ["00:00:00", "00:00:01", "00:00:02", "00:00:09"]
+
+
+def test_timestamps_accept_epoch_and_iso():
+    assert parse_timestamp("1700000000.25") == 1700000000.25
+    assert parse_timestamp("2023-11-14T22:13:20Z") == 1700000000.0
+    assert parse_timestamp("2023-11-14T23:13:20+01:00") == 1700000000.0
+
+
+def test_batches_are_several_times_smaller_than_dicts():
+    # The module's benchmark at 1M alerts; a smaller run shows the same per-alert sizes
+    result = benchmark_memory(20000)
+    assert result["column_bytes_per_alert"] == 58
+    assert result["ratio"] > 4
@@ -0,0 +1,149 @@
+import gc
+import weakref
+
+import pytest
+
+from alert_batch import AlertBatch, AlertBatchBuilder
+from alert_stream import AlertBroadcaster, AlertFilter, AlertSubscription
+from zone_index import ZoneIndex
+
+
+def make_batch(count, start=0, severity="high", signature="ET SCAN", sensor="dmz-1"):
+    builder = AlertBatchBuilder()
+    for i in range(start, start + count):
+        builder.append(1700000000.0 + i, f"10.0.{i // 256}.{i % 256}", "192.168.1.1", 1000 + i, 443,
+                       "tcp", severity, signature, sensor, i)
+    return builder.build()
+
+
+def ports(rows):
+    return [row["src_port"] - 1000 for row in rows]
+
+
+def test_filter_narrows_by_severity_sensor_and_signature():
+    builder = AlertBatchBuilder()
+    builder.append(1.0, "10.0.0.1", "10.0.0.2", severity="low", signature="A", sensor="s1")
+    builder.append(2.0, "10.0.0.1", "10.0.0.2", severity="high", signature="A", sensor="s1")
+    builder.append(3.0, "10.0.0.1", "10.0.0.2", severity="critical", signature="B", sensor="s2")
+    builder.append(4.0, "10.0.0.1", "10.0.0.2", severity="high", signature="A", sensor="s2")
+    batch = builder.build()
+    assert list(AlertFilter().select(batch)) == [0, 1, 2, 3]
+    assert AlertFilter(min_severity="high").select(batch) == [1, 2, 3]
+    assert AlertFilter(min_severity="high", sensors=["s2"]).select(batch) == [2, 3]
+    assert AlertFilter(signatures=["A"], sensors=["s1"]).select(batch) == [0, 1]
+    assert AlertFilter(signatures=["unknown"]).select(batch) == []
+    with pytest.raises(ValueError):
+        AlertFilter(min_severity="urgent")
+
+
+def test_filter_recompiles_when_intern_tables_grow():
+    builder = AlertBatchBuilder()
+    builder.append(1.0, "10.0.0.1", "10.0.0.2", signature="A")
+    alert_filter = AlertFilter(signatures=["B"])
+    assert alert_filter.select(builder.build()) == []
+    # "B" is interned only now; a stale compilation would keep matching nothing
+    builder.append(2.0, "10.0.0.1", "10.0.0.2", signature="A")
+    builder.append(3.0, "10.0.0.1", "10.0.0.2", signature="B")
+    assert alert_filter.select(builder.build()) == [1]
+
+
+def test_filter_by_sector_uses_zone_ids():
+    zones = ZoneIndex.build([{"name": "dmz", "cidrs": ["192.168.1.0/24"], "sector": "Perimeter"}])
+    builder = AlertBatchBuilder()
+    builder.append(1.0, "10.0.0.1", "192.168.1.5")
+    builder.append(2.0, "10.0.0.1", "172.16.0.5")
+    batch = builder.build()
+    zone_ids = zones.attribute_batch(batch)
+    assert AlertFilter(sectors=["perimeter"]).select(batch, zone_ids, zones) == [0]
+    assert AlertFilter(sectors=["General Defense"]).select(batch, zone_ids, zones) == [1]
+
+
+def test_drop_oldest_evicts_buffered_rows():
+    subscription = AlertSubscription(AlertFilter(), capacity=5, policy="drop_oldest")
+    subscription.offer(make_batch(3), range(3))
+    subscription.offer(make_batch(4, start=3), range(4))
+    assert subscription.size == 5
+    rows, lost = subscription.drain()
+    assert ports(rows) == [2, 3, 4, 5, 6]
+    assert lost == 2
+    assert subscription.counters == {"matched": 7, "delivered": 5, "dropped": 2, "sampled_out": 0}
+
+
+def test_drop_oldest_keeps_newest_when_one_batch_exceeds_capacity():
+    subscription = AlertSubscription(AlertFilter(), capacity=3, policy="drop_oldest")
+    batch = make_batch(8)
+    subscription.offer(batch, range(8))
+    rows, lost = subscription.drain()
+    assert ports(rows) == [5, 6, 7]
+    assert lost == 5
+
+
+def test_drop_newest_keeps_buffered_rows():
+    subscription = AlertSubscription(AlertFilter(), capacity=5, policy="drop_newest")
+    subscription.offer(make_batch(3), range(3))
+    subscription.offer(make_batch(4, start=3), range(4))
+    rows, lost = subscription.drain()
+    assert ports(rows) == [0, 1, 2, 3, 4]
+    assert lost == 2
+    assert subscription.counters["dropped"] == 2
+
+
+def test_sample_spreads_kept_rows_across_the_batch():
+    subscription = AlertSubscription(AlertFilter(), capacity=4, policy="sample")
+    subscription.offer(make_batch(8), range(8))
+    assert subscription.size == 4
+    rows, lost = subscription.drain()
+    assert ports(rows) == [0, 2, 4, 6]
+    assert lost == 4
+    assert subscription.counters["sampled_out"] == 4
+    subscription.offer(make_batch(2), range(2))
+    subscription.offer(make_batch(2), range(2))
+    subscription.offer(make_batch(2), range(2))
+    assert subscription.size == 4
+    assert subscription.counters["sampled_out"] == 6
+
+
+def test_drain_respects_limit_and_clears_ready():
+    subscription = AlertSubscription(AlertFilter(), capacity=10)
+    subscription.offer(make_batch(6), [0, 2, 4, 5])
+    assert subscription.ready.is_set()
+    rows, _ = subscription.drain(limit=3)
+    assert ports(rows) == [0, 2, 4]
+    assert subscription.ready.is_set()
+    rows, _ = subscription.drain(limit=3)
+    assert ports(rows) == [5]
+    assert subscription.size == 0 and not subscription.ready.is_set()
+
+
+def test_buffered_rows_do_not_pin_the_source_batch():
+    subscription = AlertSubscription(AlertFilter(), capacity=10)
+    for indices in ([3], range(8)):
+        batch = make_batch(8)
+        source = weakref.ref(batch.columns["timestamp"].obj)
+        subscription.offer(batch, indices)
+        del batch
+        gc.collect()
+        assert source() is None
+    rows, _ = subscription.drain()
+    assert ports(rows) == [3, 0, 1, 2, 3, 4, 5, 6, 7]
+
+
+def test_broadcaster_fans_out_to_each_subscription():
+    broadcaster = AlertBroadcaster()
+    everything = broadcaster.subscribe(AlertFilter())
+    critical = broadcaster.subscribe(AlertFilter(min_severity="critical"))
+    tiny = broadcaster.subscribe(AlertFilter(), capacity=2, policy="drop_newest")
+    builder = AlertBatchBuilder()
+    for i, severity in enumerate(["high", "high", "high", "critical", "critical"]):
+        builder.append(float(i), "10.0.0.1", "192.168.1.1", 1000 + i, 443, "tcp", severity)
+    batch = builder.build()
+    broadcaster.publish(batch)
+    broadcaster.publish(AlertBatch.empty())
+    assert ports(everything.drain()[0]) == [0, 1, 2, 3, 4]
+    assert ports(critical.drain()[0]) == [3, 4]
+    assert tiny.size == 2
+    assert broadcaster.stats() == {"published": 5, "subscribers": 3, "buffered": 2, "dropped": 3}
+    broadcaster.unsubscribe(tiny)
+    broadcaster.publish(batch)
+    assert broadcaster.stats()["subscribers"] == 2
+    assert tiny.size == 2
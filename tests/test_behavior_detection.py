@@ -0,0 +1,111 @@
+import random
+from array import array
+
+from alert_batch import pack_ip
+from behavior_detection import BehaviorDetector, CountMinSketch
+from flow_analytics import FLOW_COLUMNS, FlowBatch
+
+BASE = 1_700_000_000.0
+
+
+def flows(records):
+    """FlowBatch from (start, src, dst, dst_port) tuples"""
+    columns = {name: array(typecode) for name, typecode in FLOW_COLUMNS.items()}
+    for start, src, dst, port in records:
+        (src_hi, src_lo), (dst_hi, dst_lo) = pack_ip(src), pack_ip(dst)
+        row = {"start": start, "end": start + 1, "src_hi": src_hi, "src_lo": src_lo, "dst_hi": dst_hi,
+               "dst_lo": dst_lo, "src_port": 50000, "dst_port": port, "proto": 6, "packets": 4, "bytes": 400}
+        for name, column in columns.items():
+            column.append(row[name])
+    return FlowBatch(columns)
+
+
+def beacon_and_noise():
+    rng = random.Random(7)
+    beacon = [(BASE + 60 * n + rng.uniform(-1, 1), "10.0.0.5", "203.0.113.10", 443) for n in range(20)]
+    noise = [(BASE + rng.uniform(0, 1200), "10.0.0.6", f"198.51.100.{n}", 443) for n in range(50)]
+    return flows(beacon + noise)
+
+
+def fanout(source, count, start=0, port=445):
+    return [(BASE + n, source, f"10.1.{start + n // 250}.{1 + n % 250}", port) for n in range(count)]
+
+
+def test_periodic_pair_is_reported_as_a_beacon():
+    detector = BehaviorDetector()
+    detector.observe(beacon_and_noise())
+    beacons = detector.score(force=True)["beaconing"]
+    assert len(beacons) == 1
+    beacon = beacons[0]
+    assert (beacon["src"], beacon["dst"], beacon["dst_port"]) == ("10.0.0.5", "203.0.113.10", 443)
+    assert abs(beacon["interval"] - 60) < 2 and beacon["connections"] == 20
+    # One-off connections never got per-pair state
+    assert detector.snapshot()["tracked_pairs"] == 1
+    assert detector.counters["connections"] == 70
+
+
+def test_count_min_admission_and_estimates():
+    sketch = CountMinSketch(width=64, depth=4)
+    truth = {key: key % 5 + 1 for key in range(200)}
+    for key, count in truth.items():
+        sketch.add(key, count)
+    assert all(sketch.add(key, 0) >= count for key, count in truth.items())
+
+    detector = BehaviorDetector(admit_after=4)
+    for n in range(3):
+        detector.observe(flows([(BASE + n, "10.0.0.5", "203.0.113.10", 443)]))
+    assert detector.snapshot()["tracked_pairs"] == 0
+    detector.observe(flows([(BASE + 3, "10.0.0.5", "203.0.113.10", 443)]))
+    assert detector.counters["pairs_admitted"] == 1
+    # A pair seen often enough within one batch is admitted straight away
+    detector.observe(flows([(BASE + n, "10.0.0.7", "203.0.113.11", 443) for n in range(4)]))
+    assert detector.snapshot()["tracked_pairs"] == 2
+
+    bounded = BehaviorDetector(admit_after=1, max_pairs=3)
+    bounded.observe(flows([(BASE, "10.0.0.5", f"203.0.113.{n}", 443) for n in range(5)]))
+    assert bounded.snapshot()["tracked_pairs"] == 3 and bounded.counters["pairs_evicted"] == 2
+
+
+def test_fanout_is_flagged_at_the_threshold():
+    records = (fanout("10.0.0.5", 40) + fanout("10.1.0.20", 25, start=5)
+               + fanout("10.0.0.9", 3) + fanout("10.0.0.8", 40, port=443)
+               + [(BASE + n, "8.8.8.8", f"10.0.0.{n + 1}", 445) for n in range(40)])
+    detector = BehaviorDetector(fanout_threshold=20)
+    detector.observe(flows(records))
+    findings = detector.score(force=True)
+    flagged = {finding["src"]: finding for finding in findings["lateral_movement"]}
+    # Non-admin ports, external sources and small fan-outs are not candidates
+    assert set(flagged) == {"10.0.0.5", "10.1.0.20"}
+    assert flagged["10.0.0.5"]["ports"] == {445: 40}
+    assert flagged["10.0.0.5"]["pivots"] == ["10.1.0.20"]
+    assert len(flagged["10.0.0.5"]["sample_destinations"]) == detector.max_edges
+    assert ["10.0.0.5", "10.1.0.20"] in findings["graph"]["edges"]
+
+    distinct = flagged["10.1.0.20"]["distinct_destinations"]
+    at_threshold = BehaviorDetector(fanout_threshold=distinct)
+    at_threshold.observe(flows(fanout("10.1.0.20", 25, start=5)))
+    assert [f["src"] for f in at_threshold.score(force=True)["lateral_movement"]] == ["10.1.0.20"]
+    above = BehaviorDetector(fanout_threshold=distinct + 1)
+    above.observe(flows(fanout("10.1.0.20", 25, start=5)))
+    assert above.score(force=True)["lateral_movement"] == []
+
+
+def test_export_restore_round_trip():
+    detector = BehaviorDetector(fanout_threshold=20)
+    detector.observe(beacon_and_noise())
+    detector.observe(flows(fanout("10.0.0.5", 30)))
+    # Three sightings: one short of admission
+    detector.observe(flows([(BASE + n, "10.0.0.5", "203.0.113.99", 8443) for n in range(3)]))
+    before = detector.score(force=True)
+
+    restored = BehaviorDetector(fanout_threshold=20)
+    restored.restore_state(detector.export_state())
+    assert restored.snapshot() == detector.snapshot()
+    assert restored.sketch.rows == detector.sketch.rows
+    after = restored.score(force=True)
+    for key in ("beaconing", "lateral_movement", "graph"):
+        assert after[key] == before[key]
+
+    # The restored sketch remembers the near-admitted pair
+    restored.observe(flows([(BASE + 3, "10.0.0.5", "203.0.113.99", 8443)]))
+    assert restored.counters["pairs_admitted"] == detector.counters["pairs_admitted"] + 1
@@ -0,0 +1,100 @@
+import pickle
+
+import pytest
+
+from caching import FrozenDict, LRUCache, TopologySnapshot, TrackedDict, TrackedList, fingerprint_topology
+
+
+def test_lru_cache_evicts_least_recently_used():
+    cache = LRUCache(maxsize=2)
+    cache.put("a", 1)
+    cache.put("b", 2)
+    assert cache.get("a") == 1
+    cache.put("c", 3)
+    assert "b" not in cache and "a" in cache and "c" in cache
+    assert cache.get("b", "missing") == "missing"
+    assert cache.stats() == {"size": 2, "maxsize": 2, "hits": 1, "misses": 1}
+    with pytest.raises(ValueError):
+        LRUCache(maxsize=0)
+
+
+def test_lru_cache_get_or_compute_and_invalidation():
+    cache = LRUCache()
+    calls = []
+
+    def compute():
+        calls.append(1)
+        return None
+
+    # A cached None is still a hit
+    assert cache.get_or_compute(("t", 1), compute) is None
+    assert cache.get_or_compute(("t", 1), compute) is None
+    assert len(calls) == 1
+    cache.put(("t", 2), "x")
+    cache.put(("u", 1), "y")
+    assert cache.invalidate_where(lambda key: key[0] == "t") == 2
+    assert cache.invalidate(("u", 1)) and not cache.invalidate(("u", 1))
+    assert len(cache) == 0
+
+
+def test_fingerprint_is_stable_across_key_order():
+    first = {"nodes": [{"id": "a", "zone": "dmz"}], "edges": {"a": ["b"]}, "version": 1}
+    second = {"version": 1, "edges": {"a": ["b"]}, "nodes": [{"zone": "dmz", "id": "a"}]}
+    assert fingerprint_topology(first) == fingerprint_topology(second)
+    assert fingerprint_topology(first) != fingerprint_topology({**first, "version": 2})
+    assert fingerprint_topology(first) == fingerprint_topology(TopologySnapshot(first, version=1))
+
+
+def test_frozen_structures_refuse_mutation():
+    snapshot = TopologySnapshot({"nodes": [{"id": "a"}], "meta": {"owner": "soc"}}, version=3)
+    assert snapshot.version == 3 and snapshot.fingerprint == fingerprint_topology(snapshot)
+    assert snapshot["nodes"] == ({"id": "a"},)
+    for mutate in (
+        lambda: snapshot.__setitem__("x", 1),
+        lambda: snapshot.__delitem__("meta"),
+        lambda: snapshot.update(x=1),
+        lambda: snapshot.pop("meta"),
+        lambda: snapshot["meta"].__setitem__("owner", "ops"),
+        lambda: snapshot["nodes"][0].setdefault("zone", "dmz"),
+    ):
+        with pytest.raises(TypeError):
+            mutate()
+    with pytest.raises(TypeError):
+        snapshot |= {"x": 1}
+    restored = pickle.loads(pickle.dumps(snapshot))
+    assert isinstance(restored, TopologySnapshot) and isinstance(restored["meta"], FrozenDict)
+    assert (restored.version, restored.fingerprint) == (3, snapshot.fingerprint)
+
+
+def test_tracked_dict_reports_nested_changes():
+    changes = []
+    tracked = TrackedDict({"zones": {"dmz": ["10.0.0.0/24"]}}, on_change=lambda: changes.append(1))
+    tracked["zones"]["dmz"].append("10.0.1.0/24")
+    tracked["zones"]["lan"] = []
+    tracked["zones"]["lan"].extend(["192.168.0.0/16"])
+    tracked.update(owner="soc")
+    tracked.setdefault("owner", "ops")
+    tracked.setdefault("tags", {})["pci"] = True
+    tracked.pop("missing", None)
+    tracked |= {"version": 2}
+    del tracked["owner"]
+    assert len(changes) == 8
+    assert tracked == {"zones": {"dmz": ["10.0.0.0/24", "10.0.1.0/24"], "lan": ["192.168.0.0/16"]},
+                       "tags": {"pci": True}, "version": 2}
+
+
+def test_tracked_list_in_place_operators():
+    changes = []
+    tracked = TrackedList([{"id": 1}], on_change=lambda: changes.append(1))
+    alias = tracked
+    tracked += [{"id": 2}]
+    assert tracked is alias and len(changes) == 1
+    tracked[1]["id"] = 3
+    assert len(changes) == 2
+    tracked *= 2
+    assert tracked is alias and len(tracked) == 4 and len(changes) == 3
+    tracked[0:1] = [{"id": 9}]
+    tracked[0]["id"] = 10
+    tracked.sort(key=lambda item: item["id"])
+    del tracked[0]
+    assert len(changes) == 7
@@ -0,0 +1,51 @@
+from capability_scoring import CapabilityScorer
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_mttr_pairs_detections_with_mitigations_of_the_same_indicator():
+    clock = Clock()
+    scorer = CapabilityScorer(mttr_target=60.0, clock=clock)
+    scorer.record_detected(10, ["203.0.113.5", "203.0.113.9"])
+    assert scorer.mttr() is None
+
+    clock.now += 30
+    scorer.record_detected(5, ["203.0.113.5"])   # already open: keeps its first detection time
+    scorer.record_mitigated(1, ["host-17"])       # matches nothing
+    assert scorer.mttr() is None
+    clock.now += 30
+    scorer.record_mitigated(2, ["203.0.113.5", "203.0.113.9"])
+    assert scorer.mttr() == 60.0
+    assert scorer.response_capability() == round(100 * (3 / 15 + 1.0) / 2)
+
+
+def test_open_detections_survive_a_snapshot():
+    clock = Clock()
+    scorer = CapabilityScorer(clock=clock)
+    scorer.record_detected(1, ["198.51.100.1"])
+    clock.now += 20
+    state = scorer.export_state()
+
+    restored = CapabilityScorer(clock=clock)
+    restored.restore_state(state, elapsed=10.0)
+    restored.record_mitigated(1, ["198.51.100.1"])
+    assert restored.mttr() == 30.0
+
+
+def test_capture_stats_from_an_unknown_sensor_type_count_as_ids_evidence():
+    import json
+    from gaius_core import GaiusGeneral
+    from security_tools import SecurityToolsInterface
+
+    tools = SecurityToolsInterface(GaiusGeneral())
+    tools.ids_config["sensor_types"]["lab-1"] = "homegrown"
+    stats = {"event_type": "stats", "stats": {"capture": {"kernel_packets": 100, "kernel_drops": 5}}}
+    tools.ingest_eve([json.dumps(stats)], "lab-1")
+    assert tools.capabilities.sensors["lab-1"].control == "ids"
+    assert tools.sensor_telemetry.sensors["lab-1"].parse_errors.total() == 0
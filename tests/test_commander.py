@@ -0,0 +1,66 @@
+import asyncio
+
+from commander import CommandInterface
+
+
+class CountingCommander(CommandInterface):
+    def __init__(self):
+        super().__init__(None, None)
+        self.calls = 0
+        self.fail = False
+
+    async def get_tactical_advice(self, params):
+        self.calls += 1
+        await asyncio.sleep(0.01)
+        if self.fail:
+            return {"status": "error", "message": "provider down"}
+        return {"status": "success", "tactical_advice": {"round": self.calls}}
+
+
+def test_polls_share_cached_tactical_advice():
+    async def scenario():
+        commander = CountingCommander()
+        first = await asyncio.gather(*(commander.cached_tactical_advice() for _ in range(5)))
+        assert commander.calls == 1
+        assert all(advice["tactical_advice"]["round"] == 1 for advice in first)
+        assert (await commander.cached_tactical_advice())["tactical_advice"]["round"] == 1
+        assert commander.calls == 1
+    asyncio.run(scenario())
+
+
+def test_stale_advice_is_served_while_refreshing():
+    async def scenario():
+        commander = CountingCommander()
+        await commander.cached_tactical_advice(max_age=0.0)
+        await asyncio.sleep(0.001)
+        # Stale: answered immediately from the old advice, refreshed in the background
+        assert (await commander.cached_tactical_advice(max_age=0.0))["tactical_advice"]["round"] == 1
+        await asyncio.sleep(0.05)
+        assert (await commander.cached_tactical_advice(max_age=60.0))["tactical_advice"]["round"] == 2
+
+        commander.fail = True
+        await commander.cached_tactical_advice(max_age=0.0)
+        await asyncio.sleep(0.05)
+        assert (await commander.cached_tactical_advice(max_age=60.0))["tactical_advice"]["round"] == 2
+    asyncio.run(scenario())
+
+
+def test_tactical_advice_reuses_the_live_assessment():
+    from gaius_core import GaiusGeneral
+    from security_tools import SecurityToolsInterface
+
+    async def scenario():
+        gaius = GaiusGeneral()
+        gaius.shared.llm_queue_wait = 0.05
+        tools = SecurityToolsInterface(gaius)
+        commander = CommandInterface(gaius, tools)
+        live = gaius.situation.current
+        history = list(gaius.conversation_context["threat_history"])
+        recomputes = gaius.situation.counters["recomputes"]
+
+        advice = await commander.get_tactical_advice({})
+        assert advice["status"] == "success"
+        assert gaius.conversation_context["threat_history"] == history
+        assert gaius.situation.counters["recomputes"] == recomputes
+        assert gaius.situation.current["threat_level"] == live["threat_level"]
+    asyncio.run(scenario())
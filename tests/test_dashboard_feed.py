@@ -0,0 +1,41 @@
+import asyncio
+
+from dashboard_feed import DashboardFeed
+
+
+def payloads(messages):
+    return [(message.payload["type"], message.payload["seq"]) for message in messages]
+
+
+def test_resume_within_an_epoch_replays_missed_updates():
+    async def scenario():
+        feed = DashboardFeed(history=4)
+        for n in range(3):
+            await feed.publish({"n": n})
+        first = feed.since(None)
+        assert payloads(first) == [("snapshot", 3)]
+        assert first[0].payload["epoch"] == feed.epoch and first[0].payload["data"] == {"n": 2}
+        assert payloads(feed.since(1, feed.epoch)) == [("update", 2), ("update", 3)]
+        assert feed.since(3, feed.epoch) == []
+        for n in range(3, 8):
+            await feed.publish({"n": n})
+        # Updates 2-4 have aged out of the buffer
+        assert payloads(feed.since(1, feed.epoch)) == [("snapshot", 8)]
+        assert payloads(feed.since(9, feed.epoch)) == [("snapshot", 8)]
+    asyncio.run(scenario())
+
+
+def test_resume_from_another_epoch_gets_a_snapshot():
+    async def scenario():
+        old = DashboardFeed()
+        for n in range(5):
+            await old.publish({"n": n})
+        # A restarted process: sequence numbers start over under a new epoch
+        restarted = DashboardFeed()
+        assert restarted.epoch != old.epoch
+        for n in range(8):
+            await restarted.publish({"restarted": n})
+        assert payloads(restarted.since(5, old.epoch)) == [("snapshot", 8)]
+        assert payloads(restarted.since(5)) == [("snapshot", 8)]
+        assert payloads(restarted.since(5, restarted.epoch)) == [("update", 6), ("update", 7), ("update", 8)]
+    asyncio.run(scenario())
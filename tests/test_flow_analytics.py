@@ -0,0 +1,18 @@
+import struct
+
+import pytest
+
+from flow_analytics import read_flows
+
+PCAP_HEADER = struct.pack("<IHHiIII", 0xA1B2C3D4, 2, 4, 0, 0, 65535, 1)
+
+
+@pytest.mark.parametrize("data", [
+    PCAP_HEADER[:12],  # cut inside the global header
+    PCAP_HEADER + struct.pack("<IIII", 0, 0, 4, 4) + b"\x00" * 4,  # last packet shorter than an Ethernet header
+])
+def test_truncated_pcap_is_a_value_error(tmp_path, data):
+    path = tmp_path / "capture.pcap"
+    path.write_bytes(data)
+    with pytest.raises(ValueError, match="truncated"):
+        read_flows(str(path))
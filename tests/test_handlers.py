@@ -0,0 +1,146 @@
+import asyncio
+import json
+
+import httpx
+import pytest
+
+from handlers.edr import CrowdStrikeHandler, SentinelOneHandler
+from handlers.soar import DemistoHandler, PhantomHandler
+
+
+def _mock(handler, routes):
+    """Serve the handler's requests from ``routes[(method, path)](request)``; returns the request log"""
+    seen = []
+
+    def respond(request: httpx.Request) -> httpx.Response:
+        seen.append(request)
+        return routes[(request.method, request.url.path)](request)
+
+    handler.api.client = httpx.AsyncClient(base_url=handler.url, transport=httpx.MockTransport(respond))
+    return seen
+
+
+def _crowdstrike():
+    handler = CrowdStrikeHandler({"url": "https://falcon.test", "client_id": "id", "client_secret": "secret"})
+    detections = [{"detection_id": f"ldt:{n}", "max_severity": 70, "last_behavior": "2024-01-01T00:00:00Z",
+                   "device": {"device_id": "a1b2c3", "hostname": "web-1"}} for n in range(3)]
+    seen = _mock(handler, {
+        ("POST", "/oauth2/token"): lambda request: httpx.Response(200, json={"access_token": "t", "expires_in": 1800}),
+        ("GET", "/detects/queries/detects/v1"): lambda request: httpx.Response(200, json={
+            "resources": [d["detection_id"] for d in detections],
+            "meta": {"pagination": {"offset": 0, "total": 3}}}),
+        ("POST", "/detects/entities/summaries/GET/v1"): lambda request: httpx.Response(200, json={
+            "resources": [d for d in detections if d["detection_id"] in json.loads(request.content)["ids"]]}),
+        ("POST", "/devices/entities/devices-actions/v2"): lambda request: httpx.Response(200, json={
+            "resources": [{"id": host_id} for host_id in json.loads(request.content)["ids"]]}),
+    })
+    return handler, seen
+
+
+def test_crowdstrike_detections_filter_on_host_ids():
+    async def scenario():
+        handler, seen = _crowdstrike()
+        detections = await handler.get_detections(["a1b2c3", "d4e5f6"])
+        assert [d["id"] for d in detections] == ["ldt:0", "ldt:1", "ldt:2"]
+        assert detections[0]["severity"] == "high"
+        query = next(r for r in seen if r.url.path == "/detects/queries/detects/v1")
+        assert query.url.params["filter"] == "device.device_id:['a1b2c3','d4e5f6']"
+        assert query.headers["authorization"] == "Bearer t"
+    asyncio.run(scenario())
+
+
+def test_crowdstrike_rejects_host_ids_that_would_escape_the_filter():
+    async def scenario():
+        handler, seen = _crowdstrike()
+        with pytest.raises(ValueError):
+            await handler.get_detections(["a1b2c3'] OR device.hostname:['*"])
+        with pytest.raises(ValueError):
+            await handler.isolate_hosts(["a1b2c3", "bad id"])
+        assert seen == []
+        assert await handler.isolate_hosts(["a1b2c3"]) == {"a1b2c3": True}
+    asyncio.run(scenario())
+
+
+def test_sentinelone_pages_and_partial_isolation():
+    async def scenario():
+        handler = SentinelOneHandler({"url": "https://s1.test", "api_token": "tok"})
+        pages = {None: ("c1", ["t0", "t1"]), "c1": (None, ["t2"])}
+
+        def threats(request):
+            cursor, names = pages[request.url.params.get("cursor")]
+            return httpx.Response(200, json={
+                "data": [{"id": name, "threatInfo": {"threatName": name, "confidenceLevel": "malicious"},
+                          "agentRealtimeInfo": {"agentId": "42"}} for name in names],
+                "pagination": {"nextCursor": cursor}})
+
+        _mock(handler, {
+            ("GET", "/web/api/v2.1/threats"): threats,
+            ("POST", "/web/api/v2.1/agents/actions/disconnect"):
+                lambda request: httpx.Response(200, json={"data": {"affected": 1}}),
+        })
+        detections = await handler.get_detections(limit=10)
+        assert [d["name"] for d in detections] == ["t0", "t1", "t2"]
+        assert await handler.isolate_hosts(["42", "43"]) == {"42": True, "43": False}
+    asyncio.run(scenario())
+
+
+def test_demisto_command_and_injection():
+    async def scenario():
+        handler = DemistoHandler({"url": "https://xsoar.test", "api_key": "k", "investigation_id": "7"})
+        seen = _mock(handler, {("POST", "/entry"): lambda request: httpx.Response(200, json={})})
+        accepted = await handler.execute_action("block-ip", ["10.0.0.1", "2001:db8::1"],
+                                                {"argument": "ip", "fields": {"reason": "gaius"}})
+        assert accepted == {"10.0.0.1": True, "2001:db8::1": True}
+        assert json.loads(seen[0].content) == {
+            "investigationId": "7", "data": '!block-ip ip="10.0.0.1,2001:db8::1" reason="gaius"'}
+
+        for targets, parameters in [
+            (['1.2.3.4" extra="x'], {}),
+            (["1.2.3.4 !delete"], {}),
+            (["1.2.3.4"], {"fields": {"reason": 'x" !rm'}}),
+            (["1.2.3.4"], {"argument": "ip=1 !rm"}),
+        ]:
+            with pytest.raises(ValueError):
+                await handler.execute_action("block-ip", targets, parameters)
+        with pytest.raises(ValueError):
+            await handler.execute_action("block-ip; !rm", ["1.2.3.4"])
+        assert len(seen) == 1
+    asyncio.run(scenario())
+
+
+def test_demisto_playbook_path_is_validated():
+    async def scenario():
+        handler = DemistoHandler({"url": "https://xsoar.test", "api_key": "k", "investigation_id": "7"})
+        seen = _mock(handler, {("POST", "/inv-playbook/contain-host/42"):
+                               lambda request: httpx.Response(200, json={})})
+        assert await handler.run_playbook("contain-host", "42", {"host": "web-1"}) == {
+            "id": "42:contain-host", "status": "running"}
+        assert json.loads(seen[0].content) == {"host": "web-1"}
+        for playbook, incident_id in [("../admin", "42"), ("contain host", "42"), ("contain-host", "42?x=1")]:
+            with pytest.raises(ValueError):
+                await handler.run_playbook(playbook, incident_id)
+        handler.investigation_id = None
+        with pytest.raises(ValueError):
+            await handler.run_playbook("contain-host")
+        assert len(seen) == 1
+
+        seen = _mock(handler, {("POST", "/inv-playbook/a/../admin/42"):
+                               lambda request: httpx.Response(200, json={})})
+        await handler.run_playbook("a/../admin", "42")
+        assert seen[0].url.raw_path == b"/inv-playbook/a%2F..%2Fadmin/42"
+    asyncio.run(scenario())
+
+
+def test_phantom_playbook_passes_inputs():
+    async def scenario():
+        handler = PhantomHandler({"url": "https://soar.test", "token": "t", "container_id": 5})
+        seen = _mock(handler, {("POST", "/rest/playbook_run"):
+                               lambda request: httpx.Response(200, json={"playbook_run_id": 9, "success": True})})
+        assert await handler.run_playbook("local/contain", inputs={"ip": "10.0.0.1"}) == {
+            "id": 9, "status": "running"}
+        await handler.run_playbook("local/contain", "12")
+        first, second = (json.loads(request.content) for request in seen)
+        assert first == {"container_id": 5, "playbook_id": "local/contain", "scope": "new", "run": True,
+                         "inputs": {"ip": "10.0.0.1"}}
+        assert second["container_id"] == "12" and "inputs" not in second
+    asyncio.run(scenario())
@@ -0,0 +1,38 @@
+import asyncio
+
+from history_store import HistoryStore
+
+
+def test_writes_after_close_are_rejected_not_lost_silently(tmp_path):
+    async def scenario():
+        store = HistoryStore(str(tmp_path / "history.db"), flush_interval=0.01)
+        for n in range(50):
+            store.record_threat_level("high", session="s", timestamp=float(n))
+        await store.close()
+        assert store.counters["written"] == 50
+
+        store.record_threat_level("low", session="s")
+        assert store.counters["rejected"] == 1
+        await store.flush()   # returns instead of waiting on the stopped writer
+        await store.close()
+
+        reopened = HistoryStore(str(tmp_path / "history.db"))
+        assert len(await reopened.threat_history(session="s")) == 50
+        await reopened.close()
+    asyncio.run(scenario())
+
+
+def test_explicit_epoch_zero_is_kept(tmp_path):
+    async def scenario():
+        store = HistoryStore(str(tmp_path / "history.db"), flush_interval=0.01)
+        store.record_assessment({"threat_level": "low"}, session="s", timestamp=0)
+        store.record_threat_level("low", session="s", timestamp=0.0)
+        store.record_chat_turn("user", "hello", session="s", timestamp="1970-01-01T00:00:00+00:00")
+        store.record_chat_turn("user", "now", session="s")
+        await store.flush()
+        assert [row["ts"] for row in await store.query_assessments(session="s")] == [0.0]
+        assert [row["ts"] for row in await store.threat_history(session="s")] == [0.0]
+        turns = await store.chat_history(session="s")
+        assert turns[-1]["ts"] == 0.0 and turns[0]["ts"] > 1e9
+        await store.close()
+    asyncio.run(scenario())
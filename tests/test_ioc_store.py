@@ -0,0 +1,119 @@
+import json
+import logging
+
+from alert_batch import AlertBatchBuilder
+from ioc_store import BloomFilter, IOCStore, infer_type, normalize
+
+
+STIX_BUNDLE = {
+    "type": "bundle",
+    "objects": [
+        {"type": "indicator", "pattern": "[ipv4-addr:value = '198.51.100.7']", "x_severity": "critical"},
+        {"type": "indicator", "pattern": "[ipv4-addr:value = '10.0.0.0/8']", "confidence": 40},
+        {"type": "indicator", "pattern": "[ipv4-addr:value = '10.20.0.0/16']", "confidence": 90},
+        {"type": "indicator", "pattern": "[domain-name:value = 'Evil.Example.']"},
+        {"type": "indicator", "pattern": "[file:hashes.'SHA-256' = '" + "AB" * 32 + "']"},
+        {"type": "indicator", "pattern": "[ipv4-addr:value = '300.1.1.1']"},
+        {"type": "url", "value": "HTTP://Bad.Example/Payload/"},
+    ]
+}
+
+CSV_FEED = """type,value,severity
+ip,203.0.113.9,high
+ip,198.51.100.7,low
+network,2001:db8::/32,high
+domain,c2.example,medium
+2001:db8:ffff::1
+not an indicator
+"""
+
+
+def make_store(tmp_path, autoload=True):
+    (tmp_path / "bundle.json").write_text(json.dumps(STIX_BUNDLE))
+    (tmp_path / "feed.csv").write_text(CSV_FEED)
+    return IOCStore(str(tmp_path), autoload=autoload)
+
+
+def make_batch(pairs):
+    builder = AlertBatchBuilder()
+    for src, dst in pairs:
+        builder.append(1700000000.0, src, dst)
+    return builder.build()
+
+
+def test_normalize_forms():
+    assert normalize("ip", "::ffff:10.0.0.1") == normalize("ip", "10.0.0.1")
+    assert normalize("ip", "10.0.0.0/8") is None
+    assert normalize("network", "10.1.2.3/8") == "10.0.0.0/8"
+    assert normalize("domain", "Evil.Example.") == "evil.example"
+    assert normalize("url", "HTTPS://user:Pw@Bad.Example:8443/Path/To?Q=A/") == \
+        "https://user:Pw@bad.example:8443/Path/To?Q=A"
+    assert normalize("url", "http://[::1") is None
+    assert infer_type("10.0.0.0/8") == "network"
+    assert infer_type("https://a.example/x") == "url"
+    assert infer_type("ab" * 20) == "hash"
+
+
+def test_loads_stix_and_csv_feeds(tmp_path, caplog):
+    with caplog.at_level(logging.WARNING):
+        store = make_store(tmp_path)
+    assert store.index.counts() == {"ip": 3, "network": 3, "domain": 2, "hash": 1, "url": 1}
+    assert "Skipped 1 unparseable indicators" in caplog.text
+    index = store.index
+    # The highest severity across feeds wins
+    assert index.contains("ip", "198.51.100.7")
+    assert index.severity["ip"][normalize("ip", "198.51.100.7")] == 4
+    assert index.contains("domain", "EVIL.example")
+    assert index.contains("hash", "ab" * 32)
+    assert index.contains("url", "http://bad.example/Payload")
+    assert not index.contains("url", "http://bad.example/payload")
+    assert index.contains("ip", "10.9.9.9")
+    assert index.contains("ip", "2001:db8::dead")
+    assert not index.contains("ip", "192.0.2.1")
+    assert index.match_values("ip", ["10.1.1.1", "203.0.113.9", "192.0.2.1", "junk"]) == {
+        normalize("ip", "10.1.1.1"), normalize("ip", "203.0.113.9")}
+
+
+def test_bloom_filter_has_no_false_negatives():
+    bloom = BloomFilter(1000, error_rate=0.01)
+    for n in range(1000):
+        bloom.add(f"value-{n}")
+    assert all(f"value-{n}" in bloom for n in range(1000))
+    false_positives = sum(f"other-{n}" in bloom for n in range(10000))
+    assert false_positives < 300
+
+
+def test_match_batch_counts_exact_and_network_hits(tmp_path):
+    index = make_store(tmp_path).index
+    batch = make_batch([
+        ("198.51.100.7", "192.168.1.1"),
+        ("198.51.100.7", "10.20.1.1"),    # both ends match: still one alert
+        ("10.1.2.3", "192.168.1.1"),
+        ("10.20.5.5", "192.168.1.1"),
+        ("192.168.1.1", "192.168.1.2"),
+    ])
+    match = index.match_batch(batch)
+    assert match.alerts == 5
+    assert match.matched_alerts == 4
+    # The most specific network decides the severity of an address
+    assert match.severity_counts == {"critical": 4, "medium": 1}
+    assert dict(match.indicators) == {"198.51.100.7": 2, "10.20.0.0/16": 2, "10.0.0.0/8": 1}
+    assert match.max_severity == "critical"
+    assert index.match_batch(make_batch([("192.0.2.1", "192.0.2.2")])).matched_alerts == 0
+
+
+def test_export_and_restore_skip_feed_parsing(tmp_path):
+    store = make_store(tmp_path)
+    state = store.index.export_state()
+    restored = IOCStore(str(tmp_path), autoload=False)
+    assert restored.restore_state(state)
+    assert restored.index.counts() == store.index.counts()
+    assert restored.index.severity == store.index.severity
+    batch = make_batch([("10.20.5.5", "203.0.113.9")])
+    assert restored.match_batch(batch) == store.match_batch(batch)
+    assert not restored.needs_reload()
+
+    (tmp_path / "feed.csv").write_text(CSV_FEED + "ip,192.0.2.50,high\n")
+    assert not IOCStore(str(tmp_path), autoload=False).restore_state(state)
+    assert restored.reload_if_changed()
+    assert restored.index.contains("ip", "192.0.2.50")
@@ -0,0 +1,60 @@
+import asyncio
+
+from llm_batcher import LLMBatcher, LLMQueueTimeout, TokenBucket
+from llm_resilience import BreakerState, CircuitBreaker, ResilientLLM
+
+
+def test_identical_keys_share_one_call():
+    async def scenario():
+        batcher = LLMBatcher(window=0.01)
+        calls = 0
+
+        async def call() -> str:
+            nonlocal calls
+            calls += 1
+            await asyncio.sleep(0.01)
+            return "answer"
+
+        answers = await asyncio.gather(*(batcher.submit("prompt", call) for _ in range(5)))
+        assert answers == ["answer"] * 5
+        assert calls == 1
+        assert batcher.counters["deduplicated"] == 4
+    asyncio.run(scenario())
+
+
+def test_queue_deadline_is_not_a_provider_failure():
+    async def scenario():
+        breaker = CircuitBreaker(min_requests=1)
+        llm = ResilientLLM(breaker, timeout=0.5)
+        # One request per minute: the second caller can never get a slot in time
+        batcher = LLMBatcher(window=0.0, requests_per_minute=1)
+
+        async def provider() -> str:
+            return "answer"
+
+        async def ask(key: str) -> str:
+            try:
+                return await batcher.submit(key, lambda: llm.call(provider, key, lambda: "fallback"),
+                                            max_wait=0.05)
+            except LLMQueueTimeout:
+                return llm.queue_timeout(key, lambda: "fallback")
+
+        assert await ask("first") == "answer"
+        assert await ask("second") == "fallback"
+        assert batcher.counters["queue_timeouts"] == 1
+        assert batcher.counters["failed"] == 0
+        assert llm.counters["queue_timeouts"] == 1
+        assert breaker.state is BreakerState.CLOSED
+        assert batcher.snapshot()["inflight"] == 0
+        assert batcher._semaphore._value == batcher.max_concurrency  # the timed-out wait gave its slot back
+    asyncio.run(scenario())
+
+
+def test_try_acquire_never_waits():
+    async def scenario():
+        bucket = TokenBucket(rate=0.001, capacity=1)
+        assert bucket.try_acquire()
+        assert not bucket.try_acquire()
+        bucket.refund()
+        assert bucket.try_acquire()
+    asyncio.run(scenario())
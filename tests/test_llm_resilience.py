@@ -0,0 +1,94 @@
+import asyncio
+
+from openai import AsyncOpenAI
+
+from fake_llm import FakeLLMServer
+from llm_resilience import BreakerState, CircuitBreaker, ResilientLLM
+
+
+def _client(server: FakeLLMServer) -> AsyncOpenAI:
+    return AsyncOpenAI(api_key="test", base_url=server.base_url, max_retries=0)
+
+
+def _request(client: AsyncOpenAI):
+    async def request() -> str:
+        response = await client.chat.completions.create(
+            model="fake", messages=[{"role": "user", "content": "status report"}])
+        return response.choices[0].message.content
+    return request
+
+
+def test_breaker_opens_on_provider_errors_and_recovers():
+    async def scenario():
+        server = FakeLLMServer(port=0, latency=0.01, error_rate=1.0, seed=1)
+        await server.start()
+        try:
+            breaker = CircuitBreaker(min_requests=3, open_seconds=0.2)
+            llm = ResilientLLM(breaker, timeout=2.0)
+            request = _request(_client(server))
+            answers = [await llm.call(request, "key", lambda: "fallback") for _ in range(3)]
+            assert answers == ["fallback"] * 3
+            assert breaker.state is BreakerState.OPEN
+
+            # While open, calls short-circuit without reaching the provider
+            requests = server.requests
+            assert await llm.call(request, "key", lambda: "fallback") == "fallback"
+            assert server.requests == requests
+            assert llm.counters["short_circuited"] == 1
+
+            server.configure(error_rate=0.0)
+            await asyncio.sleep(0.25)
+            assert (await llm.call(request, "key", lambda: "fallback")).startswith("Ave! [fake]")
+            assert breaker.state is BreakerState.CLOSED
+        finally:
+            await server.stop()
+    asyncio.run(scenario())
+
+
+def test_cancelled_half_open_probe_is_released():
+    async def scenario():
+        server = FakeLLMServer(port=0, latency=0.01, slow_rate=1.0, slow_latency=30.0)
+        await server.start()
+        try:
+            breaker = CircuitBreaker(min_requests=1, open_seconds=0.0)
+            breaker.record_failure(0.1)
+            assert breaker.state is BreakerState.HALF_OPEN
+            llm = ResilientLLM(breaker, timeout=60.0)
+
+            probe = asyncio.ensure_future(llm.call(_request(_client(server)), "key", lambda: "fallback"))
+            await asyncio.sleep(0.1)
+            assert not breaker.allow_request()  # the single probe slot is taken
+            probe.cancel()
+            await asyncio.gather(probe, return_exceptions=True)
+
+            assert breaker.state is BreakerState.HALF_OPEN
+            assert breaker.allow_request()
+        finally:
+            await server.stop()
+    asyncio.run(scenario())
+
+
+def test_hedged_primary_is_cancelled_with_its_caller():
+    async def scenario():
+        breaker = CircuitBreaker()
+        for _ in range(5):
+            breaker.record_success(0.5)
+        llm = ResilientLLM(breaker, timeout=60.0, hedge=True)
+        started, cancelled = asyncio.Event(), asyncio.Event()
+
+        async def request() -> str:
+            started.set()
+            try:
+                await asyncio.sleep(30)
+            except asyncio.CancelledError:
+                cancelled.set()
+                raise
+            return "late"
+
+        caller = asyncio.ensure_future(llm.call(request, "key", lambda: "fallback"))
+        await started.wait()
+        caller.cancel()  # still inside the wait before hedging
+        await asyncio.gather(caller, return_exceptions=True)
+        await asyncio.wait_for(cancelled.wait(), 1.0)
+        assert llm.counters["hedged"] == 0
+    asyncio.run(scenario())
@@ -0,0 +1,38 @@
+from load_shedding import LoadShedder
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_sampling_turns_off_without_further_batches():
+    clock = FakeClock()
+    changes = []
+    shedder = LoadShedder(enter_eps=100, cool_down=10.0, clock=clock,
+                          on_change=lambda snapshot: changes.append(snapshot["sampling"]))
+    clock.now = 1.0
+    assert shedder.observe(5000)
+    assert changes == [True]
+
+    # The flood stops abruptly: only snapshots (heartbeats) happen from here on
+    for second in range(2, 30):
+        clock.now = float(second)
+        snapshot = shedder.snapshot()
+    assert not shedder.active
+    assert snapshot["sampling"] is False
+    assert changes == [True, False]
+
+
+def test_sampling_stays_on_while_flood_continues():
+    clock = FakeClock()
+    shedder = LoadShedder(enter_eps=100, cool_down=10.0, clock=clock)
+    for second in range(1, 30):
+        clock.now = float(second)
+        shedder.observe(1000)
+        shedder.snapshot()
+    assert shedder.active
+    assert shedder.counters["activations"] == 1
@@ -0,0 +1,51 @@
+import asyncio
+import os
+import time
+
+import loop_monitor
+from loop_monitor import LoopMonitor, _percentile
+
+
+def test_lag_percentiles():
+    assert _percentile([], 0.5) == 0.0
+    ordered = [n / 1000 for n in range(1, 101)]
+    assert _percentile(ordered, 0.50) == 0.051
+    assert _percentile(ordered, 0.99) == 0.1
+    assert _percentile(ordered, 1.0) == 0.1
+
+    monitor = LoopMonitor(interval=0.1, window=100)
+    monitor.lags.extend([0.002] * 90 + [0.050] * 9 + [0.400])
+    lag = monitor.snapshot()["lag_ms"]
+    assert lag == {"p50": 2.0, "p95": 50.0, "p99": 400.0, "max": 400.0, "samples": 100}
+    # The window keeps only the most recent lags
+    monitor.lags.extend([0.001] * 100)
+    assert monitor.snapshot()["lag_ms"]["max"] == 1.0
+
+
+def block(seconds):
+    time.sleep(seconds)
+
+
+def test_watchdog_records_a_stall_with_package_frames(monkeypatch):
+    # Count this test module as "the package" so the blocking frame here is called out
+    monkeypatch.setattr(loop_monitor, "PACKAGE_DIR", os.path.dirname(os.path.abspath(__file__)))
+
+    async def scenario():
+        monitor = LoopMonitor(interval=0.02, slow_callback_ms=50)
+        monitor.start()
+        await asyncio.sleep(0.1)
+        assert monitor.stall_count == 0
+        asyncio.get_running_loop().call_soon(block, 0.4)
+        await asyncio.sleep(0.1)
+        await monitor.stop()
+        return monitor
+
+    monitor = asyncio.run(scenario())
+    snapshot = monitor.snapshot()
+    assert snapshot["stalls"] == 1 and snapshot["slow_callback_ms"] == 50
+    assert snapshot["lag_ms"]["max"] >= 300
+    stall = snapshot["recent_stalls"][0]
+    assert stall["duration_ms"] >= 200 and stall["samples"] >= 2
+    frames = [entry["frame"] for entry in stall["package_frames"]]
+    assert any(frame.startswith("test_loop_monitor.py:") and frame.endswith(" in block") for frame in frames)
+    assert any("in block" in line for line in stall["stacks"][0])
@@ -0,0 +1,102 @@
+import asyncio
+
+import pytest
+
+from alert_batch import AlertBatchBuilder
+from gaius_core import GaiusGeneral
+from prompt_builder import PromptBuilder, estimate_tokens, truncate_to_tokens
+
+PRINCIPLES = {"veni_vidi_vici": {"principle": "Speed", "applications": ["rapid response"]}}
+
+
+def facts_of(result):
+    return [line[2:] for line in result.messages[-1]["content"].splitlines() if line.startswith("- ")]
+
+
+def platform_alerts(*groups):
+    """security_platform_data with ``count`` alerts per (name, severity)"""
+    alerts = [{"signature": name, "severity": severity} for name, severity, count in groups for _ in range(count)]
+    return {"siem": {"splunk": {"alerts": alerts}}}
+
+
+def test_prompt_stays_within_budget():
+    builder = PromptBuilder(PRINCIPLES, budget_tokens=150, max_message_tokens=40)
+    context = {
+        "chat_message": "  what   now?  " + "x" * 1000,
+        "security_platform_data": platform_alerts(*[(f"rule {n} " * 5, "high", n + 1) for n in range(40)]),
+        "previous_responses": ["y" * 500] * 3,
+    }
+    result = builder.build(context, {"threat_level": "high", "key_factors": ["exposed_vpn"]})
+    content = result.messages[-1]["content"]
+    assert result.stats["total_tokens"] <= 150
+    assert result.stats["total_tokens"] == estimate_tokens(result.messages[0]["content"]) + estimate_tokens(content)
+    assert "Commander's message: what now? xxx" in content
+    assert 0 < result.stats["facts_included"] < result.stats["facts_considered"]
+    assert result.messages[0] is builder.system_message
+
+
+def test_overflowing_facts_are_skipped_not_truncated():
+    system = PromptBuilder(PRINCIPLES).build({}).stats["system_tokens"]
+    # No room for any fact: the question alone is sent, itself cut to what is left
+    tight = PromptBuilder(PRINCIPLES, budget_tokens=system + 5)
+    result = tight.build({"chat_message": "status report please, in full detail"},
+                         {"threat_level": "critical", "key_factors": ["a"]})
+    assert result.stats["facts_included"] == 0
+    assert result.messages[-1]["content"] == truncate_to_tokens(
+        "Commander's message: status report please, in full detail", 5)
+    # A long fact that does not fit is skipped while shorter, lower-ranked ones still fill the budget
+    # 29 tokens leave 14 for facts once the question, header and separators are counted
+    roomy = PromptBuilder(PRINCIPLES, budget_tokens=system + 29)
+    result = roomy.build({"chat_message": "go"}, {"threat_level": "low", "key_factors": ["k" * 400], "strength": 80})
+    assert facts_of(result) == ["Threat level: low", "Defense strength: 80%"]
+    with pytest.raises(ValueError):
+        PromptBuilder(PRINCIPLES, budget_tokens=10)
+
+
+def test_facts_are_deduplicated_and_ranked():
+    builder = PromptBuilder(PRINCIPLES, budget_tokens=2000, max_facts=6)
+    batch = AlertBatchBuilder()
+    for _ in range(3):
+        batch.append(1.0, "10.0.0.1", "10.0.0.2", severity="critical", signature="ET EXPLOIT")
+    batch.append(1.0, "10.0.0.1", "10.0.0.2", severity="low", signature="ET INFO")
+    context = {
+        "threat_data": batch.build(),
+        "security_platform_data": {
+            "siem": {"splunk": platform_alerts(("Brute force", "high", 10), ("Port scan", "low", 200))["siem"]["splunk"],
+                     "SPLUNK": platform_alerts(("Brute force", "high", 10))["siem"]["splunk"]},
+            "edr": {"falcon": {"error": "timeout"}},
+        },
+        "previous_responses": ["hold the line"],
+    }
+    facts = facts_of(builder.build(context, {"threat_level": "high", "opportunities": ["deception"]}))
+    assert facts == [
+        "Threat level: high",
+        "IDS alerts in window: 4 (1 low, 3 critical)",
+        "Opportunities: deception",
+        "Earlier you said: hold the line",
+        "falcon (edr) unavailable: timeout",
+        "IDS: 3x ET EXPLOIT (critical)",
+    ]
+    # Same text from two sources is listed once
+    everything = facts_of(PromptBuilder(PRINCIPLES, budget_tokens=2000).build(context))
+    assert everything.count("splunk: 10x Brute force (high)") == 1
+    assert everything.index("splunk: 10x Brute force (high)") < everything.index("splunk: 200x Port scan (low)")
+
+
+def test_chat_prompts_include_the_live_assessment():
+    async def scenario():
+        general = GaiusGeneral()
+        prompts = []
+
+        async def complete(prompt, chat_message):
+            prompts.append(prompt)
+            return "Ave"
+
+        general._complete_prompt = complete
+        await general.evaluate_situation({"chat_message": "status report"})
+        current = general.situation.current
+        content = prompts[0].messages[-1]["content"]
+        assert f"Key factors: {', '.join(current['key_factors'])}" in content
+        assert f"Opportunities: {', '.join(current['opportunities'])}" in content
+        assert "Commander's message: status report" in content
+    asyncio.run(scenario())
@@ -0,0 +1,29 @@
+import json
+
+from alert_batch import parse_timestamp
+from replay import read_eve, read_transcript, read_zeek
+
+
+def test_parse_timestamp_forms():
+    assert parse_timestamp("2024-01-01T00:00:00.500000+0000") == 1704067200.5
+    assert parse_timestamp("2024-01-01T00:00:00Z") == 1704067200.0
+    assert parse_timestamp("2024-01-01T00:00:00") == 1704067200.0   # no offset: UTC
+    assert parse_timestamp("1704067200.25") == 1704067200.25
+    assert parse_timestamp(1704067200) == 1704067200.0
+
+
+def test_replay_readers_accept_iso_and_epoch(tmp_path):
+    eve = tmp_path / "eve.json"
+    eve.write_text("\n".join(json.dumps({"event_type": "alert", "timestamp": ts, "alert": {}})
+                             for ts in ["2024-01-01T00:00:00.000000+0000", "1704067201.5"]))
+    assert [ts for ts, _ in read_eve(str(eve))] == [1704067200.0, 1704067201.5]
+
+    notice = tmp_path / "notice.log"
+    notice.write_text("\n".join(json.dumps({"ts": ts, "note": "Scan::Port_Scan", "msg": "scan"})
+                                for ts in ["2024-01-01T00:00:02.000000Z", 1704067203.0]))
+    assert [ts for ts, _ in read_zeek(str(notice))] == [1704067202.0, 1704067203.0]
+
+    transcript = tmp_path / "chat.jsonl"
+    transcript.write_text("\n".join(json.dumps({"ts": ts, "message": "status"})
+                                    for ts in ["2024-01-01T00:00:00Z", "2024-01-01T00:00:30Z"]))
+    assert [offset for offset, _, _ in read_transcript(str(transcript))] == [0.0, 30.0]
@@ -0,0 +1,62 @@
+import os
+
+from rule_index import RuleIndex, default_cache_path, parse_rule
+
+RULES = "\n".join([
+    'alert tcp any any -> any 22 (msg:"ET SCAN SSH \\"brute\\""; classtype:attempted-admin; sid:1000; rev:3; '
+    'metadata:mitre_tactic_id TA0006, mitre_technique_id T1110;)',
+    '# alert udp any any -> any 53 (msg:"disabled; still indexed"; sid:1001; priority:2;)',
+    'alert http any any -> any any (msg:"continued \\',
+    '  rule"; classtype:web-application-attack; sid:1002;)',
+    'alert tcp any any -> any any (msg:"preprocessor"; gid:3; sid:1000; classtype:misc-activity;)',
+    '# just a comment',
+]) + "\n"
+
+
+def write_rules(tmp_path, text=RULES):
+    path = tmp_path / "local.rules"
+    path.write_text(text)
+    return str(path)
+
+
+def test_parse_rule_options():
+    rule = parse_rule(RULES.splitlines()[0], "local.rules")
+    assert rule.msg == 'ET SCAN SSH "brute"'
+    assert (rule.gid, rule.sid, rule.rev, rule.priority) == (1, 1000, 3, 1)
+    assert rule.mitre_tactics == ("TA0006",) and rule.mitre_techniques == ("T1110",)
+    assert parse_rule(r'alert tcp any any -> any any (msg:"semi\;colon"; sid:5;)').msg == "semi;colon"
+    assert parse_rule("# just a comment") is None
+
+
+def test_index_keys_by_gid_and_sid_and_joins_continuations(tmp_path):
+    index = RuleIndex.parse(write_rules(tmp_path))
+    assert len(index) == 4
+    assert index.lookup(1000).classtype == "attempted-admin"
+    assert index.lookup(1000, gid=3).msg == "preprocessor"
+    assert index.lookup(1002).msg == "continued   rule"
+    disabled = index.lookup(1001)
+    assert not disabled.enabled and disabled.priority == 2
+
+    enriched = index.enrich({"sid": 1000, "signature": "x"})
+    assert enriched["priority"] == 1 and enriched["mitre_techniques"] == ["T1110"]
+    assert index.enrich({"sid": 42}) == {"sid": 42}
+
+
+def test_cache_is_reused_until_the_rules_change(tmp_path, monkeypatch):
+    path = write_rules(tmp_path)
+    RuleIndex.load(path)
+    assert os.path.exists(default_cache_path(path))
+
+    parsed = []
+    original = RuleIndex.parse.__func__
+    monkeypatch.setattr(RuleIndex, "parse", classmethod(lambda cls, p: parsed.append(p) or original(cls, p)))
+    assert len(RuleIndex.load(path)) == 4
+    # Touched without a content change: the content hash keeps the cache valid
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+    assert len(RuleIndex.load(path)) == 4
+    assert parsed == []
+
+    write_rules(tmp_path, RULES + 'alert tcp any any -> any any (msg:"new"; sid:2000;)\n')
+    assert RuleIndex.load(path).lookup(2000).msg == "new"
+    assert parsed == [path]
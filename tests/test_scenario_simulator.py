@@ -0,0 +1,110 @@
+import asyncio
+import random
+import threading
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+from gaius_core import GaiusGeneral
+from scenario_simulator import TERRAIN_FLAGS, run_shard
+
+CONTEXT = {
+    "friendly_forces": {"strength": 80, "mobility": 60, "supplies": 50},
+    "enemy_forces": {"strength": 100, "mobility": 55, "supplies": 52},
+    "enemy_unity": 0.85,
+    "terrain": {"monitoring_points": {"ids_coverage": True}, "data_routes": {"bottlenecks": ["core-1"]},
+                "failover_systems": {"backup_sites": 2, "backup_power": True}},
+    "behavior": {"beaconing": [{"src": "10.0.0.5"}]}
+}
+
+
+def test_outcome_classes_agree_with_the_assessment_per_scenario():
+    gaius = GaiusGeneral()
+    spec = gaius.simulator.build_spec(CONTEXT, spread=0.3, flip_probability=0.2)
+    count, seed = 2000, 42
+    counts = run_shard(spec, count, seed)
+
+    # The same draws, assessed one scenario at a time
+    rng = random.Random(seed)
+    columns = []
+    for _, base, spread in spec.numeric:
+        columns.append([base * (1 - spread) + base * 2 * spread * rng.random() for _ in range(count)])
+    flips = [[rng.random() < probability for _ in range(count)] for _, _, probability in spec.flags]
+    expected = Counter()
+    for i in range(count):
+        terrain = {section: {} for section, _ in TERRAIN_FLAGS}
+        for j, (section, flag) in enumerate(TERRAIN_FLAGS):
+            terrain[section][flag] = spec.flags[j][1] ^ flips[j][i]
+        terrain["failover_systems"]["backup_sites"] = columns[7][i]
+        assessment = gaius._perform_base_assessment({
+            "friendly_forces": {"strength": columns[0][i], "mobility": columns[1][i], "supplies": columns[2][i]},
+            "enemy_forces": {"strength": columns[3][i], "mobility": columns[4][i], "supplies": columns[5][i]},
+            "enemy_unity": columns[6][i], "terrain": terrain, "behavior": CONTEXT["behavior"]
+        })
+        expected[(assessment["threat_level"], tuple(assessment["recommended_principles"]))] += 1
+
+    simulated = Counter()
+    for key, scenarios in counts["outcomes"].items():
+        outcome = gaius.simulator._evaluate(key, CONTEXT["behavior"])
+        simulated[(outcome.threat_level, outcome.principles)] += scenarios
+    assert simulated == expected
+
+
+def test_zero_spread_reproduces_the_baseline_with_fractional_backup_sites():
+    gaius = GaiusGeneral()
+    context = {**CONTEXT, "terrain": {"failover_systems": {"backup_sites": 1.5}}}
+    result = asyncio.run(gaius.simulator.simulate(context, scenarios=500, spread=0.0, flip_probability=0.0, seed=1))
+    assert result["principles"]["unchanged"] == 1.0
+    assert result["defense_strength"]["median"] == result["baseline"]["defense_strength"]
+
+
+def test_simulation_leaves_the_strength_cache_alone():
+    gaius = GaiusGeneral()
+    cached = len(gaius.strength_cache)
+    asyncio.run(gaius.simulator.simulate(CONTEXT, scenarios=2000, seed=1))
+    assert len(gaius.strength_cache) == cached
+
+
+class CountingPool(ThreadPoolExecutor):
+    """Records the most shards a run had submitted and unfinished at once"""
+    def __init__(self, workers: int):
+        super().__init__(max_workers=workers)
+        self.outstanding = self.most_outstanding = 0
+        self.lock = threading.Lock()
+
+    def submit(self, fn, *args):
+        with self.lock:
+            self.outstanding += 1
+            self.most_outstanding = max(self.most_outstanding, self.outstanding)
+        future = super().submit(fn, *args)
+        future.add_done_callback(self._finished)
+        return future
+
+    def _finished(self, future):
+        with self.lock:
+            self.outstanding -= 1
+
+
+def test_pooled_runs_keep_one_shard_per_worker_in_flight():
+    gaius = GaiusGeneral()
+    gaius.shared.scenario_workers = 2
+    simulator = gaius.simulator
+    simulator.shard_size, simulator.pool_threshold = 5000, 10000
+    spec = simulator.build_spec(CONTEXT)
+    with CountingPool(2) as pool:
+        gaius.shared.scenario_pool = lambda: pool
+        counts = simulator.run(spec, 60000, seed=7)
+        assert counts["scenarios"] == 60000
+        assert pool.most_outstanding <= 2
+
+        truncated = simulator.run(spec, 1_000_000, seed=7, budget=0.2)
+        assert 0 < truncated["scenarios"] < 1_000_000
+    assert simulator.counters["pooled"] == 2
+
+
+def test_strategy_route_rejects_malformed_bodies():
+    from fastapi.testclient import TestClient
+    from web_interface import GaiusDashboard
+
+    client = TestClient(GaiusDashboard().app)
+    assert client.post("/strategy", content=b"{not json", headers={"content-type": "application/json"}).status_code == 400
+    assert client.post("/strategy", json=[1, 2]).status_code == 400
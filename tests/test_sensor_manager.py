@@ -0,0 +1,98 @@
+import asyncio
+import json
+import time
+
+from fastapi.testclient import TestClient
+
+from gaius_core import GaiusGeneral
+from security_tools import SecurityToolsInterface
+from sensor_manager import SensorConfig
+
+STATS = json.dumps({"event_type": "stats", "stats": {"capture": {"kernel_packets": 100, "kernel_drops": 5}}})
+
+
+def slow_reads(manager, delay: float = 0.2):
+    """Make every tail read take ``delay`` seconds on its worker thread"""
+    read_chunk = manager._read_chunk
+
+    def slow(feed):
+        time.sleep(delay)
+        return read_chunk(feed)
+    manager._read_chunk = slow
+
+
+def test_removing_a_sensor_mid_read_forgets_it_everywhere(tmp_path):
+    log = tmp_path / "eve.json"
+    log.write_text(STATS + "\n")
+
+    async def scenario():
+        tools = SecurityToolsInterface(GaiusGeneral())
+        manager = tools.sensor_manager
+        slow_reads(manager)
+        await manager.add(SensorConfig("dmz-1", "suricata", str(log), from_start=True))
+        await manager.start()
+        await asyncio.sleep(0.05)  # the first read is now in flight
+        assert await manager.remove("dmz-1")
+        await asyncio.sleep(0.3)
+        await manager.stop()
+        return tools
+
+    tools = asyncio.run(scenario())
+    assert "dmz-1" not in tools.sensor_telemetry.sensors
+    assert "dmz-1" not in tools.capabilities.sensors
+    assert "dmz-1" not in tools.ids_config["sensors"]
+
+
+def test_reconfiguring_a_sensor_resumes_after_its_in_flight_read(tmp_path):
+    log = tmp_path / "eve.json"
+    log.write_text(STATS + "\n")
+
+    async def scenario():
+        tools = SecurityToolsInterface(GaiusGeneral())
+        manager = tools.sensor_manager
+        slow_reads(manager)
+        await manager.add(SensorConfig("dmz-1", "suricata", str(log), from_start=True))
+        await manager.start()
+        await asyncio.sleep(0.05)
+        assert await manager.add(SensorConfig("dmz-1", "suricata", str(log), max_eps=100, from_start=True))
+        position = manager.sensors["dmz-1"].tail.position
+        await manager.stop()
+        return position
+
+    assert asyncio.run(scenario())[1] == log.stat().st_size
+
+
+def test_add_sensor_rejects_a_non_object_body():
+    from web_interface import GaiusDashboard
+    client = TestClient(GaiusDashboard().app)
+    response = client.post("/sensors", json=["dmz-2", "suricata"])
+    assert response.status_code == 400
+
+
+NOTICE_LOG = "\n".join([
+    "#separator \\x09",
+    "#fields\tts\tid.orig_h\tid.orig_p\tid.resp_h\tid.resp_p\tproto\tnote\tmsg",
+    "1700000000.0\t10.0.0.1\t40000\t10.0.0.2\t22\ttcp\tSSH::Password_Guessing\tguessing",
+    "1700000001.0\t10.0.0.1\tabc\t10.0.0.2\t22\ttcp\tSSH::Password_Guessing\tbad port",
+    "{\"ts\": 1700000002.0, \"note\": broken json",
+    "garbled\t10.0.0.3\t1\t10.0.0.2\t80\ttcp\tHTTP::SQL_Injection\tbad ts",
+    "-\t10.0.0.3\t1\t10.0.0.2\t80\ttcp\tHTTP::SQL_Injection\tno ts",
+    "1700000003.0\t10.0.0.4\t5555\t10.0.0.2\t443\ttcp\tScan::Port_Scan\tscan",
+]) + "\n"
+
+
+def test_malformed_notice_rows_are_rejected_one_by_one(tmp_path):
+    from sensor_manager import SensorFeed, zeek_notice_events
+
+    errors = []
+    events = list(zeek_notice_events(NOTICE_LOG.splitlines(), "core", lambda line, error: errors.append(line)))
+    assert [event["src_ip"] for event in events] == ["10.0.0.1", "10.0.0.4"]
+    assert len(errors) == 4
+
+    log = tmp_path / "notice.log"
+    log.write_text(NOTICE_LOG)
+    tools = SecurityToolsInterface(GaiusGeneral())
+    feed = SensorFeed(SensorConfig("core", "zeek", str(log), log="notice", from_start=True), 8)
+    chunk = tools.sensor_manager._read_chunk(feed)
+    assert len(chunk.alerts) == 2
+    assert chunk.parse_errors == 4
@@ -0,0 +1,31 @@
+import json
+from enum import Enum, IntEnum
+
+import serialization
+from serialization import dumps_json
+
+
+class Level(Enum):
+    HIGH = 3
+
+
+class Priority(IntEnum):
+    URGENT = 1
+
+
+class Record:
+    def to_dict(self):
+        return {"level": Level.HIGH}
+
+
+PAYLOAD = {"level": Level.HIGH, "priority": Priority.URGENT, "nested": [(Level.HIGH,)], "record": Record()}
+EXPECTED = {"level": "high", "priority": "urgent", "nested": [["high"]], "record": {"level": "high"}}
+
+
+def test_enums_encode_as_names_with_orjson():
+    assert json.loads(dumps_json(PAYLOAD)) == EXPECTED
+
+
+def test_enums_encode_as_names_with_stdlib_json(monkeypatch):
+    monkeypatch.setattr(serialization, "orjson", None)
+    assert json.loads(dumps_json(PAYLOAD)) == EXPECTED
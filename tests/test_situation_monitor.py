@@ -0,0 +1,61 @@
+import asyncio
+
+from gaius_core import GaiusGeneral
+
+FRIENDLY = {"strength": 100, "mobility": 50, "supplies": 50}
+ENEMY = {"strength": 100, "mobility": 50, "supplies": 50}
+
+
+def monitor():
+    situation = GaiusGeneral().situation
+    situation.update(friendly_forces=FRIENDLY, enemy_forces=ENEMY)
+    situation.current
+    return situation
+
+
+def test_small_force_moves_are_ignored():
+    situation = monitor()
+    situation.update(friendly_forces={**FRIENDLY, "mobility": 52})
+    assert situation.counters["ignored"] == 1
+    assert situation.snapshot()["pending"] == []
+
+
+def test_large_moves_and_band_crossings_trigger_a_recompute():
+    situation = monitor()
+    situation.update(friendly_forces={**FRIENDLY, "supplies": 60})
+    assert situation.snapshot()["pending"] == ["friendly_forces"]
+    situation.current
+
+    # 100/83 and 100/84 straddle the 1.2 band edge although strength moves by one point
+    situation.update(enemy_forces={**ENEMY, "strength": 83})
+    situation.current
+    situation.update(enemy_forces={**ENEMY, "strength": 84})
+    assert situation.snapshot()["pending"] == ["enemy_forces"]
+
+
+def test_behavior_counts_alone_are_not_relevant():
+    situation = monitor()
+    situation.update(behavior={"beaconing": 1, "lateral_movement": 0, "sectors": {"DMZ": 1}})
+    situation.current
+    situation.update(behavior={"beaconing": 3, "lateral_movement": 0, "sectors": {"DMZ": 3}})
+    assert situation.snapshot()["pending"] == []
+
+
+def test_updates_in_one_loop_iteration_are_coalesced():
+    async def scenario():
+        situation = monitor()
+        events = []
+
+        async def listener(event):
+            events.append(event)
+        situation.subscribe(listener)
+        recomputes = situation.counters["recomputes"]
+        situation.update(friendly_forces={**FRIENDLY, "strength": 40})
+        situation.update(enemy_forces={**ENEMY, "strength": 130})
+        situation.update(terrain={"monitoring_points": {"ids_coverage": True}})
+        await asyncio.sleep(0.01)
+        assert situation.counters["recomputes"] == recomputes + 1
+        assert len(events) == 1
+        assert events[0]["triggers"] == ["enemy_forces", "friendly_forces", "terrain"]
+        assert events[0]["threat_level"].name == "CRITICAL"
+    asyncio.run(scenario())
@@ -0,0 +1,41 @@
+import asyncio
+
+from gaius_core import STRATEGIC_PRINCIPLES
+from shared_resources import SharedResources
+from state_snapshot import read_snapshot, write_snapshot
+from tenancy import Tenant
+
+
+def busy_tenant(directory) -> Tenant:
+    tenant = Tenant("acme", SharedResources(STRATEGIC_PRINCIPLES), snapshot_dir=str(directory))
+    tools = tenant.security_tools
+    tools.alert_counters.total = 7
+    tools.capabilities.record_detected(3, ["10.0.0.1"])
+    tools.sensor_telemetry.record_events("dmz-1", 5)
+    return tenant
+
+
+def test_snapshot_round_trip(tmp_path):
+    asyncio.run(busy_tenant(tmp_path).snapshotter.save())
+    restored = Tenant("acme", SharedResources(STRATEGIC_PRINCIPLES), snapshot_dir=str(tmp_path))
+    assert asyncio.run(restored.snapshotter.restore())
+    tools = restored.security_tools
+    assert tools.alert_counters.total == 7
+    assert tools.capabilities.detected.total() == 3
+    assert "dmz-1" in tools.ids_config["sensors"]
+
+
+def test_a_snapshot_that_fails_partway_leaves_the_tenant_cold(tmp_path):
+    path = asyncio.run(busy_tenant(tmp_path).snapshotter.save())
+    state = read_snapshot(path)
+    state["behavior"] = {"epoch": 0, "counters": {}}  # applied after counters, windows and telemetry
+    write_snapshot(path, state)
+
+    cold = Tenant("acme", SharedResources(STRATEGIC_PRINCIPLES), snapshot_dir=str(tmp_path))
+    assert asyncio.run(cold.snapshotter.restore()) is False
+    assert cold.snapshotter.counters["unreadable"] == 1
+    tools = cold.security_tools
+    assert tools.alert_counters.total == 0
+    assert tools.capabilities.detected.total() == 0
+    assert tools.sensor_telemetry.sensors == {}
+    assert "dmz-1" not in tools.ids_config["sensors"]
@@ -0,0 +1,36 @@
+from ioc_store import IOCMatch
+from telemetry import RollingCounts
+
+
+def test_rolling_counts_accumulate_and_expire():
+    counts = RollingCounts(window=30.0, bucket=10.0, clock=lambda: 0.0)
+    counts.add({"DMZ": {"External": 2, "Internal": 0}}, now=0.0)
+    counts.add({"DMZ": {"External": 1}, "Core": {"Internal": 4}}, now=5.0)
+    counts.add({"DMZ": {"Internal": 3}}, now=12.0)
+    assert counts.totals(now=12.0) == {"DMZ": {"External": 3, "Internal": 3}, "Core": {"Internal": 4}}
+    # The first bucket ages out of the 30s window
+    assert counts.totals(now=31.0) == {"DMZ": {"Internal": 3}}
+    assert counts.totals(now=60.0) == {}
+
+
+def test_rolling_counts_survive_export_and_restore():
+    counts = RollingCounts(window=30.0, bucket=10.0)
+    counts.add({"DMZ": {"External": 2}}, now=100.0)
+    counts.add({"DMZ": {"External": 1}}, now=115.0)
+    state = counts.export_state(now=115.0)
+
+    restored = RollingCounts(window=30.0, bucket=10.0)
+    restored.restore_state(state, elapsed=20.0, now=7.0)
+    assert restored.totals(now=7.0) == {"DMZ": {"External": 1}}
+
+
+def test_ioc_matches_sum_across_batches():
+    window = RollingCounts(window=300.0, bucket=10.0)
+    window.add(IOCMatch(100, 5, {"high": 5}, [("10.0.0.1", 5)]).to_counts(), now=0.0)
+    window.add(IOCMatch(50, 2, {"low": 2}, [("10.0.0.2", 2)]).to_counts(), now=1.0)
+    window.add(IOCMatch(10, 0, {}, []).to_counts(), now=2.0)
+    match = IOCMatch.from_counts(window.totals(now=2.0))
+    assert (match.alerts, match.matched_alerts) == (160, 7)
+    assert match.severity_counts == {"high": 5, "low": 2}
+    assert match.max_severity == "high"
+    assert match.indicators == [("10.0.0.1", 5), ("10.0.0.2", 2)]
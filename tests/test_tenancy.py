@@ -0,0 +1,61 @@
+import asyncio
+
+from fastapi.testclient import TestClient
+
+from gaius_core import GaiusGeneral, STRATEGIC_PRINCIPLES
+from history_store import tenant_history_path
+from llm_resilience import BreakerState
+from shared_resources import DEFAULT_TENANT, SharedResources
+
+
+def test_tenant_history_paths():
+    assert tenant_history_path("/var/gaius/history.db", DEFAULT_TENANT) == "/var/gaius/history.db"
+    assert tenant_history_path("/var/gaius/history.db", "finance") == "/var/gaius/history.finance.db"
+
+
+def test_waiting_on_tenant_llm_slots_does_not_trip_the_shared_breaker():
+    async def scenario():
+        shared = SharedResources(STRATEGIC_PRINCIPLES)
+        shared.llm_queue_wait = 0.05
+        busy, quiet = GaiusGeneral(shared, "busy"), GaiusGeneral(shared, "quiet")
+        for _ in range(busy.quotas.max_concurrent_llm):
+            await busy._llm_slots.acquire()
+
+        answer = await busy._generate_enhanced_response({"chat_message": "status report"})
+        assert answer
+        assert busy.llm.counters["queue_timeouts"] == 1
+        assert quiet.llm.counters["queue_timeouts"] == 0
+        assert shared.llm_breaker.state is BreakerState.CLOSED
+        assert shared.llm_batcher.counters["submitted"] == 0
+    asyncio.run(scenario())
+
+
+def test_routes_reject_requests_over_the_tenant_quota():
+    from web_interface import GaiusDashboard
+    dashboard = GaiusDashboard()
+    tenant = dashboard.tenants.get(None)
+    tenant.quotas = tenant.quotas._replace(max_queued_requests=0)
+
+    async def fill():
+        for _ in range(tenant.quotas.max_concurrent_requests):
+            await tenant._slots.acquire()
+    asyncio.run(fill())
+
+    client = TestClient(dashboard.app)
+    for method, path in [("get", "/sensors"), ("get", "/behavior"), ("get", "/flows"),
+                         ("post", "/behavior/conn"), ("post", "/action/a1"), ("get", "/checkpoints"),
+                         ("get", "/diagnostics"), ("get", "/history/assessments"), ("get", "/history/threats"),
+                         ("get", "/history/chat"), ("get", "/action/a1")]:
+        assert getattr(client, method)(path).status_code == 429, path
+    for _ in range(tenant.quotas.max_concurrent_requests):
+        tenant._slots.release()
+    assert client.get("/sensors").status_code == 200
+
+
+def test_history_queries_are_bounded():
+    from web_interface import GaiusDashboard
+    client = TestClient(GaiusDashboard().app)
+    assert client.get("/history/threats", params={"days": 1e10}).status_code == 422
+    assert client.get("/history/chat", params={"limit": 10**7}).status_code == 422
+    assert client.get("/history/assessments", params={"days": 0}).status_code == 422
+    assert client.get("/history/threats", params={"days": 30, "limit": 10}).status_code == 200
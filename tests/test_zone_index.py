@@ -0,0 +1,91 @@
+from array import array
+
+from alert_batch import AlertBatchBuilder, pack_ip
+from zone_index import DEFAULT_SECTOR, NO_ZONE, ZoneIndex
+
+
+def build():
+    return ZoneIndex.build([
+        {"name": "corp", "cidrs": ["10.0.0.0/8"], "sector": "Internal", "criticality": 2},
+        {"name": "dmz", "cidrs": ["10.1.0.0/16", "192.168.1.0/24"], "sector": "Perimeter", "kind": "zone"},
+        {"name": "db", "cidrs": ["10.1.2.0/24"], "sector": "Data", "kind": "asset_group", "criticality": 5},
+        {"name": "jump", "cidrs": ["10.1.2.7/32"], "sector": "Admin"},
+        {"name": "v6", "cidrs": ["2001:db8::/32"], "sector": "Cloud"},
+        {"name": "v6-prod", "cidrs": ["2001:db8:1::/48"]},
+    ])
+
+
+def name(index, address):
+    zone = index.lookup(address)
+    return zone.name if zone else None
+
+
+def test_longest_prefix_wins_across_nested_prefixes():
+    index = build()
+    assert name(index, "10.200.0.1") == "corp"
+    assert name(index, "10.1.9.9") == "dmz"
+    assert name(index, "10.1.2.6") == "db"
+    assert name(index, "10.1.2.7") == "jump"
+    # Back out of each nested prefix to the enclosing one
+    assert name(index, "10.1.2.8") == "db"
+    assert name(index, "10.1.3.0") == "dmz"
+    assert name(index, "10.2.0.0") == "corp"
+    assert name(index, "11.0.0.0") is None
+    assert name(index, "9.255.255.255") is None
+    assert name(index, "192.168.1.255") == "dmz"
+    assert index.lookup("10.1.2.1").criticality == 5
+    assert index.lookup("2001:db8:2::1").sector == "Cloud"
+    assert index.lookup("2001:db8:1::1").sector == DEFAULT_SECTOR
+
+
+def test_duplicate_prefix_goes_to_the_later_entry():
+    index = ZoneIndex.build([
+        {"name": "first", "cidrs": ["172.16.0.0/12"]},
+        {"name": "second", "cidrs": ["172.16.0.0/12", "172.16.5.0/24"]},
+        {"name": "third", "cidrs": ["172.16.5.0/24"]},
+    ])
+    assert name(index, "172.20.0.1") == "second"
+    assert name(index, "172.16.5.1") == "third"
+    assert name(index, "172.16.6.1") == "second"
+
+
+def test_ipv6_and_ipv4_mapped_addresses():
+    index = build()
+    assert name(index, "2001:db8:1:ffff::1") == "v6-prod"
+    assert name(index, "2001:db8:ffff::1") == "v6"
+    assert name(index, "2001:db9::1") is None
+    # IPv4 is stored IPv4-mapped, so the mapped spelling lands in the same zone
+    assert name(index, "::ffff:10.1.2.7") == "jump"
+    assert name(index, "::10.1.2.7") is None
+    mapped = ZoneIndex.build([{"name": "mapped", "cidrs": ["::ffff:192.0.2.0/120"]}])
+    assert name(mapped, "192.0.2.9") == "mapped"
+    assert name(mapped, "192.0.3.9") is None
+
+
+def test_lookup_columns_matches_single_lookups():
+    index = build()
+    addresses = ["10.1.2.7", "10.1.2.7", "8.8.8.8", "2001:db8:1::5", "10.0.0.1", ""]
+    packed = [pack_ip(address) for address in addresses]
+    zone_ids = index.lookup_columns(array("Q", [hi for hi, _ in packed]), array("Q", [lo for _, lo in packed]))
+    expected = [index.lookup_int((hi << 64) | lo) for hi, lo in packed]
+    assert list(zone_ids) == expected
+    assert [index.zones[z].name if z != NO_ZONE else None for z in zone_ids] == \
+        ["jump", "jump", None, "v6-prod", "corp", None]
+    empty = ZoneIndex.build([])
+    assert list(empty.lookup_columns(array("Q", [1, 2]), array("Q", [3, 4]))) == [NO_ZONE, NO_ZONE]
+
+
+def test_analyze_batch_prefers_destination_and_splits_origin():
+    index = build()
+    builder = AlertBatchBuilder()
+    builder.append(1.0, "8.8.8.8", "10.1.2.5")        # external -> Data
+    builder.append(2.0, "10.200.0.1", "8.8.4.4")      # internal source only -> Internal
+    builder.append(3.0, "10.200.0.1", "10.1.2.5")     # internal -> Data
+    builder.append(4.0, "8.8.8.8", "1.1.1.1")         # unzoned
+    zone_ids, activity = index.analyze_batch(builder.build())
+    assert [index.zones[z].name if z != NO_ZONE else None for z in zone_ids] == ["db", "corp", "db", None]
+    assert activity == {
+        "Data": {"External": 1, "Internal": 1},
+        "Internal": {"External": 0, "Internal": 1},
+        DEFAULT_SECTOR: {"External": 1, "Internal": 0},
+    }